@@ -293,3 +293,24 @@ EM_CONFIG = EngineConfig(
 #                   --update-env-vars STRICT_HALLUCINATION_BLOCK=true`
 # Rollback en 30s : `--update-env-vars STRICT_HALLUCINATION_BLOCK=false`
 STRICT_HALLUCINATION_BLOCK_ENABLED: bool = _env_bool("STRICT_HALLUCINATION_BLOCK", False)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Answer cache chatbot (services.gemini_cache.AnswerCache, default ON)
+# ═══════════════════════════════════════════════════════════════════════
+#
+# Questions identiques (message normalisé + phase + langue + contexte
+# d'enrichissement) rejouées depuis le cache au lieu d'un appel Gemini.
+# Rollback : `--update-env-vars CHAT_ANSWER_CACHE=false`
+CHAT_ANSWER_CACHE_ENABLED: bool = _env_bool("CHAT_ANSWER_CACHE", True)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Text-to-SQL local (services.draw_sql, default ON)
+# ═══════════════════════════════════════════════════════════════════════
+#
+# SQL validé dont la forme est simple (comptages, fréquences, première /
+# dernière sortie, derniers tirages) évalué sur le draw store en mémoire au
+# lieu de Cloud SQL. Store non chargé ou forme non reconnue → MySQL.
+# Rollback : `--update-env-vars CHAT_SQL_LOCAL=false`
+CHAT_SQL_LOCAL_ENABLED: bool = _env_bool("CHAT_SQL_LOCAL", True)
@@ -31,7 +31,7 @@ import asyncio
 import os
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Optional
 from contextlib import asynccontextmanager
 
 import aiomysql
@@ -350,18 +350,30 @@ async def get_latest_tirage() -> Optional[dict]:
         return result
 
 
-async def get_tirages_list(limit: int = 10, offset: int = 0) -> list:
+async def get_tirages_list(limit: int = 10, offset: int = 0, before: Optional[str] = None) -> list:
+    """Tirages DESC. `before` (keyset, "YYYY-MM-DD") : tirages strictement
+    antérieurs à cette date — page suivante = date du dernier tirage reçu,
+    coût constant quelle que soit la profondeur (contrairement à OFFSET)."""
     limit = min(max(1, limit), 100)
     offset = max(0, offset)
 
     async with get_connection() as conn:
         cur = await conn.cursor()
-        await cur.execute("""
-            SELECT *
-            FROM tirages
-            ORDER BY date_de_tirage DESC
-            LIMIT %s OFFSET %s
-        """, (limit, offset))
+        if before is not None:
+            await cur.execute("""
+                SELECT *
+                FROM tirages
+                WHERE date_de_tirage < %s
+                ORDER BY date_de_tirage DESC
+                LIMIT %s
+            """, (before, limit))
+        else:
+            await cur.execute("""
+                SELECT *
+                FROM tirages
+                ORDER BY date_de_tirage DESC
+                LIMIT %s OFFSET %s
+            """, (limit, offset))
 
         results = await cur.fetchall()
 
@@ -425,6 +437,41 @@ async def async_fetchall(sql: str, params=None) -> list[dict]:
     return await _execute_with_retry(_op)
 
 
+# Un stream garde sa connexion pendant tout le téléchargement du client le plus
+# lent : au plus _STREAM_MAX_CONCURRENT connexions du pool (max=10) y sont prises.
+_STREAM_MAX_CONCURRENT = int(os.getenv("DB_STREAM_MAX_CONCURRENT", "2"))
+_stream_slots = asyncio.Semaphore(_STREAM_MAX_CONCURRENT)
+
+
+def stream_slot_available() -> bool:
+    """True if a stream_rows() can start now (routes: 503 instead of queueing)."""
+    return not _stream_slots.locked()
+
+
+async def stream_rows(sql: str, params=None, batch_size: int = 500) -> AsyncIterator[dict]:
+    """Yield the rows of a SELECT as they arrive (server-side cursor, SSDictCursor).
+
+    Le jeu de résultats n'est pas bufferisé côté client : au plus `batch_size`
+    lignes en mémoire (exports / consommateurs bulk). La connexion reste prise
+    jusqu'à la fin de l'itération — consommer ou fermer (aclose) le générateur.
+    Au plus _STREAM_MAX_CONCURRENT streams simultanés : les suivants attendent
+    un slot, le reste du pool reste aux requêtes API.
+    Pas de retry : des lignes ont pu être émises avant l'erreur.
+    """
+    async with _stream_slots, get_connection() as conn:
+        cur = await conn.cursor(aiomysql.SSDictCursor)
+        try:
+            await cur.execute(sql, params)
+            while True:
+                rows = await cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+        finally:
+            await cur.close()
+
+
 # ============================================================================
 # F01 V122 — Query timeout helper (client-side, opt-in)
 # ============================================================================
@@ -11,12 +11,22 @@ import random
 import statistics
 from datetime import datetime, timedelta, timezone
 
+import numpy as np
+
 from config.engine import EngineConfig
 from config.i18n import _badges as _i18n_badges
 from services.decay_state import calculate_decay_multiplier, get_decay_state
+from services.draw_store import (
+    DrawSnapshot, _partial_sql, _version_tag, get_draw_snapshot, get_draw_store,
+)
+from services.score_cache import get_cached_scores, set_cached_scores
+from services.table_summary import TableSummary, get_table_summary
+from services.window_stats import WindowStats
 from services.penalization import get_unpopularity_multiplier
 from services.esi import validate_esi
 
+from . import sampler
+
 logger = logging.getLogger(__name__)
 
 
@@ -107,6 +117,9 @@ class HybrideEngine:
     # ── Reference date ────────────────────────────────────────────────
 
     async def get_reference_date(self, conn) -> datetime:
+        snap = get_draw_snapshot(self.cfg.game)
+        if snap is not None and len(snap):
+            return self._snapshot_reference_date(snap)
         try:
             cursor = await conn.cursor()
             await cursor.execute(
@@ -234,28 +247,9 @@ class HybrideEngine:
         # This is by design: global acts as a stabilizer, smoothing noise from
         # shorter windows. Weights sum to 1.0 per mode, which compensates for
         # the overlap. See also inline comment at window combination below.
-        now = await self.get_reference_date(conn)
-        date_princ = now - timedelta(days=self.cfg.fenetre_principale_annees * 365.25)
-        date_rec = now - timedelta(days=self.cfg.fenetre_recente_annees * 365.25)
-
-        scores_princ = await self.calculer_scores_fenetre(conn, date_princ)
-        scores_rec = await self.calculer_scores_fenetre(conn, date_rec)
-
-        poids = self.cfg.modes.get(mode, self.cfg.modes['balanced'])
-
-        if self.cfg.fenetre_globale and len(poids) == 3:
-            scores_glob = await self.calculer_scores_fenetre(conn, date_limite=None)
-            p_p, p_r, p_g = poids
-            return {
-                n: p_p * scores_princ[n] + p_r * scores_rec[n] + p_g * scores_glob[n]
-                for n in range(self.cfg.num_min, self.cfg.num_max + 1)
-            }
-
-        p_p, p_r = poids[0], poids[1]
-        return {
-            n: p_p * scores_princ[n] + p_r * scores_rec[n]
-            for n in range(self.cfg.num_min, self.cfg.num_max + 1)
-        }
+        # 1 scan for all windows (WindowStats) instead of 2 queries per window.
+        stats = await self.window_stats(conn, mode)
+        return self._scores_hybrides_from_stats(stats, mode, secondary=False)
 
     # ── Secondary scoring (chance / etoiles) ──────────────────────────
 
@@ -403,33 +397,147 @@ class HybrideEngine:
         }
 
     async def calculer_scores_hybrides_secondary(self, conn, mode: str = "balanced") -> dict[int, float]:
-        now = await self.get_reference_date(conn)
-        date_princ = now - timedelta(days=self.cfg.fenetre_principale_annees * 365.25)
-        date_rec = now - timedelta(days=self.cfg.fenetre_recente_annees * 365.25)
+        stats = await self.window_stats(conn, mode)
+        return self._scores_hybrides_from_stats(stats, mode, secondary=True)
 
-        scores_princ = await self.calculer_scores_fenetre_secondary(conn, date_princ)
-        scores_rec = await self.calculer_scores_fenetre_secondary(conn, date_rec)
+    # ── Single-pass window scoring (WindowStats) ──────────────────────
+    # Same formulas as the per-window methods above (calculer_frequences /
+    # calculer_retards / calculer_scores_fenetre + secondary variants), computed
+    # for every window at once from one scan of the history (services.window_stats):
+    # draw store snapshot if loaded, else ONE SQL query. Bit-identical: counts/lags
+    # are integers, divisions and combinations run on Python floats in the same order.
 
+    @staticmethod
+    def _snapshot_reference_date(snap: DrawSnapshot) -> datetime:
+        ref = snap.reference_date()
+        return datetime(ref.year, ref.month, ref.day, tzinfo=timezone.utc)
+
+    def _window_cutoffs(self, now: datetime, mode: str) -> list[datetime | None]:
+        """[principale, récente(, globale=None)] date limits for a mode."""
+        cutoffs = [
+            now - timedelta(days=self.cfg.fenetre_principale_annees * 365.25),
+            now - timedelta(days=self.cfg.fenetre_recente_annees * 365.25),
+        ]
         poids = self.cfg.modes.get(mode, self.cfg.modes['balanced'])
-
         if self.cfg.fenetre_globale and len(poids) == 3:
-            scores_glob = await self.calculer_scores_fenetre_secondary(conn, date_limite=None)
+            cutoffs.append(None)
+        return cutoffs
+
+    async def window_stats(self, conn, mode: str = "balanced") -> WindowStats:
+        """Counts + lags of all scoring windows of a mode (balls and secondary), one scan."""
+        snap = get_draw_snapshot(self.cfg.game)
+        if snap is not None and len(snap):
+            return WindowStats(snap, self._window_cutoffs(self._snapshot_reference_date(snap), mode), self.cfg)
+        cutoffs = self._window_cutoffs(await self.get_reference_date(conn), mode)
+        query, params = WindowStats.select_sql(self.cfg, cutoffs)
+        cursor = await conn.cursor()
+        await cursor.execute(query, params)
+        return WindowStats.from_rows(self.cfg, list(await cursor.fetchall()), cutoffs)
+
+    def _scores_fenetre_from_stats(
+        self, stats: WindowStats, window: int, secondary: bool,
+    ) -> dict[int, float]:
+        if secondary:
+            lo, hi = self.cfg.secondary_min, self.cfg.secondary_max
+            pf, pr = self.cfg.poids_frequence_secondary, self.cfg.poids_retard_secondary
+        else:
+            lo, hi = self.cfg.num_min, self.cfg.num_max
+            pf, pr = self.cfg.poids_frequence, self.cfg.poids_retard
+        numbers = range(lo, hi + 1)
+        nb = stats.size(window)
+
+        if nb == 0:
+            logger.warning(
+                "window scoring: 0 tirages for %s (date_limite=%s, secondary=%s) — uniform fallback",
+                self.cfg.table_name, stats.cutoffs[window], secondary,
+            )
+            freq = {n: 1.0 / len(numbers) for n in numbers}
+            retard = {n: 0 for n in numbers}
+        else:
+            counts = stats.counts(window, secondary).tolist()
+            lags = stats.lags(window, secondary).tolist()
+            freq = {n: counts[n] / nb for n in numbers}
+            max_r = max(lags[n] for n in numbers) or 1
+            retard = {n: lags[n] / max_r for n in numbers}
+
+        freq = self._minmax_normalize(freq)
+        retard = self._minmax_normalize(retard)
+        return {n: pf * freq[n] + pr * retard[n] for n in numbers}
+
+    def _scores_hybrides_from_stats(
+        self, stats: WindowStats, mode: str, secondary: bool,
+    ) -> dict[int, float]:
+        numbers = (range(self.cfg.secondary_min, self.cfg.secondary_max + 1) if secondary
+                   else range(self.cfg.num_min, self.cfg.num_max + 1))
+
+        scores_princ = self._scores_fenetre_from_stats(stats, 0, secondary)
+        scores_rec = self._scores_fenetre_from_stats(stats, 1, secondary)
+
+        poids = self.cfg.modes.get(mode, self.cfg.modes['balanced'])
+
+        if len(stats.cutoffs) == 3:
+            scores_glob = self._scores_fenetre_from_stats(stats, 2, secondary)
             p_p, p_r, p_g = poids
             return {
-                n: p_p * scores_princ.get(n, 0) + p_r * scores_rec.get(n, 0) + p_g * scores_glob.get(n, 0)
-                for n in range(self.cfg.secondary_min, self.cfg.secondary_max + 1)
+                n: p_p * scores_princ[n] + p_r * scores_rec[n] + p_g * scores_glob[n]
+                for n in numbers
             }
 
         p_p, p_r = poids[0], poids[1]
-        return {
-            n: p_p * scores_princ.get(n, 0) + p_r * scores_rec.get(n, 0)
-            for n in range(self.cfg.secondary_min, self.cfg.secondary_max + 1)
-        }
+        return {n: p_p * scores_princ[n] + p_r * scores_rec[n] for n in numbers}
+
+    # ── Draw-versioned score cache ────────────────────────────────────
+
+    async def _draw_version(self, conn) -> str | None:
+        """MAX(date_de_tirage) as ISO string — None if unknown (no caching then).
+
+        Same tag as the draw store snapshot: suffixed ``~partial`` while the
+        latest draw's secondary numbers are not imported yet.
+        """
+        snap = get_draw_snapshot(self.cfg.game)
+        if snap is not None and len(snap):
+            return snap.version
+        try:
+            cursor = await conn.cursor()
+            await cursor.execute(
+                f"SELECT MAX(date_de_tirage) as max_date, ({_partial_sql(self.cfg)}) AS partial "
+                f"FROM {self.cfg.table_name}"
+            )
+            row = await cursor.fetchone()
+            max_date = row['max_date'] if row else None
+            return _version_tag(str(max_date)[:10], bool(row.get('partial'))) if max_date else None
+        except Exception:
+            return None
+
+    async def scores_hybrides_cached(
+        self, conn, mode: str = "balanced", secondary: bool = False,
+    ) -> dict[int, float]:
+        """calculer_scores_hybrides(_secondary) memoized per (game, mode, draw, config).
+
+        Scores only change when a new draw lands → 1 computation per draw shared
+        by all requests and instances (services.score_cache, memory + Redis).
+        """
+        version = await self._draw_version(conn)
+        kind = "secondary" if secondary else "balls"
+        if version is not None:
+            cached = await get_cached_scores(self.cfg, kind, mode, version)
+            if cached is not None:
+                return cached
+        if secondary:
+            scores = await self.calculer_scores_hybrides_secondary(conn, mode=mode)
+        else:
+            scores = await self.calculer_scores_hybrides(conn, mode=mode)
+        if version is not None:
+            await set_cached_scores(self.cfg, kind, mode, version, scores)
+        return scores
 
     # ── Penalization ──────────────────────────────────────────────────
 
     async def get_recent_draws(self, conn, n: int | None = None) -> list[dict]:
         n = n or self.cfg.penalty_window
+        snap = get_draw_snapshot(self.cfg.game)
+        if snap is not None and len(snap):
+            return snap.recent_draws(n, self.cfg)
         cursor = await conn.cursor()
         cols = "date_de_tirage, boule_1, boule_2, boule_3, boule_4, boule_5"
         for col in self.cfg.secondary_columns:
@@ -797,6 +905,148 @@ class HybrideEngine:
             result.append(choice)
         return result
 
+    # ── Attempt sampling (retry loop) ──────────────────────────────────
+
+    def _sample_attempts_sequential(
+        self,
+        penalized: dict[int, float],
+        forced_nums: list[int],
+        hard_excluded: set[int],
+        exclusions: dict | None,
+        temperature: float,
+        noise_factor: float,
+        use_stratified: bool,
+        use_wildcard: bool,
+        nb_to_draw: int,
+    ) -> tuple[list[int], float]:
+        """Retry loop, one attempt at a time (reference path, wildcard cold slot)."""
+        forced_set = set(forced_nums)
+        normal_draw_count = (nb_to_draw - 1) if use_wildcard else nb_to_draw
+        meilleure_grille = None
+        meilleur_score = 0
+
+        for _ in range(self.cfg.max_tentatives):
+            # Step 4b: fresh noise per attempt (intra-session diversification)
+            noisy = self.apply_noise(penalized, noise_factor)
+            probas = self.normaliser_en_probabilites(noisy, temperature=temperature)
+
+            if use_stratified:
+                # V104: 1 number per zone
+                numeros = self._draw_stratified(probas, forced_set, hard_excluded, exclusions)
+            else:
+                # Legacy global draw (used when forced_nums or zones not configured)
+                disponibles = [n for n in range(self.cfg.num_min, self.cfg.num_max + 1)
+                               if n not in forced_set and n not in hard_excluded]
+                disponibles = self._apply_exclusions(disponibles, exclusions)
+                if len(disponibles) < nb_to_draw:
+                    disponibles = [n for n in range(self.cfg.num_min, self.cfg.num_max + 1)
+                                   if n not in forced_set]
+                p_list = [probas[n] for n in disponibles]
+
+                numeros = list(forced_nums)
+                drawn_set = set(forced_nums)
+                # Weighted sampling without replacement
+                for _ in range(normal_draw_count):
+                    num = random.choices(disponibles, weights=p_list, k=1)[0]
+                    numeros.append(num)
+                    drawn_set.add(num)
+                    idx = disponibles.index(num)
+                    disponibles.pop(idx)
+                    p_list.pop(idx)
+
+                # Step 7b: wildcard cold slot
+                if use_wildcard:
+                    excl_set = set(exclusions.get("exclude_nums", [])) if exclusions else set()
+                    wc = self._select_wildcard(noisy, drawn_set | hard_excluded | excl_set)
+                    if wc is not None and wc not in drawn_set:
+                        numeros.append(wc)
+                    else:
+                        if disponibles and p_list:
+                            num = random.choices(disponibles, weights=p_list, k=1)[0]
+                            numeros.append(num)
+                        elif disponibles:
+                            numeros.append(random.choice(disponibles))
+                        else:
+                            remaining = [n for n in range(self.cfg.num_min, self.cfg.num_max + 1)
+                                         if n not in drawn_set]
+                            if remaining:
+                                numeros.append(random.choice(remaining))
+
+            numeros = sorted(numeros)
+            conf = self.valider_contraintes(numeros)
+            # V107: ESI filter — reject over-regular or clustered grids
+            _esi_ok = validate_esi(
+                numeros, self.cfg.num_max,
+                self.cfg.esi_min, self.cfg.esi_max,
+            )
+            # Grid quality: conformity score, penalized if ESI fails
+            _effective_conf = conf if _esi_ok else conf * 0.5
+            if meilleure_grille is None or _effective_conf > meilleur_score:
+                meilleure_grille = numeros
+                meilleur_score = _effective_conf
+            if conf >= self.cfg.min_conformite and _esi_ok:
+                break
+        return meilleure_grille, meilleur_score
+
+    def _sample_attempts_batch(
+        self,
+        penalized: dict[int, float],
+        forced_nums: list[int],
+        hard_excluded: set[int],
+        exclusions: dict | None,
+        temperature: float,
+        noise_factor: float,
+        use_stratified: bool,
+        nb_to_draw: int,
+    ) -> tuple[list[int], float]:
+        """Draw cfg.max_tentatives grids as one matrix and keep the one the retry loop would.
+
+        Same law as the sequential loop (noise → temperature → weighted draw
+        without replacement / 1 per zone → conformity + ESI → first accepted or
+        best effective conformity). See engine/sampler.py.
+        """
+        lo = self.cfg.num_min
+        numbers = np.arange(lo, self.cfg.num_max + 1)
+        forced_set = set(forced_nums)
+        rows = self.cfg.max_tentatives
+        rng = sampler.make_rng()
+        scores = np.array([penalized.get(int(n), 0.0) for n in numbers], dtype=float)
+        weights = sampler.noisy_weights(rng, scores, rows, noise_factor, temperature)
+
+        if use_stratified:
+            columns = []
+            for z_lo, z_hi in self.cfg.zones:
+                pool = [n for n in range(z_lo, z_hi + 1)
+                        if n not in forced_set and n not in hard_excluded]
+                pool = self._apply_exclusions(pool, exclusions)
+                if not pool:
+                    pool = [n for n in range(z_lo, z_hi + 1)
+                            if n not in forced_set and n not in hard_excluded]
+                if not pool:
+                    pool = [n for n in range(z_lo, z_hi + 1) if n not in forced_set]
+                pool_idx = np.array(pool) - lo
+                pick = sampler.weighted_choice(rng, weights[:, pool_idx])
+                columns.append(pool_idx[pick] + lo)
+            drawn = np.stack(columns, axis=1)
+        else:
+            disponibles = [n for n in range(lo, self.cfg.num_max + 1)
+                           if n not in forced_set and n not in hard_excluded]
+            disponibles = self._apply_exclusions(disponibles, exclusions)
+            if len(disponibles) < nb_to_draw:
+                disponibles = [n for n in range(lo, self.cfg.num_max + 1) if n not in forced_set]
+            disp_idx = np.array(disponibles) - lo
+            pick = sampler.sample_without_replacement(rng, weights[:, disp_idx], nb_to_draw)
+            drawn = disp_idx[pick] + lo
+
+        if forced_nums:
+            drawn = np.hstack([np.tile(np.array(forced_nums), (rows, 1)), drawn])
+        grids = np.sort(drawn, axis=1)
+        conf = sampler.conformity_matrix(grids, self.cfg)
+        esi = sampler.esi_matrix(grids, self.cfg.num_max)
+        esi_ok = (esi >= self.cfg.esi_min) & (esi <= self.cfg.esi_max)
+        best, score = sampler.pick_attempt(conf, esi_ok, self.cfg.min_conformite)
+        return [int(n) for n in grids[best]], score
+
     # ── Grid generation ───────────────────────────────────────────────
 
     async def generer_grille(
@@ -871,72 +1121,20 @@ class HybrideEngine:
             and nb_to_draw >= 2
             and not use_stratified
         )
-        normal_draw_count = (nb_to_draw - 1) if use_wildcard else nb_to_draw
-
-        meilleure_grille = None
-        meilleur_score = 0
-
-        for _ in range(self.cfg.max_tentatives):
-            # Step 4b: fresh noise per attempt (intra-session diversification)
-            noisy = self.apply_noise(penalized, noise_factor)
-            probas = self.normaliser_en_probabilites(noisy, temperature=temperature)
-
-            if use_stratified:
-                # V104: 1 number per zone
-                numeros = self._draw_stratified(probas, forced_set, hard_excluded, exclusions)
-            else:
-                # Legacy global draw (used when forced_nums or zones not configured)
-                disponibles = [n for n in range(self.cfg.num_min, self.cfg.num_max + 1)
-                               if n not in forced_set and n not in hard_excluded]
-                disponibles = self._apply_exclusions(disponibles, exclusions)
-                if len(disponibles) < nb_to_draw:
-                    disponibles = [n for n in range(self.cfg.num_min, self.cfg.num_max + 1)
-                                   if n not in forced_set]
-                p_list = [probas[n] for n in disponibles]
 
-                numeros = list(forced_nums)
-                drawn_set = set(forced_nums)
-                # Weighted sampling without replacement
-                for _ in range(normal_draw_count):
-                    num = random.choices(disponibles, weights=p_list, k=1)[0]
-                    numeros.append(num)
-                    drawn_set.add(num)
-                    idx = disponibles.index(num)
-                    disponibles.pop(idx)
-                    p_list.pop(idx)
-
-                # Step 7b: wildcard cold slot
-                if use_wildcard:
-                    excl_set = set(exclusions.get("exclude_nums", [])) if exclusions else set()
-                    wc = self._select_wildcard(noisy, drawn_set | hard_excluded | excl_set)
-                    if wc is not None and wc not in drawn_set:
-                        numeros.append(wc)
-                    else:
-                        if disponibles and p_list:
-                            num = random.choices(disponibles, weights=p_list, k=1)[0]
-                            numeros.append(num)
-                        elif disponibles:
-                            numeros.append(random.choice(disponibles))
-                        else:
-                            remaining = [n for n in range(self.cfg.num_min, self.cfg.num_max + 1)
-                                         if n not in drawn_set]
-                            if remaining:
-                                numeros.append(random.choice(remaining))
-
-            numeros = sorted(numeros)
-            conf = self.valider_contraintes(numeros)
-            # V107: ESI filter — reject over-regular or clustered grids
-            _esi_ok = validate_esi(
-                numeros, self.cfg.num_max,
-                self.cfg.esi_min, self.cfg.esi_max,
+        if use_wildcard:
+            # Wildcard cold slot (forced_nums path): sequential loop — the cold pool
+            # depends on the numbers already drawn in each attempt.
+            meilleure_grille, meilleur_score = self._sample_attempts_sequential(
+                penalized, forced_nums, hard_excluded, exclusions,
+                temperature, noise_factor, use_stratified, use_wildcard, nb_to_draw,
+            )
+        else:
+            # Batch sampler: all attempts drawn at once (engine/sampler.py), same law.
+            meilleure_grille, meilleur_score = self._sample_attempts_batch(
+                penalized, forced_nums, hard_excluded, exclusions,
+                temperature, noise_factor, use_stratified, nb_to_draw,
             )
-            # Grid quality: conformity score, penalized if ESI fails
-            _effective_conf = conf if _esi_ok else conf * 0.5
-            if meilleure_grille is None or _effective_conf > meilleur_score:
-                meilleure_grille = numeros
-                meilleur_score = _effective_conf
-            if conf >= self.cfg.min_conformite and _esi_ok:
-                break
 
         numeros = meilleure_grille
         score_conformite = meilleur_score
@@ -1006,11 +1204,13 @@ class HybrideEngine:
 
     async def _check_degraded_windows(
         self, conn, nb_tirages: int, date_min, date_max,
+        summary: TableSummary | None = None,
     ) -> list[dict]:
         """Check if time windows have sufficient data (<50% of expected draws).
 
         Returns a list of degraded window descriptors (empty if all healthy).
         Uses the actual draws-per-year rate from DB to estimate expected counts.
+        With a TableSummary, window counts come from memory (no query).
         """
         if not date_min or not date_max or nb_tirages == 0:
             return []
@@ -1023,21 +1223,25 @@ class HybrideEngine:
             return []
 
         draws_per_year = nb_tirages / (span_days / 365.25)
-        ref = await self.get_reference_date(conn)
         degraded: list[dict] = []
-        cursor = await conn.cursor()
+        if summary is None:
+            ref = await self.get_reference_date(conn)
+            cursor = await conn.cursor()
 
         for name, years in [
             ("principale", self.cfg.fenetre_principale_annees),
             ("recente", self.cfg.fenetre_recente_annees),
         ]:
-            date_limit = ref - timedelta(days=years * 365.25)
-            await cursor.execute(
-                f"SELECT COUNT(*) as count FROM {self.cfg.table_name} "
-                f"WHERE date_de_tirage >= %s",
-                (date_limit.strftime("%Y-%m-%d"),),
-            )
-            actual = (await cursor.fetchone())["count"]
+            if summary is not None:
+                actual = summary.window_counts[name]
+            else:
+                date_limit = ref - timedelta(days=years * 365.25)
+                await cursor.execute(
+                    f"SELECT COUNT(*) as count FROM {self.cfg.table_name} "
+                    f"WHERE date_de_tirage >= %s",
+                    (date_limit.strftime("%Y-%m-%d"),),
+                )
+                actual = (await cursor.fetchone())["count"]
             expected = int(years * draws_per_year)
             if expected > 0 and actual < expected * 0.5:
                 degraded.append({
@@ -1077,6 +1281,7 @@ class HybrideEngine:
         persistent_brake_map_secondary: dict[int, float] | None = None,
         _get_connection=None,
         recent_draws: list[dict] | None = None,
+        decay_state_secondary: dict[int, int] | None = None,
     ) -> dict:
         if _get_connection is None:
             from .db import get_connection as _get_connection
@@ -1085,7 +1290,10 @@ class HybrideEngine:
             logger.debug("generate_grids: decay_enabled but no decay_state provided — skipping decay")
 
         async with _get_connection() as conn:
-            scores_hybrides = await self.calculer_scores_hybrides(conn, mode=mode)
+            # Draw store: throttled MAX(date) check, reload only on new draw.
+            # No-op when the store is not initialised (tests, tools) → SQL path.
+            await get_draw_store(self.cfg.game).ensure_fresh(conn)
+            scores_hybrides = await self.scores_hybrides_cached(conn, mode=mode)
             # recent_draws=None (prod / tous appelants actuels) → fetch DB inchangé.
             # recent_draws fourni (harness backtest, T-1 relatif) → utilisé tel quel
             # (évite le future-leak get_recent_draws absolu qui ignore date_max).
@@ -1093,8 +1301,10 @@ class HybrideEngine:
                 recent_draws = await self.get_recent_draws(conn)
 
             # V92: load secondary decay state (stars/chance) for rotation
-            decay_state_secondary = None
-            if self.cfg.decay_enabled and decay_state is not None:
+            # (skipped when the caller already read it — /generate GenerateSession)
+            if not self.cfg.decay_enabled or decay_state is None:
+                decay_state_secondary = None
+            elif decay_state_secondary is None:
                 try:
                     game_name = "euromillions" if self.cfg.game == "em" else "loto"
                     ntype = "star" if self.cfg.game == "em" else "chance"
@@ -1107,7 +1317,7 @@ class HybrideEngine:
             # calculer_scores_hybrides_secondary est une fonction pure SQL de (conn, mode),
             # sans RNG ni mutation → invariant entre les n grilles → bit-identique (audit B).
             # saturation V105 + penalties + sampling restent per-grille dans generer_secondary.
-            scores_secondary_base = await self.calculer_scores_hybrides_secondary(conn, mode=mode)
+            scores_secondary_base = await self.scores_hybrides_cached(conn, mode=mode, secondary=True)
 
             grilles = []
             # V105: Saturation Brake — accumulate selected numbers across batch
@@ -1138,18 +1348,24 @@ class HybrideEngine:
 
             grilles = sorted(grilles, key=lambda g: g['score'], reverse=True)
 
-            cursor = await conn.cursor()
-            await cursor.execute(f"SELECT COUNT(*) as count FROM {self.cfg.table_name}")
-            result = await cursor.fetchone()
-            nb_tirages = result['count'] if result else 0
+            # Table metadata: in-memory TableSummary (1 calcul / tirage) when the
+            # draw store is loaded, SQL otherwise.
+            summary = await get_table_summary(self.cfg, conn)
+            if summary is not None:
+                nb_tirages, date_min, date_max = summary.total, summary.date_min, summary.date_max
+            else:
+                cursor = await conn.cursor()
+                await cursor.execute(f"SELECT COUNT(*) as count FROM {self.cfg.table_name}")
+                result = await cursor.fetchone()
+                nb_tirages = result['count'] if result else 0
 
-            await cursor.execute(
-                f"SELECT MIN(date_de_tirage) as min_date, MAX(date_de_tirage) as max_date "
-                f"FROM {self.cfg.table_name}"
-            )
-            result = await cursor.fetchone()
-            date_min = result['min_date'] if result else None
-            date_max = result['max_date'] if result else None
+                await cursor.execute(
+                    f"SELECT MIN(date_de_tirage) as min_date, MAX(date_de_tirage) as max_date "
+                    f"FROM {self.cfg.table_name}"
+                )
+                result = await cursor.fetchone()
+                date_min = result['min_date'] if result else None
+                date_max = result['max_date'] if result else None
 
             # Real 3-window weights: principale/recente/globale — generated from config.
             weights = self.cfg.modes.get(mode, self.cfg.modes['balanced'])
@@ -1191,7 +1407,7 @@ class HybrideEngine:
                     'window': self.cfg.saturation_persistent_window,
                 },
                 'degraded_windows': await self._check_degraded_windows(
-                    conn, nb_tirages, date_min, date_max,
+                    conn, nb_tirages, date_min, date_max, summary=summary,
                 ),
             }
 
@@ -0,0 +1,127 @@
+"""
+Batch sampler NumPy pour HybrideEngine.generer_grille().
+
+Toutes les tentatives (cfg.max_tentatives) sont tirées d'un coup sous forme de
+matrice (tentatives × num_count) au lieu d'une boucle random.choices / list.pop :
+
+    - bruit gaussien par tentative  → même loi que HybrideEngine.apply_noise()
+    - température                   → même loi que normaliser_en_probabilites()
+    - tirage pondéré SANS remise    → CDF inverse vectorisée sur les lignes,
+      k étapes successives (même loi et même sensibilité aux poids que
+      random.choices + pop ; un simple Gumbel-top-k serait invariant à un
+      facteur commun intra-zone comme le decay au plancher).
+    - conformité + ESI vectorisés   → miroir de valider_contraintes() / validate_esi()
+    - sélection                     → même règle que la boucle (1ère tentative
+      acceptée, sinon meilleure conformité effective, 1ère occurrence).
+
+Le RNG NumPy est dérivé du module random (random.getrandbits) : random.seed()
+garde le contrôle de la reproductibilité (tests, backtests).
+"""
+
+import random
+
+import numpy as np
+
+from config.engine import EngineConfig
+
+
+def make_rng() -> np.random.Generator:
+    """NumPy Generator seeded from the stdlib `random` state (reproducible under random.seed)."""
+    return np.random.default_rng(random.getrandbits(64))
+
+
+def noisy_weights(
+    rng: np.random.Generator, scores: np.ndarray, n_rows: int,
+    noise_factor: float, temperature: float,
+) -> np.ndarray:
+    """Per-attempt sampling weights (n_rows × len(scores)).
+
+    Row i = normaliser_en_probabilites(apply_noise(scores), temperature) up to a
+    constant factor (irrelevant for sampling). All-zero rows → uniform, like the
+    `total == 0` fallback of normaliser_en_probabilites().
+    """
+    base = np.broadcast_to(scores, (n_rows, scores.size)).astype(float)
+    positives = scores[scores > 0]
+    if noise_factor > 0.0 and scores.size >= 2 and positives.size >= 2:
+        std = float(np.std(positives, ddof=1))
+        if std > 0:
+            sigma = noise_factor * std
+            base = np.maximum(0.0, base + rng.normal(0.0, sigma, size=base.shape))
+    t = max(temperature, 0.1)
+    positive = base > 0
+    weights = np.where(positive, np.power(np.where(positive, base, 1.0), 1.0 / t), 0.0)
+    empty = ~(weights > 0).any(axis=1)
+    if empty.any():
+        weights[empty] = 1.0
+    return weights
+
+
+def weighted_choice(rng: np.random.Generator, weights: np.ndarray) -> np.ndarray:
+    """One weighted index per row — inverse CDF, like random.choices(k=1).
+
+    Rows with no positive weight draw uniformly among columns >= 0
+    (negative = column already removed by sample_without_replacement).
+    """
+    positive = np.where(weights > 0, weights, 0.0)
+    empty = ~(positive > 0).any(axis=1)
+    if empty.any():
+        positive[empty] = (weights[empty] >= 0).astype(float)
+    weights = positive
+    cum = np.cumsum(weights, axis=1)
+    u = rng.random(len(weights))[:, None] * cum[:, -1:]
+    idx = (cum <= u).sum(axis=1)
+    return np.minimum(idx, weights.shape[1] - 1)
+
+
+def sample_without_replacement(rng: np.random.Generator, weights: np.ndarray, k: int) -> np.ndarray:
+    """k weighted indices per row without replacement (row order = draw order).
+
+    Same law as k successive random.choices() + pop(): each step draws by
+    inverse CDF among the remaining columns. Vectorized over rows.
+    """
+    remaining = np.array(weights, dtype=float)
+    rows = np.arange(len(remaining))
+    picks = np.empty((len(remaining), k), dtype=np.intp)
+    for j in range(k):
+        idx = weighted_choice(rng, remaining)
+        picks[:, j] = idx
+        remaining[rows, idx] = -1.0  # retiré (jamais re-tiré, même en fallback uniforme)
+    return picks
+
+
+def conformity_matrix(grids: np.ndarray, cfg: EngineConfig) -> np.ndarray:
+    """Vectorized HybrideEngine.valider_contraintes() on sorted grids (rows)."""
+    k = grids.shape[1]
+    nb_pairs = (grids % 2 == 0).sum(axis=1)
+    score = np.ones(len(grids))
+    score = np.where((nb_pairs == 1) | (nb_pairs == k - 1), score * 0.8, score)
+    nb_bas = (grids <= cfg.seuil_bas_haut).sum(axis=1)
+    score = np.where((nb_bas < 1) | (nb_bas > 4), score * 0.85, score)
+    somme = grids.sum(axis=1)
+    score = np.where((somme < cfg.somme_min) | (somme > cfg.somme_max), score * 0.7, score)
+    dispersion = grids[:, -1] - grids[:, 0]
+    score = np.where(dispersion < cfg.dispersion_min, score * 0.6, score)
+    suites = (np.diff(grids, axis=1) == 1).sum(axis=1)
+    score = np.where(suites > cfg.max_consecutifs, score * 0.75, score)
+    # Hard-reject: all-even or all-odd (F05 audit 01/04/2026)
+    return np.where((nb_pairs == 0) | (nb_pairs == k), 0.0, score)
+
+
+def esi_matrix(grids: np.ndarray, universe_size: int) -> np.ndarray:
+    """Vectorized services.esi.calculate_esi() on sorted grids (rows)."""
+    gaps = np.diff(grids, axis=1) - 1
+    wrap = grids[:, 0] - 1 + universe_size - grids[:, -1]
+    return (gaps ** 2).sum(axis=1) + wrap ** 2
+
+
+def pick_attempt(conf: np.ndarray, esi_ok: np.ndarray, min_conformite: float) -> tuple[int, float]:
+    """Index + effective score of the attempt the sequential retry loop would keep.
+
+    Loop semantics: stop at the first attempt with conf >= min_conformite and
+    ESI ok; keep the first strictly-best effective conformity seen so far.
+    """
+    effective = np.where(esi_ok, conf, conf * 0.5)
+    accepted = np.flatnonzero((conf >= min_conformite) & esi_ok)
+    stop = int(accepted[0]) if accepted.size else len(conf) - 1
+    best = int(np.argmax(effective[:stop + 1]))
+    return best, float(effective[best])
@@ -12,7 +12,10 @@ interpolation for table names is safe in this context.
 import logging
 from config.engine import EngineConfig, LOTO_CONFIG
 from .db import get_connection
-from services.cache import cache_get, cache_set
+from services.cache import DEFAULT_TTL, cached
+from services.draw_store import draw_version, get_draw_snapshot
+from services.number_stats import get_number_stats
+from services.window_stats import WindowStats
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +41,20 @@ async def analyze_number(number: int, cfg: EngineConfig = LOTO_CONFIG) -> dict:
     if not cfg.num_min <= number <= cfg.num_max:
         raise ValueError(f"Le numéro doit être entre {cfg.num_min} et {cfg.num_max}")
 
+    # Draw store chargé → ligne de NumberStats, aucune requête
+    index = get_number_stats(cfg.game)
+    if index is not None:
+        row = index.number(number)
+        return {
+            "number": number,
+            "total_appearances": row.appearances,
+            "first_appearance": row.first,
+            "last_appearance": row.last,
+            "current_gap": row.current_gap,
+            "appearance_dates": list(row.dates),
+            "total_draws": len(index)
+        }
+
     table = cfg.table_name
 
     async with get_connection() as conn:
@@ -90,7 +107,8 @@ async def analyze_number(number: int, cfg: EngineConfig = LOTO_CONFIG) -> dict:
 async def get_global_stats(cfg: EngineConfig = LOTO_CONFIG) -> dict:
     """
     Récupère les statistiques globales de la base de données.
-    Résultat mis en cache 1 h.
+    Résultat mis en cache jusqu'au tirage suivant (1 h si le draw store n'est
+    pas chargé).
 
     Args:
         cfg: Configuration du jeu (default: LOTO_CONFIG pour rétrocompatibilité)
@@ -102,11 +120,14 @@ async def get_global_stats(cfg: EngineConfig = LOTO_CONFIG) -> dict:
         - last_draw_date: date du dernier tirage
         - period_covered: période couverte (texte)
     """
-    cache_key = f"global_stats_{cfg.game}"
-    cached = await cache_get(cache_key)
-    if cached is not None:
-        return cached
+    return await cached(
+        f"global_stats_{cfg.game}", DEFAULT_TTL, lambda: _load_global_stats(cfg),
+        version=draw_version(cfg.game),
+    )
+
 
+async def _load_global_stats(cfg: EngineConfig) -> dict:
+    """Calcul SQL de get_global_stats (loader cached())."""
     table = cfg.table_name
 
     async with get_connection() as conn:
@@ -142,7 +163,6 @@ async def get_global_stats(cfg: EngineConfig = LOTO_CONFIG) -> dict:
         "last_draw_date": last_draw_date,
         "period_covered": period_covered
     }
-    await cache_set(cache_key, data)
     return data
 
 
@@ -164,6 +184,15 @@ async def get_top_flop_numbers(cfg: EngineConfig = LOTO_CONFIG) -> dict:
     table = cfg.table_name
     num_range = range(cfg.num_min, cfg.num_max + 1)
 
+    snap = get_draw_snapshot(cfg.game)
+    if snap is not None and len(snap):
+        # Draw store chargé : 1 passage sur le snapshot, aucune requête
+        stats = WindowStats(snap, [None], cfg)
+        counts = stats.counts(0).tolist()
+        total_draws = stats.size(0)
+        number_counts = [{"number": num, "count": counts[num]} for num in num_range]
+        return _top_flop(total_draws, number_counts)
+
     async with get_connection() as conn:
         cursor = await conn.cursor()
 
@@ -187,6 +216,10 @@ async def get_top_flop_numbers(cfg: EngineConfig = LOTO_CONFIG) -> dict:
         freq_map = {row['num']: row['freq'] for row in await cursor.fetchall()}
         number_counts = [{"number": num, "count": freq_map.get(num, 0)} for num in num_range]
 
+    return _top_flop(total_draws, number_counts)
+
+
+def _top_flop(total_draws: int, number_counts: list[dict]) -> dict:
     # Trier pour TOP : count DESC, puis number ASC
     top_sorted = sorted(number_counts, key=lambda x: (-x["count"], x["number"]))
 
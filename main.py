@@ -174,6 +174,14 @@ async def lifespan(app):
     await db_cloudsql.init_pool()
     await db_cloudsql.init_pool_readonly()
     await init_cache()
+    # L1 cache invalidations broadcast by the other instances (Redis pub/sub)
+    from services.cache import run_invalidation_listener
+    asyncio.create_task(_supervised_loop(run_invalidation_listener, "cache_invalidation_listener"))
+    # In-process draw store (NumPy) — engine scoring without per-request table scans
+    from services.draw_store import init_draw_stores, run_draw_watcher
+    await init_draw_stores()
+    # Draw-import watcher: new draw → snapshot reload → draw-versioned cache entries recomputed
+    asyncio.create_task(_supervised_loop(run_draw_watcher, "draw_watcher"))
     await _ensure_monitoring_tables()
     # V126 4/5: build DB schema whitelist (DESCRIBE) — non-blocking fallback static
     try:
@@ -209,6 +217,9 @@ async def lifespan(app):
             except Exception as e:
                 logger.warning("[AI_BOTS] flush failed (retry next cycle): %s", e)
     asyncio.create_task(_supervised_loop(_periodic_ai_counter_flush, "periodic_ai_counter_flush"))
+    # /generate canonical grids: write-behind queue, multi-row INSERT every 1s
+    from services.selection_writer import run_selection_writer, flush_selection_writes
+    asyncio.create_task(_supervised_loop(run_selection_writer, "selection_writer"))
     # V97: IndexNow ping post-deploy (fire-and-forget, 30s delay, prod only)
     if os.getenv("K_SERVICE") and os.getenv("ENVIRONMENT", "").lower() != "staging":
         async def _indexnow_post_deploy():
@@ -218,6 +229,8 @@ async def lifespan(app):
             logger.info("[INDEXNOW] Post-deploy ping: %s", result)
         asyncio.create_task(_supervised_task(_indexnow_post_deploy(), "indexnow_post_deploy"))
     yield
+    # Flush pending grid selections while the pool is still open
+    await flush_selection_writes()
     await close_cache()
     await db_cloudsql.close_pool_readonly()
     await db_cloudsql.close_pool()
@@ -0,0 +1,27 @@
+-- Migration 028 : add Text-to-SQL plan cache columns to chat_log
+-- Date : 2026-10-17
+-- Raison : cache de plans Text-to-SQL (services/sql_plan_cache.py). Chaque
+--          échange Phase SQL indique si le SQL vient du cache (PLAN : appel
+--          LLM évité, RESULT : exécution évitée aussi) ou non (MISS), et la
+--          latence économisée. NULL / 0 hors Phase SQL et sur les rows existantes.
+
+ALTER TABLE chat_log
+  ADD COLUMN IF NOT EXISTS sql_cache VARCHAR(10) NULL AFTER sql_status,
+  ADD COLUMN IF NOT EXISTS sql_saved_ms INT NOT NULL DEFAULT 0 AFTER sql_cache;
+
+
+-- ============================================================
+-- DOWN (rollback manuel — à décommenter et exécuter en prod si besoin)
+-- Complexité : 🟡
+-- Data loss potentielle : partielle (métriques de cache SQL uniquement)
+-- PITR requis : non
+-- ============================================================
+-- -- ⚠️ PRÉ-REQUIS : retirer sql_cache / sql_saved_ms de
+-- --   services/chat_logger.py::_INSERT_SQL AVANT le DROP (sinon INSERT en échec,
+-- --   loggé en warning, chatbot non impacté).
+--
+-- -- ÉTAPE 1 : drop des 2 colonnes
+-- ALTER TABLE chat_log
+--   DROP COLUMN sql_saved_ms,
+--   DROP COLUMN sql_cache;
+-- -- Note : routes/admin_monitoring.py KPI chatbot-log lit sql_cache_hits / sql_saved_ms.
@@ -308,6 +308,41 @@ async def admin_api_breakers(request: Request):
     return JSONResponse({"breakers": items})
 
 
+@router.get("/admin/api/cache-stats", include_in_schema=False)
+async def admin_api_cache_stats(request: Request):
+    """Cache L1 (in-process) / L2 (Redis) de l'instance : occupation L1 et
+    compteurs hits / misses / evictions par namespace de clé."""
+    err = _require_auth_json(request)
+    if err:
+        return err
+    from services.cache import cache_stats
+    return JSONResponse(cache_stats())
+
+
+@router.get("/admin/api/coalescer-stats", include_in_schema=False)
+async def admin_api_coalescer_stats(request: Request):
+    """Coalescence des GET identiques concurrents : exécutions, appels
+    économisés (coalesced) et erreurs par handler, requêtes en vol."""
+    err = _require_auth_json(request)
+    if err:
+        return err
+    from services.request_coalescer import coalescer_stats
+    return JSONResponse(coalescer_stats())
+
+
+@router.get("/admin/api/gemini-cache-stats", include_in_schema=False)
+async def admin_api_gemini_cache_stats(request: Request):
+    """Caches de réponses Gemini (pitch-grilles V127, réponses chatbot, plans
+    Text-to-SQL) : taille, hits, misses, evictions / latence économisée."""
+    err = _require_auth_json(request)
+    if err:
+        return err
+    from services.gemini_cache import answer_cache, pitch_cache
+    from services.sql_plan_cache import sql_plan_cache
+    return JSONResponse({"pitch": pitch_cache.stats(), "answer": answer_cache.stats(),
+                         "sql_plan": sql_plan_cache.stats()})
+
+
 @router.post("/admin/api/breakers/{name}/reset", include_in_schema=False)
 async def admin_api_breaker_reset_individual(request: Request, name: str):
     """V131.E — Reset individuel d'un breaker (force_close).
@@ -925,7 +960,8 @@ async def admin_api_chatbot_log(
     w = " AND ".join(where) if where else "1=1"
 
     # KPI
-    kpi = {"total": 0, "rejected_pct": 0, "error_pct": 0, "avg_duration": 0, "unique_sessions": 0, "sql_count": 0}
+    kpi = {"total": 0, "rejected_pct": 0, "error_pct": 0, "avg_duration": 0, "unique_sessions": 0, "sql_count": 0,
+           "sql_cache_hit_pct": 0, "sql_saved_ms": 0}
     try:
         row = await db_cloudsql.async_fetchone(
             f"SELECT COUNT(*) AS total, "
@@ -934,7 +970,10 @@ async def admin_api_chatbot_log(
             f"SUM(CASE WHEN is_error = 1 THEN 1 ELSE 0 END) AS errors, "
             f"AVG(duration_ms) AS avg_dur, "
             f"COUNT(DISTINCT session_hash) AS sessions, "
-            f"SUM(CASE WHEN phase_detected = 'SQL' THEN 1 ELSE 0 END) AS sql_count "
+            f"SUM(CASE WHEN phase_detected = 'SQL' THEN 1 ELSE 0 END) AS sql_count, "
+            f"SUM(CASE WHEN sql_cache IN ('PLAN', 'RESULT') THEN 1 ELSE 0 END) AS sql_cache_hits, "
+            f"SUM(CASE WHEN sql_cache IS NOT NULL THEN 1 ELSE 0 END) AS sql_cache_lookups, "
+            f"SUM(sql_saved_ms) AS sql_saved_ms "
             f"FROM chat_log WHERE {w}",
             tuple(params),
         )
@@ -947,6 +986,10 @@ async def admin_api_chatbot_log(
             kpi["avg_duration"] = int(_dec(row["avg_dur"]) or 0)
             kpi["unique_sessions"] = _dec(row["sessions"]) or 0
             kpi["sql_count"] = _dec(row["sql_count"]) or 0
+            # Cache de plans Text-to-SQL (services.sql_plan_cache)
+            lookups = _dec(row.get("sql_cache_lookups")) or 0
+            kpi["sql_cache_hit_pct"] = round((_dec(row.get("sql_cache_hits")) or 0) / lookups * 100, 1) if lookups > 0 else 0
+            kpi["sql_saved_ms"] = int(_dec(row.get("sql_saved_ms")) or 0)
     except Exception as e:
         logger.error("[ADMIN API] chatbot-log KPI failed: %s", e)
 
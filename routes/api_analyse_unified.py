@@ -10,14 +10,12 @@ import logging
 
 import db_cloudsql
 from rate_limit import limiter
-from config.games import ValidGame, get_config, get_engine, get_next_draw_date, get_next_draw_date_db_aware
+from config.games import ValidGame, get_config, get_engine, get_next_draw_date_db_aware
 from config.i18n import _badges, _analysis_strings
-from services.penalization import compute_penalized_ranking
+from services.draw_windows import get_draw_window
 from services.decay_state import get_decay_state, check_and_update_decay
-from services.selection_history import (
-    get_persistent_brake_map,
-    record_canonical_selection,
-)
+from services.generate_session import GenerateSession
+from services.grid_index import get_grid_index
 from config.engine import LOTO_ZONES, EM_ZONES
 
 logger = logging.getLogger(__name__)
@@ -53,95 +51,29 @@ async def unified_generate(
 
         engine = get_engine(cfg)
 
-        # Decay state: auto-detect new draw + read state (V94 hotfix)
-        decay = None
-        game_name = "euromillions" if cfg.slug == "euromillions" else "loto"
-        secondary_type = "star" if game_name == "euromillions" else "chance"
-        # V110: compute target draw date ONCE for both read (brake map) and write (record canonical)
-        # V137.C: BDD-aware — skip si résultat officiel déjà inséré (source de vérité = BDD)
-        # 2 try blocks séparés pour que next_draw_date ne soit JAMAIS None si
-        # check_and_update_decay plante (robustesse > overhead 1 connexion).
-        next_draw_date = None
-        brake_balls: dict = {}
-        brake_secondary: dict = {}
-
-        try:
-            async with db_cloudsql.get_connection() as dconn:
-                next_draw_date = await get_next_draw_date_db_aware(game, dconn)
-        except Exception:
-            logger.debug("get_next_draw_date_db_aware failed — fallback sync")
-        if next_draw_date is None:
-            next_draw_date = get_next_draw_date(game)
-
-        try:
-            async with db_cloudsql.get_connection() as dconn:
-                # Auto-update decay if a new real draw was imported (best-effort, once per draw)
-                await check_and_update_decay(dconn, game_name, cfg.table)
-        except Exception:
-            logger.debug("check_and_update_decay failed — non-blocking")
-        try:
-            async with db_cloudsql.get_connection() as dconn:
-                decay = await get_decay_state(dconn, game_name, "ball")
-                # V110: load persistent brake maps (best-effort, non-blocking).
-                # get_persistent_brake_map returns {} if engine.cfg.saturation_persistent_enabled=False.
-                brake_balls = await get_persistent_brake_map(
-                    dconn, game_name, next_draw_date, "ball", engine.cfg,
-                )
-                brake_secondary = await get_persistent_brake_map(
-                    dconn, game_name, next_draw_date, secondary_type, engine.cfg,
-                )
-        except Exception:
-            logger.debug("decay_state/brake load failed — generating without")
+        # V110/V137: target draw date (read brake map + write canonical), decay
+        # state (V94), brake maps, generation and batch recording share ONE
+        # connection — per-phase timings logged by GenerateSession ([GENERATE]).
+        async with GenerateSession(game, cfg, engine, db_cloudsql.get_connection) as session:
+            await session.load_state()
+            result = await session.generate(
+                n=n, mode=mode, lang=lang, anti_collision=anti_collision,
+            )
 
-        result = await engine.generate_grids(
-            n=n, mode=mode, lang=lang, anti_collision=anti_collision,
-            decay_state=decay,
-            persistent_brake_map=brake_balls or None,
-            persistent_brake_map_secondary=brake_secondary or None,
-        )
-
-        # V110: record canonical grid for persistent saturation brake (T-1, T-2).
-        # V137.B: enregistrer TOUTES les grilles du batch (pas seulement grids[0])
-        # pour que /admin/calendar-perf affiche les N grilles vues par le visiteur.
-        # Chaque appel record_canonical_selection génère son propre grid_id UUID v4
-        # (V137 inchangé). Boucle graceful : si 1 grille fail, les autres continuent.
-        # NOTE V110 brake : avec 5+ grilles dans la même seconde, get_persistent_brake_map
-        # filtre via MIN(grid_id) (V137.B) pour ne lire que la 1ère grille déterministe.
-        # Chatbot NEVER calls this (V94 invariant extended).
-        if engine.cfg.saturation_persistent_enabled and result.get('grids'):
-            recorded = 0
-            failed = 0
-            try:
-                async with db_cloudsql.get_connection() as dconn:
-                    for grid in result['grids']:
-                        try:
-                            sec_val = grid.get(engine.cfg.secondary_name)
-                            if isinstance(sec_val, list):
-                                sec_list = sec_val
-                            elif sec_val is not None:
-                                sec_list = [sec_val]
-                            else:
-                                sec_list = []
-                            selected = {
-                                "ball": grid.get("nums", []),
-                                secondary_type: sec_list,
-                            }
-                            await record_canonical_selection(
-                                dconn, game_name, next_draw_date, selected,
-                            )
-                            recorded += 1
-                        except Exception:
-                            failed += 1
-                            logger.warning(
-                                "[CALENDAR] V137.B grid record failed — continuing batch",
-                                exc_info=True,
-                            )
-                logger.info(
-                    "[CALENDAR] V137.B batch recorded game=%s target=%s grids=%d failed=%d",
-                    game_name, next_draw_date, recorded, failed,
-                )
-            except Exception:
-                logger.debug("record_canonical_selection batch failed — non-blocking")
+            # V110: record canonical grid for persistent saturation brake (T-1, T-2).
+            # V137.B: enregistrer TOUTES les grilles du batch (pas seulement grids[0])
+            # pour que /admin/calendar-perf affiche les N grilles vues par le visiteur.
+            # Chaque grille garde son propre grid_id UUID v4 (V137 inchangé), écriture
+            # différée (write-behind services.selection_writer, flush périodique).
+            # Graceful : si 1 grille fail, les autres continuent.
+            # NOTE V110 brake : avec 5+ grilles dans la même seconde, get_persistent_brake_map
+            # filtre via MIN(grid_id) (V137.B) pour ne lire que la 1ère grille déterministe.
+            # Chatbot NEVER calls this (V94 invariant extended).
+            if engine.cfg.saturation_persistent_enabled and result.get('grids'):
+                try:
+                    session.record_selections(result['grids'])
+                except Exception:
+                    logger.debug("record_canonical_selection batch failed — non-blocking")
 
         return {
             "success": True,
@@ -174,120 +106,59 @@ async def unified_meta_analyse_local(
     is_loto = game == ValidGame.loto
 
     try:
-        async with db_cloudsql.get_connection() as conn:
-            cursor = await conn.cursor()
-
-            await cursor.execute(f"SELECT COUNT(*) as total FROM {cfg.table}")
-            total_rows = (await cursor.fetchone())['total']
-
-            mode_used = "tirages"
-            window_used = "GLOBAL"
-            years_used = None
-            use_date_filter = False
-            date_limit = None
-
-            if years is not None:
-                mode_used = "annees"
-                if years.upper() == "GLOBAL":
-                    window_used = "GLOBAL"
-                    years_used = "GLOBAL"
-                else:
-                    try:
-                        years_int = int(years)
-                        if 1 <= years_int <= 10:
-                            years_used = str(years_int)
-                            window_used = f"{years_int}A"
-                            use_date_filter = True
-                            date_limit = (datetime.now() - timedelta(days=365 * years_int)).strftime('%Y-%m-%d')
-                        else:
-                            years_used = "GLOBAL"
-                            window_used = "GLOBAL"
-                    except (ValueError, TypeError):
-                        years_used = "GLOBAL"
-                        window_used = "GLOBAL"
+        mode_used = "tirages"
+        window_used = "GLOBAL"
+        years_used = None
+        date_limit = None
+        last_n = None
+
+        if years is not None:
+            mode_used = "annees"
+            if years.upper() == "GLOBAL":
+                window_used = "GLOBAL"
+                years_used = "GLOBAL"
             else:
-                mode_used = "tirages"
-                if window and window.upper() != "GLOBAL":
-                    try:
-                        window_int = int(window)
-                        if window_int >= 1:
-                            window_used = str(min(window_int, total_rows))
-                    except (ValueError, TypeError):
+                try:
+                    years_int = int(years)
+                    if 1 <= years_int <= 10:
+                        years_used = str(years_int)
+                        window_used = f"{years_int}A"
+                        date_limit = (datetime.now() - timedelta(days=365 * years_int)).strftime('%Y-%m-%d')
+                    else:
+                        years_used = "GLOBAL"
                         window_used = "GLOBAL"
+                except (ValueError, TypeError):
+                    years_used = "GLOBAL"
+                    window_used = "GLOBAL"
+        else:
+            mode_used = "tirages"
+            if window and window.upper() != "GLOBAL":
+                try:
+                    window_int = int(window)
+                    if window_int >= 1:
+                        last_n = window_int
+                except (ValueError, TypeError):
+                    window_used = "GLOBAL"
 
-            # Recuperer les IDs de la fenetre
-            if use_date_filter and date_limit:
-                await cursor.execute(f"""
-                    SELECT id FROM {cfg.table}
-                    WHERE date_de_tirage >= %s
-                    ORDER BY date_de_tirage DESC
-                """, (date_limit,))
-            elif window_used != "GLOBAL":
-                await cursor.execute(f"""
-                    SELECT id FROM {cfg.table}
-                    ORDER BY date_de_tirage DESC
-                    LIMIT %s
-                """, (int(window_used),))
-            else:
-                await cursor.execute(f"""
-                    SELECT id FROM {cfg.table}
-                    ORDER BY date_de_tirage DESC
-                """)
-            window_ids = [row['id'] for row in await cursor.fetchall()]
-
-            if not window_ids:
-                raise Exception("Aucun tirage trouve")
-
-            ids_placeholder = ','.join(['%s'] * len(window_ids))
-
-            # Frequences boules sur la fenetre
-            await cursor.execute(f"""
-                SELECT num, COUNT(*) as freq FROM (
-                    SELECT boule_1 as num FROM {cfg.table} WHERE id IN ({ids_placeholder})
-                    UNION ALL SELECT boule_2 FROM {cfg.table} WHERE id IN ({ids_placeholder})
-                    UNION ALL SELECT boule_3 FROM {cfg.table} WHERE id IN ({ids_placeholder})
-                    UNION ALL SELECT boule_4 FROM {cfg.table} WHERE id IN ({ids_placeholder})
-                    UNION ALL SELECT boule_5 FROM {cfg.table} WHERE id IN ({ids_placeholder})
-                ) t
-                GROUP BY num ORDER BY num
-            """, (*window_ids, *window_ids, *window_ids, *window_ids, *window_ids))
-            freq_map = {row['num']: row['freq'] for row in await cursor.fetchall()}
-
-            # 4 derniers tirages pour penalisation V2 (hard-exclude T-1 + degradation T-2/T-3/T-4)
-            if is_loto:
-                await cursor.execute(f"""
-                    SELECT boule_1, boule_2, boule_3, boule_4, boule_5,
-                           numero_chance, date_de_tirage
-                    FROM {cfg.table}
-                    WHERE id IN ({ids_placeholder})
-                    ORDER BY date_de_tirage DESC LIMIT 4
-                """, window_ids)
-            else:
-                await cursor.execute(f"""
-                    SELECT boule_1, boule_2, boule_3, boule_4, boule_5,
-                           etoile_1, etoile_2, date_de_tirage
-                    FROM {cfg.table}
-                    WHERE id IN ({ids_placeholder})
-                    ORDER BY date_de_tirage DESC LIMIT 4
-                """, window_ids)
-            recent_draws = await cursor.fetchall()
-
-            # Build recent_draws lists for V2 penalization
-            recent_balls: list[set[int]] = []
-            recent_secondary: list[set[int]] = []
-            draw_dates: list[str | None] = []
-            for rd in recent_draws:
-                recent_balls.append({rd[f'boule_{i}'] for i in range(1, 6)})
-                draw_dates.append(str(rd['date_de_tirage']))
-                if is_loto:
-                    recent_secondary.append({rd['numero_chance']})
-                else:
-                    recent_secondary.append({rd['etoile_1'], rd['etoile_2']})
-
-            last_draw_date = draw_dates[0] if draw_dates else None
-            second_last_date = draw_dates[1] if len(draw_dates) >= 2 else None
-
-        # V102: read decay state for META ranking (outside main conn block)
+        # Fenetre = suffixe de l'historique (draw store ou 1 requete des lignes,
+        # services.draw_windows) — frequences, 4 derniers tirages, bornes de dates.
+        win = await get_draw_window(
+            get_engine(cfg).cfg, last_n=last_n, since=date_limit,
+            get_connection=db_cloudsql.get_connection,
+        )
+        total_rows = win.total
+        if last_n is not None:
+            window_used = str(min(last_n, total_rows))
+        if not win.size:
+            raise Exception("Aucun tirage trouve")
+
+        freq_map = win.ball_freq
+        last_draw_date = win.recent_dates[0] if win.recent_dates else None
+        second_last_date = win.recent_dates[1] if len(win.recent_dates) >= 2 else None
+        date_min = win.date_min
+        date_max = win.date_max
+
+        # V102: read decay state for META ranking
         game_name = "euromillions" if not is_loto else "loto"
         decay_balls: dict[int, int] = {}
         decay_secondary: dict[int, int] = {}
@@ -304,99 +175,45 @@ async def unified_meta_analyse_local(
         except Exception:
             logger.debug("decay_state META unavailable — ranking without decay")
 
-        async with db_cloudsql.get_connection() as conn:
-            cursor = await conn.cursor()
-
-            _zones = LOTO_ZONES if is_loto else EM_ZONES
-            top_numbers, penal_info_balls = compute_penalized_ranking(
-                raw_freq=freq_map,
-                last_draw_numbers=set(),
-                second_last_draw_numbers=set(),
-                num_range=range(1, cfg.num_range[1] + 1),
-                top_n=5,
-                recent_draws=recent_balls,
-                decay_state=decay_balls,
-                zones=_zones,
-            )
+        # V2 penalization (hard-exclude T-1 + degradation T-2/T-3/T-4) + decay V102
+        _zones = LOTO_ZONES if is_loto else EM_ZONES
+        top_numbers, penal_info_balls = win.penalized_ranking(
+            range(1, cfg.num_range[1] + 1), 5, decay_state=decay_balls, zones=_zones,
+        )
 
-            # Secondary numbers (chance / etoiles)
-            if is_loto:
-                # V135: filtres défensifs NULL/range — pipeline import 2 étapes
-                # peut laisser numero_chance NULL temporairement (V2 hyp F).
-                await cursor.execute(f"""
-                    SELECT numero_chance AS num, COUNT(*) AS freq
-                    FROM {cfg.table}
-                    WHERE id IN ({ids_placeholder})
-                      AND numero_chance IS NOT NULL
-                      AND numero_chance BETWEEN 1 AND 10
-                    GROUP BY numero_chance ORDER BY freq DESC
-                """, window_ids)
-                secondary_freq = {row['num']: row['freq'] for row in await cursor.fetchall()}
-                # V135: alerte si asymétrie (sum chance != nb tirages dans la fenêtre)
-                _total_chance = sum(secondary_freq.values())
-                if _total_chance != len(window_ids):
-                    logger.error(
-                        "[META-CHANCE] Asymétrie détectée Loto window=%s: "
-                        "%d chance comptabilisés vs %d tirages — "
-                        "probablement NULL transitoire pipeline import (V2 hyp F).",
-                        window_used, _total_chance, len(window_ids),
-                    )
-                secondary_top, penal_info_secondary = compute_penalized_ranking(
-                    raw_freq=secondary_freq,
-                    last_draw_numbers=set(),
-                    second_last_draw_numbers=set(),
-                    num_range=range(1, 11),
-                    top_n=3,
-                    recent_draws=recent_secondary,
-                    decay_state=decay_secondary,
-                    unpopularity=False,  # V106: chance universe too small
+        # Secondary numbers (chance / etoiles)
+        # V135: NULL/hors range exclus des frequences (pipeline import 2 étapes
+        # peut laisser numero_chance / etoile_x NULL temporairement, V2 hyp F).
+        secondary_freq = win.secondary_freq
+        if is_loto:
+            # V135: alerte si asymétrie (sum chance != nb tirages dans la fenêtre)
+            _total_chance = sum(secondary_freq.values())
+            if _total_chance != win.size:
+                logger.error(
+                    "[META-CHANCE] Asymétrie détectée Loto window=%s: "
+                    "%d chance comptabilisés vs %d tirages — "
+                    "probablement NULL transitoire pipeline import (V2 hyp F).",
+                    window_used, _total_chance, win.size,
                 )
-            else:
-                # V135: filtres défensifs NULL/range pour étoiles EM (idem Loto chance).
-                await cursor.execute(f"""
-                    SELECT num, COUNT(*) as freq FROM (
-                        SELECT etoile_1 as num FROM {cfg.table}
-                        WHERE id IN ({ids_placeholder})
-                          AND etoile_1 IS NOT NULL
-                          AND etoile_1 BETWEEN 1 AND 12
-                        UNION ALL
-                        SELECT etoile_2 FROM {cfg.table}
-                        WHERE id IN ({ids_placeholder})
-                          AND etoile_2 IS NOT NULL
-                          AND etoile_2 BETWEEN 1 AND 12
-                    ) t
-                    GROUP BY num ORDER BY num
-                """, (*window_ids, *window_ids))
-                secondary_freq = {row['num']: row['freq'] for row in await cursor.fetchall()}
-                # V135: alerte si asymétrie EM (sum stars != 2 × nb tirages)
-                _total_stars = sum(secondary_freq.values())
-                _expected_stars = len(window_ids) * 2
-                if _total_stars != _expected_stars:
-                    logger.error(
-                        "[META-STARS] Asymétrie détectée EM window=%s: "
-                        "%d stars comptabilisées vs %d attendues — "
-                        "probablement NULL transitoire pipeline import (V2 hyp F).",
-                        window_used, _total_stars, _expected_stars,
-                    )
-                secondary_top, penal_info_secondary = compute_penalized_ranking(
-                    raw_freq=secondary_freq,
-                    last_draw_numbers=set(),
-                    second_last_draw_numbers=set(),
-                    num_range=range(1, 13),
-                    top_n=3,
-                    recent_draws=recent_secondary,
-                    decay_state=decay_secondary,
-                    unpopularity=False,  # V106: stars universe too small
+            secondary_top, penal_info_secondary = win.penalized_ranking(
+                range(1, 11), 3, secondary=True, decay_state=decay_secondary,
+                unpopularity=False,  # V106: chance universe too small
+            )
+        else:
+            # V135: alerte si asymétrie EM (sum stars != 2 × nb tirages)
+            _total_stars = sum(secondary_freq.values())
+            _expected_stars = win.size * 2
+            if _total_stars != _expected_stars:
+                logger.error(
+                    "[META-STARS] Asymétrie détectée EM window=%s: "
+                    "%d stars comptabilisées vs %d attendues — "
+                    "probablement NULL transitoire pipeline import (V2 hyp F).",
+                    window_used, _total_stars, _expected_stars,
                 )
-
-            # Dates de la fenetre
-            await cursor.execute(f"""
-                SELECT MIN(date_de_tirage) as min_date, MAX(date_de_tirage) as max_date
-                FROM {cfg.table} WHERE id IN ({ids_placeholder})
-            """, window_ids)
-            dates = await cursor.fetchone()
-            date_min = dates['min_date']
-            date_max = dates['max_date']
+            secondary_top, penal_info_secondary = win.penalized_ranking(
+                range(1, 13), 3, secondary=True, decay_state=decay_secondary,
+                unpopularity=False,  # V106: stars universe too small
+            )
 
         graph_labels = [str(n['number']) for n in top_numbers]
         graph_values = [n['count'] for n in top_numbers]
@@ -448,7 +265,7 @@ async def unified_meta_analyse_local(
         min_freq = min(graph_values) if graph_values else 0
         spread = max_freq - min_freq
 
-        actual_count = len(window_ids)
+        actual_count = win.size
         if mode_used == "annees" and years_used and years_used != "GLOBAL":
             window_label = f"{years_used} an(s) ({actual_count} tirages)"
         elif window_used != "GLOBAL":
@@ -593,11 +410,18 @@ async def unified_analyze_custom_grid(
                 return {"success": False, "error": "Les 2 étoiles doivent être différentes"}
             etoiles = sorted([etoile1, etoile2])
 
+        # Draw store chargé → correspondances par masques de bits (services.grid_index)
+        index = get_grid_index("loto" if is_loto else "em")
+        index_secondary = [chance] if is_loto else etoiles
+
         async with db_cloudsql.get_connection() as conn:
             cursor = await conn.cursor()
 
-            await cursor.execute(f"SELECT COUNT(*) as total FROM {cfg.table}")
-            total_tirages = (await cursor.fetchone())['total']
+            if index is not None:
+                total_tirages = len(index)
+            else:
+                await cursor.execute(f"SELECT COUNT(*) as total FROM {cfg.table}")
+                total_tirages = (await cursor.fetchone())['total']
 
             # Frequences des boules selectionnees
             await cursor.execute(f"""
@@ -614,69 +438,75 @@ async def unified_analyze_custom_grid(
             freq_map = {row['num']: row['freq'] for row in await cursor.fetchall()}
             frequencies = [freq_map.get(num, 0) for num in nums]
 
-            # Correspondance exacte
-            if is_loto:
-                await cursor.execute("""
-                    SELECT date_de_tirage FROM tirages
-                    WHERE boule_1 IN (%s,%s,%s,%s,%s)
-                      AND boule_2 IN (%s,%s,%s,%s,%s)
-                      AND boule_3 IN (%s,%s,%s,%s,%s)
-                      AND boule_4 IN (%s,%s,%s,%s,%s)
-                      AND boule_5 IN (%s,%s,%s,%s,%s)
-                      AND numero_chance = %s
-                    ORDER BY date_de_tirage DESC
-                """, (*nums, *nums, *nums, *nums, *nums, chance))
-            else:
-                await cursor.execute(f"""
-                    SELECT date_de_tirage FROM {cfg.table}
-                    WHERE boule_1 IN (%s,%s,%s,%s,%s)
-                      AND boule_2 IN (%s,%s,%s,%s,%s)
-                      AND boule_3 IN (%s,%s,%s,%s,%s)
-                      AND boule_4 IN (%s,%s,%s,%s,%s)
-                      AND boule_5 IN (%s,%s,%s,%s,%s)
-                      AND etoile_1 IN (%s,%s)
-                      AND etoile_2 IN (%s,%s)
-                    ORDER BY date_de_tirage DESC
-                """, (*nums, *nums, *nums, *nums, *nums, *etoiles, *etoiles))
-            exact_matches = await cursor.fetchall()
-            exact_dates = [str(row['date_de_tirage']) for row in exact_matches]
-
-            # Meilleure correspondance
-            if is_loto:
-                await cursor.execute("""
-                    SELECT date_de_tirage, boule_1, boule_2, boule_3, boule_4, boule_5, numero_chance,
-                        (
-                            (boule_1 IN (%s,%s,%s,%s,%s)) +
-                            (boule_2 IN (%s,%s,%s,%s,%s)) +
-                            (boule_3 IN (%s,%s,%s,%s,%s)) +
-                            (boule_4 IN (%s,%s,%s,%s,%s)) +
-                            (boule_5 IN (%s,%s,%s,%s,%s))
-                        ) AS match_count,
-                        (numero_chance = %s) AS chance_match
-                    FROM tirages
-                    ORDER BY match_count DESC, chance_match DESC, date_de_tirage DESC
-                    LIMIT 1
-                """, (*nums, *nums, *nums, *nums, *nums, chance))
+            if index is not None:
+                exact_dates = [str(d) for d in index.exact_dates(nums, index_secondary)]
+                best_match = index.best_match(
+                    nums, index_secondary, match_key="chance_match" if is_loto else "etoile_match",
+                )
             else:
-                await cursor.execute(f"""
-                    SELECT date_de_tirage, boule_1, boule_2, boule_3, boule_4, boule_5,
-                           etoile_1, etoile_2,
-                        (
-                            (boule_1 IN (%s,%s,%s,%s,%s)) +
-                            (boule_2 IN (%s,%s,%s,%s,%s)) +
-                            (boule_3 IN (%s,%s,%s,%s,%s)) +
-                            (boule_4 IN (%s,%s,%s,%s,%s)) +
-                            (boule_5 IN (%s,%s,%s,%s,%s))
-                        ) AS match_count,
-                        (
-                            (etoile_1 IN (%s,%s)) +
-                            (etoile_2 IN (%s,%s))
-                        ) AS etoile_match
-                    FROM {cfg.table}
-                    ORDER BY match_count DESC, etoile_match DESC, date_de_tirage DESC
-                    LIMIT 1
-                """, (*nums, *nums, *nums, *nums, *nums, *etoiles, *etoiles))
-            best_match = await cursor.fetchone()
+                # Correspondance exacte
+                if is_loto:
+                    await cursor.execute("""
+                        SELECT date_de_tirage FROM tirages
+                        WHERE boule_1 IN (%s,%s,%s,%s,%s)
+                          AND boule_2 IN (%s,%s,%s,%s,%s)
+                          AND boule_3 IN (%s,%s,%s,%s,%s)
+                          AND boule_4 IN (%s,%s,%s,%s,%s)
+                          AND boule_5 IN (%s,%s,%s,%s,%s)
+                          AND numero_chance = %s
+                        ORDER BY date_de_tirage DESC
+                    """, (*nums, *nums, *nums, *nums, *nums, chance))
+                else:
+                    await cursor.execute(f"""
+                        SELECT date_de_tirage FROM {cfg.table}
+                        WHERE boule_1 IN (%s,%s,%s,%s,%s)
+                          AND boule_2 IN (%s,%s,%s,%s,%s)
+                          AND boule_3 IN (%s,%s,%s,%s,%s)
+                          AND boule_4 IN (%s,%s,%s,%s,%s)
+                          AND boule_5 IN (%s,%s,%s,%s,%s)
+                          AND etoile_1 IN (%s,%s)
+                          AND etoile_2 IN (%s,%s)
+                        ORDER BY date_de_tirage DESC
+                    """, (*nums, *nums, *nums, *nums, *nums, *etoiles, *etoiles))
+                exact_matches = await cursor.fetchall()
+                exact_dates = [str(row['date_de_tirage']) for row in exact_matches]
+
+                # Meilleure correspondance
+                if is_loto:
+                    await cursor.execute("""
+                        SELECT date_de_tirage, boule_1, boule_2, boule_3, boule_4, boule_5, numero_chance,
+                            (
+                                (boule_1 IN (%s,%s,%s,%s,%s)) +
+                                (boule_2 IN (%s,%s,%s,%s,%s)) +
+                                (boule_3 IN (%s,%s,%s,%s,%s)) +
+                                (boule_4 IN (%s,%s,%s,%s,%s)) +
+                                (boule_5 IN (%s,%s,%s,%s,%s))
+                            ) AS match_count,
+                            (numero_chance = %s) AS chance_match
+                        FROM tirages
+                        ORDER BY match_count DESC, chance_match DESC, date_de_tirage DESC
+                        LIMIT 1
+                    """, (*nums, *nums, *nums, *nums, *nums, chance))
+                else:
+                    await cursor.execute(f"""
+                        SELECT date_de_tirage, boule_1, boule_2, boule_3, boule_4, boule_5,
+                               etoile_1, etoile_2,
+                            (
+                                (boule_1 IN (%s,%s,%s,%s,%s)) +
+                                (boule_2 IN (%s,%s,%s,%s,%s)) +
+                                (boule_3 IN (%s,%s,%s,%s,%s)) +
+                                (boule_4 IN (%s,%s,%s,%s,%s)) +
+                                (boule_5 IN (%s,%s,%s,%s,%s))
+                            ) AS match_count,
+                            (
+                                (etoile_1 IN (%s,%s)) +
+                                (etoile_2 IN (%s,%s))
+                            ) AS etoile_match
+                        FROM {cfg.table}
+                        ORDER BY match_count DESC, etoile_match DESC, date_de_tirage DESC
+                        LIMIT 1
+                    """, (*nums, *nums, *nums, *nums, *nums, *etoiles, *etoiles))
+                best_match = await cursor.fetchone()
 
         best_match_numbers = []
         if best_match:
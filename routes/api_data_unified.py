@@ -4,13 +4,20 @@ Phase 10 — remplace la duplication api_data.py / em_data.py
 """
 
 from fastapi import APIRouter, HTTPException, Query, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from typing import Optional
+import csv
+import io
+import json
 import logging
 
 import db_cloudsql
 from rate_limit import limiter
-from config.games import ValidGame, get_config, get_stats_service, get_engine_stats
+from config.games import ValidGame, get_config, get_engine, get_stats_service, get_engine_stats
+from services.number_stats import get_number_stats
+from services.request_coalescer import coalesce
+from services.response_snapshots import get_response_snapshot
+from services.table_summary import TableSummary, get_table_summary
 
 logger = logging.getLogger(__name__)
 
@@ -41,15 +48,100 @@ def _strip_pct_to_float(pct_value) -> float:
     return 0.0
 
 
+async def _table_summary(cfg):
+    """In-memory TableSummary (draw store loaded) or None → SQL path."""
+    try:
+        return await get_table_summary(get_engine(cfg).cfg, get_connection=db_cloudsql.get_connection)
+    except Exception as e:
+        logger.warning(f"[TABLE_SUMMARY] {cfg.slug} unavailable ({e}) — SQL fallback")
+        return None
+
+
+async def _snapshot_response(request: Request, cfg, kind: str, render):
+    """Pre-rendered response of the current draw (services.response_snapshots),
+    304 if If-None-Match matches its ETag. None (store not loaded, error) → SQL path."""
+    try:
+        snapshot = await get_response_snapshot(
+            get_engine(cfg).cfg, kind, render, get_connection=db_cloudsql.get_connection,
+        )
+    except Exception as e:
+        logger.warning(f"[RESPONSE_SNAPSHOT] {cfg.slug}/{kind} unavailable ({e}) — SQL fallback")
+        return None
+    if snapshot is None:
+        return None
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if snapshot.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+
+def _snapshot_maps(snap, size: int, secondary: bool = False):
+    """Draw store equivalents of the SQL path inputs for one number type:
+    ({num: freq}, {num: ecart}, {num: last draw date}) over the whole history."""
+    total = len(snap)
+    counts = snap.counts(0, size, secondary).tolist()
+    lags = snap.lags(0, size, secondary).tolist()
+    freq = {num: counts[num] for num in range(1, size + 1) if counts[num] > 0}
+    ecarts = {num: lags[num] for num in range(1, size + 1)}
+    last_dates = {num: str(snap.dates[total - 1 - lags[num]]) for num in range(1, size + 1)
+                  if lags[num] < total}
+    return freq, ecarts, last_dates
+
+
+def _top_froids(freqs: dict, n: int):
+    """(top n, flop n) of a {"num": freq} map, as the /stats payload."""
+    sorted_by_freq = sorted(
+        [(int(k), v) for k, v in freqs.items()],
+        key=lambda x: x[1], reverse=True,
+    )
+    return ([{"numero": num, "freq": f} for num, f in sorted_by_freq[:n]],
+            [{"numero": num, "freq": f} for num, f in sorted_by_freq[-n:]])
+
+
+def _heat_numbers(freq_map: dict, last_dates: dict, size: int):
+    """({num: {frequency, last_draw, category}}, seuil chaud, seuil froid) — /numbers-heat."""
+    data = {}
+    freqs = []
+    for num in range(1, size + 1):
+        freq = freq_map.get(num, 0)
+        last_d = last_dates.get(num)
+        data[num] = {"frequency": freq, "last_draw": str(last_d) if last_d else None}
+        freqs.append(freq)
+
+    freqs.sort(reverse=True)
+    seuil_chaud = freqs[len(freqs) // 3]
+    seuil_froid = freqs[2 * len(freqs) // 3]
+    for num in range(1, size + 1):
+        freq = data[num]["frequency"]
+        if freq >= seuil_chaud:
+            data[num]["category"] = "hot"
+        elif freq <= seuil_froid:
+            data[num]["category"] = "cold"
+        else:
+            data[num]["category"] = "neutral"
+    return data, seuil_chaud, seuil_froid
+
+
+def _top_flop(freq_map: dict, size: int):
+    """(top, flop) of every number by count — /stats/top-flop."""
+    numbers_freq = [{"number": num, "count": freq_map.get(num, 0)} for num in range(1, size + 1)]
+    return (sorted(numbers_freq, key=lambda x: (-x['count'], x['number'])),
+            sorted(numbers_freq, key=lambda x: (x['count'], x['number'])))
+
+
 # =========================
 # Tirages count / latest / list
 # =========================
 
 @router.get("/tirages/count")
 @limiter.limit("60/minute")
+@coalesce
 async def unified_tirages_count(request: Request, game: ValidGame):
     cfg = get_config(game)
     try:
+        summary = await _table_summary(cfg)
+        if summary is not None:
+            return {"success": True, "data": {"total": summary.total}, "error": None}
         async with db_cloudsql.get_connection() as conn:
             cursor = await conn.cursor()
             await cursor.execute(f"SELECT COUNT(*) as total FROM {cfg.table}")
@@ -64,6 +156,7 @@ async def unified_tirages_count(request: Request, game: ValidGame):
 
 @router.get("/tirages/latest")
 @limiter.limit("60/minute")
+@coalesce
 async def unified_tirages_latest(request: Request, game: ValidGame):
     cfg = get_config(game)
     try:
@@ -89,12 +182,18 @@ async def unified_tirages_latest(request: Request, game: ValidGame):
         })
 
 
+_DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}$"
+
+
 @router.get("/tirages/list")
 @limiter.limit("60/minute")
+@coalesce
 async def unified_tirages_list(
     request: Request, game: ValidGame,
     limit: int = Query(default=10, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
+    before: Optional[str] = Query(default=None, pattern=_DATE_PATTERN,
+                                  description="Keyset: tirages anterieurs a cette date (next_cursor)"),
 ):
     cfg = get_config(game)
     try:
@@ -102,18 +201,32 @@ async def unified_tirages_list(
         off = max(0, offset)
         async with db_cloudsql.get_connection() as conn:
             cursor = await conn.cursor()
-            await cursor.execute(f"""
-                SELECT * FROM {cfg.table}
-                ORDER BY date_de_tirage DESC
-                LIMIT %s OFFSET %s
-            """, (lim, off))
+            if before is not None:
+                # Keyset sur date_de_tirage (1 tirage / date) : cout constant
+                # quelle que soit la profondeur, contrairement a OFFSET.
+                await cursor.execute(f"""
+                    SELECT * FROM {cfg.table}
+                    WHERE date_de_tirage < %s
+                    ORDER BY date_de_tirage DESC
+                    LIMIT %s
+                """, (before, lim))
+            else:
+                await cursor.execute(f"""
+                    SELECT * FROM {cfg.table}
+                    ORDER BY date_de_tirage DESC
+                    LIMIT %s OFFSET %s
+                """, (lim, off))
             tirages = await cursor.fetchall()
             for row in tirages:
                 if row.get("date_de_tirage"):
                     row["date_de_tirage"] = str(row["date_de_tirage"])
+        next_cursor = tirages[-1].get("date_de_tirage") if len(tirages) == lim else None
         return {
             "success": True,
-            "data": {"items": tirages, "count": len(tirages), "limit": limit, "offset": offset},
+            "data": {
+                "items": tirages, "count": len(tirages), "limit": limit, "offset": offset,
+                "next_cursor": next_cursor,
+            },
             "error": None,
         }
     except Exception as e:
@@ -123,15 +236,89 @@ async def unified_tirages_list(
         })
 
 
+def _export_value(value):
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    return str(value)  # date, Decimal
+
+
+async def _ndjson_lines(rows):
+    async for row in rows:
+        yield json.dumps({k: _export_value(v) for k, v in row.items()}, ensure_ascii=False) + "\n"
+
+
+async def _csv_lines(rows):
+    buf = io.StringIO()
+    writer = None
+    async for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(buf, fieldnames=list(row), lineterminator="\n")
+            writer.writeheader()
+        writer.writerow({k: _export_value(v) for k, v in row.items()})
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+
+
+async def _logged_stream(lines, slug: str):
+    """Stream errors cannot change the status any more (headers sent): log and stop."""
+    try:
+        async for line in lines:
+            yield line
+    except Exception as e:
+        logger.error(f"Erreur /api/{slug}/tirages/export (stream interrompu): {e}")
+
+
+@router.get("/tirages/export")
+@limiter.limit("10/minute")
+async def unified_tirages_export(
+    request: Request, game: ValidGame,
+    format: str = Query(default="ndjson", pattern="^(ndjson|csv)$"),
+    since: Optional[str] = Query(default=None, pattern=_DATE_PATTERN,
+                                 description="Tirages a partir de cette date (incluse)"),
+):
+    """Historique complet (ou depuis `since`) en ASC, streame depuis un curseur
+    serveur : NDJSON (1 tirage / ligne) ou CSV. Aucune page en memoire.
+    Exports simultanes plafonnes (db_cloudsql.stream_rows) : 503 si aucun slot."""
+    cfg = get_config(game)
+    if not db_cloudsql.stream_slot_available():
+        return JSONResponse(
+            status_code=503, headers={"Retry-After": "30"},
+            content={"success": False, "data": None, "error": "Export indisponible, reessayez plus tard"},
+        )
+    sql = f"SELECT * FROM {cfg.table}"
+    params = None
+    if since:
+        sql += " WHERE date_de_tirage >= %s"
+        params = (since,)
+    rows = db_cloudsql.stream_rows(sql + " ORDER BY date_de_tirage ASC", params)
+    if format == "csv":
+        lines, media_type = _csv_lines(rows), "text/csv; charset=utf-8"
+    else:
+        lines, media_type = _ndjson_lines(rows), "application/x-ndjson"
+    return StreamingResponse(
+        _logged_stream(lines, cfg.slug), media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{cfg.slug}-tirages.{format}"'},
+    )
+
+
 # =========================
 # Database info
 # =========================
 
 @router.get("/database-info")
 @limiter.limit("60/minute")
+@coalesce
 async def unified_database_info(request: Request, game: ValidGame):
     cfg = get_config(game)
     try:
+        summary = await _table_summary(cfg)
+        if summary is not None:
+            return {
+                "total_draws": summary.total,
+                "first_draw": str(summary.date_min) if summary.date_min else None,
+                "last_draw": str(summary.date_max) if summary.date_max else None,
+            }
         async with db_cloudsql.get_connection() as conn:
             cursor = await conn.cursor()
             await cursor.execute(f"""
@@ -157,54 +344,61 @@ async def unified_database_info(request: Request, game: ValidGame):
 # META Windows Info (slider)
 # =========================
 
+def _meta_windows_payload(summary, window_sizes: list[int]) -> dict:
+    """/meta-windows-info payload from a TableSummary (draw store or SQL fallback)."""
+    from datetime import timedelta
+
+    total = summary.total
+    last_draw, first_draw = summary.date_max, summary.date_min
+
+    tirages_windows = {}
+    for size in window_sizes:
+        if size <= total:
+            tirages_windows[size] = {"draws": size, "start": str(summary.nth_latest(size)), "end": str(last_draw)}
+        else:
+            tirages_windows[size] = {"draws": total, "start": str(first_draw), "end": str(last_draw)}
+    tirages_windows["GLOBAL"] = {"draws": total, "start": str(first_draw), "end": str(last_draw)}
+
+    annees_windows = {}
+    for y in [1, 2, 3, 4, 5, 6]:
+        date_limit = last_draw - timedelta(days=365 * y)
+        start = summary.first_since(date_limit)
+        annees_windows[y] = {
+            "draws": summary.count_since(date_limit),
+            "start": str(start) if start else str(first_draw),
+            "end": str(last_draw),
+        }
+    annees_windows["GLOBAL"] = {"draws": total, "start": str(first_draw), "end": str(last_draw)}
+
+    return {
+        "tirages": tirages_windows,
+        "annees": annees_windows,
+        "total_draws": total,
+        "last_draw": str(last_draw),
+        "first_draw": str(first_draw),
+    }
+
+
 @router.get("/meta-windows-info")
 @limiter.limit("60/minute")
+@coalesce
 async def unified_meta_windows_info(request: Request, game: ValidGame):
-    from datetime import timedelta
-
     cfg = get_config(game)
     # Loto uses window sizes up to 800, EM up to 700
     window_sizes = [100, 200, 300, 400, 500, 600, 700, 800] if game == ValidGame.loto else [100, 200, 300, 400, 500, 600, 700]
 
     try:
-        async with db_cloudsql.get_connection() as conn:
-            cursor = await conn.cursor()
-            await cursor.execute(f"""
-                SELECT date_de_tirage FROM {cfg.table}
-                ORDER BY date_de_tirage DESC
-            """)
-            all_dates = [row["date_de_tirage"] for row in await cursor.fetchall()]
-
-        total = len(all_dates)
-        last_draw = all_dates[0] if all_dates else None
-        first_draw = all_dates[-1] if all_dates else None
-
-        tirages_windows = {}
-        for size in window_sizes:
-            if size <= total:
-                tirages_windows[size] = {"draws": size, "start": str(all_dates[size - 1]), "end": str(last_draw)}
-            else:
-                tirages_windows[size] = {"draws": total, "start": str(first_draw), "end": str(last_draw)}
-        tirages_windows["GLOBAL"] = {"draws": total, "start": str(first_draw), "end": str(last_draw)}
-
-        annees_windows = {}
-        for y in [1, 2, 3, 4, 5, 6]:
-            date_limit = last_draw - timedelta(days=365 * y)
-            draws_in_range = [d for d in all_dates if d >= date_limit]
-            annees_windows[y] = {
-                "draws": len(draws_in_range),
-                "start": str(draws_in_range[-1]) if draws_in_range else str(first_draw),
-                "end": str(last_draw),
-            }
-        annees_windows["GLOBAL"] = {"draws": total, "start": str(first_draw), "end": str(last_draw)}
-
-        return {
-            "tirages": tirages_windows,
-            "annees": annees_windows,
-            "total_draws": total,
-            "last_draw": str(last_draw),
-            "first_draw": str(first_draw),
-        }
+        summary = await _table_summary(cfg)
+        if summary is None:
+            async with db_cloudsql.get_connection() as conn:
+                cursor = await conn.cursor()
+                await cursor.execute(f"""
+                    SELECT date_de_tirage FROM {cfg.table}
+                    ORDER BY date_de_tirage DESC
+                """)
+                all_dates = [row["date_de_tirage"] for row in await cursor.fetchall()]
+            summary = TableSummary.from_dates(get_engine(cfg).cfg.game, all_dates)
+        return _meta_windows_payload(summary, window_sizes)
 
     except Exception as e:
         logger.error(f"Erreur /api/{cfg.slug}/meta-windows-info: {e}")
@@ -215,12 +409,76 @@ async def unified_meta_windows_info(request: Request, game: ValidGame):
 # Stats completes
 # =========================
 
+def _stats_body(game, cfg, total_tirages, date_min, date_max,
+                freq_map, ecart_map, freq_etoiles=None, ecart_etoiles=None) -> dict:
+    """Payload /stats (loto vs EM) — shared by the SQL path and the draw store snapshot."""
+    num_max = cfg.num_range[1] + 1
+    frequences = {str(num): freq_map.get(num, 0) for num in range(1, num_max)}
+    retards = {str(num): ecart_map.get(num, total_tirages) for num in range(1, num_max)}
+
+    # Top/Flop boules
+    top_chauds, top_froids = _top_froids(frequences, 5)
+
+    if game == ValidGame.loto:
+        return {
+            "success": True,
+            "data": {
+                "total_tirages": total_tirages,
+                "periode": {"debut": date_min, "fin": date_max},
+                "frequences": frequences,
+                "retards": retards,
+                "top_chauds": top_chauds,
+                "top_froids": top_froids,
+            },
+            "error": None,
+        }
+
+    # EM: also etoiles
+    frequences_etoiles = {str(num): freq_etoiles.get(num, 0) for num in range(1, 13)}
+    retards_etoiles = {str(num): ecart_etoiles.get(num, total_tirages) for num in range(1, 13)}
+    top_chauds_etoiles, top_froids_etoiles = _top_froids(frequences_etoiles, 3)
+
+    return {
+        "success": True,
+        "data": {
+            "total_tirages": total_tirages,
+            "periode": {"debut": date_min, "fin": date_max},
+            "frequences_boules": frequences,
+            "retards_boules": retards,
+            "frequences_etoiles": frequences_etoiles,
+            "retards_etoiles": retards_etoiles,
+            "top_chauds_boules": top_chauds,
+            "top_froids_boules": top_froids,
+            "top_chauds_etoiles": top_chauds_etoiles,
+            "top_froids_etoiles": top_froids_etoiles,
+        },
+        "error": None,
+    }
+
+
+def _render_stats(game, cfg):
+    """render(snap) of the /stats response snapshot."""
+    def render(snap):
+        freq_map, ecart_map, _ = _snapshot_maps(snap, cfg.num_range[1])
+        freq_etoiles = ecart_etoiles = None
+        if game != ValidGame.loto:
+            freq_etoiles, ecart_etoiles, _ = _snapshot_maps(snap, 12, secondary=True)
+        return _stats_body(game, cfg, len(snap), str(snap.dates[0]), str(snap.dates[-1]),
+                           freq_map, ecart_map, freq_etoiles, ecart_etoiles)
+    return render
+
+
 @router.get("/stats")
 @limiter.limit("60/minute")
+@coalesce
 async def unified_stats(request: Request, game: ValidGame):
     cfg = get_config(game)
     svc = get_stats_service(cfg)
     try:
+        snapshot = await _snapshot_response(request, cfg, "stats", _render_stats(game, cfg))
+        if snapshot is not None:
+            return snapshot
+
         async with db_cloudsql.get_connection() as conn:
             cursor = await conn.cursor()
 
@@ -238,63 +496,15 @@ async def unified_stats(request: Request, game: ValidGame):
             # Frequences & retards boules principales
             type_principal = "principal" if game == ValidGame.loto else "boule"
             freq_map = await svc._get_all_frequencies(cursor, type_principal)
-            num_max = cfg.num_range[1] + 1
-            frequences = {str(num): freq_map.get(num, 0) for num in range(1, num_max)}
-
             ecart_map = await svc._get_all_ecarts(cursor, type_principal)
-            retards = {str(num): ecart_map.get(num, total_tirages) for num in range(1, num_max)}
-
-            # Top/Flop boules
-            sorted_by_freq = sorted(
-                [(int(k), v) for k, v in frequences.items()],
-                key=lambda x: x[1], reverse=True,
-            )
-            top_chauds = [{"numero": n, "freq": f} for n, f in sorted_by_freq[:5]]
-            top_froids = [{"numero": n, "freq": f} for n, f in sorted_by_freq[-5:]]
 
-            if game == ValidGame.loto:
-                return {
-                    "success": True,
-                    "data": {
-                        "total_tirages": total_tirages,
-                        "periode": {"debut": date_min, "fin": date_max},
-                        "frequences": frequences,
-                        "retards": retards,
-                        "top_chauds": top_chauds,
-                        "top_froids": top_froids,
-                    },
-                    "error": None,
-                }
-            else:
-                # EM: also compute etoiles
+            freq_etoiles = ecart_etoiles = None
+            if game != ValidGame.loto:
                 freq_etoiles = await svc._get_all_frequencies(cursor, "etoile")
-                frequences_etoiles = {str(num): freq_etoiles.get(num, 0) for num in range(1, 13)}
                 ecart_etoiles = await svc._get_all_ecarts(cursor, "etoile")
-                retards_etoiles = {str(num): ecart_etoiles.get(num, total_tirages) for num in range(1, 13)}
-
-                sorted_etoiles = sorted(
-                    [(int(k), v) for k, v in frequences_etoiles.items()],
-                    key=lambda x: x[1], reverse=True,
-                )
-                top_chauds_etoiles = [{"numero": n, "freq": f} for n, f in sorted_etoiles[:3]]
-                top_froids_etoiles = [{"numero": n, "freq": f} for n, f in sorted_etoiles[-3:]]
-
-                return {
-                    "success": True,
-                    "data": {
-                        "total_tirages": total_tirages,
-                        "periode": {"debut": date_min, "fin": date_max},
-                        "frequences_boules": frequences,
-                        "retards_boules": retards,
-                        "frequences_etoiles": frequences_etoiles,
-                        "retards_etoiles": retards_etoiles,
-                        "top_chauds_boules": top_chauds,
-                        "top_froids_boules": top_froids,
-                        "top_chauds_etoiles": top_chauds_etoiles,
-                        "top_froids_etoiles": top_froids_etoiles,
-                    },
-                    "error": None,
-                }
+
+        return _stats_body(game, cfg, total_tirages, date_min, date_max,
+                           freq_map, ecart_map, freq_etoiles, ecart_etoiles)
 
     except Exception as e:
         logger.error(f"Erreur /api/{cfg.slug}/stats: {e}")
@@ -307,12 +517,53 @@ async def unified_stats(request: Request, game: ValidGame):
 # Numbers Heat
 # =========================
 
+def _heat_body(game, cfg, total, freq_boules, last_dates_boules,
+               freq_etoiles=None, last_dates_etoiles=None) -> dict:
+    """Payload /numbers-heat (loto vs EM) — shared by the SQL path and the draw store snapshot."""
+    boules_data, seuil_chaud_b, seuil_froid_b = _heat_numbers(
+        freq_boules, last_dates_boules, cfg.num_range[1],
+    )
+    if game == ValidGame.loto:
+        return {
+            "success": True,
+            "numbers": boules_data,
+            "total_tirages": total,
+            "seuils": {"chaud": seuil_chaud_b, "froid": seuil_froid_b},
+        }
+
+    etoiles_data, seuil_chaud_e, seuil_froid_e = _heat_numbers(freq_etoiles, last_dates_etoiles, 12)
+    return {
+        "success": True,
+        "boules": boules_data,
+        "etoiles": etoiles_data,
+        "total_tirages": total,
+        "seuils_boules": {"chaud": seuil_chaud_b, "froid": seuil_froid_b},
+        "seuils_etoiles": {"chaud": seuil_chaud_e, "froid": seuil_froid_e},
+    }
+
+
+def _render_heat(game, cfg):
+    """render(snap) of the /numbers-heat response snapshot."""
+    def render(snap):
+        freq_boules, _, last_boules = _snapshot_maps(snap, cfg.num_range[1])
+        freq_etoiles = last_etoiles = None
+        if game != ValidGame.loto:
+            freq_etoiles, _, last_etoiles = _snapshot_maps(snap, 12, secondary=True)
+        return _heat_body(game, cfg, len(snap), freq_boules, last_boules, freq_etoiles, last_etoiles)
+    return render
+
+
 @router.get("/numbers-heat")
 @limiter.limit("60/minute")
+@coalesce
 async def unified_numbers_heat(request: Request, game: ValidGame):
     cfg = get_config(game)
     svc = get_stats_service(cfg)
     try:
+        snapshot = await _snapshot_response(request, cfg, "numbers-heat", _render_heat(game, cfg))
+        if snapshot is not None:
+            return snapshot
+
         async with db_cloudsql.get_connection() as conn:
             cursor = await conn.cursor()
 
@@ -322,7 +573,6 @@ async def unified_numbers_heat(request: Request, game: ValidGame):
             # --- Boules ---
             type_principal = "principal" if game == ValidGame.loto else "boule"
             freq_boules = await svc._get_all_frequencies(cursor, type_principal)
-            num_max = cfg.num_range[1] + 1
 
             await cursor.execute(f"""
                 SELECT num, MAX(date_de_tirage) as last_date FROM (
@@ -335,33 +585,8 @@ async def unified_numbers_heat(request: Request, game: ValidGame):
             """)
             last_dates_boules = {row['num']: row['last_date'] for row in await cursor.fetchall()}
 
-            boules_data = {}
-            boules_freqs = []
-            for num in range(1, num_max):
-                freq = freq_boules.get(num, 0)
-                last_d = last_dates_boules.get(num)
-                boules_data[num] = {"frequency": freq, "last_draw": str(last_d) if last_d else None}
-                boules_freqs.append(freq)
-
-            boules_freqs.sort(reverse=True)
-            seuil_chaud_b = boules_freqs[len(boules_freqs) // 3]
-            seuil_froid_b = boules_freqs[2 * len(boules_freqs) // 3]
-            for num in range(1, num_max):
-                freq = boules_data[num]["frequency"]
-                if freq >= seuil_chaud_b:
-                    boules_data[num]["category"] = "hot"
-                elif freq <= seuil_froid_b:
-                    boules_data[num]["category"] = "cold"
-                else:
-                    boules_data[num]["category"] = "neutral"
-
             if game == ValidGame.loto:
-                return {
-                    "success": True,
-                    "numbers": boules_data,
-                    "total_tirages": total,
-                    "seuils": {"chaud": seuil_chaud_b, "froid": seuil_froid_b},
-                }
+                return _heat_body(game, cfg, total, freq_boules, last_dates_boules)
 
             # --- Etoiles (EM only) ---
             freq_etoiles = await svc._get_all_frequencies(cursor, "etoile")
@@ -373,34 +598,8 @@ async def unified_numbers_heat(request: Request, game: ValidGame):
             """)
             last_dates_etoiles = {row['num']: row['last_date'] for row in await cursor.fetchall()}
 
-            etoiles_data = {}
-            etoiles_freqs = []
-            for num in range(1, 13):
-                freq = freq_etoiles.get(num, 0)
-                last_d = last_dates_etoiles.get(num)
-                etoiles_data[num] = {"frequency": freq, "last_draw": str(last_d) if last_d else None}
-                etoiles_freqs.append(freq)
-
-            etoiles_freqs.sort(reverse=True)
-            seuil_chaud_e = etoiles_freqs[len(etoiles_freqs) // 3]
-            seuil_froid_e = etoiles_freqs[2 * len(etoiles_freqs) // 3]
-            for num in range(1, 13):
-                freq = etoiles_data[num]["frequency"]
-                if freq >= seuil_chaud_e:
-                    etoiles_data[num]["category"] = "hot"
-                elif freq <= seuil_froid_e:
-                    etoiles_data[num]["category"] = "cold"
-                else:
-                    etoiles_data[num]["category"] = "neutral"
-
-            return {
-                "success": True,
-                "boules": boules_data,
-                "etoiles": etoiles_data,
-                "total_tirages": total,
-                "seuils_boules": {"chaud": seuil_chaud_b, "froid": seuil_froid_b},
-                "seuils_etoiles": {"chaud": seuil_chaud_e, "froid": seuil_froid_e},
-            }
+        return _heat_body(game, cfg, total, freq_boules, last_dates_boules,
+                          freq_etoiles, last_dates_etoiles)
 
     except Exception as e:
         logger.error(f"Erreur /api/{cfg.slug}/numbers-heat: {e}")
@@ -419,6 +618,7 @@ async def unified_numbers_heat(request: Request, game: ValidGame):
 
 @router.get("/draw/{date}")
 @limiter.limit("60/minute")
+@coalesce
 async def unified_draw_by_date(request: Request, game: ValidGame, date: str):
     cfg = get_config(game)
     try:
@@ -471,8 +671,37 @@ async def unified_draw_by_date(request: Request, game: ValidGame, date: str):
 # Stats number
 # =========================
 
+async def _number_history(cfg, number: int, columns: tuple) -> tuple[list[str], int]:
+    """(appearance dates ASC as str, current gap) of a number drawn in `columns`
+    (boules or étoiles). Draw store loaded → NumberStats row, else SQL."""
+    index = get_number_stats(get_engine(cfg).cfg.game)
+    if index is not None:
+        row = index.number(number, secondary=columns[0].startswith("etoile"))
+        return [str(d) for d in row.dates], row.current_gap
+
+    async with db_cloudsql.get_connection() as conn:
+        cursor = await conn.cursor()
+        await cursor.execute(f"""
+            SELECT date_de_tirage FROM {cfg.table}
+            WHERE {" OR ".join(f"{col} = %s" for col in columns)}
+            ORDER BY date_de_tirage ASC
+        """, (number,) * len(columns))
+        appearance_dates = [str(r['date_de_tirage']) for r in await cursor.fetchall()]
+
+        current_gap = 0
+        if appearance_dates:
+            await cursor.execute(f"""
+                SELECT COUNT(*) as gap FROM {cfg.table}
+                WHERE date_de_tirage > %s
+            """, (appearance_dates[-1],))
+            gap_result = await cursor.fetchone()
+            current_gap = gap_result['gap'] if gap_result else 0
+    return appearance_dates, current_gap
+
+
 @router.get("/stats/number/{number}")
 @limiter.limit("60/minute")
+@coalesce
 async def unified_stats_number(request: Request, game: ValidGame, number: int):
     cfg = get_config(game)
     try:
@@ -482,28 +711,11 @@ async def unified_stats_number(request: Request, game: ValidGame, number: int):
                 "message": f"Numéro doit être entre {cfg.num_range[0]} et {cfg.num_range[1]}",
             })
 
-        async with db_cloudsql.get_connection() as conn:
-            cursor = await conn.cursor()
-            await cursor.execute(f"""
-                SELECT date_de_tirage FROM {cfg.table}
-                WHERE boule_1 = %s OR boule_2 = %s OR boule_3 = %s
-                   OR boule_4 = %s OR boule_5 = %s
-                ORDER BY date_de_tirage ASC
-            """, (number, number, number, number, number))
-            results = await cursor.fetchall()
-            appearance_dates = [str(r['date_de_tirage']) for r in results]
-            total_appearances = len(appearance_dates)
-            first_appearance = appearance_dates[0] if appearance_dates else None
-            last_appearance = appearance_dates[-1] if appearance_dates else None
-
-            current_gap = 0
-            if last_appearance:
-                await cursor.execute(f"""
-                    SELECT COUNT(*) as gap FROM {cfg.table}
-                    WHERE date_de_tirage > %s
-                """, (last_appearance,))
-                gap_result = await cursor.fetchone()
-                current_gap = gap_result['gap'] if gap_result else 0
+        appearance_dates, current_gap = await _number_history(cfg, number, (
+            "boule_1", "boule_2", "boule_3", "boule_4", "boule_5"))
+        total_appearances = len(appearance_dates)
+        first_appearance = appearance_dates[0] if appearance_dates else None
+        last_appearance = appearance_dates[-1] if appearance_dates else None
 
         # === V141 A.5 — Délégation partielle pour 3 nouvelles metrics ===
         # SQL inline ci-dessus PRESERVÉ (rétrocompat 8 clés legacy).
@@ -559,6 +771,7 @@ async def unified_stats_number(request: Request, game: ValidGame, number: int):
 
 @router.get("/stats/etoile/{number}")
 @limiter.limit("60/minute")
+@coalesce
 async def unified_stats_etoile(request: Request, game: ValidGame, number: int):
     if game != ValidGame.euromillions:
         raise HTTPException(status_code=404, detail="Route disponible uniquement pour EuroMillions")
@@ -570,27 +783,10 @@ async def unified_stats_etoile(request: Request, game: ValidGame, number: int):
                 "success": False, "message": "Etoile doit etre entre 1 et 12"
             })
 
-        async with db_cloudsql.get_connection() as conn:
-            cursor = await conn.cursor()
-            await cursor.execute(f"""
-                SELECT date_de_tirage FROM {cfg.table}
-                WHERE etoile_1 = %s OR etoile_2 = %s
-                ORDER BY date_de_tirage ASC
-            """, (number, number))
-            results = await cursor.fetchall()
-            appearance_dates = [str(r['date_de_tirage']) for r in results]
-            total_appearances = len(appearance_dates)
-            first_appearance = appearance_dates[0] if appearance_dates else None
-            last_appearance = appearance_dates[-1] if appearance_dates else None
-
-            current_gap = 0
-            if last_appearance:
-                await cursor.execute(f"""
-                    SELECT COUNT(*) as gap FROM {cfg.table}
-                    WHERE date_de_tirage > %s
-                """, (last_appearance,))
-                gap_result = await cursor.fetchone()
-                current_gap = gap_result['gap'] if gap_result else 0
+        appearance_dates, current_gap = await _number_history(cfg, number, ("etoile_1", "etoile_2"))
+        total_appearances = len(appearance_dates)
+        first_appearance = appearance_dates[0] if appearance_dates else None
+        last_appearance = appearance_dates[-1] if appearance_dates else None
 
         # === V141 A.5 — Délégation partielle (étoile EM, type_num="etoile") ===
         try:
@@ -639,37 +835,51 @@ async def unified_stats_etoile(request: Request, game: ValidGame, number: int):
 # Top / Flop
 # =========================
 
+def _top_flop_body(game, cfg, freq_map, freq_etoiles=None) -> dict:
+    """Payload /stats/top-flop (loto vs EM) — shared by the SQL path and the draw store snapshot."""
+    top, flop = _top_flop(freq_map, cfg.num_range[1])
+    if game == ValidGame.loto:
+        return {"success": True, "top": top, "flop": flop}
+
+    top_etoiles, flop_etoiles = _top_flop(freq_etoiles, 12)
+    return {
+        "success": True,
+        "top_boules": top, "flop_boules": flop,
+        "top_etoiles": top_etoiles, "flop_etoiles": flop_etoiles,
+    }
+
+
+def _render_top_flop(game, cfg):
+    """render(snap) of the /stats/top-flop response snapshot."""
+    def render(snap):
+        freq_map, _, _ = _snapshot_maps(snap, cfg.num_range[1])
+        freq_etoiles = None
+        if game != ValidGame.loto:
+            freq_etoiles, _, _ = _snapshot_maps(snap, 12, secondary=True)
+        return _top_flop_body(game, cfg, freq_map, freq_etoiles)
+    return render
+
+
 @router.get("/stats/top-flop")
 @limiter.limit("60/minute")
+@coalesce
 async def unified_stats_top_flop(request: Request, game: ValidGame):
     cfg = get_config(game)
     svc = get_stats_service(cfg)
     try:
+        snapshot = await _snapshot_response(request, cfg, "top-flop", _render_top_flop(game, cfg))
+        if snapshot is not None:
+            return snapshot
+
         async with db_cloudsql.get_connection() as conn:
             cursor = await conn.cursor()
             type_principal = "principal" if game == ValidGame.loto else "boule"
-            num_max = cfg.num_range[1] + 1
-
             freq_map = await svc._get_all_frequencies(cursor, type_principal)
-            numbers_freq = [{"number": num, "count": freq_map.get(num, 0)} for num in range(1, num_max)]
-
-            top = sorted(numbers_freq, key=lambda x: (-x['count'], x['number']))
-            flop = sorted(numbers_freq, key=lambda x: (x['count'], x['number']))
-
-            if game == ValidGame.loto:
-                return {"success": True, "top": top, "flop": flop}
-
-            # EM: also compute etoiles
-            freq_etoiles = await svc._get_all_frequencies(cursor, "etoile")
-            etoiles_freq = [{"number": num, "count": freq_etoiles.get(num, 0)} for num in range(1, 13)]
-            top_etoiles = sorted(etoiles_freq, key=lambda x: (-x['count'], x['number']))
-            flop_etoiles = sorted(etoiles_freq, key=lambda x: (x['count'], x['number']))
+            freq_etoiles = None
+            if game != ValidGame.loto:
+                freq_etoiles = await svc._get_all_frequencies(cursor, "etoile")
 
-            return {
-                "success": True,
-                "top_boules": top, "flop_boules": flop,
-                "top_etoiles": top_etoiles, "flop_etoiles": flop_etoiles,
-            }
+        return _top_flop_body(game, cfg, freq_map, freq_etoiles)
 
     except Exception as e:
         logger.error(f"Erreur /api/{cfg.slug}/stats/top-flop: {e}")
@@ -684,6 +894,7 @@ async def unified_stats_top_flop(request: Request, game: ValidGame):
 
 @router.get("/stats/pairs")
 @limiter.limit("60/minute")
+@coalesce
 async def unified_stats_pairs(
     request: Request, game: ValidGame,
     top_n: int = Query(default=10, ge=1, le=50),
@@ -718,6 +929,7 @@ async def unified_stats_pairs(
 
 @router.get("/stats/pair")
 @limiter.limit("60/minute")
+@coalesce
 async def unified_stats_single_pair(
     request: Request, game: ValidGame,
     n1: int = Query(..., ge=1, le=50),
@@ -742,6 +954,7 @@ async def unified_stats_single_pair(
 
 @router.get("/stats/star-pair")
 @limiter.limit("60/minute")
+@coalesce
 async def unified_stats_single_star_pair(
     request: Request, game: ValidGame,
     s1: int = Query(..., ge=1, le=12),
@@ -770,6 +983,7 @@ async def unified_stats_single_star_pair(
 
 @router.get("/stats/pair-draws")
 @limiter.limit("30/minute")
+@coalesce
 async def unified_stats_pair_draws(
     request: Request, game: ValidGame,
     n1: int = Query(..., ge=1, le=50),
@@ -794,6 +1008,7 @@ async def unified_stats_pair_draws(
 
 @router.get("/stats/star-pair-draws")
 @limiter.limit("30/minute")
+@coalesce
 async def unified_stats_star_pair_draws(
     request: Request, game: ValidGame,
     s1: int = Query(..., ge=1, le=12),
@@ -822,6 +1037,7 @@ async def unified_stats_star_pair_draws(
 
 @router.get("/stats/triplets")
 @limiter.limit("60/minute")
+@coalesce
 async def unified_stats_triplets(
     request: Request, game: ValidGame,
     top_n: int = Query(default=10, ge=1, le=50),
@@ -846,6 +1062,7 @@ async def unified_stats_triplets(
 
 @router.get("/hybride-stats")
 @limiter.limit("60/minute")
+@coalesce
 async def unified_hybride_stats(
     request: Request, game: ValidGame,
     numero: int = Query(..., description="Numero a analyser"),
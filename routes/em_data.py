@@ -4,6 +4,7 @@ Thin wrappers delegating to unified routes.
 """
 
 from fastapi import APIRouter, Query, Request
+from typing import Optional
 from rate_limit import limiter
 from config.games import ValidGame
 from routes.api_data_unified import (
@@ -37,8 +38,9 @@ async def em_tirages_list(
     request: Request,
     limit: int = Query(default=10, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
+    before: Optional[str] = Query(default=None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
 ):
-    return await unified_tirages_list(request=request, game=_EM, limit=limit, offset=offset)
+    return await unified_tirages_list(request=request, game=_EM, limit=limit, offset=offset, before=before)
 
 
 @router.get("/database-info")
@@ -6,6 +6,8 @@ site rating detection. Split from base_chat_detectors.py (V70 F10).
 
 import re
 
+from services.intent_router import merge_patterns, merge_phrases, merge_words
+
 _INSULTE_MOTS = {
     # FR
     "connard", "connards", "connasse", "connasses",
@@ -129,6 +131,13 @@ _MENACE_PATTERNS = [
 ]
 
 
+# Listes compilées en une alternance (1 parcours du message, cf. services.intent_router)
+_MENACE_RE = merge_patterns(_MENACE_PATTERNS)
+_INSULTE_RE = merge_patterns([*_INSULTE_PHRASES, merge_words(_INSULTE_MOTS).pattern])
+_DOTTED_RE = re.compile(r'(?<=\w)\.(?=\w)')
+_TES_RE = re.compile(r'\btes\b')
+
+
 def _insult_targets_bot(message: str) -> bool:
     """Verifie si l'insulte vise le bot (True) ou le Loto/FDJ (False)."""
     bot_words = (
@@ -163,26 +172,17 @@ def _detect_insulte(message: str):
     lower = message.lower()
     # Normalisation basique leet speak
     normalized = lower.replace('0', 'o').replace('1', 'i').replace('3', 'e').replace('@', 'a')
-    normalized = re.sub(r'(?<=\w)\.(?=\w)', '', normalized)
+    normalized = _DOTTED_RE.sub('', normalized)
     # Normalisation apostrophe manquante : "tes nul" → "t'es nul"
-    normalized = re.sub(r'\btes\b', "t'es", normalized)
+    normalized = _TES_RE.sub("t'es", normalized)
 
     # Menaces en priorite
-    for pattern in _MENACE_PATTERNS:
-        if re.search(pattern, normalized):
-            return "menace"
-
-    # Phrases insultantes (plus specifiques, testees en premier)
-    for pattern in _INSULTE_PHRASES:
-        if re.search(pattern, normalized):
-            if _insult_targets_bot(normalized):
-                return "directe"
-
-    # Mots insultes individuels (word boundary)
-    for mot in _INSULTE_MOTS:
-        if re.search(r'\b' + re.escape(mot) + r'\b', normalized):
-            if _insult_targets_bot(normalized):
-                return "directe"
+    if _MENACE_RE.search(normalized):
+        return "menace"
+
+    # Phrases insultantes + mots insultes individuels (word boundary)
+    if _INSULTE_RE.search(normalized) and _insult_targets_bot(normalized):
+        return "directe"
 
     return None
 
@@ -283,6 +283,18 @@ _COMPLIMENT_SOLO_WORDS = {
 }
 
 
+_COMPLIMENT_LOVE_RE = merge_phrases(_COMPLIMENT_LOVE_PHRASES)
+_COMPLIMENT_RE = merge_phrases(_COMPLIMENT_PHRASES)
+_MERCI_STARTS = ("merci", "thanks", "thank you", "gracias", "obrigado", "obrigada", "danke", "bedankt", "dank je")
+_MERCI_RE = merge_phrases((
+    "je vous remercie", "je te remercie", "je remercie",
+    "i appreciate", "thank you very much", "thanks so much",
+    "muchas gracias", "muito obrigado", "muito obrigada",
+    "vielen dank", "heel erg bedankt", "hartelijk dank",
+))
+_WORD_RE = re.compile(r'\w+')
+
+
 def _compliment_targets_bot(message: str) -> bool:
     """Verifie si le compliment vise le bot (True) ou le Loto/FDJ (False)."""
     lower = message.lower()
@@ -315,37 +327,20 @@ def _detect_compliment(message: str):
     """
     lower = message.lower().strip()
     # Normalisation apostrophe manquante : "tes génial" → "t'es génial"
-    lower = re.sub(r'\btes\b', "t'es", lower)
+    lower = _TES_RE.sub("t'es", lower)
 
     # Declaration affective
-    for phrase in _COMPLIMENT_LOVE_PHRASES:
-        if phrase in lower:
-            return "love"
+    if _COMPLIMENT_LOVE_RE.search(lower):
+        return "love"
 
     # Remerciement simple (court ou phrase de remerciement)
-    _merci_starts = ("merci", "thanks", "thank you", "gracias", "obrigado", "obrigada", "danke", "bedankt", "dank je")
-    _merci_phrases = (
-        "je vous remercie", "je te remercie", "je remercie",
-        "i appreciate", "thank you very much", "thanks so much",
-        "muchas gracias", "muito obrigado", "muito obrigada",
-        "vielen dank", "heel erg bedankt", "hartelijk dank",
-    )
-    if any(lower.startswith(m) for m in _merci_starts) and len(lower) < 80:
-        return "merci"
-    if any(p in lower for p in _merci_phrases) and len(lower) < 80:
+    if len(lower) < 80 and (lower.startswith(_MERCI_STARTS) or _MERCI_RE.search(lower)):
         return "merci"
 
-    # Phrases complimentaires
-    for phrase in _COMPLIMENT_PHRASES:
-        if phrase in lower:
-            if _compliment_targets_bot(lower):
-                return "compliment"
-
-    # Mots isolés (fallback)
-    words = set(re.findall(r'\w+', lower))
-    if words & _COMPLIMENT_SOLO_WORDS:
-        if _compliment_targets_bot(lower):
-            return "compliment"
+    # Phrases complimentaires, puis mots isolés (fallback)
+    if (_COMPLIMENT_RE.search(lower) or not _COMPLIMENT_SOLO_WORDS.isdisjoint(_WORD_RE.findall(lower))) \
+            and _compliment_targets_bot(lower):
+        return "compliment"
 
     return None
 
@@ -7,6 +7,8 @@ Split from base_chat_detect_intent.py (F05 V84).
 import re
 from datetime import date, timedelta
 
+from services.intent_router import merge_patterns
+
 # ────────────────────────────────────────────
 # Phase T : Detection tirage (date / dernier)
 # ────────────────────────────────────────────
@@ -516,10 +518,12 @@ _TEMPORAL_PATTERNS = [
 ]
 
 
+_TEMPORAL_RE = merge_patterns(_TEMPORAL_PATTERNS)
+
+
 def _has_temporal_filter(message: str) -> bool:
     """Detecte si le message contient un filtre temporel (annee, mois, periode)."""
-    lower = message.lower()
-    return any(re.search(pat, lower) for pat in _TEMPORAL_PATTERNS)
+    return bool(_TEMPORAL_RE.search(message.lower()))
 
 
 # Patterns d'extraction temporelle (nombre + unite) — 6 langues
@@ -10,7 +10,10 @@ import logging
 import aiomysql
 
 import db_cloudsql
+from config.engine import CHAT_SQL_LOCAL_ENABLED
 from services.base_chat_utils import _format_date_fr
+from services.draw_sql import answer_from_draw_store
+from services.sql_ast import SqlSyntaxError, check_query, clamp_limit, parse_sql
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +48,18 @@ ALLOWED_TABLES_EM = frozenset({"tirages_euromillions"})
 # S13 V94: capture table names with or without backticks
 _TABLE_RE = re.compile(r"(?:FROM|JOIN)\s+(?!\()(?:`(\w+)`|(\w+))", re.IGNORECASE)
 
+# Whitelist colonnes (AST) : DESCRIBE des tables au boot
+# (chat_pipeline_gemini._build_schema_whitelist). Vide = colonnes non vérifiées
+# (boot pas encore exécuté, ou DESCRIBE en échec : la liste statique de repli
+# rejetterait des colonnes réelles).
+_ALLOWED_COLUMNS: frozenset[str] = frozenset()
+
+
+def set_allowed_columns(columns) -> None:
+    """Colonnes autorisées dans le SQL généré (noms en minuscules)."""
+    global _ALLOWED_COLUMNS
+    _ALLOWED_COLUMNS = frozenset(c.lower() for c in columns)
+
 # F04: single source of truth for French weekday names (shared Loto + EM)
 _JOURS_FR = {
     0: "lundi", 1: "mardi", 2: "mercredi", 3: "jeudi",
@@ -113,6 +128,18 @@ def _validate_sql(sql: str, *, allowed_tables: frozenset[str]) -> bool:
             logger.warning("[TEXT2SQL] Unauthorized table '%s' in SQL: %s", tbl, sql[:200])
             return False
 
+    # AST : sous-ensemble lecture seule — tables / colonnes / fonctions whitelistées,
+    # y compris dans les sous-requêtes et tables dérivées
+    try:
+        query = parse_sql(sql)
+    except SqlSyntaxError as e:
+        logger.warning("[TEXT2SQL] Unparsable SQL (%s): %s", e, sql[:200])
+        return False
+    reason = check_query(query, allowed_tables=allowed_tables, allowed_columns=_ALLOWED_COLUMNS)
+    if reason:
+        logger.warning("[TEXT2SQL] Unauthorized %s in SQL: %s", reason, sql[:200])
+        return False
+
     return True
 
 
@@ -124,7 +151,16 @@ _LIMIT_RE = re.compile(
 
 
 def _ensure_limit(sql: str, max_limit: int = 20) -> str:
-    """Ajoute LIMIT si absent, plafonne a max_limit si present."""
+    """Ajoute LIMIT si absent, plafonne a max_limit si present.
+
+    LIMIT de la requete principale (AST) : les LIMIT d'une sous-requete
+    (« 200 derniers tirages » dans un UNION ALL) restent intacts. Regex sur le
+    premier LIMIT trouve si le SQL ne parse pas.
+    """
+    try:
+        return clamp_limit(sql, max_limit)
+    except SqlSyntaxError:
+        pass
     m = _LIMIT_RE.search(sql)
     if not m:
         return sql.rstrip() + f" LIMIT {max_limit}"
@@ -205,6 +241,12 @@ async def _execute_safe_sql(sql: str, *, allowed_tables: frozenset[str]) -> list
         logger.warning("[TEXT2SQL] _execute_safe_sql rejected unvalidated SQL: %s", sql[:100])
         return None
     sql = _ensure_limit(sql)  # F02 V74: defense-in-depth — cap LIMIT even if caller forgot
+    # Formes simples (comptages, fréquences, dernière sortie) : draw store en mémoire
+    if CHAT_SQL_LOCAL_ENABLED:
+        rows = answer_from_draw_store(sql)
+        if rows is not None:
+            logger.info("[TEXT2SQL] answered from draw store (%d rows): %s", len(rows), sql[:100])
+            return rows
     try:
         async with db_cloudsql.get_connection_readonly() as conn:
             cursor = await conn.cursor()
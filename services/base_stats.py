@@ -5,9 +5,14 @@ Config-driven methods + overridable hooks for game-specific SQL.
 
 import logging
 from dataclasses import dataclass
-from datetime import timedelta
-
-from services.cache import cache_get, cache_set
+from datetime import date, timedelta
+
+from services.cache import DEFAULT_TTL, cached
+from services.draw_store import get_draw_snapshot, get_draw_store
+from services.cooccurrence import get_cooccurrence
+from services.grid_index import get_grid_index
+from services.number_stats import get_number_stats
+from services.window_stats import WindowStats
 from config.i18n import _badges
 
 logger = logging.getLogger(__name__)
@@ -31,6 +36,7 @@ class GameConfig:
     secondary_key: str           # "chance" | "etoiles"
     secondary_match_key: str     # "chance_match" | "etoiles_match"
     secondary_label: str         # "Chance" | "Étoiles"
+    draw_store_game: str = ""    # "loto" | "em" — in-process draw store (services.draw_store)
 
 
 class BaseStatsService:
@@ -86,26 +92,83 @@ class BaseStatsService:
         """Extract secondary number match from best_match row. Default: False."""
         return False
 
+    def _index_secondary(self, secondary):
+        """Secondary numbers filtered/ranked on by the GridIndex path (same
+        semantics as the two SQL hooks above). Default: None (boules only)."""
+        return None
+
     # ──────────────────────────────────────
     # Helpers BDD (avec cache)
     # ──────────────────────────────────────
 
+    def _window_stats(self, date_from=None):
+        """WindowStats (1 window: date >= date_from) on the in-process draw store.
+        None if the store is not loaded → SQL path."""
+        if not self.cfg.draw_store_game:
+            return None
+        snap = get_draw_snapshot(self.cfg.draw_store_game)
+        if snap is None or not len(snap):
+            return None
+        return WindowStats(snap, [date_from], get_draw_store(self.cfg.draw_store_game).cfg)
+
+    def _grid_index(self):
+        """GridIndex (bitmask matching) on the draw store. None → SQL path."""
+        if not self.cfg.draw_store_game:
+            return None
+        return get_grid_index(self.cfg.draw_store_game)
+
+    def _number_stats(self):
+        """NumberStats (per-number rows) on the draw store. None → SQL path."""
+        if not self.cfg.draw_store_game:
+            return None
+        return get_number_stats(self.cfg.draw_store_game)
+
+    def _cooccurrence(self):
+        """CooccurrenceIndex (pairs / triplets / star pairs) on the draw store. None → SQL path."""
+        if not self.cfg.draw_store_game:
+            return None
+        return get_cooccurrence(self.cfg.draw_store_game)
+
+    @staticmethod
+    def _window_start(snap, window):
+        """Index of the 1st draw of window "NA" (date >= MAX(date) - 365*N days), 0 = global."""
+        if not window:
+            return 0
+        years = int(window.replace("A", ""))
+        return snap.window_start(snap.reference_date() - timedelta(days=365 * years))
+
+    async def _on_own_connection(self, load, *args):
+        """Refresh de fond cached() : détaché de la requête, dont la connexion
+        a pu retourner au pool → load(cursor, *args) sur une connexion dédiée."""
+        async with self._get_connection() as conn:
+            return await load(await conn.cursor(), *args)
+
     async def _get_all_frequencies(self, cursor, type_num=None, date_from=None):
         """
         Calcule la frequence de TOUS les numeros en UNE seule requete SQL.
         Retourne un dict {numero: frequence}.
         Resultat mis en cache 1 h (sauf si date_from est fourni).
+        Miss : calcul sur le curseur de l'appelant ; refresh de fond : sa
+        propre connexion (_on_own_connection).
         """
         if type_num is None:
             type_num = self.cfg.type_principal
         if type_num not in self._allowed_types:
             raise ValueError(f"type_num invalide: {type_num}")
 
-        cache_key = f"{self.cfg.cache_prefix}freq:{type_num}:{date_from}"
-        cached = await cache_get(cache_key)
-        if cached is not None:
-            return cached
+        stats = self._window_stats(date_from)
+        if stats is not None:
+            counts = stats.counts(0, secondary=type_num != self.cfg.type_principal).tolist()
+            return {num: c for num, c in enumerate(counts) if c > 0}
+
+        return await cached(
+            f"{self.cfg.cache_prefix}freq:{type_num}:{date_from}", DEFAULT_TTL,
+            lambda: self._load_frequencies(cursor, type_num, date_from),
+            refresh_loader=lambda: self._on_own_connection(self._load_frequencies, type_num, date_from),
+        )
 
+    async def _load_frequencies(self, cursor, type_num, date_from):
+        """Calcul SQL de _get_all_frequencies (loader cached())."""
         if type_num == self.cfg.type_principal:
             if date_from:
                 date_filter = "WHERE date_de_tirage >= %s"
@@ -160,7 +223,6 @@ class BaseStatsService:
                 """, params)
 
         result = {row['num']: row['freq'] for row in await cursor.fetchall()}
-        await cache_set(cache_key, result)
         return result
 
     async def _get_all_ecarts(self, cursor, type_num=None):
@@ -172,11 +234,22 @@ class BaseStatsService:
         if type_num is None:
             type_num = self.cfg.type_principal
 
-        cache_key = f"{self.cfg.cache_prefix}ecarts:{type_num}"
-        cached = await cache_get(cache_key)
-        if cached is not None:
-            return cached
+        r_min, r_max = (self.cfg.range_principal if type_num == self.cfg.type_principal
+                        else self.cfg.range_secondary)
+
+        stats = self._window_stats()
+        if stats is not None:
+            lags = stats.lags(0, secondary=type_num != self.cfg.type_principal).tolist()
+            return {num: lags[num] for num in range(r_min, r_max + 1)}
 
+        return await cached(
+            f"{self.cfg.cache_prefix}ecarts:{type_num}", DEFAULT_TTL,
+            lambda: self._load_ecarts(cursor, type_num, r_min, r_max),
+            refresh_loader=lambda: self._on_own_connection(self._load_ecarts, type_num, r_min, r_max),
+        )
+
+    async def _load_ecarts(self, cursor, type_num, r_min, r_max):
+        """Calcul SQL de _get_all_ecarts (loader cached())."""
         await cursor.execute(f"SELECT COUNT(*) as total FROM {self.cfg.table}")
         total = (await cursor.fetchone())['total']
 
@@ -229,13 +302,10 @@ class BaseStatsService:
 
         ecarts = {row['num']: row['ecart'] for row in await cursor.fetchall()}
 
-        r_min, r_max = (self.cfg.range_principal if type_num == self.cfg.type_principal
-                        else self.cfg.range_secondary)
         for num in range(r_min, r_max + 1):
             if num not in ecarts:
                 ecarts[num] = total
 
-        await cache_set(cache_key, ecarts)
         return ecarts
 
     # ──────────────────────────────────────
@@ -261,6 +331,14 @@ class BaseStatsService:
         if not r_min <= numero <= r_max:
             return None
 
+        index = self._number_stats()
+        if index is not None:
+            try:
+                return await self._numero_stats_indexed(index, numero, type_num, r_max)
+            except Exception as e:
+                logger.error(f"Erreur get_numero_stats{self.cfg.log_label} ({numero}, {type_num}): {e}")
+                return None
+
         async with self._get_connection() as conn:
           try:
             cursor = await conn.cursor()
@@ -329,23 +407,51 @@ class BaseStatsService:
 
             date_2ans = date_max - timedelta(days=730)
             freq_2ans_map = await self._get_all_frequencies(cursor, type_num, date_from=date_2ans)
-            freq_2ans = freq_2ans_map.get(numero, 0)
-            all_freq_2ans = sorted(freq_2ans_map.values(), reverse=True)
-            tiers = len(all_freq_2ans) // 3
-            seuil_chaud = all_freq_2ans[tiers] if tiers < len(all_freq_2ans) else 0
-            seuil_froid = all_freq_2ans[2 * tiers] if 2 * tiers < len(all_freq_2ans) else 0
-
-            if freq_2ans >= seuil_chaud:
-                categorie = "chaud"
-            elif freq_2ans <= seuil_froid:
-                categorie = "froid"
-            else:
-                categorie = "neutre"
+            categorie = self._categorie(freq_2ans_map, numero)
 
           except Exception as e:
             logger.error(f"Erreur get_numero_stats{self.cfg.log_label} ({numero}, {type_num}): {e}")
             return None
 
+        return self._numero_payload(
+            numero, type_num, frequence_totale, total_tirages, derniere_sortie, ecart_actuel,
+            ecart_moyen, classement, classement_sur, categorie, date_min, date_max,
+        )
+
+    async def _numero_stats_indexed(self, index, numero, type_num, r_max) -> dict:
+        """get_numero_stats() on NumberStats: row lookup, no SQL."""
+        secondary = type_num != self.cfg.type_principal
+        row = index.number(numero, secondary=secondary)
+        snap = index.snapshot
+        date_min, date_max = snap.dates[0].astype(date), snap.reference_date()
+        classement = 1 + int((index.appearances(secondary) > row.appearances).sum())
+        freq_2ans_map = await self._get_all_frequencies(
+            None, type_num, date_from=date_max - timedelta(days=730))
+        return self._numero_payload(
+            numero, type_num, row.appearances, len(index), row.last, row.current_gap,
+            round(row.mean_gap, 1), classement, r_max, self._categorie(freq_2ans_map, numero),
+            date_min, date_max,
+        )
+
+    @staticmethod
+    def _categorie(freq_2ans_map: dict, numero: int) -> str:
+        """chaud / neutre / froid : tiers of the last-2-years frequencies."""
+        freq_2ans = freq_2ans_map.get(numero, 0)
+        all_freq_2ans = sorted(freq_2ans_map.values(), reverse=True)
+        tiers = len(all_freq_2ans) // 3
+        seuil_chaud = all_freq_2ans[tiers] if tiers < len(all_freq_2ans) else 0
+        seuil_froid = all_freq_2ans[2 * tiers] if 2 * tiers < len(all_freq_2ans) else 0
+
+        if freq_2ans >= seuil_chaud:
+            return "chaud"
+        if freq_2ans <= seuil_froid:
+            return "froid"
+        return "neutre"
+
+    @staticmethod
+    def _numero_payload(numero, type_num, frequence_totale, total_tirages, derniere_sortie,
+                        ecart_actuel, ecart_moyen, classement, classement_sur, categorie,
+                        date_min, date_max) -> dict:
         pourcentage = round(frequence_totale / total_tirages * 100, 2) if total_tirages else 0
 
         return {
@@ -379,9 +485,13 @@ class BaseStatsService:
         async with self._get_connection() as conn:
           try:
             cursor = await conn.cursor()
+            index = self._grid_index()
 
-            await cursor.execute(f"SELECT COUNT(*) as total FROM {self.cfg.table}")
-            total_tirages = (await cursor.fetchone())['total']
+            if index is not None:
+                total_tirages = len(index)
+            else:
+                await cursor.execute(f"SELECT COUNT(*) as total FROM {self.cfg.table}")
+                total_tirages = (await cursor.fetchone())['total']
 
             freq_map = await self._get_all_frequencies(cursor, self.cfg.type_principal)
             frequencies = [freq_map.get(num, 0) for num in nums]
@@ -394,10 +504,17 @@ class BaseStatsService:
             numeros_froids = [n for n in nums if freq_map.get(n, 0) <= seuil_froid]
             numeros_neutres = [n for n in nums if n not in numeros_chauds and n not in numeros_froids]
 
-            exact_matches = await self._query_exact_matches(cursor, nums, secondary)
-            exact_dates = [str(row['date_de_tirage']) for row in exact_matches]
+            if index is not None:
+                index_secondary = self._index_secondary(secondary)
+                exact_dates = [str(d) for d in index.exact_dates(nums, index_secondary)]
+                best_match = index.best_match(
+                    nums, index_secondary, match_key=self.cfg.secondary_match_key,
+                )
+            else:
+                exact_matches = await self._query_exact_matches(cursor, nums, secondary)
+                exact_dates = [str(row['date_de_tirage']) for row in exact_matches]
 
-            best_match = await self._query_best_match(cursor, nums, secondary)
+                best_match = await self._query_best_match(cursor, nums, secondary)
 
             best_match_numbers = []
             best_match_count = 0
@@ -852,11 +969,31 @@ class BaseStatsService:
         Cache: {prefix}pairs:{window}:{top_n}:{order}, TTL 1h.
         Retour: dict(pairs=[{num_a, num_b, count, percentage, rank}], total_draws, window)
         """
-        cache_key = f"{self.cfg.cache_prefix}pairs:{window}:{top_n}:{order}"
-        cached = await cache_get(cache_key)
-        if cached is not None:
-            return cached
+        index = self._cooccurrence()
+        if index is not None:
+            try:
+                start = self._window_start(index.snapshot, window)
+                total_draws = len(index) - start
+                return {
+                    "pairs": [
+                        {"num_a": a, "num_b": b, "count": c,
+                         "percentage": round(c / total_draws * 100, 1), "rank": rank}
+                        for rank, (a, b, c) in enumerate(index.top_pairs(start, top_n, order), 1)
+                    ],
+                    "total_draws": total_draws,
+                    "window": window,
+                }
+            except Exception as e:
+                logger.error(f"Erreur get_pair_correlations{self.cfg.log_label}: {e}")
+                return None
+
+        return await cached(
+            f"{self.cfg.cache_prefix}pairs:{window}:{top_n}:{order}", DEFAULT_TTL,
+            lambda: self._load_pair_correlations(top_n, window, order),
+        )
 
+    async def _load_pair_correlations(self, top_n, window, order):
+        """Calcul SQL de get_pair_correlations (loader cached())."""
         async with self._get_connection() as conn:
           try:
             cursor = await conn.cursor()
@@ -890,7 +1027,6 @@ class BaseStatsService:
 
             if total_draws == 0:
                 result = {"pairs": [], "total_draws": 0, "window": window}
-                await cache_set(cache_key, result)
                 return result
 
             # 10 UNION ALL for C(5,2) pairs
@@ -939,7 +1075,6 @@ class BaseStatsService:
                 "total_draws": total_draws,
                 "window": window,
             }
-            await cache_set(cache_key, result)
             return result
 
           except Exception as e:
@@ -956,11 +1091,23 @@ class BaseStatsService:
         Returns: dict(n1, n2, count, percentage, rank, total_draws, total_pairs) or None.
         """
         a, b = min(n1, n2), max(n1, n2)
-        cache_key = f"{self.cfg.cache_prefix}pair_single:{a}:{b}"
-        cached = await cache_get(cache_key)
-        if cached is not None:
-            return cached
+        index = self._cooccurrence()
+        if index is not None:
+            total_draws = len(index)
+            pair_count, rank, total_pairs = index.pair_stats(a, b)
+            return {
+                "n1": a, "n2": b, "count": pair_count,
+                "percentage": round(pair_count / total_draws * 100, 1), "rank": rank,
+                "total_draws": total_draws, "total_pairs": total_pairs,
+            }
 
+        return await cached(
+            f"{self.cfg.cache_prefix}pair_single:{a}:{b}", DEFAULT_TTL,
+            lambda: self._load_single_pair(a, b),
+        )
+
+    async def _load_single_pair(self, a, b):
+        """Calcul SQL de get_single_pair (loader cached())."""
         async with self._get_connection() as conn:
           try:
             cursor = await conn.cursor()
@@ -973,7 +1120,6 @@ class BaseStatsService:
             if total_draws == 0:
                 result = {"n1": a, "n2": b, "count": 0, "percentage": 0.0,
                           "rank": 0, "total_draws": 0, "total_pairs": 0}
-                await cache_set(cache_key, result)
                 return result
 
             # Count for the specific pair
@@ -1020,7 +1166,6 @@ class BaseStatsService:
                 "percentage": pct, "rank": rank,
                 "total_draws": total_draws, "total_pairs": total_pairs,
             }
-            await cache_set(cache_key, result)
             return result
 
           except Exception as e:
@@ -1036,11 +1181,31 @@ class BaseStatsService:
         Cache: {prefix}triplets:{window}:{top_n}, TTL 1h.
         Retour: dict(triplets=[{num_a, num_b, num_c, count, percentage, rank}], total_draws, window)
         """
-        cache_key = f"{self.cfg.cache_prefix}triplets:{window}:{top_n}"
-        cached = await cache_get(cache_key)
-        if cached is not None:
-            return cached
+        index = self._cooccurrence()
+        if index is not None:
+            try:
+                start = self._window_start(index.snapshot, window)
+                total_draws = len(index) - start
+                return {
+                    "triplets": [
+                        {"num_a": a, "num_b": b, "num_c": c, "count": n,
+                         "percentage": round(n / total_draws * 100, 1), "rank": rank}
+                        for rank, (a, b, c, n) in enumerate(index.top_triplets(start, top_n), 1)
+                    ],
+                    "total_draws": total_draws,
+                    "window": window,
+                }
+            except Exception as e:
+                logger.error(f"Erreur get_triplet_correlations{self.cfg.log_label}: {e}")
+                return None
 
+        return await cached(
+            f"{self.cfg.cache_prefix}triplets:{window}:{top_n}", DEFAULT_TTL,
+            lambda: self._load_triplet_correlations(top_n, window),
+        )
+
+    async def _load_triplet_correlations(self, top_n, window):
+        """Calcul SQL de get_triplet_correlations (loader cached())."""
         async with self._get_connection() as conn:
           try:
             cursor = await conn.cursor()
@@ -1074,7 +1239,6 @@ class BaseStatsService:
 
             if total_draws == 0:
                 result = {"triplets": [], "total_draws": 0, "window": window}
-                await cache_set(cache_key, result)
                 return result
 
             # 10 UNION ALL for C(5,3) triplets
@@ -1131,7 +1295,6 @@ class BaseStatsService:
                 "total_draws": total_draws,
                 "window": window,
             }
-            await cache_set(cache_key, result)
             return result
 
           except Exception as e:
@@ -1149,12 +1312,32 @@ class BaseStatsService:
         if len(self.cfg.secondary_columns) != 2:
             return None
 
-        col_a, col_b = self.cfg.secondary_columns
-        cache_key = f"{self.cfg.cache_prefix}star_pairs:{window}:{top_n}:{order}"
-        cached = await cache_get(cache_key)
-        if cached is not None:
-            return cached
+        index = self._cooccurrence()
+        if index is not None:
+            try:
+                start = self._window_start(index.snapshot, window)
+                total_draws = len(index) - start
+                return {
+                    "pairs": [
+                        {"num_a": a, "num_b": b, "count": c,
+                         "percentage": round(c / total_draws * 100, 1), "rank": rank}
+                        for rank, (a, b, c) in enumerate(index.top_star_pairs(start, top_n, order), 1)
+                    ],
+                    "total_draws": total_draws,
+                    "window": window,
+                }
+            except Exception as e:
+                logger.error(f"Erreur get_star_pair_correlations{self.cfg.log_label}: {e}")
+                return None
 
+        return await cached(
+            f"{self.cfg.cache_prefix}star_pairs:{window}:{top_n}:{order}", DEFAULT_TTL,
+            lambda: self._load_star_pair_correlations(top_n, window, order),
+        )
+
+    async def _load_star_pair_correlations(self, top_n, window, order):
+        """Calcul SQL de get_star_pair_correlations (loader cached())."""
+        col_a, col_b = self.cfg.secondary_columns
         async with self._get_connection() as conn:
           try:
             cursor = await conn.cursor()
@@ -1213,7 +1396,6 @@ class BaseStatsService:
                 "total_draws": total_draws,
                 "window": window,
             }
-            await cache_set(cache_key, result)
             return result
 
           except Exception as e:
@@ -1230,13 +1412,25 @@ class BaseStatsService:
         if len(self.cfg.secondary_columns) != 2:
             return None
 
-        col_a, col_b = self.cfg.secondary_columns
         a, b = min(s1, s2), max(s1, s2)
-        cache_key = f"{self.cfg.cache_prefix}star_pair_single:{a}:{b}"
-        cached = await cache_get(cache_key)
-        if cached is not None:
-            return cached
+        index = self._cooccurrence()
+        if index is not None:
+            total_draws = len(index)
+            pair_count, rank, total_pairs = index.star_pair_stats(a, b)
+            return {
+                "s1": a, "s2": b, "count": pair_count,
+                "percentage": round(pair_count / total_draws * 100, 1), "rank": rank,
+                "total_draws": total_draws, "total_pairs": total_pairs,
+            }
+
+        return await cached(
+            f"{self.cfg.cache_prefix}star_pair_single:{a}:{b}", DEFAULT_TTL,
+            lambda: self._load_single_star_pair(a, b),
+        )
 
+    async def _load_single_star_pair(self, a, b):
+        """Calcul SQL de get_single_star_pair (loader cached())."""
+        col_a, col_b = self.cfg.secondary_columns
         async with self._get_connection() as conn:
           try:
             cursor = await conn.cursor()
@@ -1249,7 +1443,6 @@ class BaseStatsService:
             if total_draws == 0:
                 result = {"s1": a, "s2": b, "count": 0, "percentage": 0.0,
                           "rank": 0, "total_draws": 0, "total_pairs": 0}
-                await cache_set(cache_key, result)
                 return result
 
             # Count for this specific star pair
@@ -1282,7 +1475,6 @@ class BaseStatsService:
                 "percentage": pct, "rank": rank,
                 "total_draws": total_draws, "total_pairs": total_pairs,
             }
-            await cache_set(cache_key, result)
             return result
 
           except Exception as e:
@@ -1291,17 +1483,43 @@ class BaseStatsService:
             )
             return None
 
+    def _draw_summary(self, row):
+        """{date, boules (sorted), secondary} of a draw row (SQL or DrawSnapshot.row).
+
+        Secondary numbers still NULL (import EM en 2 étapes) are left out.
+        """
+        return {
+            "date": row["date_de_tirage"].strftime("%Y-%m-%d"),
+            "boules": sorted([
+                row["boule_1"], row["boule_2"], row["boule_3"],
+                row["boule_4"], row["boule_5"],
+            ]),
+            "secondary": sorted(v for col in self.cfg.secondary_columns
+                                if (v := row[col]) is not None),
+        }
+
     async def get_pair_draws(self, *, n1: int, n2: int, limit: int = 50):
         """
         Return the list of draws where a specific pair co-occurred.
         Each draw includes date + full numbers + secondary numbers.
         """
         a, b = min(n1, n2), max(n1, n2)
-        cache_key = f"{self.cfg.cache_prefix}pair_draws:{a}:{b}"
-        cached = await cache_get(cache_key)
-        if cached is not None:
-            return cached
-
+        index = self._cooccurrence()
+        if index is not None:
+            try:
+                draws = [self._draw_summary(index.snapshot.row(int(i), self.cfg.secondary_columns))
+                         for i in index.pair_draws(a, b, limit)]
+                return {"n1": a, "n2": b, "draws": draws, "count": len(draws)}
+            except Exception as e:
+                logger.error(f"Erreur get_pair_draws{self.cfg.log_label} (index, repli SQL): {e}")
+
+        return await cached(
+            f"{self.cfg.cache_prefix}pair_draws:{a}:{b}", DEFAULT_TTL,
+            lambda: self._load_pair_draws(a, b, limit),
+        )
+
+    async def _load_pair_draws(self, a, b, limit):
+        """Calcul SQL de get_pair_draws (loader cached())."""
         async with self._get_connection() as conn:
           try:
             cursor = await conn.cursor()
@@ -1317,26 +1535,9 @@ class BaseStatsService:
             await cursor.execute(sql, [a, b, limit])
             rows = await cursor.fetchall()
 
-            draws = []
-            for row in rows:
-                d = {
-                    "date": row["date_de_tirage"].strftime("%Y-%m-%d"),
-                    "boules": sorted([
-                        row["boule_1"], row["boule_2"], row["boule_3"],
-                        row["boule_4"], row["boule_5"],
-                    ]),
-                }
-                if len(self.cfg.secondary_columns) == 1:
-                    d["secondary"] = [row[self.cfg.secondary_columns[0]]]
-                else:
-                    d["secondary"] = sorted([
-                        row[self.cfg.secondary_columns[0]],
-                        row[self.cfg.secondary_columns[1]],
-                    ])
-                draws.append(d)
+            draws = [self._draw_summary(row) for row in rows]
 
             result = {"n1": a, "n2": b, "draws": draws, "count": len(draws)}
-            await cache_set(cache_key, result)
             return result
 
           except Exception as e:
@@ -1352,13 +1553,24 @@ class BaseStatsService:
         if len(self.cfg.secondary_columns) != 2:
             return None
 
-        col_a, col_b = self.cfg.secondary_columns
         a, b = min(s1, s2), max(s1, s2)
-        cache_key = f"{self.cfg.cache_prefix}star_pair_draws:{a}:{b}"
-        cached = await cache_get(cache_key)
-        if cached is not None:
-            return cached
-
+        index = self._cooccurrence()
+        if index is not None:
+            try:
+                draws = [self._draw_summary(index.snapshot.row(int(i), self.cfg.secondary_columns))
+                         for i in index.star_pair_draws(a, b, limit)]
+                return {"s1": a, "s2": b, "draws": draws, "count": len(draws)}
+            except Exception as e:
+                logger.error(f"Erreur get_star_pair_draws{self.cfg.log_label} (index, repli SQL): {e}")
+
+        return await cached(
+            f"{self.cfg.cache_prefix}star_pair_draws:{a}:{b}", DEFAULT_TTL,
+            lambda: self._load_star_pair_draws(a, b, limit),
+        )
+
+    async def _load_star_pair_draws(self, a, b, limit):
+        """Calcul SQL de get_star_pair_draws (loader cached())."""
+        col_a, col_b = self.cfg.secondary_columns
         async with self._get_connection() as conn:
           try:
             cursor = await conn.cursor()
@@ -1372,19 +1584,9 @@ class BaseStatsService:
             await cursor.execute(sql, [a, b, limit])
             rows = await cursor.fetchall()
 
-            draws = []
-            for row in rows:
-                draws.append({
-                    "date": row["date_de_tirage"].strftime("%Y-%m-%d"),
-                    "boules": sorted([
-                        row["boule_1"], row["boule_2"], row["boule_3"],
-                        row["boule_4"], row["boule_5"],
-                    ]),
-                    "secondary": sorted([row[col_a], row[col_b]]),
-                })
+            draws = [self._draw_summary(row) for row in rows]
 
             result = {"s1": a, "s2": b, "draws": draws, "count": len(draws)}
-            await cache_set(cache_key, result)
             return result
 
           except Exception as e:
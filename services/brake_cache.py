@@ -0,0 +1,140 @@
+"""
+Brake maps V110 matérialisées par (jeu, type, date de tirage ciblée).
+
+get_persistent_brake_map exécute un SELECT DISTINCT puis un self-join
+MIN(selected_at) / MIN(grid_id) sur hybride_selection_history, 2 fois par
+/generate (boules + secondaire). Or la brake map du tirage T ne dépend que des
+1ères grilles canoniques de T-1, T-2 : elle est figée dès que la 1ère grille
+de T-1 est écrite, bien avant que /generate ne cible T.
+
+La brake map est donc matérialisée sous la clé
+    brake_map:{game}:{number_type}:{target}:{t1}:{t2}:{window}
+à 2 niveaux, comme services.score_cache :
+    - dict in-process (lecture O(1), sans aller-retour réseau)
+    - services.cache (Redis partagé entre instances Cloud Run, fallback mémoire)
+
+Calcul à l'écriture : après le flush d'une date cible encore jamais vue par
+l'instance (services.selection_writer), les brake maps des `window` tirages
+suivants sont recalculées et écrasées. Miss (démarrage, éviction, TTL) →
+reconstruction depuis la table (build_persistent_brake_map) puis stockage.
+Une erreur BDD n'est jamais matérialisée (brake vide pour la requête seulement).
+
+Multi-instances : l'écriture d'une brake map (cache_set) publie sa clé sur le
+canal pub/sub de services.cache ; les autres instances retirent alors leur
+copie du dict in-process (register_invalidation_hook) et relisent Redis.
+"""
+
+import logging
+from datetime import timedelta
+
+from services.cache import cache_get, cache_set, register_invalidation_hook
+from services.selection_history import build_persistent_brake_map
+
+logger = logging.getLogger(__name__)
+
+BRAKE_TTL = 7 * 24 * 3600  # clé par date cible — TTL = simple garde-fou mémoire Redis
+_LOCAL_MAXSIZE = 64
+
+_local: dict[str, dict[int, float]] = {}
+
+
+def _secondary_type(game: str) -> str:
+    return "star" if game == "euromillions" else "chance"
+
+
+def _key(game: str, number_type: str, target, config) -> str:
+    t1 = getattr(config, "saturation_brake_persistent_t1", 0.20)
+    t2 = getattr(config, "saturation_brake_persistent_t2", 0.50)
+    window = getattr(config, "saturation_persistent_window", 2)
+    return f"brake_map:{game}:{number_type}:{target}:{t1}:{t2}:{window}"
+
+
+def _remember(key: str, brake: dict[int, float]) -> None:
+    if len(_local) >= _LOCAL_MAXSIZE:
+        # FIFO : les dates cibles les plus anciennes partent en premier
+        for k in list(_local)[:_LOCAL_MAXSIZE // 4 or 1]:
+            del _local[k]
+    _local[key] = brake
+
+
+async def _store(key: str, brake: dict[int, float]) -> None:
+    _remember(key, dict(brake))
+    await cache_set(key, brake, ttl=BRAKE_TTL)
+
+
+async def get_brake_map(conn, game: str, current_draw_date, number_type: str, config) -> dict:
+    """Cached get_persistent_brake_map: {number: multiplier} for target current_draw_date."""
+    if not getattr(config, "saturation_persistent_enabled", False):
+        return {}
+    key = _key(game, number_type, current_draw_date, config)
+    brake = _local.get(key)
+    if brake is None:
+        cached = await cache_get(key)
+        if cached is not None:
+            brake = {int(n): m for n, m in cached.items()}
+            _remember(key, brake)
+        else:
+            try:
+                brake = await build_persistent_brake_map(
+                    conn, game, current_draw_date, number_type, config,
+                )
+            except Exception:
+                logger.warning(
+                    "[BRAKE_CACHE] rebuild failed for %s/%s target=%s — returning empty map",
+                    game, number_type, current_draw_date, exc_info=True,
+                )
+                return {}
+            await _store(key, brake)
+    return dict(brake)
+
+
+async def get_brake_maps(conn, game: str, current_draw_date, config) -> dict[str, dict]:
+    """Ball + secondary brake maps of a target draw: {"ball": {...}, "star"|"chance": {...}}."""
+    return {
+        ntype: await get_brake_map(conn, game, current_draw_date, ntype, config)
+        for ntype in ("ball", _secondary_type(game))
+    }
+
+
+def _engine_config(game: str):
+    from config.games import ValidGame, get_config, get_engine
+    return get_engine(get_config(ValidGame(game))).cfg
+
+
+def _next_targets(game: str, target, count: int) -> list:
+    """The `count` draw dates following target (target = their T-1, T-2, ...)."""
+    from config.games import ValidGame, get_next_draw_date
+    targets = []
+    for _ in range(count):
+        target = get_next_draw_date(ValidGame(game), reference=target + timedelta(days=1))
+        targets.append(target)
+    return targets
+
+
+async def materialize_after_selection(conn, game: str, target, config=None) -> None:
+    """First canonical selection of `target` written: recompute the brake maps
+    of the following draws (for which target is T-1, T-2, ...)."""
+    config = config or _engine_config(game)
+    if not getattr(config, "saturation_persistent_enabled", False):
+        return
+    window = getattr(config, "saturation_persistent_window", 2)
+    for next_target in _next_targets(game, target, int(window)):
+        for ntype in ("ball", _secondary_type(game)):
+            brake = await build_persistent_brake_map(conn, game, next_target, ntype, config)
+            await _store(_key(game, ntype, next_target, config), brake)
+    logger.info("[BRAKE_CACHE] %s brake maps materialized after target=%s", game, target)
+
+
+def clear_brake_cache() -> None:
+    _local.clear()
+
+
+def _on_peer_invalidation(key: str | None) -> None:
+    """Brake map rewritten by another instance (pub/sub) → drop the local copy."""
+    if key is None:
+        _local.clear()
+    else:
+        _local.pop(key, None)
+
+
+register_invalidation_hook(_on_peer_invalidation)
@@ -2,19 +2,62 @@
 Cache async avec Redis (partage entre instances) + fallback dict in-memory.
 Compatible Memorystore, Redis Cloud, ou tout Redis >= 6.
 
-Interface : await cache_get(key), await cache_set(key, value, ttl), await cache_clear()
-Lifecycle : init_cache() au startup, close_cache() au shutdown.
+Interface : await cache_get(key), await cache_set(key, value, ttl),
+            await cache_delete(*keys), await cache_clear(), cache_stats(),
+            await cached(key, ttl, loader)  (get / compute / set anti-stampede)
+Lifecycle : init_cache() au startup, close_cache() au shutdown,
+            run_invalidation_listener() en tâche supervisée (lifespan main.py).
+
+Redis actif → 2 niveaux :
+    - L1 : LRU in-process (valeurs déjà désérialisées), TTL par entrée
+      (= TTL Redis restant, plafonné à _L1_MAX_TTL) et budget en octets
+      (_L1_MAX_BYTES, taille = payload Redis décompressé). Un hit L1 ne fait
+      ni aller-retour réseau ni décodage.
+    - L2 : Redis, partagé entre instances Cloud Run. Valeurs sérialisées par
+      services.cache_codec (binaire marshal + zlib au-delà d'un seuil ; clés
+      int, dates et Decimal conservées).
+cache_set / cache_delete / cache_clear publient la clé sur le canal pub/sub
+_INVALIDATION_CHANNEL : les autres instances la retirent de leur L1. Message
+perdu (listener en redémarrage) → obsolescence bornée par _L1_MAX_TTL.
+Caches locaux posés au-dessus de cache_get (services.brake_cache) :
+register_invalidation_hook(callback) → même invalidation reçue des autres instances.
+Les valeurs renvoyées sont partagées (comme le fallback in-memory) : lecture seule.
+
+Compteurs par namespace de clé (l1_hits, l2_hits, misses, evictions) : cache_stats().
+
+cached(key, ttl, loader) — à l'expiration d'une clé chaude (pairs, global_stats…)
+toutes les requêtes concurrentes rataient en même temps et relançaient la même
+requête SQL lourde (pool aiomysql saturé). cached() stocke une enveloppe
+{v, soft, delta} avec un TTL physique ttl + stale_ttl et :
+    - single-flight : 1 seul loader par clé et par process (futures partagées),
+      + verrou Redis SET NX entre instances (les autres attendent la valeur) ;
+    - refresh anticipé probabiliste (XFetch) : peu avant `soft`, une requête
+      tirée au sort recalcule en tâche de fond (plus delta est long, plus tôt) ;
+    - stale-while-revalidate : après `soft`, la valeur périmée est servie
+      pendant que le recalcul tourne en arrière-plan.
+cached(..., version=draw_version(game)) — entrée dérivée des tirages : l'enveloppe
+enregistre la version du tirage (MAX(date_de_tirage)) qui l'a produite et vit
+jusqu'au tirage suivant (VERSIONED_TTL = simple garde-fou mémoire). Une entrée
+d'une version antérieure n'est jamais servie : le watcher de tirages
+(draw_store.run_draw_watcher) fait avancer la version → recalcul à la lecture.
 """
 
-import json
+import asyncio
 import logging
+import math
 import os
+import random
 import time
-from typing import Any
+import uuid
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable
+
+from services.cache_codec import decode, encode
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_TTL = 3600  # 1 heure
+VERSIONED_TTL = 7 * 24 * 3600  # entrée versionnée par tirage — TTL = garde-fou mémoire
 
 # ── In-memory fallback (I04 V66: bounded to prevent OOM) ──────────
 _MEM_CACHE_MAXSIZE = 10_000
@@ -25,6 +68,81 @@ _redis = None
 
 _REDIS_PREFIX = "hybride:"
 
+# ── L1 in-process devant Redis ──────────────────────────────────────
+_L1_MAX_BYTES = int(os.getenv("CACHE_L1_MAX_BYTES", str(32 * 1024 * 1024)))
+_L1_MAX_TTL = 300  # s — borne l'obsolescence si une invalidation pub/sub est perdue
+_l1: "OrderedDict[str, tuple[float, int, Any]]" = OrderedDict()  # key → (expires_at, size, value)
+_l1_bytes = 0
+
+_INVALIDATION_CHANNEL = f"{_REDIS_PREFIX}cache:invalidate"
+_INSTANCE_ID = uuid.uuid4().hex[:12]
+_CLEAR_ALL = "*"
+_invalidation_hooks: list[Callable[[str | None], None]] = []
+
+_stats: dict[str, dict[str, int]] = defaultdict(
+    lambda: {"l1_hits": 0, "l2_hits": 0, "misses": 0, "evictions": 0}
+)
+
+
+def _namespace(key: str) -> str:
+    """Counter namespace: 1st key segment ("em:" kept): "em:freq:..." → "em:freq"."""
+    head, _, rest = key.partition(":")
+    if head == "em" and rest:
+        return f"em:{rest.partition(':')[0]}"
+    return head
+
+
+def _l1_get(key: str):
+    entry = _l1.get(key)
+    if entry is None:
+        return None
+    if time.monotonic() > entry[0]:
+        _l1_pop(key)
+        return None
+    _l1.move_to_end(key)
+    return entry
+
+
+def _l1_put(key: str, value: Any, size: int, ttl: float) -> None:
+    global _l1_bytes
+    if ttl <= 0 or size > _L1_MAX_BYTES:
+        _l1_pop(key)
+        return
+    _l1_pop(key)
+    _l1[key] = (time.monotonic() + min(ttl, _L1_MAX_TTL), size, value)
+    _l1_bytes += size
+    while _l1_bytes > _L1_MAX_BYTES:
+        old_key, (_, old_size, _) = _l1.popitem(last=False)
+        _l1_bytes -= old_size
+        _stats[_namespace(old_key)]["evictions"] += 1
+
+
+def _l1_pop(key: str) -> None:
+    global _l1_bytes
+    entry = _l1.pop(key, None)
+    if entry is not None:
+        _l1_bytes -= entry[1]
+
+
+def clear_l1_cache() -> None:
+    """Drop every L1 entry (local only, no broadcast)."""
+    global _l1_bytes
+    _l1.clear()
+    _l1_bytes = 0
+
+
+def redis_active() -> bool:
+    return _redis is not None
+
+
+def cache_stats() -> dict:
+    """L1 occupancy + hit / miss / eviction counters per key namespace."""
+    return {
+        "l1": {"entries": len(_l1), "bytes": _l1_bytes, "max_bytes": _L1_MAX_BYTES},
+        "redis": _redis is not None,
+        "namespaces": {ns: dict(c) for ns, c in sorted(_stats.items())},
+    }
+
 
 async def init_cache():
     """Initialise la connexion Redis. Fallback in-memory si indisponible."""
@@ -60,20 +178,90 @@ async def init_cache():
 async def close_cache():
     """Ferme la connexion Redis."""
     global _redis
+    clear_l1_cache()
     if _redis:
         await _redis.aclose()
         _redis = None
         logger.info("Cache Redis ferme")
 
 
+async def _publish_invalidation(*keys: str) -> None:
+    """Broadcast keys to drop from the other instances' L1 (best-effort)."""
+    try:
+        for key in keys:
+            await _redis.publish(_INVALIDATION_CHANNEL, f"{_INSTANCE_ID}|{key}")
+    except Exception as e:
+        logger.warning(f"Redis PUBLISH error ({e}) — L1 peers expire via TTL")
+
+
+def register_invalidation_hook(callback: Callable[[str | None], None]) -> None:
+    """Register callback(key) run on each peer invalidation (None = whole cache).
+
+    For process-local copies layered over cache_get: a peer rewriting a key
+    drops them like the L1 entry. Idempotent.
+    """
+    if callback not in _invalidation_hooks:
+        _invalidation_hooks.append(callback)
+
+
+def _apply_invalidation(message) -> None:
+    """Handle one pub/sub payload "<instance>|<key>" (own messages ignored)."""
+    if isinstance(message, bytes):
+        message = message.decode()
+    instance, _, key = message.partition("|")
+    if instance == _INSTANCE_ID or not key:
+        return
+    if key == _CLEAR_ALL:
+        clear_l1_cache()
+    else:
+        _l1_pop(key)
+    for callback in list(_invalidation_hooks):
+        try:
+            callback(None if key == _CLEAR_ALL else key)
+        except Exception:
+            logger.warning("[CACHE] invalidation hook %r failed for %s", callback, key, exc_info=True)
+
+
+async def run_invalidation_listener() -> None:
+    """Apply L1 invalidations published by other instances (supervised task).
+
+    Returns immediately without Redis (no L1, nothing to invalidate).
+    """
+    if not _redis:
+        return
+    pubsub = _redis.pubsub()
+    await pubsub.subscribe(_INVALIDATION_CHANNEL)
+    # (Re)subscribed: invalidations may have been missed meanwhile
+    clear_l1_cache()
+    try:
+        async for message in pubsub.listen():
+            if message.get("type") == "message":
+                _apply_invalidation(message["data"])
+    finally:
+        await pubsub.aclose()
+
+
 async def cache_get(key: str) -> Any | None:
     """Retourne la valeur si presente et non expiree, sinon None."""
-    # Redis
+    stats = _stats[_namespace(key)]
+    # L1 → Redis (L2)
     if _redis:
+        entry = _l1_get(key)
+        if entry is not None:
+            stats["l1_hits"] += 1
+            return entry[2]
         try:
-            data = await _redis.get(f"{_REDIS_PREFIX}{key}")
+            # GET + PTTL in one round-trip: the L1 copy never outlives the L2 one
+            async with _redis.pipeline(transaction=False) as pipe:
+                pipe.get(f"{_REDIS_PREFIX}{key}")
+                pipe.pttl(f"{_REDIS_PREFIX}{key}")
+                data, pttl = await pipe.execute()
             if data is not None:
-                return json.loads(data)
+                value, size = decode(data)
+                _l1_put(key, value, size, pttl / 1000 if pttl and pttl > 0 else _L1_MAX_TTL)
+                stats["l2_hits"] += 1
+                return value
+            stats["misses"] += 1
             return None
         except Exception as e:
             logger.warning(f"Redis GET error ({e}) — fallback in-memory")
@@ -81,11 +269,14 @@ async def cache_get(key: str) -> Any | None:
     # Fallback in-memory
     entry = _mem_cache.get(key)
     if entry is None:
+        stats["misses"] += 1
         return None
     expires_at, value = entry
     if time.monotonic() > expires_at:
         _mem_cache.pop(key, None)
+        stats["misses"] += 1
         return None
+    stats["l1_hits"] += 1
     return value
 
 
@@ -98,23 +289,29 @@ def _evict_mem_cache() -> None:
     expired = [k for k, (expires_at, _) in _mem_cache.items() if expires_at < now]
     for k in expired:
         del _mem_cache[k]
+        _stats[_namespace(k)]["evictions"] += 1
     if len(_mem_cache) < _MEM_CACHE_MAXSIZE:
         return
     # Still full — FIFO eviction: remove 20% oldest by expiry timestamp
     to_remove = sorted(_mem_cache, key=lambda k: _mem_cache[k][0])[:len(_mem_cache) // 5 or 1]
     for k in to_remove:
         del _mem_cache[k]
+        _stats[_namespace(k)]["evictions"] += 1
     logger.warning("[CACHE] In-memory eviction triggered: %d entries removed", len(expired) + len(to_remove))
 
 
 async def cache_set(key: str, value: Any, ttl: int = DEFAULT_TTL) -> None:
     """Stocke une valeur avec un TTL en secondes."""
-    # Redis
+    # Redis (+ L1 local, invalidation des L1 des autres instances)
     if _redis:
         try:
-            await _redis.set(f"{_REDIS_PREFIX}{key}", json.dumps(value), ex=ttl)
+            data, size = encode(value)
+            await _redis.set(f"{_REDIS_PREFIX}{key}", data, ex=ttl)
+            _l1_put(key, value, size, ttl)
+            await _publish_invalidation(key)
             return
         except Exception as e:
+            _l1_pop(key)
             logger.warning(f"Redis SET error ({e}) — fallback in-memory")
 
     # I04 V66: Evict before writing if at capacity
@@ -125,6 +322,21 @@ async def cache_set(key: str, value: Any, ttl: int = DEFAULT_TTL) -> None:
     _mem_cache[key] = (time.monotonic() + ttl, value)
 
 
+async def cache_delete(*keys: str) -> None:
+    """Supprime des cles (L2 + L1 de toutes les instances + fallback)."""
+    if not keys:
+        return
+    for key in keys:
+        _l1_pop(key)
+        _mem_cache.pop(key, None)
+    if _redis:
+        try:
+            await _redis.delete(*(f"{_REDIS_PREFIX}{k}" for k in keys))
+            await _publish_invalidation(*keys)
+        except Exception as e:
+            logger.warning(f"Redis DELETE error: {e}")
+
+
 async def cache_clear() -> None:
     """Vide tout le cache."""
     if _redis:
@@ -138,7 +350,162 @@ async def cache_clear() -> None:
                     await _redis.delete(*keys)
                 if cursor == 0:
                     break
+            await _publish_invalidation(_CLEAR_ALL)
         except Exception as e:
             logger.warning(f"Redis CLEAR error: {e}")
 
+    clear_l1_cache()
     _mem_cache.clear()
+
+
+# ── cached() : single-flight + refresh anticipé + stale-while-revalidate ──
+_SWR_TAG = "__swr__"
+_LOCK_PREFIX = "lock:"
+_LOCK_TTL_MS = 30_000     # verrou inter-instances (> durée d'un loader)
+_LOCK_WAIT = 5.0          # s — attente max de la valeur calculée par une autre instance
+_LOCK_POLL = 0.05         # s
+_inflight: dict[str, asyncio.Task] = {}
+
+
+def _is_envelope(entry: Any) -> bool:
+    return isinstance(entry, dict) and entry.get(_SWR_TAG) == 1
+
+
+def _version_order(version: str) -> tuple[str, bool]:
+    """Sortable draw version: (date, complete). "2026-10-14~partial" (secondaires
+    encore NULL, services.draw_store) < "2026-10-14" < "2026-10-17"."""
+    day, _, suffix = version.partition("~")
+    return day, not suffix
+
+
+def _usable(entry: Any, version: str | None) -> bool:
+    """Entry may be served for this version (computed from this draw or a later
+    one — a peer may have seen the new draw first). version None → untagged.
+    A partial entry never satisfies the complete version of the same draw."""
+    if version is None:
+        return True
+    return _is_envelope(entry) and _version_order(entry.get("ver") or "") >= _version_order(version)
+
+
+def _should_refresh(entry: dict, beta: float, now: float) -> bool:
+    """XFetch: stale, or elected for early refresh (probability grows near `soft`)."""
+    return now - entry["delta"] * beta * math.log(1.0 - random.random()) >= entry["soft"]
+
+
+async def _acquire_lock(key: str) -> str | None:
+    """Cross-instance lock (SET NX PX). Token if acquired, None if held elsewhere."""
+    token = f"{_INSTANCE_ID}:{uuid.uuid4().hex[:8]}"
+    try:
+        ok = await _redis.set(f"{_REDIS_PREFIX}{_LOCK_PREFIX}{key}", token, nx=True, px=_LOCK_TTL_MS)
+    except Exception as e:
+        logger.warning(f"Redis LOCK error ({e}) — computing without lock")
+        return ""
+    return token if ok else None
+
+
+async def _release_lock(key: str, token: str) -> None:
+    lock_key = f"{_REDIS_PREFIX}{_LOCK_PREFIX}{key}"
+    try:
+        held = await _redis.get(lock_key)
+        if held is not None and (held.decode() if isinstance(held, bytes) else held) == token:
+            await _redis.delete(lock_key)
+    except Exception as e:
+        logger.warning(f"Redis UNLOCK error ({e}) — lock expires in {_LOCK_TTL_MS} ms")
+
+
+async def _wait_for_peer(key: str, version: str | None) -> Any | None:
+    """Poll the cache while another instance holds the lock (None on timeout)."""
+    deadline = time.monotonic() + _LOCK_WAIT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(_LOCK_POLL)
+        entry = await cache_get(key)
+        if entry is not None and _usable(entry, version):
+            return entry
+    return None
+
+
+async def _load(key: str, ttl: int, loader, stale_ttl: int, refresh: bool,
+                version: str | None) -> Any:
+    token = None
+    if _redis:
+        token = await _acquire_lock(key)
+        if token is None:
+            if refresh:
+                return None  # another instance is already refreshing
+            entry = await _wait_for_peer(key, version)
+            if entry is not None:
+                return entry["v"] if _is_envelope(entry) else entry
+            logger.warning(f"[CACHE] lock wait timeout on {key} — computing locally")
+    try:
+        t0 = time.monotonic()
+        value = await loader()
+        if value is not None:
+            envelope = {_SWR_TAG: 1, "v": value, "soft": time.time() + ttl,
+                        "delta": time.monotonic() - t0, "ver": version}
+            await cache_set(key, envelope, ttl + stale_ttl)
+        return value
+    finally:
+        if token:
+            await _release_lock(key, token)
+
+
+def _start_load(key: str, ttl: int, loader, stale_ttl: int, refresh: bool,
+                version: str | None) -> asyncio.Task:
+    # in-flight key = key + version: a load of the previous draw is never shared
+    flight = key if version is None else f"{key}@{version}"
+    task = _inflight.get(flight)
+    if task is not None:
+        return task
+    task = asyncio.ensure_future(_load(key, ttl, loader, stale_ttl, refresh, version))
+    _inflight[flight] = task
+
+    def _done(t: asyncio.Task) -> None:
+        if _inflight.get(flight) is t:
+            del _inflight[flight]
+        if not t.cancelled() and t.exception() is not None and refresh:
+            logger.warning(f"[CACHE] background refresh of {key} failed: {t.exception()}")
+
+    task.add_done_callback(_done)
+    return task
+
+
+async def cached(
+    key: str,
+    ttl: int,
+    loader: Callable[[], Awaitable[Any]],
+    *,
+    stale_ttl: int | None = None,
+    beta: float = 1.0,
+    version: str | None = None,
+    refresh_loader: Callable[[], Awaitable[Any]] | None = None,
+) -> Any:
+    """Valeur de `key`, calculée par `await loader()` au plus une fois à la fois.
+
+    ttl : fraîcheur (s) ; stale_ttl : durée supplémentaire pendant laquelle la
+    valeur périmée est servie pendant son recalcul (défaut : ttl). beta > 1
+    anticipe davantage le refresh. Un loader qui renvoie None n'est pas mis en
+    cache ; une erreur de loader est propagée (refresh de fond : loguée, la
+    valeur périmée reste servie). Une valeur écrite par cache_set (sans
+    enveloppe) est considérée fraîche.
+
+    version : version du tirage courant (draw_store.draw_version) — l'entrée
+    vit jusqu'au tirage suivant (ttl remplacé par VERSIONED_TTL) et une entrée
+    d'une version antérieure est traitée comme absente. None → TTL seul.
+
+    refresh_loader : loader du refresh de fond (XFetch / SWR), détaché de la
+    requête — à fournir quand `loader` utilise une ressource de l'appelant
+    (curseur BDD) qui n'existera plus pendant le recalcul. Défaut : loader.
+    """
+    if version is not None:
+        ttl = VERSIONED_TTL
+    if stale_ttl is None:
+        stale_ttl = ttl
+    entry = await cache_get(key)
+    if entry is not None and _usable(entry, version):
+        if not _is_envelope(entry):
+            return entry
+        if _should_refresh(entry, beta, time.time()):
+            _start_load(key, ttl, refresh_loader or loader, stale_ttl, True, version)
+        return entry["v"]
+    # Miss: single-flight (a waiter cancelled does not cancel the shared load)
+    return await asyncio.shield(_start_load(key, ttl, loader, stale_ttl, False, version))
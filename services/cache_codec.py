@@ -0,0 +1,160 @@
+"""
+Codecs de sérialisation des valeurs Redis de services.cache.
+
+json.dumps / json.loads pour tout (listes de tirages d'une paire, réponses /stats
+complètes…) coûtait à chaque hit L2 un json.loads sur un texte verbeux, et :
+    - les clés int des dicts revenaient en str (score_cache / brake_cache
+      reconvertissaient à la lecture) ;
+    - date / datetime / Decimal faisaient échouer json.dumps → la valeur
+      (ex. global_stats) ne partait jamais dans Redis (fallback mémoire local).
+
+Trame : _MAGIC (0xC1 — jamais le 1er octet d'un JSON) + 1 octet de flags
+(id du codec | _F_TAGGED | _F_ZLIB) + payload. Une valeur sans _MAGIC est un
+JSON écrit avant les codecs (décodé tel quel). Le décodage lit l'id du codec
+dans la trame : changer CACHE_CODEC ne casse pas les entrées existantes.
+
+Codecs (registre _CODECS, register_codec() pour en ajouter) :
+    - "marshal" (défaut) : format binaire natif CPython, version figée
+      (_MARSHAL_VERSION). Clés int, tuples, sets conservés. Types hors marshal
+      (date, datetime, Decimal, scalaires NumPy) → tuples taggés, parcours
+      Python uniquement si la valeur en contient (_F_TAGGED).
+      marshal n'est pas sûr face à des données forgées : réservé à un Redis
+      privé (VPC), comme aujourd'hui.
+    - "json" : le format historique (comparaison / rollback via CACHE_CODEC=json).
+Compression zlib (niveau 1) au-delà de _COMPRESS_MIN_BYTES, gardée seulement
+si elle réduit la taille.
+
+encode / decode renvoient aussi la taille du payload décompressé : c'est elle
+que le L1 compte dans son budget (une entrée compressée pèse décodée).
+
+Micro-benchmark : python tools/bench_cache_codec.py
+"""
+
+import json
+import marshal
+import os
+import zlib
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable
+
+_MAGIC = 0xC1
+_F_ID = 0x0F       # codec id (bits 0-3)
+_F_TAGGED = 0x40   # payload contains tagged values (date, Decimal…)
+_F_ZLIB = 0x80
+
+_MARSHAL_VERSION = 4
+_COMPRESS_MIN_BYTES = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "8192"))
+_COMPRESS_LEVEL = 1
+
+_TAG = "\x00t"  # 1st element of a tagged tuple: (_TAG, kind, repr)
+
+
+@dataclass(frozen=True)
+class Codec:
+    name: str
+    id: int                           # 0..15, stored in the frame
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[bytes], Any]
+    native_types: bool = True         # False: no tagging (types handled by dumps itself)
+
+
+# ── Tagged values (types unknown to marshal) ───────────────────────────
+
+def _tag(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        return {_tag(k): _tag(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_tag(v) for v in obj]
+    if isinstance(obj, tuple):
+        return tuple(_tag(v) for v in obj)
+    if isinstance(obj, datetime):
+        return (_TAG, "dt", obj.isoformat())
+    if isinstance(obj, date):
+        return (_TAG, "d", obj.isoformat())
+    if isinstance(obj, Decimal):
+        return (_TAG, "dec", str(obj))
+    if hasattr(obj, "item") and hasattr(obj, "dtype"):  # NumPy scalar
+        return obj.item()
+    return obj
+
+
+_UNTAG = {
+    "dt": datetime.fromisoformat,
+    "d": date.fromisoformat,
+    "dec": Decimal,
+}
+
+
+def _untag(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        return {_untag(k): _untag(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_untag(v) for v in obj]
+    if isinstance(obj, tuple):
+        if len(obj) == 3 and obj[0] == _TAG:
+            return _UNTAG[obj[1]](obj[2])
+        return tuple(_untag(v) for v in obj)
+    return obj
+
+
+# ── Registry ───────────────────────────────────────────────────────────
+
+_CODECS: dict[str, Codec] = {}
+_BY_ID: dict[int, Codec] = {}
+
+
+def register_codec(codec: Codec) -> None:
+    """Add a codec (name and id must be unused, id in 0..15)."""
+    if not 0 <= codec.id <= _F_ID:
+        raise ValueError(f"codec id out of range: {codec.id}")
+    if codec.name in _CODECS or codec.id in _BY_ID:
+        raise ValueError(f"codec already registered: {codec.name} / {codec.id}")
+    _CODECS[codec.name] = codec
+    _BY_ID[codec.id] = codec
+
+
+register_codec(Codec("json", 0, lambda v: json.dumps(v).encode(), json.loads, native_types=False))
+register_codec(Codec("marshal", 1, lambda v: marshal.dumps(v, _MARSHAL_VERSION), marshal.loads))
+
+_default = _CODECS[os.getenv("CACHE_CODEC", "marshal")]
+
+
+def get_codec(name: str | None = None) -> Codec:
+    """Codec by name (None → writer codec, env CACHE_CODEC)."""
+    return _default if name is None else _CODECS[name]
+
+
+def encode(value: Any, codec: Codec | None = None) -> tuple[bytes, int]:
+    """(frame, uncompressed payload size). Raises like json.dumps on unsupported values."""
+    codec = codec or _default
+    flags = codec.id
+    try:
+        payload = codec.dumps(value)
+    except ValueError:
+        if not codec.native_types:
+            raise
+        payload = codec.dumps(_tag(value))
+        flags |= _F_TAGGED
+    size = len(payload)
+    if size >= _COMPRESS_MIN_BYTES:
+        packed = zlib.compress(payload, _COMPRESS_LEVEL)
+        if len(packed) < size:
+            payload = packed
+            flags |= _F_ZLIB
+    return bytes((_MAGIC, flags)) + payload, size
+
+
+def decode(data: bytes) -> tuple[Any, int]:
+    """(value, uncompressed payload size) of a frame — or of a legacy JSON value."""
+    if not data or data[0] != _MAGIC:
+        return json.loads(data), len(data)
+    flags = data[1]
+    payload = data[2:]
+    if flags & _F_ZLIB:
+        payload = zlib.decompress(payload)
+    value = _BY_ID[flags & _F_ID].loads(payload)
+    if flags & _F_TAGGED:
+        value = _untag(value)
+    return value, len(payload)
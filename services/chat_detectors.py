@@ -10,6 +10,8 @@ import re
 import random
 import logging
 
+from services.intent_router import merge_patterns, merge_words
+
 logger = logging.getLogger(__name__)
 
 # Re-export ALL shared functions and constants (consumers import from here)
@@ -636,13 +638,12 @@ _PEDAGOGIE_LIMITES_FR = [
 ]
 
 
+_PEDAGOGIE_LIMITES_RE = merge_patterns(_PEDAGOGIE_LIMITES_FR)
+
+
 def _detect_pedagogie_limites(message: str) -> bool:
     """Detecte les questions pedagogiques sur les limites de la prediction."""
-    lower = message.lower()
-    for pattern in _PEDAGOGIE_LIMITES_FR:
-        if re.search(pattern, lower):
-            return True
-    return False
+    return bool(_PEDAGOGIE_LIMITES_RE.search(message.lower()))
 
 
 _SCORE_QUESTION_FR = [
@@ -656,13 +657,12 @@ _SCORE_QUESTION_FR = [
 ]
 
 
+_SCORE_QUESTION_RE = merge_patterns(_SCORE_QUESTION_FR)
+
+
 def _detect_score_question(message: str) -> bool:
     """Detecte si le message porte sur l'explication du score de conformite."""
-    lower = message.lower()
-    for pattern in _SCORE_QUESTION_FR:
-        if re.search(pattern, lower):
-            return True
-    return False
+    return bool(_SCORE_QUESTION_RE.search(message.lower()))
 
 
 # ═══════════════════════════════════════════════════════
@@ -908,6 +908,16 @@ def _get_foreign_lottery_response(
     return tpl.format(lottery=display_name)
 
 
+# Phrases / mots argent compilés par langue ; mots sans les termes "euro / million"
+# quand le message cite un jeu euro (EuroMillions, EuroDreams…)
+_ARGENT_PHRASES_RE = {lang: merge_patterns(p) for lang, p in _ARGENT_PHRASES.items()}
+_ARGENT_MOTS_RE = {
+    lang: (merge_words(mots),
+           merge_words(m for m in mots if m not in _EURO_GAME_SKIP.get(lang, _EURO_GAME_SKIP["fr"])))
+    for lang, mots in _ARGENT_MOTS.items()
+}
+
+
 def _detect_argent(message: str, lang: str = "fr") -> bool:
     """Detecte si le message concerne l'argent, les gains ou les paris (multilingue).
 
@@ -934,19 +944,10 @@ def _detect_argent(message: str, lang: str = "fr") -> bool:
     if _foreign and not any(token in _foreign for token in _OWN_GAME_TOKENS):
         return False
     lower = message.lower()
-    phrases = _ARGENT_PHRASES.get(lang, _ARGENT_PHRASES["fr"])
-    for pattern in phrases:
-        if re.search(pattern, lower):
-            return True
-    mots = _ARGENT_MOTS.get(lang, _ARGENT_MOTS["fr"])
-    is_euro_game = bool(_EURO_GAME_RE.search(lower))
-    skip = _EURO_GAME_SKIP.get(lang, _EURO_GAME_SKIP["fr"]) if is_euro_game else set()
-    for mot in mots:
-        if mot in skip:
-            continue
-        if re.search(r'\b' + re.escape(mot) + r'\b', lower):
-            return True
-    return False
+    if _ARGENT_PHRASES_RE.get(lang, _ARGENT_PHRASES_RE["fr"]).search(lower):
+        return True
+    mots_re, mots_euro_game_re = _ARGENT_MOTS_RE.get(lang, _ARGENT_MOTS_RE["fr"])
+    return bool((mots_euro_game_re if _EURO_GAME_RE.search(lower) else mots_re).search(lower))
 
 
 def _get_argent_response(message: str, lang: str = "fr") -> str:
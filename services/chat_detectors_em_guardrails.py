@@ -8,6 +8,8 @@ Split from chat_detectors_em.py (V70 F11).
 import re
 import random
 
+from services.intent_router import merge_patterns, merge_words
+
 from services.base_chat_detectors import (
     _detect_generation,
 )
@@ -388,15 +390,13 @@ _PEDAGOGIE_LIMITES_EM = {
 }
 
 
+_PEDAGOGIE_LIMITES_EM_RE = {lang: merge_patterns(p) for lang, p in _PEDAGOGIE_LIMITES_EM.items()}
+
+
 def _detect_pedagogie_limites_em(message: str, lang: str) -> bool:
     """Detecte les questions pedagogiques sur les limites de la prediction (multilingue).
     Ces questions ne doivent PAS declencher Phase A."""
-    lower = message.lower()
-    patterns = _PEDAGOGIE_LIMITES_EM.get(lang, _PEDAGOGIE_LIMITES_EM["fr"])
-    for pattern in patterns:
-        if re.search(pattern, lower):
-            return True
-    return False
+    return bool(_PEDAGOGIE_LIMITES_EM_RE.get(lang, _PEDAGOGIE_LIMITES_EM_RE["fr"]).search(message.lower()))
 
 
 # Exclusion Phase A — questions sur le score de conformité (multilingue)
@@ -450,15 +450,22 @@ _SCORE_QUESTION_EM = {
 }
 
 
+_SCORE_QUESTION_EM_RE = {lang: merge_patterns(p) for lang, p in _SCORE_QUESTION_EM.items()}
+
+
 def _detect_score_question_em(message: str, lang: str) -> bool:
     """Detecte si le message EM porte sur l'explication du score (multilingue).
     Ces questions ne doivent PAS declencher Phase A."""
-    lower = message.lower()
-    patterns = _SCORE_QUESTION_EM.get(lang, _SCORE_QUESTION_EM["fr"])
-    for pattern in patterns:
-        if re.search(pattern, lower):
-            return True
-    return False
+    return bool(_SCORE_QUESTION_EM_RE.get(lang, _SCORE_QUESTION_EM_RE["fr"]).search(message.lower()))
+
+
+# Phrases / mots argent compilés par langue (cf. _detect_argent Loto)
+_ARGENT_PHRASES_EM_RE = {lang: merge_patterns(p) for lang, p in _ARGENT_PHRASES_EM.items()}
+_ARGENT_MOTS_EM_RE = {
+    lang: (merge_words(mots),
+           merge_words(m for m in mots if m not in _EURO_GAME_SKIP_EM.get(lang, _EURO_GAME_SKIP_EM["fr"])))
+    for lang, mots in _ARGENT_MOTS_EM.items()
+}
 
 
 def _detect_argent_em(message: str, lang: str) -> bool:
@@ -476,19 +483,10 @@ def _detect_argent_em(message: str, lang: str) -> bool:
     if _TECHNICAL_VOCAB_RE_EM.search(message):
         return False
     lower = message.lower()
-    phrases = _ARGENT_PHRASES_EM.get(lang, _ARGENT_PHRASES_EM["fr"])
-    for pattern in phrases:
-        if re.search(pattern, lower):
-            return True
-    mots = _ARGENT_MOTS_EM.get(lang, _ARGENT_MOTS_EM["fr"])
-    is_euro_game = bool(_EURO_GAME_RE_EM.search(lower))
-    skip = _EURO_GAME_SKIP_EM.get(lang, _EURO_GAME_SKIP_EM["fr"]) if is_euro_game else set()
-    for mot in mots:
-        if mot in skip:
-            continue
-        if re.search(r'\b' + re.escape(mot) + r'\b', lower):
-            return True
-    return False
+    if _ARGENT_PHRASES_EM_RE.get(lang, _ARGENT_PHRASES_EM_RE["fr"]).search(lower):
+        return True
+    mots_re, mots_euro_game_re = _ARGENT_MOTS_EM_RE.get(lang, _ARGENT_MOTS_EM_RE["fr"])
+    return bool((mots_euro_game_re if _EURO_GAME_RE_EM.search(lower) else mots_re).search(lower))
 
 
 # --- Response pools EM ES (argent) ---
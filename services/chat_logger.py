@@ -16,8 +16,8 @@ _INSERT_SQL = (
     "(module, lang, question, response_preview, phase_detected, "
     "sql_generated, sql_status, duration_ms, ip_hash, session_hash, "
     "grid_count, has_exclusions, is_error, error_detail, "
-    "gemini_tokens_in, gemini_tokens_out) "
-    "VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)"
+    "gemini_tokens_in, gemini_tokens_out, sql_cache, sql_saved_ms) "
+    "VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)"
 )
 
 
@@ -28,6 +28,7 @@ async def _do_insert(
     grid_count: int, has_exclusions: bool, is_error: bool,
     error_detail: str | None,
     gemini_tokens_in: int, gemini_tokens_out: int,
+    sql_cache: str | None = None, sql_saved_ms: int = 0,
 ) -> None:
     """Fire-and-forget DB insert. Errors are logged, never raised."""
     try:
@@ -40,6 +41,7 @@ async def _do_insert(
                 grid_count, int(has_exclusions), int(is_error),
                 (error_detail or "")[:255] if error_detail else None,
                 gemini_tokens_in, gemini_tokens_out,
+                sql_cache, sql_saved_ms,
             ),
         )
     except Exception as e:
@@ -63,8 +65,14 @@ def log_chat_exchange(
     error_detail: str | None = None,
     gemini_tokens_in: int = 0,
     gemini_tokens_out: int = 0,
+    sql_cache: str | None = None,
+    sql_saved_ms: int = 0,
 ) -> None:
-    """Non-blocking INSERT into chat_log. Fire-and-forget via asyncio.create_task."""
+    """Non-blocking INSERT into chat_log. Fire-and-forget via asyncio.create_task.
+
+    sql_cache / sql_saved_ms : cache de plans Text-to-SQL (services.sql_plan_cache),
+    "PLAN" | "RESULT" | "MISS" (None hors Phase SQL) et latence économisée.
+    """
     try:
         asyncio.create_task(
             _do_insert(
@@ -73,6 +81,7 @@ def log_chat_exchange(
                 duration_ms, ip_hash, session_hash,
                 grid_count, has_exclusions, is_error, error_detail,
                 gemini_tokens_in, gemini_tokens_out,
+                sql_cache, sql_saved_ms,
             )
         )
     except RuntimeError:
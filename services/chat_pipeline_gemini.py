@@ -23,18 +23,19 @@ import httpx  # V131.A: conservé pour signature rétrocompat (ctx["_http_client
 from google.genai import errors as genai_errors, types
 
 from services.circuit_breaker import gemini_breaker, CircuitOpenError
-from services.gemini import stream_gemini_chat, _GEMINI_CHAT_TEMPERATURE
+from services.gemini import finish_reason_ok, stream_gemini_chat, _GEMINI_CHAT_TEMPERATURE
 from services.gemini_shared import (
     _get_client,
     _is_rate_limit_error,
     _VERTEX_MODEL_NAME,
     _V131_E_SAFETY_SETTINGS_RELAX,
 )
-from services.gemini_cache import pitch_cache
+from services.gemini_cache import answer_cache, pitch_cache
 from services.chat_utils import (
     _clean_response, _strip_non_latin, _get_sponsor_if_due,
     _strip_sponsor_from_text, StreamBuffer,
 )
+from services.base_chat_sql import set_allowed_columns
 from services.base_chat_utils import _format_last_draw_context
 from services.chat_logger import log_chat_exchange
 
@@ -344,8 +345,10 @@ _KNOWN_HALLUCINATED_IDENTIFIERS: frozenset[str] = frozenset({
 async def _build_schema_whitelist() -> set[str]:
     """V126 4/5 (option Y) : construit la whitelist schéma DB au boot.
 
-    DESCRIBE `tirages` + `tirages_euromillions` → populate `_SCHEMA_WHITELIST`.
-    Fallback sur `_SCHEMA_WHITELIST_FALLBACK` si DB down (logger.error).
+    DESCRIBE `tirages` + `tirages_euromillions` → populate `_SCHEMA_WHITELIST`
+    (+ whitelist colonnes du validateur SQL, base_chat_sql.set_allowed_columns).
+    Fallback sur `_SCHEMA_WHITELIST_FALLBACK` si DB down (logger.error) — le
+    validateur SQL reste alors sans contrôle de colonnes.
 
     Appelée depuis `main.py::lifespan` après init_pool_readonly.
     """
@@ -370,6 +373,8 @@ async def _build_schema_whitelist() -> set[str]:
                     )
         if columns:
             _SCHEMA_WHITELIST = columns
+            # Validation AST du SQL généré (services.base_chat_sql._validate_sql)
+            set_allowed_columns(columns)
             logger.info(
                 "V126 4/5 schema whitelist built from DB: %d columns (%s)",
                 len(columns), sorted(columns)[:10],
@@ -824,6 +829,8 @@ def log_from_meta(meta, module, lang, message, response_preview="",
         grid_count=meta.get("grid_count", 0),
         has_exclusions=meta.get("has_exclusions", False),
         is_error=is_error, error_detail=error_detail,
+        sql_cache=meta.get("sql_cache"),
+        sql_saved_ms=meta.get("sql_saved_ms", 0),
     )
 
 
@@ -1018,6 +1025,19 @@ async def call_gemini_and_respond(ctx, fallback, log_prefix, module, lang,
     mode = ctx["mode"]
     _breaker = breaker or gemini_breaker
 
+    # Answer cache — même question / phase / contexte déjà répondue → pas d'appel Gemini
+    _answer_key = answer_cache.key_for(ctx, message, lang, page) if ctx.get("_answer_cache") else None
+    if _answer_key:
+        _cached = await answer_cache.aget(_answer_key)
+        if _cached is not None:
+            text = _cached
+            sponsor_line = _get_sponsor_if_due(ctx["history"], **(sponsor_kwargs or {}))
+            if sponsor_line:
+                text += "\n\n" + sponsor_line
+            logger.info(f"{log_prefix} OK cache (page={page}, mode={mode})")
+            log_from_meta(ctx.get("_chat_meta"), module, lang, message, text)
+            return {"response": text, "source": "gemini", "mode": mode}
+
     def _fallback_dict(error_type):
         detail = {"circuit_open": "CircuitOpen", "timeout": "Timeout"}.get(error_type, error_type)
         log_from_meta(ctx.get("_chat_meta"), module, lang, message, is_error=True, error_detail=detail)
@@ -1096,8 +1116,15 @@ async def call_gemini_and_respond(ctx, fallback, log_prefix, module, lang,
         log_from_meta(ctx.get("_chat_meta"), module, lang, message, is_error=True, error_detail="EmptyResponse")
         return {"response": fallback, "source": "fallback", "mode": mode}
 
+    # Réponse coupée (MAX_TOKENS / SAFETY…) : servie telle quelle, jamais mise en cache
+    _candidates = getattr(response, "candidates", None) or []
+    _complete = finish_reason_ok(getattr(_candidates[0], "finish_reason", None) if _candidates else None)
+    if not _complete:
+        logger.warning(f"{log_prefix} finish_reason={_candidates[0].finish_reason} — réponse non mise en cache")
+
     text = _clean_response(text)
     text = _strip_temporal_anchor_leak(text)  # V142.F-bis — anti-fuite bloc ancrage
+    _answer_body = text
     if ctx["insult_prefix"]:
         text = ctx["insult_prefix"] + "\n\n" + text
     s_kwargs = sponsor_kwargs or {}
@@ -1138,6 +1165,8 @@ async def call_gemini_and_respond(ctx, fallback, log_prefix, module, lang,
     )
     if _schema_replace:
         text = _schema_replace
+    elif _answer_key and _complete and not (_safe_replacement or _phase0_replace):
+        await answer_cache.aset(_answer_key, _answer_body)
     return {"response": text, "source": "gemini", "mode": mode}
 
 
@@ -1177,6 +1206,23 @@ _STRICT_BLOCK_FALLBACK_I18N = {
 # stream_and_respond) — les stream_fn de test gardent la signature historique.
 _STREAM_MAX_RETRIES_429 = 2
 
+# Answer cache — rejeu SSE d'une réponse en cache, découpée comme un stream Gemini
+_REPLAY_CHUNK_CHARS = 120
+
+
+def _replay_chunks(text: str, size: int = _REPLAY_CHUNK_CHARS) -> list[str]:
+    """Découpe `text` en morceaux de ~size caractères, coupés après un espace."""
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = start + size
+        if end < len(text):
+            cut = text.rfind(" ", start, end)
+            end = cut + 1 if cut > start else end
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+
 
 # ═══════════════════════════════════════════════════════
 # handle_chat_stream — SSE streaming loop
@@ -1203,6 +1249,28 @@ async def stream_and_respond(ctx, fallback, log_prefix, module, lang,
         _stream_extra_kwargs["max_retries"] = _STREAM_MAX_RETRIES_429
         _stream_extra_kwargs["failure_box"] = _failure_box
 
+    # Answer cache — réponse rejouée en chunks SSE (front identique à un stream Gemini)
+    _answer_key = answer_cache.key_for(ctx, message, lang, page) if ctx.get("_answer_cache") else None
+    if _answer_key:
+        _cached = await answer_cache.aget(_answer_key)
+        if _cached is not None:
+            for _chunk in _replay_chunks(_cached):
+                yield sse_event({
+                    "chunk": _chunk, "source": "gemini", "mode": mode, "is_done": False,
+                })
+            sponsor_line = _get_sponsor_if_due(ctx["history"], **(sponsor_kwargs or {}))
+            if sponsor_line:
+                yield sse_event({
+                    "chunk": "\n\n" + sponsor_line,
+                    "source": "gemini", "mode": mode, "is_done": False,
+                })
+            yield sse_event({
+                "chunk": "", "source": "gemini", "mode": mode, "is_done": True,
+            })
+            log_from_meta(ctx.get("_chat_meta"), module, lang, message, _cached)
+            logger.info(f"{log_prefix} Stream OK cache (page={page}, mode={mode})")
+            return
+
     # V131.G — Buffer mode opt-in via ctx flag (set par chat_pipeline_shared
     # depuis env var STRICT_HALLUCINATION_BLOCK lue au module-load via
     # _env_bool pattern V134). Quand activé, accumule tous chunks SANS yield,
@@ -1388,30 +1456,38 @@ async def stream_and_respond(ctx, fallback, log_prefix, module, lang,
         # (stream already sent to client, cannot be replaced).
         # V131.G : en strict mode, ces checks ont déjà été exécutés au-dessus
         # avant yield → skip ici pour éviter double-log.
+        _flagged = False
         if not _strict_block:
-            _check_sql_number_hallucination(
+            _flagged = bool(_check_sql_number_hallucination(
                 _meta.get("enrichment_context", ""), _full_response,
                 _meta.get("phase", ""), log_prefix,
                 lang=_meta.get("lang", lang),
                 history=ctx.get("history"),
-            )
+            ))
             # V126 3.5-A + V126.1 F3: Phase 0 post-hoc draw-date verification —
             # LOG-ONLY on stream (stream déjà émis, cannot replace).
             # V141 A.4 PATCH V131.G : `enrichment_context` propagé pour Fix 1 + Fix 3.
             try:
-                await _recheck_phase0_draw_accuracy(
+                _flagged |= bool(await _recheck_phase0_draw_accuracy(
                     _full_response, _meta.get("phase", ""),
                     _meta.get("lang", lang), log_prefix,
                     get_tirage_fn=ctx.get("_get_tirage_fn"),
                     game=ctx.get("_game", "loto"),
                     enrichment_context=_meta.get("enrichment_context", ""),
-                )
+                ))
             except Exception as _e:
+                _flagged = True
                 logger.warning("%s V126 3.5-A stream recheck failed: %s", log_prefix, _e)
             # V126 4/5: Schema hallucination check — LOG-ONLY sur stream (déjà émis)
-            _check_sql_schema_hallucination(
+            _flagged |= bool(_check_sql_schema_hallucination(
                 _full_response, log_prefix, lang=_meta.get("lang", lang),
-            )
+            ))
+        # Réponse suspecte (checks anti-hallucination) ou tronquée (timeout
+        # inter-chunk, MAX_TOKENS/SAFETY + suffixe "Réponse interrompue") →
+        # jamais mise en cache. stream_fn de test : pas de failure_box, fin complète.
+        _complete = _stream is not stream_gemini_chat or _failure_box.get("finish") == "STOP"
+        if _answer_key and _complete and not _flagged:
+            await answer_cache.aset(_answer_key, _full_response)
         logger.info(f"{log_prefix} Stream OK (page={page}, mode={mode})")
 
     except CircuitOpenError:
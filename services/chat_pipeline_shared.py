@@ -38,7 +38,11 @@ from services.chat_utils import _format_date_fr
 from services.base_chat_utils import _format_last_draw_context
 from services.stats_analysis import should_inject_pedagogical_context, PEDAGOGICAL_CONTEXT
 from services.decay_state import get_decay_state
-from config.engine import STRICT_HALLUCINATION_BLOCK_ENABLED  # V131.G
+from services.intent_router import route_intents
+from services.prompt_cache import get_assembled_prompt
+from services.sql_plan_cache import sql_plan_cache
+from services.draw_store import draw_version
+from config.engine import STRICT_HALLUCINATION_BLOCK_ENABLED, CHAT_ANSWER_CACHE_ENABLED  # V131.G
 
 # F15 V83: Gemini interaction helpers extracted to chat_pipeline_gemini.py
 from services.chat_pipeline_gemini import (  # noqa: F401 — re-exported for backward compat
@@ -664,10 +668,14 @@ async def run_text_to_sql(message, http_client, gem_api_key, history,
                           execute_sql_fn, format_result_fn, max_per_session,
                           log_prefix, force_sql, has_data_signal_fn,
                           continuation_mode, enrichment_context,
-                          lang="fr", sql_gen_kwargs=None) -> tuple[str, str | None, str]:
+                          lang="fr", sql_gen_kwargs=None, game=None,
+                          cache_report=None) -> tuple[str, str | None, str]:
     """
     Phase SQL block. Returns (enrichment_context, sql_query, sql_status).
     sql_gen_kwargs: extra kwargs for generate_sql_fn (e.g. lang for EM).
+    game: "loto" | "em" — active le cache de plans / résultats (services.sql_plan_cache).
+    cache_report: dict rempli avec sql_cache ("PLAN" | "RESULT" | "MISS") et
+        sql_saved_ms (reportés dans chat_log).
     """
     _sql_query = None
     _sql_status = "N/A"
@@ -694,14 +702,38 @@ async def run_text_to_sql(message, http_client, gem_api_key, history,
         if sql_gen_kwargs:
             kwargs.update(sql_gen_kwargs)
         sql_input = message[:_MAX_SQL_INPUT_LENGTH]
-        sql = await asyncio.wait_for(
-            generate_sql_fn(sql_input, http_client, gem_api_key, **kwargs),
-            timeout=_TIMEOUTS["sql_generate"],
-        )
+        # Cache de plans : question sans historique (pas de résolution de contexte)
+        _use_cache = game is not None and not history
+        _plan_hit = _result_hit = False
+        sql = sql_plan_cache.lookup_plan(game, lang, sql_input) if _use_cache else None
+        if sql is not None:
+            _plan_hit = True
+        else:
+            sql = await asyncio.wait_for(
+                generate_sql_fn(sql_input, http_client, gem_api_key, **kwargs),
+                timeout=_TIMEOUTS["sql_generate"],
+            )
+            sql_plan_cache.record_generation((time.monotonic() - t0) * 1000)
         if sql and sql.strip().upper() != "NO_SQL" and validate_sql_fn(sql):
             _sql_query = sql
+            if _use_cache and not _plan_hit:
+                sql_plan_cache.remember_plan(game, lang, sql_input, sql)
             sql = ensure_limit_fn(sql)
-            rows = await asyncio.wait_for(execute_sql_fn(sql), timeout=_TIMEOUTS["sql_execute"])
+            _version = draw_version(game) if _use_cache else None
+            rows = sql_plan_cache.lookup_result(game, _version, sql)
+            if rows is not None:
+                _result_hit = True
+            else:
+                t_exec = time.monotonic()
+                rows = await asyncio.wait_for(execute_sql_fn(sql), timeout=_TIMEOUTS["sql_execute"])
+                sql_plan_cache.record_execution((time.monotonic() - t_exec) * 1000)
+                if rows is not None:
+                    sql_plan_cache.remember_result(game, _version, sql, rows)
+            if _use_cache:
+                _saved = sql_plan_cache.record(_plan_hit, _result_hit)
+                if cache_report is not None:
+                    cache_report["sql_cache"] = "RESULT" if _result_hit else "PLAN" if _plan_hit else "MISS"
+                    cache_report["sql_saved_ms"] = _saved
             t_total = int((time.monotonic() - t0) * 1000)
             if rows is not None and len(rows) > 0:
                 _sql_status = "OK"
@@ -804,6 +836,36 @@ def _build_temporal_anchor(today=None) -> str:
     )
 
 
+def _assemble_system_prompt(base_prompt: str, lang: str, draw_count: int, today, pedagogical: bool) -> str:
+    """System prompt complet : base + {DRAW_COUNT} + langue + ancrage temporel
+    + anti-re-introduction + contexte pédagogique (mémorisé par services.prompt_cache)."""
+    system_prompt = base_prompt
+
+    # F02: inject dynamic draw count
+    if draw_count and "{DRAW_COUNT}" in system_prompt:
+        system_prompt = system_prompt.replace("{DRAW_COUNT}", str(draw_count))
+
+    # ── F01 V74: Force language when lang != "fr" (Loto prompt is FR-only) ──
+    if lang != "fr" and lang in _LANG_NAMES:
+        system_prompt += (
+            f"\n\n[LANGUE — RÈGLE OBLIGATOIRE]\n"
+            f"Tu DOIS répondre UNIQUEMENT en {_LANG_NAMES[lang]}. "
+            f"L'utilisateur parle {_LANG_NAMES[lang]}. "
+            f"Ne réponds JAMAIS dans une autre langue."
+        )
+
+    # ── Ancrage temporel (date courante réelle) — fix bug date 2026-05-26 ──
+    system_prompt += _build_temporal_anchor(today)
+
+    # ── Anti-re-introduction ──
+    system_prompt += ANTI_REINTRO_BLOCK
+
+    # ── Contexte pédagogique ──
+    if pedagogical:
+        system_prompt += PEDAGOGICAL_CONTEXT
+    return system_prompt
+
+
 async def _prepare_chat_context_base(
     message: str, history: list, page: str, http_client, lang: str, cfg: dict,
 ) -> tuple[dict, dict | None]:
@@ -867,35 +929,23 @@ async def _prepare_chat_context_base(
     _grid_count = 0
     _has_exclusions = False
 
-    system_prompt = cfg["load_system_prompt"](lang)
-    if not system_prompt:
+    base_prompt = cfg["load_system_prompt"](lang)
+    if not base_prompt:
         logger.error(f"{_lp} Prompt systeme introuvable")
         return {"response": _fallback, "source": "fallback", "mode": mode}, None
 
     # F02: inject dynamic draw count
     from services.chat_pipeline import _get_draw_count
     draw_count = await _get_draw_count(cfg["draw_count_game"])
-    if draw_count and "{DRAW_COUNT}" in system_prompt:
-        system_prompt = system_prompt.replace("{DRAW_COUNT}", str(draw_count))
-
-    # ── F01 V74: Force language when lang != "fr" (Loto prompt is FR-only) ──
-    if lang != "fr" and lang in _LANG_NAMES:
-        system_prompt += (
-            f"\n\n[LANGUE — RÈGLE OBLIGATOIRE]\n"
-            f"Tu DOIS répondre UNIQUEMENT en {_LANG_NAMES[lang]}. "
-            f"L'utilisateur parle {_LANG_NAMES[lang]}. "
-            f"Ne réponds JAMAIS dans une autre langue."
-        )
-
-    # ── Ancrage temporel (date courante réelle) — fix bug date 2026-05-26 ──
-    system_prompt += _build_temporal_anchor()
-
-    # ── Anti-re-introduction ──
-    system_prompt += ANTI_REINTRO_BLOCK
 
-    # ── Contexte pédagogique ──
-    if should_inject_pedagogical_context(message):
-        system_prompt += PEDAGOGICAL_CONTEXT
+    # Couches statiques mémorisées par (jeu, langue, base, draw_count, date, pédagogique)
+    _today = _date_cls.today()
+    _pedagogical = should_inject_pedagogical_context(message)
+    _assembled = get_assembled_prompt(
+        (cfg.get("game", "loto"), lang, base_prompt, draw_count, _today, _pedagogical),
+        lambda: _assemble_system_prompt(base_prompt, lang, draw_count, _today, _pedagogical),
+    )
+    system_prompt = _assembled.text
 
     # V131.A migration ADC : Vertex AI utilise désormais Application Default
     # Credentials (cf. gemini_shared._get_client). Le gate GEM_API_KEY legacy
@@ -914,16 +964,15 @@ async def _prepare_chat_context_base(
         return {"response": response, "source": source, "mode": mode,
                 "_chat_meta": _meta(**extra_meta)}, None
 
+    # Signaux des phases court-circuit (I → GEO) en un appel, message normalisé une fois
+    _signals = route_intents(message, lang, cfg)
+
     # ── Phase I : Détection d'insultes / agressivité ──
     _insult_prefix = ""
-    _insult_type = cfg["detect_insulte"](message)
+    _insult_type = _signals.insulte
     if _insult_type:
         _insult_streak = cfg["count_insult_streak"](history)
-        _has_question = (
-            '?' in message
-            or bool(re.search(r'\b\d{1,2}\b', message))
-            or any(kw in message.lower() for kw in _QUESTION_KEYWORDS_INSULT)
-        )
+        _has_question = _signals.has_question(message, _QUESTION_KEYWORDS_INSULT)
         if _has_question:
             _insult_prefix = cfg["get_insult_short"](lang)
             logger.info(f"{_lp} Insulte + question (type={_insult_type}, streak={_insult_streak})")
@@ -938,13 +987,9 @@ async def _prepare_chat_context_base(
 
     # ── Phase C : Détection de compliments ──
     if not _insult_prefix:
-        _compliment_type = cfg["detect_compliment"](message)
+        _compliment_type = _signals.compliment
         if _compliment_type:
-            _has_question_c = (
-                '?' in message
-                or bool(re.search(r'\b\d{1,2}\b', message))
-                or any(kw in message.lower() for kw in _QUESTION_KEYWORDS_COMPLIMENT)
-            )
+            _has_question_c = _signals.has_question(message, _QUESTION_KEYWORDS_COMPLIMENT)
             if not _has_question_c:
                 _phase = "C"
                 _comp_streak = cfg["count_compliment_streak"](history)
@@ -955,14 +1000,14 @@ async def _prepare_chat_context_base(
                 logger.info(f"{_lp} Compliment + question (type={_compliment_type}), passage au flow normal")
 
     # ── Phase R : Détection intention de noter le site ──
-    if cfg["detect_site_rating"](message):
+    if _signals.site_rating:
         _phase = "R"
         logger.info(f"{_lp} Site rating intent detected (lang={lang})")
         return _early(cfg["get_site_rating_response"](lang), "hybride_rating_invite")
 
     # ── Phase SALUTATION : Salutation initiale sans historique ──
     if not history or len(history) <= 1:
-        if cfg["detect_salutation"](message):
+        if _signals.salutation:
             _phase = "SALUTATION"
             _sal_resp = cfg["get_salutation_response"](cfg["salutation_game"], lang)
             logger.info(f"{_lp} Salutation detectee — court-circuit Phase SALUTATION (lang={lang})")
@@ -972,7 +1017,7 @@ async def _prepare_chat_context_base(
     _generation_context = ""
     _phase_g_attempted = False        # V141 A.3.1 BUG #4 — observability flag
     _phase_g_error_label = ""         # V141 A.3.1 BUG #4 — telemetry label
-    if cfg["detect_generation"](message):
+    if _signals.generation:
         _phase_g_attempted = True
         _phase = "G"
         try:
@@ -1091,9 +1136,8 @@ async def _prepare_chat_context_base(
     # matchait Phase A via "jackpot" → réponse inadaptée "argent c'est pas mon rayon".
     # Cross-sell module-aware : EM↔Loto redirige vers le module dédié LotoIA.
     # Response = None signifie "match = jeu courant" (own game same-module) → fall through.
-    _foreign_lottery_fn = cfg.get("detect_foreign_lottery")
-    if _foreign_lottery_fn:
-        _foreign_lottery_match = _foreign_lottery_fn(message)
+    if cfg.get("detect_foreign_lottery"):
+        _foreign_lottery_match = _signals.foreign_lottery
         if _foreign_lottery_match:
             _current_module = "em" if cfg.get("game") == "em" else "loto"
             _ol_resp_fn = cfg.get("get_foreign_lottery_response")
@@ -1111,8 +1155,8 @@ async def _prepare_chat_context_base(
 
     # ── Phase A : Détection argent / gains / paris ──
     # F02 V84: skip Phase A if message contains a user grid — Phase EVAL handles it
-    _has_grid_eval = cfg["detect_grid_evaluation"](message, game=cfg["eval_game"])
-    if cfg["detect_argent"](message, lang) and not _has_grid_eval:
+    _has_grid_eval = _signals.grid_evaluation
+    if _signals.argent and not _has_grid_eval:
         _phase = "A"
         _argent_resp = cfg["get_argent_response"](message, lang)
         if _insult_prefix:
@@ -1122,8 +1166,7 @@ async def _prepare_chat_context_base(
 
     # ── Phase GEO : Détection pays (EM only) ──
     _country_context = ""
-    _detect_country_fn = cfg.get("detect_country")
-    if _detect_country_fn and _detect_country_fn(message):
+    if _signals.country:
         _phase = "GEO"
         _country_context = cfg["get_country_context"](lang)
         logger.info(f"{_lp} Phase GEO — pays detecte, contexte injecte (lang={lang})")
@@ -1531,6 +1574,7 @@ async def _prepare_chat_context_base(
     # Phase SQL : Text-to-SQL fallback
     _sql_gen_kwargs_fn = cfg.get("sql_gen_kwargs")
     _sql_kw = {}
+    _sql_cache = {}
     if _sql_gen_kwargs_fn:
         _sql_kw["sql_gen_kwargs"] = _sql_gen_kwargs_fn(lang)
     enrichment_context, _sql_query, _sql_status = await run_text_to_sql(
@@ -1541,7 +1585,7 @@ async def _prepare_chat_context_base(
         log_prefix=cfg["sql_log_prefix"], force_sql=force_sql,
         has_data_signal_fn=cfg["has_data_signal"],
         continuation_mode=_continuation_mode, enrichment_context=enrichment_context,
-        lang=lang, **_sql_kw,
+        lang=lang, game=cfg.get("game"), cache_report=_sql_cache, **_sql_kw,
     )
     if (_sql_query or _sql_status != "N/A") and not _phase_g_error_label:
         _phase = "SQL"
@@ -1601,6 +1645,8 @@ async def _prepare_chat_context_base(
 
     return None, {
         "system_prompt": system_prompt,
+        # Hash stable du system prompt assemblé (clé de context caching fournisseur)
+        "system_prompt_hash": _assembled.hash,
         "gem_api_key": gem_api_key,
         "contents": contents,
         "mode": mode,
@@ -1614,10 +1660,13 @@ async def _prepare_chat_context_base(
         "_game": cfg.get("game", "loto"),
         # V131.G — flag strict mode lu depuis env var au module-load (config/engine.py)
         "_strict_hallucination_block": STRICT_HALLUCINATION_BLOCK_ENABLED,
+        # Answer cache (services.gemini_cache) — kill switch env CHAT_ANSWER_CACHE
+        "_answer_cache": CHAT_ANSWER_CACHE_ENABLED,
         "_chat_meta": {
             "phase": _phase, "t0": _t0, "lang": lang,
             "sql_query": _sql_query, "sql_status": _sql_status,
             "grid_count": _grid_count, "has_exclusions": _has_exclusions,
             "enrichment_context": enrichment_context,
+            "sql_cache": _sql_cache.get("sql_cache"), "sql_saved_ms": _sql_cache.get("sql_saved_ms", 0),
         },
     }
@@ -0,0 +1,194 @@
+"""
+Co-occurrences (paires, triplets, paires d'étoiles) sur le draw store.
+
+get_pair_correlations, get_triplet_correlations, get_star_pair_correlations,
+get_single_pair et get_pair_draws généraient chacun un UNION ALL à 10 branches
+LEAST/GREATEST + GROUP BY sur toute la table, avec 1 entrée de cache (et 1
+requête à froid) par combinaison fenêtre × top_n × ordre — la charge SQL la
+plus lourde déclenchée par la Phase P du chatbot.
+
+Ici chaque tirage est encodé une fois :
+    - 10 paires     a*64 + b            (a < b)
+    - 10 triplets   a*4096 + b*64 + c   (a < b < c)
+    - 1 paire d'étoiles                 (EM — NULL → -1, ignorée)
+Une fenêtre est un suffixe de l'historique (date >= date_from) : ses comptes
+sont un bincount / unique sur le suffixe des codes (matrice 64×64 pour les
+paires, creux pour les triplets), mémorisés par indice de début. Top-N
+hot/cold, paire isolée et rang se lisent par indexation ; get_pair_draws lit
+la liste des tirages de la paire (posting list, indices ASC).
+
+Nouveau tirage ajouté par le store : seuls les nouveaux tirages sont encodés
+et ajoutés (extend), les comptes par fenêtre sont recalculés à la demande.
+Store non chargé → None, les appelants gardent le chemin SQL.
+"""
+
+from itertools import combinations
+
+import numpy as np
+
+from services.draw_store import DrawSnapshot, get_draw_snapshot
+
+_PAIR_IDX = np.array(list(combinations(range(5), 2)), dtype=np.intp)
+_TRIPLET_IDX = np.array(list(combinations(range(5), 3)), dtype=np.intp)
+_PAIR_SPACE = 64 * 64
+
+
+def _pair_codes(balls: np.ndarray) -> np.ndarray:
+    s = np.sort(balls.astype(np.int32), axis=1)
+    return s[:, _PAIR_IDX[:, 0]] * 64 + s[:, _PAIR_IDX[:, 1]]
+
+
+def _triplet_codes(balls: np.ndarray) -> np.ndarray:
+    s = np.sort(balls.astype(np.int32), axis=1)
+    return s[:, _TRIPLET_IDX[:, 0]] * 4096 + s[:, _TRIPLET_IDX[:, 1]] * 64 + s[:, _TRIPLET_IDX[:, 2]]
+
+
+def _star_codes(secondary: np.ndarray) -> np.ndarray:
+    if secondary.shape[1] != 2:
+        return np.full(len(secondary), -1, dtype=np.int32)
+    s = np.sort(secondary.astype(np.int32), axis=1)
+    return np.where(s[:, 0] >= 0, s[:, 0] * 64 + s[:, 1], -1)
+
+
+def _top(codes: np.ndarray, counts: np.ndarray, top_n: int, order: str) -> list[tuple[int, int]]:
+    """(code, count) sorted by count (DESC hot / ASC cold), ties by code ASC."""
+    keys = counts if order == "cold" else -counts
+    sel = np.lexsort((codes, keys))[:top_n]
+    return [(int(codes[i]), int(counts[i])) for i in sel]
+
+
+def _rank(counts: np.ndarray, count: int) -> tuple[int, int]:
+    """(rank, total) of a count among the non-zero counts — SQL `pair_count > %s` + 1."""
+    nz = counts[counts > 0]
+    return int((nz > count).sum()) + 1, len(nz)
+
+
+class CooccurrenceIndex:
+    """Encoded pairs / triplets / star pairs of every draw of a snapshot (ASC)."""
+
+    def __init__(self, snap: DrawSnapshot):
+        self.snapshot = snap
+        self.pairs = _pair_codes(snap.balls)
+        self.triplets = _triplet_codes(snap.balls)
+        self.stars = _star_codes(snap.secondary)
+        self._postings = self._build_postings(self.pairs, 0)
+        self._windows: dict[tuple, object] = {}
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    @staticmethod
+    def _build_postings(pairs: np.ndarray, offset: int) -> dict[int, np.ndarray]:
+        draw_idx = np.repeat(np.arange(offset, offset + len(pairs), dtype=np.int32), pairs.shape[1])
+        flat = pairs.ravel()
+        order = np.argsort(flat, kind="stable")
+        codes, starts = np.unique(flat[order], return_index=True)
+        return dict(zip(codes.tolist(), np.split(draw_idx[order], starts[1:])))
+
+    def extends(self, snap: DrawSnapshot) -> bool:
+        """True if snap = this snapshot + appended draws (incremental update possible)."""
+        n = len(self)
+        return (
+            len(snap) >= n
+            and np.array_equal(snap.dates[:n], self.snapshot.dates)
+            and np.array_equal(snap.balls[:n], self.snapshot.balls)
+            and np.array_equal(snap.secondary[:n], self.snapshot.secondary)
+        )
+
+    def extend(self, snap: DrawSnapshot) -> None:
+        """Encode only the draws appended since the indexed snapshot."""
+        n = len(self)
+        new_balls = snap.balls[n:]
+        new_pairs = _pair_codes(new_balls)
+        self.pairs = np.concatenate([self.pairs, new_pairs])
+        self.triplets = np.concatenate([self.triplets, _triplet_codes(new_balls)])
+        self.stars = np.concatenate([self.stars, _star_codes(snap.secondary[n:])])
+        for code, idx in self._build_postings(new_pairs, n).items():
+            old = self._postings.get(code)
+            self._postings[code] = idx if old is None else np.concatenate([old, idx])
+        self.snapshot = snap
+        self._windows.clear()
+
+    # ── Counts per window (suffix draws[start:]) ──
+
+    def _pair_counts(self, start: int) -> np.ndarray:
+        key = ("pairs", start)
+        counts = self._windows.get(key)
+        if counts is None:
+            counts = np.bincount(self.pairs[start:].ravel(), minlength=_PAIR_SPACE)
+            self._windows[key] = counts
+        return counts
+
+    def _star_counts(self, start: int) -> np.ndarray:
+        key = ("stars", start)
+        counts = self._windows.get(key)
+        if counts is None:
+            codes = self.stars[start:]
+            counts = np.bincount(codes[codes >= 0], minlength=_PAIR_SPACE)
+            self._windows[key] = counts
+        return counts
+
+    def _triplet_counts(self, start: int) -> tuple[np.ndarray, np.ndarray]:
+        key = ("triplets", start)
+        sparse = self._windows.get(key)
+        if sparse is None:
+            sparse = np.unique(self.triplets[start:].ravel(), return_counts=True)
+            self._windows[key] = sparse
+        return sparse
+
+    # ── Queries ──
+
+    def top_pairs(self, start: int, top_n: int, order: str = "hot") -> list[tuple[int, int, int]]:
+        counts = self._pair_counts(start)
+        codes = np.flatnonzero(counts)
+        return [(c // 64, c % 64, n) for c, n in _top(codes, counts[codes], top_n, order)]
+
+    def top_star_pairs(self, start: int, top_n: int, order: str = "hot") -> list[tuple[int, int, int]]:
+        counts = self._star_counts(start)
+        codes = np.flatnonzero(counts)
+        return [(c // 64, c % 64, n) for c, n in _top(codes, counts[codes], top_n, order)]
+
+    def top_triplets(self, start: int, top_n: int) -> list[tuple[int, int, int, int]]:
+        codes, counts = self._triplet_counts(start)
+        return [(c // 4096, c // 64 % 64, c % 64, n) for c, n in _top(codes, counts, top_n, "hot")]
+
+    def pair_stats(self, a: int, b: int) -> tuple[int, int, int]:
+        """(count, rank, total_pairs) of pair a < b over the full history."""
+        counts = self._pair_counts(0)
+        count = int(counts[a * 64 + b])
+        return (count, *_rank(counts, count))
+
+    def star_pair_stats(self, a: int, b: int) -> tuple[int, int, int]:
+        counts = self._star_counts(0)
+        count = int(counts[a * 64 + b])
+        return (count, *_rank(counts, count))
+
+    def pair_draws(self, a: int, b: int, limit: int) -> np.ndarray:
+        """Draw indices (DESC = most recent first) where a and b were both drawn."""
+        idx = self._postings.get(a * 64 + b)
+        if idx is None:
+            return np.empty(0, dtype=np.int32)
+        return idx[::-1][:limit]
+
+    def star_pair_draws(self, a: int, b: int, limit: int) -> np.ndarray:
+        return np.flatnonzero(self.stars == a * 64 + b)[::-1][:limit]
+
+
+_indexes: dict[str, CooccurrenceIndex] = {}
+
+
+def get_cooccurrence(game: str) -> CooccurrenceIndex | None:
+    """CooccurrenceIndex of the current draw store snapshot ("loto" | "em"),
+    None if not loaded. Appended draws are encoded incrementally."""
+    snap = get_draw_snapshot(game)
+    if snap is None or not len(snap):
+        return None
+    index = _indexes.get(game)
+    if index is None:
+        index = _indexes[game] = CooccurrenceIndex(snap)
+    elif index.snapshot is not snap:
+        if index.extends(snap):
+            index.extend(snap)
+        else:
+            index = _indexes[game] = CooccurrenceIndex(snap)
+    return index
@@ -19,6 +19,8 @@ is "consecutive_misses" (no migration). This module always uses the SQL column n
 import logging
 from datetime import date
 
+from services.draw_store import get_draw_store, notify_new_draw
+
 logger = logging.getLogger(__name__)
 
 
@@ -83,8 +85,50 @@ async def get_decay_state(
         return {}
 
 
+async def get_decay_states(
+    conn, game: str, number_types: tuple[str, ...] = ("ball",),
+) -> dict[str, dict[int, int]]:
+    """Batched get_decay_state: {number_type: {number_value: consecutive_misses}}.
+
+    One query for all types (/generate reads "ball" + "star"/"chance" together).
+    Every requested type is present in the result ({} if no row).
+    Graceful degradation: never raises — all types empty on failure.
+    """
+    states: dict[str, dict[int, int]] = {t: {} for t in number_types}
+    if not number_types:
+        return states
+    try:
+        cursor = await conn.cursor()
+        placeholders = ",".join(["%s"] * len(number_types))
+        await cursor.execute(
+            "SELECT number_type, number_value, consecutive_misses "
+            "FROM hybride_decay_state "
+            f"WHERE game = %s AND number_type IN ({placeholders})",
+            (game, *number_types),
+        )
+        for row in await cursor.fetchall():
+            if row["number_type"] in states:
+                states[row["number_type"]][row["number_value"]] = row["consecutive_misses"]
+        return states
+    except Exception:
+        logger.warning("get_decay_states failed for %s/%s — returning empty", game, number_types)
+        return {t: {} for t in number_types}
+
+
 # ── Async DB access — WRITE (called on new real draw ONLY) ──────────
 
+def decay_transition(current: dict[int, int], drawn) -> dict[int, int]:
+    """New consecutive_misses after a draw (pure).
+
+    Drawn numbers → 0, every other tracked number → +1. Untracked numbers that
+    were not drawn stay untracked (same rows as the former per-number SQL).
+    """
+    drawn = set(drawn)
+    new = {n: misses + 1 for n, misses in current.items() if n not in drawn}
+    new.update({n: 0 for n in drawn})
+    return new
+
+
 async def update_decay_after_draw(
     conn,
     game: str,
@@ -99,63 +143,52 @@ async def update_decay_after_draw(
     - Numbers that appeared in the draw → reset consecutive_misses=0, set last_drawn=draw date
     - ALL other numbers already tracked → consecutive_misses += 1 (they missed this draw)
 
+    The transition is computed in memory (decay_transition) from the current
+    rows, read FOR UPDATE, and written back as ONE multi-row upsert in a
+    single transaction (was: 1 statement per drawn number + 2 UPDATEs).
+
     Returns summary dict {reset: int, incremented: int, game: str}.
     """
     today = date.today().isoformat()
-    reset_count = 0
-    incremented_count = 0
+    secondary_type = "star" if game == "euromillions" else "chance"
     try:
         cursor = await conn.cursor()
-
-        # 1. Reset drawn balls: consecutive_misses=0, last_drawn=today
-        for num in drawn_balls:
+        await conn.begin()
+        await cursor.execute(
+            "SELECT number_type, number_value, consecutive_misses "
+            "FROM hybride_decay_state WHERE game = %s FOR UPDATE",
+            (game,),
+        )
+        current: dict[str, dict[int, int]] = {}
+        for row in await cursor.fetchall():
+            current.setdefault(row["number_type"], {})[row["number_value"]] = row["consecutive_misses"]
+
+        reset_count = 0
+        incremented_count = 0
+        params: list = []
+        for ntype, drawn in (("ball", drawn_balls), (secondary_type, drawn_stars)):
+            if not drawn:
+                continue
+            drawn_set = {int(n) for n in drawn}
+            for n, misses in sorted(decay_transition(current.get(ntype, {}), drawn_set).items()):
+                if n in drawn_set:
+                    params += [game, ntype, n, 0, today, today]
+                    reset_count += 1
+                else:
+                    # last_drawn / last_played NULL → kept by COALESCE below
+                    params += [game, ntype, n, misses, None, None]
+                    incremented_count += 1
+
+        if params:
             await cursor.execute(
                 "INSERT INTO hybride_decay_state "
                 "(game, number_type, number_value, consecutive_misses, last_drawn, last_played) "
-                "VALUES (%s, 'ball', %s, 0, %s, %s) "
+                "VALUES " + ", ".join(["(%s, %s, %s, %s, %s, %s)"] * (len(params) // 6)) + " "
                 "ON DUPLICATE KEY UPDATE "
-                "consecutive_misses = 0, last_drawn = %s, updated_at = NOW()",
-                (game, num, today, today, today),
-            )
-            reset_count += 1
-
-        # 2. Increment all OTHER tracked balls (they missed this draw)
-        if drawn_balls:
-            placeholders = ",".join(["%s"] * len(drawn_balls))
-            await cursor.execute(
-                "UPDATE hybride_decay_state "
-                "SET consecutive_misses = consecutive_misses + 1, updated_at = NOW() "
-                "WHERE game = %s AND number_type = 'ball' "
-                f"AND number_value NOT IN ({placeholders})",
-                (game, *drawn_balls),
-            )
-            incremented_count += cursor.rowcount
-
-        # 3. Reset drawn stars/chance
-        if drawn_stars:
-            ntype = "star" if game == "euromillions" else "chance"
-            for s in drawn_stars:
-                await cursor.execute(
-                    "INSERT INTO hybride_decay_state "
-                    "(game, number_type, number_value, consecutive_misses, last_drawn, last_played) "
-                    "VALUES (%s, %s, %s, 0, %s, %s) "
-                    "ON DUPLICATE KEY UPDATE "
-                    "consecutive_misses = 0, last_drawn = %s, updated_at = NOW()",
-                    (game, ntype, s, today, today, today),
-                )
-                reset_count += 1
-
-            # 4. Increment all OTHER tracked stars/chance
-            star_placeholders = ",".join(["%s"] * len(drawn_stars))
-            await cursor.execute(
-                "UPDATE hybride_decay_state "
-                "SET consecutive_misses = consecutive_misses + 1, updated_at = NOW() "
-                "WHERE game = %s AND number_type = %s "
-                f"AND number_value NOT IN ({star_placeholders})",
-                (game, ntype, *drawn_stars),
+                "consecutive_misses = VALUES(consecutive_misses), "
+                "last_drawn = COALESCE(VALUES(last_drawn), last_drawn), updated_at = NOW()",
+                tuple(params),
             )
-            incremented_count += cursor.rowcount
-
         await conn.commit()
         logger.info(
             "update_decay_after_draw OK for %s — %d reset, %d incremented",
@@ -163,34 +196,67 @@ async def update_decay_after_draw(
         )
         return {"game": game, "reset": reset_count, "incremented": incremented_count}
     except Exception:
+        try:
+            await conn.rollback()
+        except Exception:
+            pass
         logger.warning("update_decay_after_draw failed for %s — skipping", game, exc_info=True)
         return {"game": game, "reset": 0, "incremented": 0, "error": True}
 
 
+# Latest draw date already handled per game ("loto" | "euromillions") —
+# in-memory "new draw?" check, no DB round-trip while it matches the draw store.
+_processed_versions: dict[str, str] = {}
+
+
+def _store_game(game: str) -> str:
+    return "em" if game == "euromillions" else game
+
+
+def _drawn_from_snapshot(snap) -> tuple[list[int], list[int] | None]:
+    balls = [int(n) for n in snap.balls[-1]]
+    stars = [int(n) for n in snap.secondary[-1] if n >= 0]  # -1 = NULL (import 2 étapes)
+    return balls, stars or None
+
+
 async def check_and_update_decay(conn, game: str, table_name: str) -> dict | None:
     """Auto-detect new real draw and update decay state if needed.
 
-    Compares the latest draw date in the draws table vs the MAX(updated_at)
+    Compares the latest draw date in the draws table vs the MAX(last_drawn)
     in hybride_decay_state. If a newer draw exists, triggers update_decay_after_draw.
 
+    Draw store loaded: the latest draw and its numbers come from the snapshot,
+    and once a draw version is handled the check is a pure in-memory version
+    comparison (no query until the store sees a new draw).
+
     Safe to call from the scoring path — it only WRITES when a genuinely new draw
     is detected (typically once per draw, ~3x/week for Loto, ~2x/week for EM).
 
     Returns update summary or None if no new draw detected.
     """
     try:
-        cursor = await conn.cursor()
-
-        # Get the most recent draw date from the draws table
-        await cursor.execute(
-            f"SELECT date_de_tirage FROM {table_name} "
-            "ORDER BY date_de_tirage DESC LIMIT 1",
-        )
-        latest_draw_row = await cursor.fetchone()
-        if not latest_draw_row:
-            return None
-        latest_draw_date = latest_draw_row["date_de_tirage"]
+        snap = await get_draw_store(_store_game(game)).ensure_fresh(conn)
+        if snap is not None and not len(snap):
+            snap = None
+        if snap is not None:
+            latest_draw_date = str(snap.reference_date())
+            if _processed_versions.get(game) == latest_draw_date:
+                return None
+        else:
+            cursor = await conn.cursor()
+            # Get the most recent draw date from the draws table
+            await cursor.execute(
+                f"SELECT date_de_tirage FROM {table_name} "
+                "ORDER BY date_de_tirage DESC LIMIT 1",
+            )
+            latest_draw_row = await cursor.fetchone()
+            if not latest_draw_row:
+                return None
+            latest_draw_date = latest_draw_row["date_de_tirage"]
+            if _processed_versions.get(game) == str(latest_draw_date)[:10]:
+                return None
 
+        cursor = await conn.cursor()
         # Get the most recent update in decay_state for this game
         await cursor.execute(
             "SELECT MAX(updated_at) AS last_update, MAX(last_drawn) AS last_drawn_date "
@@ -202,42 +268,56 @@ async def check_and_update_decay(conn, game: str, table_name: str) -> dict | Non
 
         # Guard: if the latest draw was already processed, skip
         if last_drawn_date is not None and str(last_drawn_date) >= str(latest_draw_date):
+            _processed_versions[game] = str(latest_draw_date)[:10]
             return None
 
-        # New draw detected — fetch drawn numbers
-        if game == "euromillions":
-            await cursor.execute(
-                f"SELECT boule_1, boule_2, boule_3, boule_4, boule_5, etoile_1, etoile_2 "
-                f"FROM {table_name} WHERE date_de_tirage = %s LIMIT 1",
-                (latest_draw_date,),
-            )
+        # New draw detected — drawn numbers from the snapshot, else from the table
+        if snap is not None:
+            drawn_balls, drawn_stars = _drawn_from_snapshot(snap)
         else:
-            await cursor.execute(
-                f"SELECT boule_1, boule_2, boule_3, boule_4, boule_5, numero_chance "
-                f"FROM {table_name} WHERE date_de_tirage = %s LIMIT 1",
-                (latest_draw_date,),
-            )
+            if game == "euromillions":
+                await cursor.execute(
+                    f"SELECT boule_1, boule_2, boule_3, boule_4, boule_5, etoile_1, etoile_2 "
+                    f"FROM {table_name} WHERE date_de_tirage = %s LIMIT 1",
+                    (latest_draw_date,),
+                )
+            else:
+                await cursor.execute(
+                    f"SELECT boule_1, boule_2, boule_3, boule_4, boule_5, numero_chance "
+                    f"FROM {table_name} WHERE date_de_tirage = %s LIMIT 1",
+                    (latest_draw_date,),
+                )
 
-        draw_row = await cursor.fetchone()
-        if not draw_row:
-            return None
+            draw_row = await cursor.fetchone()
+            if not draw_row:
+                return None
 
-        drawn_balls = [draw_row[f"boule_{i}"] for i in range(1, 6)]
+            drawn_balls = [draw_row[f"boule_{i}"] for i in range(1, 6)]
 
-        if game == "euromillions":
-            drawn_stars = [draw_row["etoile_1"], draw_row["etoile_2"]]
-        elif "numero_chance" in draw_row and draw_row["numero_chance"] is not None:
-            drawn_stars = [draw_row["numero_chance"]]
-        else:
-            drawn_stars = None
+            if game == "euromillions":
+                drawn_stars = [draw_row["etoile_1"], draw_row["etoile_2"]]
+            elif "numero_chance" in draw_row and draw_row["numero_chance"] is not None:
+                drawn_stars = [draw_row["numero_chance"]]
+            else:
+                drawn_stars = None
 
         logger.info(
             "check_and_update_decay: new draw detected for %s (date=%s, balls=%s, stars=%s)",
             game, latest_draw_date, drawn_balls, drawn_stars,
         )
+        # Same detection drives draw-derived caches (draw store, HYBRIDE score cache)
+        notify_new_draw(_store_game(game))
 
-        return await update_decay_after_draw(conn, game, drawn_balls, drawn_stars)
+        result = await update_decay_after_draw(conn, game, drawn_balls, drawn_stars)
+        if not result.get("error"):
+            _processed_versions[game] = str(latest_draw_date)[:10]
+        return result
 
     except Exception:
         logger.warning("check_and_update_decay failed for %s — skipping", game, exc_info=True)
         return None
+
+
+def reset_decay_check() -> None:
+    """Forget handled draw versions (tests / admin forced re-check)."""
+    _processed_versions.clear()
@@ -0,0 +1,369 @@
+"""
+Réponses Text-to-SQL depuis le draw store (Phase SQL du chatbot).
+
+Les questions « data » les plus fréquentes se réduisent à quelques formes de
+SQL : compter des tirages, fréquences par numéro, première / dernière sortie,
+derniers tirages. Quand le snapshot du jeu est chargé (services.draw_store),
+ces requêtes sont évaluées sur les colonnes NumPy au lieu d'un aller-retour
+Cloud SQL. Tout ce qui sort de ces formes (CASE, sous-requête corrélée,
+colonne absente du snapshot, NOT…) → None → chemin MySQL inchangé.
+
+Formes reconnues (AST services.sql_ast, table tirages / tirages_euromillions) :
+    SELECT COUNT(*) | MIN(date_de_tirage) | MAX(date_de_tirage), … FROM t [WHERE f]
+    SELECT date_de_tirage, boule_1, … FROM t [WHERE f] ORDER BY date_de_tirage [DESC] LIMIT n
+    SELECT col, COUNT(*) AS freq FROM t [WHERE f] GROUP BY col ORDER BY freq DESC LIMIT n
+    SELECT num, COUNT(*) AS freq FROM (SELECT boule_1 AS num FROM t [WHERE f]
+        UNION ALL SELECT boule_2 FROM t [WHERE f] …) x GROUP BY num ORDER BY freq DESC LIMIT n
+
+Filtre f : AND / OR de comparaisons (=, <>, <, >, <=, >=, IN, BETWEEN) entre
+une colonne du snapshot, YEAR(date_de_tirage) ou MONTH(date_de_tirage) et une
+constante (nombre, 'yyyy-mm-dd', CURDATE(), DATE_SUB(…, INTERVAL n unit)…).
+Secondaire NULL (import 2 étapes) : comparaison fausse, comme en SQL sans NOT.
+Ex æquo de fréquence : numéro croissant (ordre non défini côté MySQL).
+"""
+
+import calendar
+import logging
+import re
+from datetime import date, timedelta
+
+import numpy as np
+
+from config.engine import EM_CONFIG, LOTO_CONFIG
+from services.draw_store import get_draw_snapshot
+from services.sql_ast import (
+    Between, Binary, Column, Derived, Func, InList, Interval, Literal, Query,
+    Select, SqlSyntaxError, Star, TableRef, Unary, parse_sql,
+)
+
+logger = logging.getLogger(__name__)
+
+_CONFIGS = {cfg.table_name: cfg for cfg in (LOTO_CONFIG, EM_CONFIG)}
+_DATE_COLUMN = "date_de_tirage"
+_DATE_LITERAL_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_FLIP = {"=": "=", "<>": "<>", "<": ">", ">": "<", "<=": ">=", ">=": "<="}
+_COMPARE = {
+    "=": np.equal, "<>": np.not_equal, "<": np.less, ">": np.greater,
+    "<=": np.less_equal, ">=": np.greater_equal,
+}
+
+
+class _Unsupported(Exception):
+    """Requête hors des formes évaluables sur le snapshot."""
+
+
+def answer_from_draw_store(sql: str) -> list[dict] | None:
+    """Lignes du SQL calculées sur le snapshot, None si non applicable.
+
+    Jamais d'exception : toute erreur d'évaluation → None (chemin MySQL).
+    """
+    try:
+        query = parse_sql(sql)
+    except SqlSyntaxError:
+        return None
+    try:
+        return _answer(query)
+    except _Unsupported:
+        return None
+    except Exception:
+        logger.warning("[DRAW_SQL] evaluation failed — MySQL fallback: %s", sql, exc_info=True)
+        return None
+
+
+# ────────────────────────────────────────────
+# Source + filtre
+# ────────────────────────────────────────────
+
+class _Source:
+    """Snapshot d'une table + colonnes dérivées (années, mois) calculées à la demande."""
+
+    def __init__(self, table: TableRef):
+        cfg = _CONFIGS.get(table.name.lower())
+        snap = get_draw_snapshot(cfg.game) if cfg is not None else None
+        if snap is None:
+            raise _Unsupported
+        self.cfg, self.snap = cfg, snap
+        self.table = table.name.lower()
+        self.names = {self.table} | ({table.alias.lower()} if table.alias else set())
+
+    def column(self, node) -> np.ndarray:
+        """Valeurs int d'une colonne boule / secondaire (-1 = NULL)."""
+        if not isinstance(node, Column) or (node.table and node.table.lower() not in self.names):
+            raise _Unsupported
+        values = self.snap.column(node.name.lower(), self.cfg.secondary_columns)
+        if values is None:
+            raise _Unsupported
+        return values.astype(np.intp)
+
+    def is_date(self, node) -> bool:
+        return (isinstance(node, Column) and node.name.lower() == _DATE_COLUMN
+                and (node.table is None or node.table.lower() in self.names))
+
+    def operand(self, node) -> tuple[np.ndarray, type]:
+        """(valeurs, type de constante attendu) d'un côté colonne d'une comparaison."""
+        if self.is_date(node):
+            return self.snap.dates, date
+        if isinstance(node, Func) and len(node.args) == 1 and self.is_date(node.args[0]):
+            if node.name == "YEAR":
+                return self.snap.dates.astype("datetime64[Y]").astype(int) + 1970, int
+            if node.name == "MONTH":
+                return self.snap.dates.astype("datetime64[M]").astype(int) % 12 + 1, int
+        return self.column(node), int
+
+    def mask(self, node) -> np.ndarray:
+        if node is None:
+            return np.ones(len(self.snap), dtype=bool)
+        if isinstance(node, Binary) and node.op in ("AND", "OR"):
+            left, right = self.mask(node.left), self.mask(node.right)
+            return left & right if node.op == "AND" else left | right
+        if isinstance(node, Binary) and node.op in _COMPARE:
+            try:
+                return self.compare(node.op, node.left, node.right)
+            except _Unsupported:
+                return self.compare(_FLIP[node.op], node.right, node.left)
+        if isinstance(node, InList) and not isinstance(node.items[0], Query):
+            hit = np.zeros(len(self.snap), dtype=bool)
+            for item in node.items:
+                hit |= self.compare("=", node.expr, item)
+            if not node.negated:
+                return hit
+            values, kind = self.operand(node.expr)
+            # NOT IN : secondaire NULL (-1) exclu comme en SQL ; une date n'est jamais NULL
+            return ~hit if kind is date else ~hit & (values >= 0)
+        if isinstance(node, Between) and not node.negated:
+            return self.compare(">=", node.expr, node.low) & self.compare("<=", node.expr, node.high)
+        raise _Unsupported
+
+    def compare(self, op: str, column, value) -> np.ndarray:
+        values, kind = self.operand(column)
+        const = _constant(value)
+        if kind is date:
+            if type(const) is not date:
+                raise _Unsupported
+            return _COMPARE[op](values, np.datetime64(const, "D"))
+        if type(const) is not int:
+            raise _Unsupported
+        return _COMPARE[op](values, const) & (values >= 0)
+
+
+def _today() -> date:
+    return date.today()
+
+
+def _constant(node) -> int | date:
+    """Valeur d'une expression constante (nombre, date, CURDATE(), intervalles)."""
+    if isinstance(node, Literal):
+        if node.kind == "num" and node.value.isdigit():
+            return int(node.value)
+        if node.kind == "str" and _DATE_LITERAL_RE.fullmatch(node.value):
+            try:
+                return date.fromisoformat(node.value)
+            except ValueError:
+                raise _Unsupported from None
+    elif isinstance(node, Unary) and node.op == "-":
+        value = _constant(node.operand)
+        if type(value) is int:
+            return -value
+    elif isinstance(node, Func):
+        if node.name in ("CURDATE", "CURRENT_DATE") and not node.args:
+            return _today()
+        if node.name in ("YEAR", "MONTH") and len(node.args) == 1:
+            day = _constant(node.args[0])
+            if type(day) is date:
+                return day.year if node.name == "YEAR" else day.month
+        if node.name in ("DATE_SUB", "DATE_ADD") and len(node.args) == 2:
+            return _shift(node.args[0], node.args[1], -1 if node.name == "DATE_SUB" else 1)
+    elif isinstance(node, Binary) and node.op in ("+", "-"):
+        return _shift(node.left, node.right, -1 if node.op == "-" else 1)
+    raise _Unsupported
+
+
+def _shift(day_node, interval, sign: int) -> date:
+    day = _constant(day_node)
+    if type(day) is not date or not isinstance(interval, Interval):
+        raise _Unsupported
+    n = _constant(interval.expr)
+    if type(n) is not int:
+        raise _Unsupported
+    n *= sign
+    if interval.unit in ("DAY", "WEEK"):
+        return day + timedelta(days=n * (7 if interval.unit == "WEEK" else 1))
+    months = n * {"MONTH": 1, "QUARTER": 3, "YEAR": 12}[interval.unit]
+    # MySQL : jour ramené au dernier jour du mois cible (31/03 - 1 MONTH = 28/02)
+    index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(index, 12)
+    month += 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+# ────────────────────────────────────────────
+# Formes de requêtes
+# ────────────────────────────────────────────
+
+def _is_count_star(node) -> bool:
+    return (isinstance(node, Func) and node.name == "COUNT" and not node.distinct
+            and node.args == (Star(),) and node.over is None)
+
+
+def _page(rows: list, query: Query) -> list:
+    if query.limit is None:
+        return rows
+    offset = query.limit.offset or 0
+    return rows[offset:offset + query.limit.count]
+
+
+def _answer(query: Query) -> list[dict]:
+    if len(query.terms) != 1 or not isinstance(query.terms[0], Select):
+        raise _Unsupported
+    select = query.terms[0]
+    if select.distinct or select.having is not None or len(select.from_) != 1:
+        raise _Unsupported
+    source = select.from_[0]
+    if isinstance(source, TableRef):
+        table = _Source(source)
+        mask = table.mask(select.where)
+        if select.group_by:
+            if len(select.group_by) != 1:
+                raise _Unsupported
+            group = select.group_by[0]
+            return _frequencies(query, select, group, [table.column(group)[mask]], table.names)
+        if all(isinstance(item.expr, Func) for item in select.items):
+            if query.order_by:
+                raise _Unsupported
+            return _page([_aggregates(select, table, mask)], query)
+        return _draws(query, select, table, mask)
+    if isinstance(source, Derived) and select.where is None and len(select.group_by) == 1:
+        return _unpivot(query, select, source)
+    raise _Unsupported
+
+
+def _aggregates(select: Select, table: _Source, mask: np.ndarray) -> dict:
+    row = {}
+    dates = table.snap.dates[mask]
+    for item in select.items:
+        expr = item.expr
+        if _is_count_star(expr):
+            row[item.name] = int(mask.sum())
+        elif (expr.name in ("MIN", "MAX") and len(expr.args) == 1 and table.is_date(expr.args[0])
+              and not expr.distinct and expr.over is None):
+            if not len(dates):
+                row[item.name] = None
+            else:
+                row[item.name] = (dates[0] if expr.name == "MIN" else dates[-1]).astype(date)
+        else:
+            raise _Unsupported
+    return row
+
+
+def _draws(query: Query, select: Select, table: _Source, mask: np.ndarray) -> list[dict]:
+    """Lignes de tirages triées par date (derniers tirages, dernière sortie…)."""
+    if len(query.order_by) != 1 or not table.is_date(query.order_by[0].expr):
+        raise _Unsupported
+    columns = []
+    for item in select.items:
+        if table.is_date(item.expr):
+            columns.append((item.name, None))
+        else:
+            columns.append((item.name, table.column(item.expr)))
+    indices = np.flatnonzero(mask)
+    if query.order_by[0].desc:
+        indices = indices[::-1]
+    rows = []
+    for i in _page(indices, query):
+        row = {}
+        for name, values in columns:
+            if values is None:
+                row[name] = table.snap.dates[i].astype(date)
+            else:
+                row[name] = int(values[i]) if values[i] >= 0 else None
+        rows.append(row)
+    return rows
+
+
+def _frequencies(query: Query, select: Select, group, parts: list, names: set[str]) -> list[dict]:
+    """GROUP BY d'une colonne (ou de l'unpivot des colonnes) avec COUNT(*)."""
+    value_item = count_item = None
+    for item in select.items:
+        if _is_count_star(item.expr) and count_item is None:
+            count_item = item
+        elif _same_column(item.expr, group, names) and value_item is None:
+            value_item = item
+        else:
+            raise _Unsupported
+    if not query.order_by:
+        raise _Unsupported
+    keys = []
+    for order in query.order_by:
+        expr = order.expr
+        if isinstance(expr, Literal) and expr.kind == "num" and expr.value.isdigit():
+            position = int(expr.value) - 1
+            if not 0 <= position < len(select.items):
+                raise _Unsupported
+            expr = select.items[position].expr
+        if _is_count_star(expr) or (count_item and _names(expr, count_item.alias)):
+            keys.append((1, order.desc))
+        elif _same_column(expr, group, names) or (value_item and _names(expr, value_item.alias)):
+            keys.append((0, order.desc))
+        else:
+            raise _Unsupported
+    values = np.concatenate(parts).astype(np.intp)
+    counts = np.bincount(values[values >= 0])
+    groups = [(int(v), int(c)) for v, c in enumerate(counts) if c]
+    nulls = int((values < 0).sum())
+    if nulls:
+        groups.append((None, nulls))
+
+    def _key(group_row):
+        # NULL : premier en ASC, dernier en DESC (MySQL) ; ex æquo → valeur croissante
+        value = -1 if group_row[0] is None else group_row[0]
+        return tuple(-(group_row[k] if k else value) if desc else (group_row[k] if k else value)
+                     for k, desc in keys) + (value,)
+
+    rows = []
+    for value, count in _page(sorted(groups, key=_key), query):
+        row = {}
+        if value_item is not None:
+            row[value_item.name] = value
+        if count_item is not None:
+            row[count_item.name] = count
+        rows.append(row)
+    return rows
+
+
+def _same_column(node, group, names: set[str]) -> bool:
+    if not isinstance(node, Column) or not isinstance(group, Column):
+        return False
+    if node.name.lower() != group.name.lower():
+        return False
+    return all(t is None or t.lower() in names for t in (node.table, group.table))
+
+
+def _names(node, alias: str | None) -> bool:
+    return alias is not None and isinstance(node, Column) and node.table is None \
+        and node.name.lower() == alias.lower()
+
+
+def _unpivot(query: Query, select: Select, source: Derived) -> list[dict]:
+    """SELECT num, COUNT(*) FROM (SELECT boule_1 AS num FROM t UNION ALL …) x GROUP BY num."""
+    inner = source.query
+    if inner.order_by or inner.limit is not None:
+        raise _Unsupported
+    table = where = None
+    parts = []
+    for term in inner.terms:
+        if (not isinstance(term, Select) or len(term.items) != 1 or len(term.from_) != 1
+                or term.group_by or term.having is not None or term.distinct
+                or not isinstance(term.from_[0], TableRef)):
+            raise _Unsupported
+        if table is None:
+            table, where = _Source(term.from_[0]), term.where
+            mask = table.mask(where)
+        elif term.from_[0].name.lower() != table.table or term.where != where:
+            raise _Unsupported
+        parts.append(table.column(term.items[0].expr)[mask])
+    column = inner.terms[0].items[0].name
+    names = {source.alias.lower()} if source.alias else set()
+    group = select.group_by[0]
+    if not isinstance(group, Column) or group.name.lower() != column.lower():
+        raise _Unsupported
+    return _frequencies(query, select, group, parts, names)
@@ -0,0 +1,330 @@
+"""
+Draw store in-process — historique des tirages en colonnes NumPy.
+
+Chaque instance Cloud Run charge UNE fois l'historique complet de chaque jeu
+(tirages / tirages_euromillions) dans un snapshot immuable :
+    - dates     : datetime64[D] triées ASC
+    - balls     : matrice int8 (n_tirages × 5)
+    - secondary : matrice int8 (n_tirages × n_cols) — -1 = NULL (import 2 étapes)
+
+Le moteur HYBRIDE lit ce snapshot au lieu de re-scanner la table à chaque
+requête /generate (≈12 SELECT complets par appel sans le store). Le snapshot est
+rechargé uniquement quand sa version change — MAX(date_de_tirage) + état NULL des
+numéros secondaires du dernier tirage (import 2 étapes : le complément du tirage
+du jour recharge aussi) ; la vérification est throttlée (_CHECK_INTERVAL_S) pour
+rester négligeable sur le chemin chaud.
+
+Nouveau tirage : notify_new_draw(game) prévient les caches dérivés enregistrés
+via register_new_draw_listener() (score cache HYBRIDE, ...). Appelé par le
+reload du store et par check_and_update_decay (même détection de tirage).
+run_draw_watcher() (tâche supervisée) vérifie les stores à intervalle fixe :
+l'import d'un tirage est détecté même sans trafic /generate, et draw_version()
+(= tag des entrées services.cache.cached dérivées des tirages) avance.
+
+Lifecycle : init_draw_stores() au startup (lifespan main.py).
+Store non initialisé (tests, scripts) → get_draw_snapshot() retourne None et
+les appelants gardent leur chemin SQL historique.
+
+SQL SECURITY NOTE : table_name / secondary_columns proviennent d'EngineConfig
+frozen (constantes internes), jamais d'une entrée utilisateur.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import date, datetime
+
+import numpy as np
+
+from config.engine import EngineConfig, LOTO_CONFIG, EM_CONFIG
+
+logger = logging.getLogger(__name__)
+
+_CHECK_INTERVAL_S = 30.0  # max 1 SELECT MAX(date) / jeu / instance / 30s
+_BALL_COLS = ("boule_1", "boule_2", "boule_3", "boule_4", "boule_5")
+
+
+def select_columns(cfg: EngineConfig) -> str:
+    """Column list of a snapshot row (date + balls + secondary)."""
+    return ", ".join(("date_de_tirage", *_BALL_COLS, *cfg.secondary_columns))
+
+
+def _version_tag(day: str, partial: bool) -> str:
+    """Snapshot version: latest draw date, suffixed while its secondary numbers are NULL."""
+    return f"{day}~partial" if partial else day
+
+
+def _partial_sql(cfg: EngineConfig) -> str:
+    """SQL flag: latest draw has a NULL (or out-of-range → -1) secondary number.
+
+    Same rule as DrawSnapshot.from_rows, so the check matches the snapshot version.
+    """
+    cond = " OR ".join(
+        f"{col} IS NULL OR {col} NOT BETWEEN {cfg.secondary_min} AND {cfg.secondary_max}"
+        for col in cfg.secondary_columns
+    ) or "FALSE"
+    return f"SELECT {cond} FROM {cfg.table_name} ORDER BY date_de_tirage DESC LIMIT 1"
+
+
+class DrawSnapshot:
+    """Immutable columnar view of a game's draw history (ASC by date)."""
+
+    __slots__ = ("balls", "dates", "game", "secondary", "version")
+
+    def __init__(self, game: str, dates: np.ndarray, balls: np.ndarray, secondary: np.ndarray):
+        self.game = game
+        self.dates = dates
+        self.balls = balls
+        self.secondary = secondary
+        self.version = (
+            _version_tag(str(dates[-1]), bool((secondary[-1] < 0).any())) if len(dates) else None
+        )
+        for arr in (self.dates, self.balls, self.secondary):
+            arr.flags.writeable = False
+
+    @classmethod
+    def from_rows(cls, cfg: EngineConfig, rows: list[dict]) -> "DrawSnapshot":
+        """Build a snapshot from DB rows (any order). NULL secondary → -1."""
+        rows = sorted(rows, key=lambda r: str(r["date_de_tirage"]))
+        n = len(rows)
+        dates = np.array([str(r["date_de_tirage"])[:10] for r in rows], dtype="datetime64[D]")
+        balls = np.empty((n, len(_BALL_COLS)), dtype=np.int8)
+        secondary = np.full((n, len(cfg.secondary_columns)), -1, dtype=np.int8)
+        for i, r in enumerate(rows):
+            balls[i] = [r[c] for c in _BALL_COLS]
+            for j, col in enumerate(cfg.secondary_columns):
+                val = r.get(col)
+                if val is not None and cfg.secondary_min <= val <= cfg.secondary_max:
+                    secondary[i, j] = val
+        return cls(cfg.game, dates, balls, secondary)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def reference_date(self) -> date | None:
+        """MAX(date_de_tirage) — None if the table is empty."""
+        return self.dates[-1].astype(date) if len(self.dates) else None
+
+    def window_start(self, date_limite: datetime | date | str | None) -> int:
+        """Index of the first draw with date >= date_limite (0 = full history).
+
+        Same truncation as the SQL path (date_limite.strftime("%Y-%m-%d")).
+        """
+        if date_limite is None:
+            return 0
+        day = date_limite[:10] if isinstance(date_limite, str) else date_limite.strftime("%Y-%m-%d")
+        return int(np.searchsorted(self.dates, np.datetime64(day, "D"), "left"))
+
+    def _matrix(self, secondary: bool) -> np.ndarray:
+        return self.secondary if secondary else self.balls
+
+    def counts(self, start: int, size: int, secondary: bool = False) -> np.ndarray:
+        """Appearance count per number over draws[start:] (index = number)."""
+        values = self._matrix(secondary)[start:].ravel()
+        values = values[values >= 0].astype(np.intp)
+        return np.bincount(values, minlength=size + 1)[:size + 1]
+
+    def lags(self, start: int, size: int, secondary: bool = False) -> np.ndarray:
+        """Draws since last appearance per number over draws[start:].
+
+        0 = drawn in the most recent draw, len(window) = never seen in window.
+        Mirrors the DESC-index scan of HybrideEngine.calculer_retards().
+        """
+        window = self._matrix(secondary)[start:]
+        n_w = len(window)
+        last = np.full(size + 1, -1, dtype=np.intp)
+        if n_w:
+            positions = np.repeat(np.arange(n_w, dtype=np.intp), window.shape[1])
+            values = window.ravel().astype(np.intp)
+            valid = values >= 0
+            np.maximum.at(last, values[valid], positions[valid])
+        return np.where(last >= 0, n_w - 1 - last, n_w)
+
+    def column(self, name: str, secondary_columns) -> np.ndarray | None:
+        """Values of a ball / secondary column (-1 = NULL), None for any other column."""
+        if name in _BALL_COLS:
+            return self.balls[:, _BALL_COLS.index(name)]
+        if name in secondary_columns:
+            return self.secondary[:, secondary_columns.index(name)]
+        return None
+
+    def recent_draws(self, n: int, cfg: EngineConfig) -> list[dict]:
+        """Last n draws as dicts (DESC) — same shape as HybrideEngine.get_recent_draws()."""
+        return [self.row(i, cfg.secondary_columns)
+                for i in range(len(self) - 1, max(len(self) - n, 0) - 1, -1)]
+
+    def row(self, i: int, secondary_columns) -> dict:
+        """Draw i as a DB-like row: date_de_tirage, boule_1..5, secondary columns (NULL → None)."""
+        row = {"date_de_tirage": self.dates[i].astype(date)}
+        for j, col in enumerate(_BALL_COLS):
+            row[col] = int(self.balls[i, j])
+        for j, col in enumerate(secondary_columns):
+            val = int(self.secondary[i, j])
+            row[col] = val if val >= 0 else None
+        return row
+
+
+class DrawStore:
+    """Per-game holder: current snapshot + throttled version freshness check."""
+
+    def __init__(self, cfg: EngineConfig):
+        self.cfg = cfg
+        self.snapshot: DrawSnapshot | None = None
+        self.enabled = False
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def load(self, conn) -> DrawSnapshot:
+        """Full (re)load of the draw table — ~1 SELECT per new draw per instance."""
+        cursor = await conn.cursor()
+        await cursor.execute(
+            f"SELECT {select_columns(self.cfg)} FROM {self.cfg.table_name} ORDER BY date_de_tirage"
+        )
+        rows = await cursor.fetchall()
+        self.snapshot = DrawSnapshot.from_rows(self.cfg, list(rows))
+        self._checked_at = time.monotonic()
+        logger.info(
+            "[DRAW_STORE] %s loaded: %d draws (version=%s)",
+            self.cfg.game, len(self.snapshot), self.snapshot.version,
+        )
+        return self.snapshot
+
+    async def ensure_fresh(self, conn) -> DrawSnapshot | None:
+        """Reload if the version moved (MAX(date_de_tirage) or NULL secondaries
+        of the latest draw filled in). No-op if store not enabled.
+
+        The check runs at most once per _CHECK_INTERVAL_S; between checks
+        the current snapshot is returned without any DB access.
+        """
+        if not self.enabled:
+            return None
+        if time.monotonic() - self._checked_at < _CHECK_INTERVAL_S:
+            return self.snapshot
+        async with self._lock:
+            if time.monotonic() - self._checked_at < _CHECK_INTERVAL_S:
+                return self.snapshot
+            try:
+                if self.snapshot is None:
+                    return await self.load(conn)
+                cursor = await conn.cursor()
+                await cursor.execute(
+                    f"SELECT MAX(date_de_tirage) AS max_date, ({_partial_sql(self.cfg)}) AS partial "
+                    f"FROM {self.cfg.table_name}"
+                )
+                row = await cursor.fetchone()
+                max_date = row["max_date"] if row else None
+                self._checked_at = time.monotonic()
+                version = _version_tag(str(max_date)[:10], bool(row.get("partial"))) if max_date else None
+                if version is not None and version != self.snapshot.version:
+                    logger.info(
+                        "[DRAW_STORE] %s new draw data detected (%s → %s) — reloading",
+                        self.cfg.game, self.snapshot.version, version,
+                    )
+                    snap = await self.load(conn)
+                    notify_new_draw(self.cfg.game)
+                    return snap
+            except Exception:
+                self._checked_at = time.monotonic()
+                logger.warning("[DRAW_STORE] %s refresh failed — keeping current snapshot",
+                               self.cfg.game, exc_info=True)
+            return self.snapshot
+
+    def check_due(self) -> bool:
+        """True if the next ensure_fresh() would hit the DB (throttle expired)."""
+        return time.monotonic() - self._checked_at >= _CHECK_INTERVAL_S
+
+    def invalidate(self) -> None:
+        """Force a freshness check on the next ensure_fresh() call."""
+        self._checked_at = 0.0
+
+
+# ── New-draw listeners ───────────────────────────────────────────────
+
+_new_draw_listeners: list = []
+
+
+def register_new_draw_listener(callback) -> None:
+    """Register callback(game) fired when a new draw is detected (idempotent)."""
+    if callback not in _new_draw_listeners:
+        _new_draw_listeners.append(callback)
+
+
+def notify_new_draw(game: str) -> None:
+    """Fire new-draw listeners for a game ("loto" | "em"). Never raises."""
+    store = _stores.get(game)
+    if store is not None:
+        store.invalidate()
+    for callback in list(_new_draw_listeners):
+        try:
+            callback(game)
+        except Exception:
+            logger.warning("[DRAW_STORE] new-draw listener %r failed for %s", callback, game, exc_info=True)
+
+
+_stores: dict[str, DrawStore] = {
+    LOTO_CONFIG.game: DrawStore(LOTO_CONFIG),
+    EM_CONFIG.game: DrawStore(EM_CONFIG),
+}
+
+
+def get_draw_store(game: str) -> DrawStore:
+    """Return the process-wide store for a game ("loto" | "em")."""
+    return _stores[game]
+
+
+def get_draw_snapshot(game: str) -> DrawSnapshot | None:
+    """Current snapshot for a game, or None if the store is not loaded."""
+    store = _stores.get(game)
+    if store is None or not store.enabled:
+        return None
+    return store.snapshot
+
+
+def draw_version(game: str) -> str | None:
+    """Version (latest draw date, ~partial while its secondaries are NULL) of a
+    game's loaded snapshot, None if not loaded.
+
+    Tag for draw-derived cache entries: cached(..., version=draw_version(game)).
+    """
+    snap = get_draw_snapshot(game)
+    return snap.version if snap is not None else None
+
+
+async def run_draw_watcher(get_connection=None, interval: float = _CHECK_INTERVAL_S) -> None:
+    """Draw-import watcher (supervised task): freshness check of every enabled
+    store each `interval` s. A new draw reloads the snapshot (→ new
+    draw_version) and fires notify_new_draw()."""
+    if get_connection is None:
+        from db_cloudsql import get_connection
+    while True:
+        await asyncio.sleep(interval)
+        for store in _stores.values():
+            if not store.enabled or not store.check_due():
+                continue
+            try:
+                async with get_connection() as conn:
+                    await store.ensure_fresh(conn)
+            except Exception as e:
+                logger.warning("[DRAW_STORE] %s watcher check failed (%s)", store.cfg.game, e)
+
+
+async def init_draw_stores(get_connection=None) -> None:
+    """Enable and load all stores (startup). Non-blocking on DB failure:
+    the first ensure_fresh() retries the load, SQL fallback meanwhile."""
+    if get_connection is None:
+        from db_cloudsql import get_connection
+    for store in _stores.values():
+        store.enabled = True
+        try:
+            async with get_connection() as conn:
+                await store.load(conn)
+        except Exception as e:
+            logger.warning("[DRAW_STORE] %s initial load failed (%s) — SQL fallback", store.cfg.game, e)
+
+
+def reset_draw_stores() -> None:
+    """Disable and drop all snapshots (tests / shutdown)."""
+    for store in _stores.values():
+        store.enabled = False
+        store.snapshot = None
+        store._checked_at = 0.0
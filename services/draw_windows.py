@@ -0,0 +1,162 @@
+"""
+DrawWindow — fenêtre « N derniers tirages » / « depuis une date » de l'historique.
+
+/api/{game}/meta-analyse-local récupérait d'abord tous les id de la fenêtre,
+puis envoyait WHERE id IN (%s,%s,…) répété 5 fois (boules), 2 fois (étoiles),
+encore pour les 4 derniers tirages et pour MIN/MAX(date) : des milliers de
+placeholders par requête en GLOBAL.
+
+Les fenêtres sont des suffixes de l'historique trié par date (comme WindowStats) :
+un indice de début suffit. DrawWindow en dérive fréquences boules / secondaires,
+derniers tirages (pénalisation V2) et bornes de dates ; le classement pénalisé
+(compute_penalized_ranking) se calcule dessus. Mémorisé par (jeu, début de
+fenêtre) et version de tirage, le listener new-draw purge le jeu.
+
+Source : draw store (aucune requête) ou, store non chargé, UNE requête des lignes
+de la fenêtre (date >= %s / LIMIT %s) — jamais de liste d'id.
+"""
+
+from dataclasses import dataclass, replace
+from datetime import date
+
+from config.engine import EngineConfig
+from services.draw_store import (
+    DrawSnapshot, get_draw_store, register_new_draw_listener, select_columns,
+)
+from services.penalization import compute_penalized_ranking
+
+_RECENT_DRAWS = 4  # V2 penalization: hard-exclude T-1 + degradation T-2/T-3/T-4
+
+
+@dataclass(frozen=True)
+class DrawWindow:
+    """Aggregates of one window (suffix of the history) for one draw version."""
+    version: str | None
+    total: int                          # draws in the whole history
+    size: int                           # draws in the window
+    date_min: date | None
+    date_max: date | None
+    ball_freq: dict                     # {num: count}, drawn numbers only, ASC
+    secondary_freq: dict                # idem — NULL / out-of-range secondary excluded
+    recent_dates: tuple = ()            # last draws of the window, DESC ("YYYY-MM-DD")
+    recent_balls: tuple = ()            # frozenset per recent draw
+    recent_secondary: tuple = ()        # frozenset per recent draw (NULL → None, as SQL rows)
+
+    @classmethod
+    def from_snapshot(cls, snap: DrawSnapshot, cfg: EngineConfig, start: int) -> "DrawWindow":
+        total = len(snap)
+        start = min(max(start, 0), total)
+        rows = [snap.row(i, cfg.secondary_columns)
+                for i in range(total - 1, max(start, total - _RECENT_DRAWS) - 1, -1)]
+        return cls(
+            version=snap.version,
+            total=total,
+            size=total - start,
+            date_min=snap.dates[start].astype(date) if start < total else None,
+            date_max=snap.reference_date() if start < total else None,
+            ball_freq=_freq(snap.counts(start, cfg.num_max)),
+            secondary_freq=_freq(snap.counts(start, cfg.secondary_max, secondary=True)),
+            recent_dates=tuple(str(r["date_de_tirage"]) for r in rows),
+            recent_balls=tuple(frozenset(r[f"boule_{i}"] for i in range(1, 6)) for r in rows),
+            recent_secondary=tuple(frozenset(r[c] for c in cfg.secondary_columns) for r in rows),
+        )
+
+    def penalized_ranking(self, num_range: range, top_n: int, *, secondary: bool = False,
+                          decay_state: dict | None = None, **kwargs) -> tuple[list[dict], dict]:
+        """compute_penalized_ranking() on the window frequencies, penalized by its last draws."""
+        recent = self.recent_secondary if secondary else self.recent_balls
+        return compute_penalized_ranking(
+            raw_freq=self.secondary_freq if secondary else self.ball_freq,
+            last_draw_numbers=set(),
+            second_last_draw_numbers=set(),
+            num_range=num_range,
+            top_n=top_n,
+            recent_draws=[set(s) for s in recent],
+            decay_state=decay_state,
+            **kwargs,
+        )
+
+
+def _freq(counts) -> dict:
+    return {num: c for num, c in enumerate(counts.tolist()) if c > 0}
+
+
+def window_start(snap: DrawSnapshot, last_n: int | None = None, since: str | None = None) -> int:
+    """Index of the first draw of a window: date >= since, else the last_n draws, else 0."""
+    if since is not None:
+        return snap.window_start(since)
+    if last_n is not None:
+        return max(len(snap) - last_n, 0)
+    return 0
+
+
+_windows: dict[tuple[str, int], DrawWindow] = {}
+
+
+def window_for(cfg: EngineConfig, snap: DrawSnapshot, start: int) -> DrawWindow:
+    """Memoized DrawWindow of snap[start:] (rebuilt once per draw version)."""
+    key = (cfg.game, start)
+    window = _windows.get(key)
+    if window is None or window.version != snap.version:
+        window = DrawWindow.from_snapshot(snap, cfg, start)
+        _windows[key] = window
+    return window
+
+
+async def _load_window(cfg: EngineConfig, cursor, last_n: int | None, since: str | None) -> DrawWindow:
+    """SQL fallback: COUNT(*) + the window rows in one query."""
+    await cursor.execute(f"SELECT COUNT(*) as total FROM {cfg.table_name}")
+    total = (await cursor.fetchone())["total"]
+    sql = f"SELECT {select_columns(cfg)} FROM {cfg.table_name}"
+    params: tuple = ()
+    if since is not None:
+        sql += " WHERE date_de_tirage >= %s ORDER BY date_de_tirage DESC"
+        params = (since,)
+    elif last_n is not None:
+        sql += " ORDER BY date_de_tirage DESC LIMIT %s"
+        params = (last_n,)
+    else:
+        sql += " ORDER BY date_de_tirage DESC"
+    await cursor.execute(sql, params)
+    rows = await cursor.fetchall()
+    return replace(DrawWindow.from_snapshot(DrawSnapshot.from_rows(cfg, rows), cfg, 0), total=total)
+
+
+async def get_draw_window(
+    cfg: EngineConfig,
+    *,
+    last_n: int | None = None,
+    since: str | None = None,
+    get_connection,
+) -> DrawWindow:
+    """Window of the current history: draws with date >= since ("YYYY-MM-DD"),
+    else the last_n draws, else the whole history.
+
+    Draw store loaded → memoized slice (a connection is opened only when the
+    throttled freshness check is due). Otherwise one SQL query of the window rows.
+    """
+    store = get_draw_store(cfg.game)
+    snap = None
+    if store.enabled:
+        if store.check_due():
+            async with get_connection() as conn:
+                snap = await store.ensure_fresh(conn)
+        else:
+            snap = store.snapshot
+    if snap is None or not len(snap):
+        async with get_connection() as conn:
+            cursor = await conn.cursor()
+            return await _load_window(cfg, cursor, last_n, since)
+    return window_for(cfg, snap, window_start(snap, last_n, since))
+
+
+def invalidate_windows(game: str) -> None:
+    for key in [k for k in _windows if k[0] == game]:
+        del _windows[key]
+
+
+def clear_draw_windows() -> None:
+    _windows.clear()
+
+
+register_new_draw_listener(invalidate_windows)
@@ -29,6 +29,7 @@ EM_CONFIG = GameConfig(
     secondary_key="etoiles",
     secondary_match_key="etoiles_match",
     secondary_label="\u00c9toiles",
+    draw_store_game="em",
 )
 
 
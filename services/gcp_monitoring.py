@@ -18,7 +18,7 @@ from decimal import Decimal
 
 import db_cloudsql
 import services.cache as _cache
-from services.cache import cache_get, cache_set
+from services.cache import cached
 
 logger = logging.getLogger(__name__)
 
@@ -407,14 +407,15 @@ def _estimate_costs(metrics: dict, gemini: dict) -> dict:
 
 async def get_gcp_metrics() -> dict:
     """
-    Return full metrics payload. Uses Redis cache (60s).
+    Return full metrics payload. Uses Redis cache (60s) via cached(): one
+    Cloud Monitoring fetch at a time, stale payload served while refreshing.
     Falls back to cached values if Cloud Monitoring API is unavailable.
     """
-    # Check cache first
-    cached = await cache_get(CACHE_KEY)
-    if cached:
-        return cached
+    return await cached(CACHE_KEY, CACHE_TTL, _build_gcp_metrics)
+
 
+async def _build_gcp_metrics() -> dict:
+    """Fetch + assemble the metrics payload (loader of get_gcp_metrics)."""
     # Fetch Cloud Run metrics
     cloud_metrics = await _fetch_cloud_run_metrics()
 
@@ -488,9 +489,6 @@ async def get_gcp_metrics() -> dict:
         "redis_connected": _cache._redis is not None,
     }
 
-    # Cache result
-    await cache_set(CACHE_KEY, payload, CACHE_TTL)
-
     # Non-blocking snapshot (every 5 min, cooldown via Redis lock)
     try:
         await _maybe_snapshot(payload)
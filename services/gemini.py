@@ -74,6 +74,12 @@ async def enrich_analysis(analysis_local: str, window: str = "GLOBAL", *, http_c
     )
 
 
+def finish_reason_ok(finish_reason) -> bool:
+    """Vertex finish_reason d'une réponse complète (STOP ; absent = STOP).
+    MAX_TOKENS / SAFETY / RECITATION... = réponse tronquée."""
+    return finish_reason is None or "STOP" in str(finish_reason)
+
+
 async def stream_gemini_chat(http_client, gem_api_key, system_prompt, contents, timeout=10.0,
                              call_type="", lang="", temperature=None,
                              max_retries=0, failure_box=None):
@@ -106,6 +112,9 @@ async def stream_gemini_chat(http_client, gem_api_key, system_prompt, contents,
         est écrite ("Vertex429" / "InterChunkTimeout" / "VertexError") — lue par
         stream_and_respond pour différencier `error_detail` (ex-fourre-tout
         NoChunks). Additif strict : sémantique exceptions/breaker inchangée.
+        Fin de stream normale : `failure_box["finish"]` = "STOP" si la réponse
+        est complète, sinon "InterChunkTimeout" / finish_reason Vertex
+        (MAX_TOKENS, SAFETY...) — réponse tronquée, jamais mise en cache.
       - Timeout 1er-token 15s distinct de l'inter-chunk 8s (slow-start DSQ).
     """
     _ = http_client, gem_api_key  # noqa: F841  # V131.A DEPRECATED — paramètres ignorés
@@ -165,6 +174,7 @@ async def stream_gemini_chat(http_client, gem_api_key, system_prompt, contents,
             # inter-chunk Vertex (ex-LIMITATION V131.A) sans tuer les démarrages lents.
             _stream_iter = stream.__aiter__()
             _first_chunk = True
+            _timed_out = False
             while True:
                 _tmo = _FIRST_TOKEN_TIMEOUT if _first_chunk else _INTER_CHUNK_TIMEOUT
                 try:
@@ -180,6 +190,7 @@ async def stream_gemini_chat(http_client, gem_api_key, system_prompt, contents,
                     )
                     if not _yielded_any:
                         _box["cause"] = "InterChunkTimeout"  # V143 #3
+                    _timed_out = True
                     break
                 _first_chunk = False
 
@@ -205,7 +216,7 @@ async def stream_gemini_chat(http_client, gem_api_key, system_prompt, contents,
 
             # V131.E HOTFIX — Détection arrêt prématuré du stream (SAFETY/RECITATION/MAX_TOKENS)
             _fr_name = str(_last_finish_reason) if _last_finish_reason is not None else "STOP"
-            _fr_ok = any(ok in _fr_name for ok in ("STOP", "FinishReason.STOP"))
+            _fr_ok = finish_reason_ok(_last_finish_reason)
             if not _fr_ok:
                 _lang_safe = lang or "fr"
                 logger.warning(
@@ -222,6 +233,7 @@ async def stream_gemini_chat(http_client, gem_api_key, system_prompt, contents,
                     "nl": "\n\n— Antwoord onderbroken, kun je je vraag herformuleren? 🙏",
                 }
                 yield _FALLBACK_SUFFIX.get(_lang_safe, _FALLBACK_SUFFIX["fr"])
+            _box["finish"] = "InterChunkTimeout" if _timed_out else ("STOP" if _fr_ok else _fr_name)
 
             # ⚠️ Bug connu #4 (hors scope V143, signalé audits 11/06) : un timeout
             # 1er-token/inter-chunk aboutit ici → record_success — sémantique
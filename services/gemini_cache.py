@@ -1,53 +1,65 @@
 """
-V127 — In-memory TTL cache pour réponses Gemini pitch-grilles.
-
-Évite les appels Gemini répétés sur grilles + lang + prompt identiques.
-Bornes : TTL 24h, max 1000 entrées (FIFO/LRU eviction via OrderedDict).
-Metrics : hits / misses / evictions loggés via logger.info "[V127_PITCH_CACHE]".
-
-Audit V126.1 : impact attendu -30 à -50% appels Gemini sur pitch.
-Cache in-memory only (pas Redis pour V127 — V128 si Redis provisionné).
+V127 — In-memory TTL caches pour réponses Gemini.
+
+ResponseCache : implémentation générique (LRU OrderedDict + TTL absolu par
+entrée, clé = SHA-256 d'un payload JSON canonique, métriques hits / misses /
+evictions loggées sous le tag du cache). Deux instances :
+
+- PitchCache (V127) : pitch-grilles, clé (grilles + lang + prompt).
+  Bornes : TTL 24h, max 1000 entrées.
+  Audit V126.1 : impact attendu -30 à -50% appels Gemini sur pitch.
+- AnswerCache : réponses chatbot aux questions répétées d'un utilisateur à
+  l'autre ("quels sont les numéros les plus sortis", "top 5 étoiles"…), placé
+  devant call_gemini_and_respond / stream_and_respond. Clé : message normalisé
+  (casse, accents, ponctuation, espaces), phase détectée, langue, page, mode,
+  hash du system prompt assemblé (date + nombre de tirages) et hash du contexte
+  d'enrichissement (change avec un nouveau tirage). L2 optionnel : Redis via
+  services.cache quand il est actif (partage entre instances Cloud Run).
 """
 
 import hashlib
 import json
 import logging
+import re
 import time
+import unicodedata
 from collections import OrderedDict
 from threading import Lock
 
+from services.cache import cache_get, cache_set, redis_active
+
 logger = logging.getLogger(__name__)
 
 _TTL_SECONDS = 24 * 3600  # 24h (audit V126.1 décision 2)
 _MAX_ENTRIES = 1000        # ~500 KB total (audit V126.1 décision 3)
 
+_ANSWER_TTL_SECONDS = 6 * 3600   # + clé datée via le hash du system prompt
+_ANSWER_MAX_ENTRIES = 500        # réponses ~1-3 KB
 
-class PitchCache:
+
+class ResponseCache:
     """OrderedDict-backed LRU cache avec TTL absolu par entrée.
 
     Thread-safe via Lock (Cloud Run = single asyncio loop, mais on garde la
     garantie pour cas multi-worker éventuel V128+).
     """
 
-    def __init__(self, ttl: int = _TTL_SECONDS, maxsize: int = _MAX_ENTRIES):
+    def __init__(self, ttl: int, maxsize: int, tag: str):
         self._store: OrderedDict[str, tuple[float, dict]] = OrderedDict()
         self._ttl = ttl
         self._maxsize = maxsize
+        self._tag = tag
         self._lock = Lock()
         self.hits = 0
         self.misses = 0
         self.evictions = 0
 
     @staticmethod
-    def _key(grilles_data, lang: str, prompt_name: str) -> str:
-        payload = json.dumps(
-            {"g": grilles_data, "l": lang, "p": prompt_name},
-            sort_keys=True, ensure_ascii=False,
-        )
+    def make_key(parts: dict) -> str:
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False)
         return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
-    def get(self, grilles_data, lang: str, prompt_name: str) -> dict | None:
-        k = self._key(grilles_data, lang, prompt_name)
+    def lookup(self, k: str) -> dict | None:
         with self._lock:
             entry = self._store.get(k)
             if not entry:
@@ -61,13 +73,12 @@ class PitchCache:
             self._store.move_to_end(k)
             self.hits += 1
         logger.info(
-            "[V127_PITCH_CACHE] HIT key=%s hits=%d misses=%d size=%d",
-            k[:8], self.hits, self.misses, len(self._store),
+            "[%s] HIT key=%s hits=%d misses=%d size=%d",
+            self._tag, k[:8], self.hits, self.misses, len(self._store),
         )
         return payload
 
-    def set(self, grilles_data, lang: str, prompt_name: str, payload: dict) -> None:
-        k = self._key(grilles_data, lang, prompt_name)
+    def store(self, k: str, payload: dict) -> None:
         with self._lock:
             self._store[k] = (time.monotonic(), payload)
             self._store.move_to_end(k)
@@ -75,8 +86,8 @@ class PitchCache:
                 self._store.popitem(last=False)
                 self.evictions += 1
                 logger.info(
-                    "[V127_PITCH_CACHE] EVICT size=%d evictions=%d",
-                    len(self._store), self.evictions,
+                    "[%s] EVICT size=%d evictions=%d",
+                    self._tag, len(self._store), self.evictions,
                 )
 
     def stats(self) -> dict:
@@ -98,4 +109,83 @@ class PitchCache:
             self.evictions = 0
 
 
+class PitchCache(ResponseCache):
+    """V127 — pitch-grilles, clé (grilles_data, lang, prompt_name)."""
+
+    def __init__(self, ttl: int = _TTL_SECONDS, maxsize: int = _MAX_ENTRIES):
+        super().__init__(ttl, maxsize, "V127_PITCH_CACHE")
+
+    @classmethod
+    def _key(cls, grilles_data, lang: str, prompt_name: str) -> str:
+        return cls.make_key({"g": grilles_data, "l": lang, "p": prompt_name})
+
+    def get(self, grilles_data, lang: str, prompt_name: str) -> dict | None:
+        return self.lookup(self._key(grilles_data, lang, prompt_name))
+
+    def set(self, grilles_data, lang: str, prompt_name: str, payload: dict) -> None:
+        self.store(self._key(grilles_data, lang, prompt_name), payload)
+
+
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+
+def normalize_message(message: str) -> str:
+    """'Quels sont les NUMÉROS les plus sortis ?' -> 'quels sont les numeros les plus sortis'."""
+    text = unicodedata.normalize("NFKD", message.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _NON_WORD_RE.sub(" ", text).strip()
+
+
+class AnswerCache(ResponseCache):
+    """Réponses chatbot Gemini (texte nettoyé, sans préfixe insulte ni sponsor)."""
+
+    REDIS_PREFIX = "chat_answer:"
+
+    def __init__(self, ttl: int = _ANSWER_TTL_SECONDS, maxsize: int = _ANSWER_MAX_ENTRIES):
+        super().__init__(ttl, maxsize, "CHAT_ANSWER_CACHE")
+
+    def key_for(self, ctx: dict, message: str, lang: str, page: str) -> str | None:
+        """Clé de la réponse, None si la réponse ne dépend pas que du message.
+
+        Non cachable : conversation en cours (historique → continuation,
+        contexte de session) ou préfixe insulte.
+        """
+        if ctx.get("history") or ctx.get("insult_prefix"):
+            return None
+        normalized = normalize_message(message)
+        if not normalized:
+            return None
+        meta = ctx.get("_chat_meta") or {}
+        enrichment = meta.get("enrichment_context") or ""
+        return self.make_key({
+            "m": normalized,
+            "ph": meta.get("phase", ""),
+            "l": lang,
+            "g": ctx.get("_game", "loto"),
+            "mo": ctx.get("mode", ""),
+            "pg": page,
+            "sp": ctx.get("system_prompt_hash", ""),
+            "e": hashlib.sha256(enrichment.encode("utf-8")).hexdigest(),
+        })
+
+    async def aget(self, k: str) -> str | None:
+        """Texte de la réponse : L1 in-memory puis Redis (si actif)."""
+        payload = self.lookup(k)
+        if payload is None:
+            if not redis_active():
+                return None
+            payload = await cache_get(self.REDIS_PREFIX + k)
+            if not isinstance(payload, dict) or "text" not in payload:
+                return None
+            self.store(k, payload)
+        return payload["text"]
+
+    async def aset(self, k: str, text: str) -> None:
+        payload = {"text": text}
+        self.store(k, payload)
+        if redis_active():
+            await cache_set(self.REDIS_PREFIX + k, payload, ttl=self._ttl)
+
+
 pitch_cache = PitchCache()
+answer_cache = AnswerCache()
@@ -0,0 +1,176 @@
+"""
+GenerateSession — contexte DB d'une requête /api/{game}/generate (1 connexion).
+
+unified_generate ouvrait 5 connexions successives par requête (date cible,
+check decay, decay + brake, moteur, écriture des grilles) : 5 acquisitions du
+pool + 5 pings santé sous charge. La session les remplace par UNE connexion
+partagée par toutes les phases :
+    - next_draw  : date du tirage ciblé (BDD-aware V137.C, fallback calendrier)
+    - decay_sync : check_and_update_decay (écrit uniquement sur nouveau tirage)
+    - state      : decay ball + secondaire en 1 requête, brake maps V110
+                   matérialisées (services.brake_cache, O(1) hors miss)
+    - engine     : generate_grids sur la même connexion (decay secondaire fourni)
+    - record     : grilles V137.B mises en file (services.selection_writer,
+                   INSERT multi-lignes hors chemin critique)
+
+Chaque phase est chronométrée ; les durées (ms) sont loguées en une ligne
+[GENERATE] à la fermeture de la session.
+
+Graceful degradation inchangée : chaque lecture/écriture reste non bloquante,
+next_draw_date n'est jamais None.
+"""
+
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from config.games import get_next_draw_date, get_next_draw_date_db_aware
+from services.decay_state import check_and_update_decay, get_decay_states
+from services.brake_cache import get_brake_maps
+from services.selection_writer import enqueue_canonical_selection
+
+logger = logging.getLogger(__name__)
+
+
+class GenerateSession:
+    """Request-scoped DB session for /generate: one connection, timed phases.
+
+    Usage:
+        async with GenerateSession(game, cfg, engine, db_cloudsql.get_connection) as session:
+            await session.load_state()
+            result = await session.generate(n=n, mode=mode, ...)
+            session.record_selections(result["grids"])
+    """
+
+    def __init__(self, game, cfg, engine, get_connection):
+        self.game = game
+        self.cfg = cfg
+        self.engine = engine
+        self.game_name = "euromillions" if cfg.slug == "euromillions" else "loto"
+        self.secondary_type = "star" if self.game_name == "euromillions" else "chance"
+        self.conn = None
+        self.timings: dict[str, float] = {}
+        self._get_connection = get_connection
+        self._cm = None
+        self._t0 = 0.0
+        # Pre-generation state (filled by load_state)
+        self.next_draw_date = None
+        self.decay = None
+        self.decay_secondary = None
+        self.brake_balls: dict = {}
+        self.brake_secondary: dict = {}
+
+    async def __aenter__(self) -> "GenerateSession":
+        self._t0 = time.monotonic()
+        with self.phase("connect"):
+            self._cm = self._get_connection()
+            self.conn = await self._cm.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            return await self._cm.__aexit__(exc_type, exc, tb)
+        finally:
+            self.timings["total"] = (time.monotonic() - self._t0) * 1000
+            logger.info(
+                "[GENERATE] %s phases ms: %s", self.game_name,
+                " ".join(f"{name}={ms:.1f}" for name, ms in self.timings.items()),
+            )
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block; duration (ms) stored in self.timings[name]."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.timings[name] = (time.monotonic() - start) * 1000
+
+    @asynccontextmanager
+    async def connection(self):
+        """Borrow the session connection (engine _get_connection hook, not closed)."""
+        yield self.conn
+
+    async def load_state(self) -> None:
+        """Read all pre-generation state on the session connection."""
+        with self.phase("next_draw"):
+            try:
+                self.next_draw_date = await get_next_draw_date_db_aware(self.game, self.conn)
+            except Exception:
+                logger.debug("get_next_draw_date_db_aware failed — fallback sync")
+            if self.next_draw_date is None:
+                self.next_draw_date = get_next_draw_date(self.game)
+
+        with self.phase("decay_sync"):
+            try:
+                # Auto-update decay if a new real draw was imported (best-effort, once per draw)
+                await check_and_update_decay(self.conn, self.game_name, self.cfg.table)
+            except Exception:
+                logger.debug("check_and_update_decay failed — non-blocking")
+
+        with self.phase("state"):
+            try:
+                states = await get_decay_states(
+                    self.conn, self.game_name, ("ball", self.secondary_type),
+                )
+                self.decay = states["ball"]
+                self.decay_secondary = states[self.secondary_type]
+                # V110: materialized brake maps (services.brake_cache), {} if
+                # saturation_persistent_enabled=False.
+                brakes = await get_brake_maps(
+                    self.conn, self.game_name, self.next_draw_date, self.engine.cfg,
+                )
+                self.brake_balls = brakes["ball"]
+                self.brake_secondary = brakes[self.secondary_type]
+            except Exception:
+                logger.debug("decay_state/brake load failed — generating without")
+
+    async def generate(self, **kwargs) -> dict:
+        """engine.generate_grids on the session connection with the loaded state."""
+        with self.phase("engine"):
+            return await self.engine.generate_grids(
+                decay_state=self.decay,
+                decay_state_secondary=self.decay_secondary,
+                persistent_brake_map=self.brake_balls or None,
+                persistent_brake_map_secondary=self.brake_secondary or None,
+                _get_connection=self.connection,
+                **kwargs,
+            )
+
+    def record_selections(self, grids: list[dict]) -> tuple[int, int]:
+        """V137.B: queue every grid of the batch for the write-behind writer.
+
+        One grid_id UUID per grid (V137), rows written by
+        services.selection_writer (multi-row INSERT, off the request path).
+        Graceful: a failing grid does not stop the batch. Returns (recorded, failed).
+        """
+        recorded = 0
+        failed = 0
+        with self.phase("record"):
+            secondary_name = self.engine.cfg.secondary_name
+            for grid in grids:
+                try:
+                    sec_val = grid.get(secondary_name)
+                    if isinstance(sec_val, list):
+                        sec_list = sec_val
+                    elif sec_val is not None:
+                        sec_list = [sec_val]
+                    else:
+                        sec_list = []
+                    selected = {
+                        "ball": grid.get("nums", []),
+                        self.secondary_type: sec_list,
+                    }
+                    enqueue_canonical_selection(self.game_name, self.next_draw_date, selected)
+                    recorded += 1
+                except Exception:
+                    failed += 1
+                    logger.warning(
+                        "[CALENDAR] V137.B grid record failed — continuing batch",
+                        exc_info=True,
+                    )
+        logger.info(
+            "[CALENDAR] V137.B batch queued game=%s target=%s grids=%d failed=%d",
+            self.game_name, self.next_draw_date, recorded, failed,
+        )
+        return recorded, failed
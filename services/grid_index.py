@@ -0,0 +1,114 @@
+"""
+GridIndex — correspondances historiques d'une grille par masques de bits.
+
+analyze_grille_for_chat et /analyze-custom-grid cherchaient les tirages
+identiques et la meilleure correspondance avec 2 requêtes à 25 placeholders
+`boule_i IN (...)` : MySQL parcourt toute la table à chaque grille évaluée.
+
+Chaque tirage du draw store est ici un masque 64 bits (bit n = boule n tirée,
+max 50) + un masque secondaire (chance / étoiles). Pour une grille G :
+    - tirage identique   : (tirage & ~G) == 0   ⇔ les 5 boules ∈ G
+    - boules communes    : popcount(tirage & G), vectorisé sur tout l'historique
+Même sémantique que le SQL (`IN`, NULL secondaire jamais égal), même ordre
+(match_count DESC, secondaire DESC, date DESC) — quelques µs, aucune requête.
+
+Index construit une fois par snapshot (reconstruit quand le store recharge un
+nouveau tirage). Store non chargé → None, les appelants gardent le chemin SQL.
+"""
+
+from datetime import date
+from typing import Sequence
+
+import numpy as np
+
+from services.draw_store import DrawSnapshot, get_draw_snapshot, get_draw_store
+
+_ONE = np.uint64(1)
+
+if hasattr(np, "bitwise_count"):  # numpy >= 2.0
+    def _popcount(masks: np.ndarray) -> np.ndarray:
+        return np.bitwise_count(masks)
+else:
+    _BYTE_BITS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(masks: np.ndarray) -> np.ndarray:
+        return _BYTE_BITS[masks.view(np.uint8).reshape(-1, 8)].sum(axis=1, dtype=np.uint8)
+
+
+def _row_masks(matrix: np.ndarray) -> np.ndarray:
+    """One uint64 mask per row (values < 0 = NULL, ignored)."""
+    values = matrix.astype(np.int64)
+    bits = np.where(values >= 0, _ONE << np.maximum(values, 0).astype(np.uint64), np.uint64(0))
+    return np.bitwise_or.reduce(bits, axis=1) if bits.shape[1] else np.zeros(len(values), np.uint64)
+
+
+def _mask(numbers: Sequence[int]) -> np.uint64:
+    mask = 0
+    for n in numbers:
+        mask |= 1 << int(n)
+    return np.uint64(mask)
+
+
+class GridIndex:
+    """Ball / secondary bitmasks of every draw of a snapshot (ASC by date)."""
+
+    __slots__ = ("balls", "secondary", "secondary_columns", "secondary_count", "snapshot")
+
+    def __init__(self, snap: DrawSnapshot, secondary_columns: Sequence[str]):
+        self.snapshot = snap
+        self.secondary_columns = tuple(secondary_columns)
+        self.balls = _row_masks(snap.balls)
+        self.secondary = _row_masks(snap.secondary)
+        # non-NULL secondary columns per draw (SQL : NULL IN (...) → faux)
+        self.secondary_count = (snap.secondary >= 0).sum(axis=1)
+
+    def __len__(self) -> int:
+        return len(self.balls)
+
+    def exact_dates(self, nums: Sequence[int], secondary: Sequence[int] | None = None) -> list[date]:
+        """Dates (DESC) of draws whose 5 balls are all in nums.
+
+        secondary: also require every secondary column in it (Loto : [chance],
+        EM : étoiles) — None = balls only.
+        """
+        hit = (self.balls & ~_mask(nums)) == 0
+        if secondary is not None:
+            hit &= (self.secondary & ~_mask(secondary)) == 0
+            hit &= self.secondary_count == len(self.secondary_columns)
+        return [d.astype(date) for d in self.snapshot.dates[np.flatnonzero(hit)[::-1]]]
+
+    def best_match(
+        self, nums: Sequence[int], secondary: Sequence[int] | None = None,
+        match_key: str = "secondary_match",
+    ) -> dict | None:
+        """Draw with the most balls in common (ties: secondary matches, then
+        most recent) as a SQL-like row: date_de_tirage, boule_1..5, secondary
+        columns, match_count (+ match_key if secondary is given)."""
+        if not len(self):
+            return None
+        common = _popcount(self.balls & _mask(nums)).astype(np.int64)
+        key = common * 16
+        if secondary is not None:
+            sec_common = _popcount(self.secondary & _mask(secondary)).astype(np.int64)
+            key += sec_common
+        i = len(key) - 1 - int(np.argmax(key[::-1]))  # argmax = 1st max → reversed = latest
+        row = self.snapshot.row(i, self.secondary_columns)
+        row["match_count"] = int(common[i])
+        if secondary is not None:
+            row[match_key] = int(sec_common[i])
+        return row
+
+
+_indexes: dict[str, GridIndex] = {}
+
+
+def get_grid_index(game: str) -> GridIndex | None:
+    """GridIndex of the current draw store snapshot ("loto" | "em"), None if not loaded."""
+    snap = get_draw_snapshot(game)
+    if snap is None or not len(snap):
+        return None
+    index = _indexes.get(game)
+    if index is None or index.snapshot is not snap:
+        index = GridIndex(snap, get_draw_store(game).cfg.secondary_columns)
+        _indexes[game] = index
+    return index
@@ -0,0 +1,92 @@
+"""
+Routeur d'intentions compilé du chatbot HYBRIDE.
+
+Les détecteurs (insultes, compliments, argent, filtres temporels, pédagogie…)
+parcouraient leurs listes de mots / regex une par une : ~200 re.search(r'\\b' +
+re.escape(mot) + r'\\b') par message pour les seules insultes, chacun relisant le
+message en minuscules. Les listes sont désormais compilées une fois à l'import
+en UNE alternance par détecteur (merge_patterns / merge_words / merge_phrases) :
+un seul parcours du message par détecteur, mêmes décisions.
+
+route_intents() évalue en un appel les signaux des phases courte-circuit
+(I, C, R, SALUTATION, G, OUT_OF_SCOPE_LOTTERY, A, GEO) sur le message normalisé
+une seule fois et retourne un vecteur IntentSignals ; _prepare_chat_context_base
+lit ensuite les décisions dans ce vecteur. Les phases postérieures à la Phase 0
+gardent leurs détecteurs : la reformulation V125 peut réécrire le message.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Iterable
+
+
+_NEVER = re.compile(r"(?!)")  # empty list: never matches
+
+
+def merge_patterns(patterns: Iterable[str], flags: int = 0) -> re.Pattern:
+    """One alternation matching wherever any of the regexes matches (re.search)."""
+    patterns = list(patterns)
+    if not patterns:
+        return _NEVER
+    return re.compile("|".join(f"(?:{p})" for p in patterns), flags)
+
+
+def merge_words(words: Iterable[str], flags: int = 0) -> re.Pattern:
+    r"""\b(?:w1|w2|…)\b — any whole word of the list (longest first)."""
+    escaped = sorted({re.escape(w) for w in words}, key=lambda w: (-len(w), w))
+    if not escaped:
+        return _NEVER
+    return re.compile(r"\b(?:" + "|".join(escaped) + r")\b", flags)
+
+
+def merge_phrases(phrases: Iterable[str]) -> re.Pattern:
+    """Any of the substrings (`phrase in text`)."""
+    escaped = sorted({re.escape(p) for p in phrases}, key=lambda p: (-len(p), p))
+    if not escaped:
+        return _NEVER
+    return re.compile("|".join(escaped))
+
+
+# Question markers of Phase I / Phase C (insult / compliment + question → normal flow)
+_SHORT_NUMBER_RE = re.compile(r'\b\d{1,2}\b')
+
+
+@dataclass(frozen=True)
+class IntentSignals:
+    """Feature vector of the short-circuit phases for one message."""
+    lower: str
+    insulte: str | None                 # Phase I: 'directe' | 'menace' | None
+    compliment: str | None              # Phase C: 'love' | 'merci' | 'compliment' | None
+    site_rating: bool                   # Phase R
+    salutation: bool                    # Phase SALUTATION
+    generation: bool                    # Phase G
+    foreign_lottery: str | None         # Phase OUT_OF_SCOPE_LOTTERY (optional detector)
+    grid_evaluation: dict | None        # Phase EVAL (skips Phase A)
+    argent: bool                        # Phase A
+    country: bool                       # Phase GEO (optional detector, EM only)
+
+    def has_question(self, message: str, keywords: Iterable[str]) -> bool:
+        """'?', a 1-2 digit number or a question keyword (Phase I / C)."""
+        return ('?' in message or bool(_SHORT_NUMBER_RE.search(message))
+                or any(kw in self.lower for kw in keywords))
+
+
+def route_intents(message: str, lang: str, cfg: dict) -> IntentSignals:
+    """Evaluate every short-circuit phase signal of `message` in one call.
+
+    cfg: the chat pipeline config (detect_* callables of the game).
+    """
+    foreign_fn = cfg.get("detect_foreign_lottery")
+    country_fn = cfg.get("detect_country")
+    return IntentSignals(
+        lower=message.lower(),
+        insulte=cfg["detect_insulte"](message),
+        compliment=cfg["detect_compliment"](message),
+        site_rating=bool(cfg["detect_site_rating"](message)),
+        salutation=bool(cfg["detect_salutation"](message)),
+        generation=bool(cfg["detect_generation"](message)),
+        foreign_lottery=foreign_fn(message) if foreign_fn else None,
+        grid_evaluation=cfg["detect_grid_evaluation"](message, game=cfg["eval_game"]),
+        argent=bool(cfg["detect_argent"](message, lang)),
+        country=bool(country_fn(message)) if country_fn else False,
+    )
@@ -0,0 +1,159 @@
+"""
+NumberStats — statistiques par numéro de TOUS les numéros en un seul passage.
+
+get_numero_stats (chatbot Phase 1), engine.stats.analyze_number et
+/stats/number/{n} enchaînaient pour UN numéro : SELECT des dates d'apparition
+(OR sur 5 colonnes), COUNT(*) des tirages postérieurs, SELECT de toutes les dates
+pour les écarts, puis les fréquences — ×62 numéros possibles (50 + 12 étoiles).
+
+Ici l'historique du draw store est trié une fois par (numéro, indice de tirage) :
+    - positions  : indices des tirages de chaque numéro (CSR, offsets par numéro)
+    - appearances, premier / dernier indice, écart actuel
+    - écarts     : différences d'indices consécutifs → écart moyen et max
+      (réduction par numéro, np.maximum.at / bincount pondéré)
+    - per_year   : matrice années × numéros
+Une requête par numéro devient une lecture de ligne (NumberRow).
+
+Mémorisé par jeu et reconstruit quand le snapshot change (nouveau tirage) ;
+le listener new-draw libère l'ancien. Store non chargé → None, les appelants
+gardent leur chemin SQL.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+
+from services.draw_store import DrawSnapshot, get_draw_snapshot, get_draw_store, register_new_draw_listener
+
+
+@dataclass(frozen=True)
+class NumberRow:
+    """History of one number. current_gap = draws after its last appearance
+    (0 if never drawn, as the SQL COUNT(date > last))."""
+    number: int
+    appearances: int
+    dates: tuple                        # appearance dates (date), ASC
+    gaps: tuple                         # draws between consecutive appearances
+    current_gap: int
+    mean_gap: float                     # 0.0 below 2 appearances
+    max_gap: int                        # 0 below 2 appearances
+    per_year: dict                      # {year: count}, years with >= 1 appearance
+
+    @property
+    def first(self) -> date | None:
+        return self.dates[0] if self.dates else None
+
+    @property
+    def last(self) -> date | None:
+        return self.dates[-1] if self.dates else None
+
+
+class _Matrix:
+    """Per-number arrays for one number type (balls or secondary)."""
+
+    __slots__ = ("appearances", "current_gap", "max_gap", "mean_gap", "offsets",
+                 "per_year", "positions", "size")
+
+    def __init__(self, matrix: np.ndarray, size: int, year_index: np.ndarray, n_years: int):
+        n = len(matrix)
+        draws = np.repeat(np.arange(n, dtype=np.intp), matrix.shape[1])
+        values = matrix.ravel().astype(np.intp)
+        keep = (values >= 1) & (values <= size)
+        draws, values = draws[keep], values[keep]
+        order = np.lexsort((draws, values))
+        values, draws = values[order], draws[order]
+        dup = np.zeros(len(values), dtype=bool)
+        dup[1:] = (values[1:] == values[:-1]) & (draws[1:] == draws[:-1])
+        values, draws = values[~dup], draws[~dup]
+
+        self.size = size
+        self.appearances = np.bincount(values, minlength=size + 1)
+        self.offsets = np.concatenate(([0], np.cumsum(self.appearances)))
+        self.positions = draws
+
+        same = values[1:] == values[:-1]
+        gaps, gap_nums = np.diff(draws)[same], values[1:][same]
+        self.max_gap = np.zeros(size + 1, dtype=np.intp)
+        np.maximum.at(self.max_gap, gap_nums, gaps)
+        gap_sum = np.bincount(gap_nums, weights=gaps, minlength=size + 1)
+        n_gaps = np.maximum(self.appearances - 1, 0)
+        self.mean_gap = np.divide(gap_sum, n_gaps, out=np.zeros(size + 1), where=n_gaps > 0)
+
+        seen = self.appearances > 0
+        last = np.full(size + 1, -1, dtype=np.intp)
+        last[seen] = draws[self.offsets[1:][seen] - 1]
+        self.current_gap = np.where(seen, n - 1 - last, 0)
+
+        self.per_year = np.zeros((n_years, size + 1), dtype=np.intp)
+        np.add.at(self.per_year, (year_index[draws], values), 1)
+
+    def positions_of(self, number: int) -> np.ndarray:
+        return self.positions[self.offsets[number]:self.offsets[number + 1]]
+
+
+class NumberStats:
+    """Per-number stats of every ball / secondary number of a snapshot."""
+
+    def __init__(self, snap: DrawSnapshot, num_max: int, secondary_max: int):
+        self.snapshot = snap
+        self.version = snap.version
+        years = snap.dates.astype("datetime64[Y]").astype(np.intp) + 1970
+        self.years, year_index = np.unique(years, return_inverse=True)
+        self._matrices = {
+            False: _Matrix(snap.balls, num_max, year_index, len(self.years)),
+            True: _Matrix(snap.secondary, secondary_max, year_index, len(self.years)),
+        }
+
+    def __len__(self) -> int:
+        return len(self.snapshot)
+
+    def appearances(self, secondary: bool = False) -> np.ndarray:
+        """Appearance count per number (index = number)."""
+        return self._matrices[secondary].appearances
+
+    def number(self, number: int, secondary: bool = False) -> NumberRow:
+        """Row lookup (number outside 1..size → never drawn)."""
+        m = self._matrices[secondary]
+        if not 1 <= number <= m.size:
+            return NumberRow(number, 0, (), (), 0, 0.0, 0, {})
+        positions = m.positions_of(number)
+        dates = self.snapshot.dates[positions].astype(date)
+        per_year = m.per_year[:, number]
+        return NumberRow(
+            number=number,
+            appearances=int(m.appearances[number]),
+            dates=tuple(dates.tolist()),
+            gaps=tuple(np.diff(positions).tolist()),
+            current_gap=int(m.current_gap[number]),
+            mean_gap=float(m.mean_gap[number]),
+            max_gap=int(m.max_gap[number]),
+            per_year={int(y): int(c) for y, c in zip(self.years, per_year) if c},
+        )
+
+
+_stats: dict[str, NumberStats] = {}
+
+
+def get_number_stats(game: str) -> NumberStats | None:
+    """NumberStats of the current draw store snapshot ("loto" | "em"),
+    None if the store is not loaded. Rebuilt once per new snapshot."""
+    snap = get_draw_snapshot(game)
+    if snap is None or not len(snap):
+        return None
+    stats = _stats.get(game)
+    if stats is None or stats.snapshot is not snap:
+        cfg = get_draw_store(game).cfg
+        stats = _stats[game] = NumberStats(snap, cfg.num_max, cfg.secondary_max)
+    return stats
+
+
+def invalidate_number_stats(game: str) -> None:
+    _stats.pop(game, None)
+
+
+def clear_number_stats() -> None:
+    _stats.clear()
+
+
+register_new_draw_listener(invalidate_number_stats)
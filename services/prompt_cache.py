@@ -0,0 +1,64 @@
+"""
+Cache d'assemblage du system prompt du chatbot HYBRIDE.
+
+Pour chaque message, _prepare_chat_context_base rechargeait le prompt de base
+(12-15k tokens), remplaçait {DRAW_COUNT} puis concaténait la règle de langue,
+l'ancrage temporel, ANTI_REINTRO_BLOCK et le bloc pédagogique : une chaîne
+reconstruite de zéro alors que toutes ses couches sont statiques pour un
+(jeu, langue, nombre de tirages, date du jour, flag pédagogique) donné.
+
+Le prompt final est mémorisé sous la clé
+    (jeu, langue, prompt de base, draw_count, date, pédagogique)
+Le prompt de base fait partie de la clé : services.prompt_loader retourne le
+même objet str tant que le fichier ne change pas (contrôle mtime/taille), son
+hash est donc calculé une seule fois ; un fichier modifié donne une autre clé.
+
+Valeur : AssembledPrompt (texte interné + hash SHA-256 stable du texte), le
+hash pouvant servir de clé au context caching côté fournisseur. Éviction FIFO
+(les clés d'hier partent en premier, la date change chaque jour).
+"""
+
+import hashlib
+import sys
+from collections.abc import Callable
+from dataclasses import dataclass
+
+_MAXSIZE = 64
+
+_assembled: dict[tuple, "AssembledPrompt"] = {}
+_stats = {"hits": 0, "misses": 0}
+
+
+@dataclass(frozen=True)
+class AssembledPrompt:
+    text: str
+    hash: str   # sha256 hex of text (stable across instances / restarts)
+
+
+def prompt_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def get_assembled_prompt(key: tuple, build: Callable[[], str]) -> AssembledPrompt:
+    """Assembled prompt of `key`, built by `build()` on first use."""
+    prompt = _assembled.get(key)
+    if prompt is not None:
+        _stats["hits"] += 1
+        return prompt
+    _stats["misses"] += 1
+    text = sys.intern(build())
+    prompt = AssembledPrompt(text, prompt_hash(text))
+    if len(_assembled) >= _MAXSIZE:
+        for k in list(_assembled)[:_MAXSIZE // 4 or 1]:
+            del _assembled[k]
+    _assembled[key] = prompt
+    return prompt
+
+
+def prompt_cache_stats() -> dict:
+    return {"size": len(_assembled), **_stats}
+
+
+def clear_prompt_cache() -> None:
+    _assembled.clear()
+    _stats["hits"] = _stats["misses"] = 0
@@ -1,6 +1,5 @@
 import os
 import logging
-from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +34,37 @@ PROMPT_MAP = {
 FALLBACK_PROMPT_PATH = "prompts/tirages/prompt_global.txt"
 
 
+# =========================
+# File contents cache — re-read only when (mtime, size) changes
+# =========================
+
+_files: dict[str, tuple[int, int, str]] = {}
+
+
+def _read_prompt_file(path: str) -> str | None:
+    """Contenu du fichier (None si absent), relu seulement si mtime/taille changent.
+
+    Tant que le fichier ne change pas, le MEME objet str est retourné : son
+    hash est calculé une fois (clé de services.prompt_cache).
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        _files.pop(path, None)
+        return None
+    cached = _files.get(path)
+    if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    _files[path] = (st.st_mtime_ns, st.st_size, text)
+    return text
+
+
+def clear_prompt_files() -> None:
+    _files.clear()
+
+
 def load_prompt(window: str) -> str:
     """
     Charge le prompt contextuel correspondant a la fenetre d'analyse (Loto).
@@ -43,15 +73,15 @@ def load_prompt(window: str) -> str:
     key = (window or "GLOBAL").upper().strip()
     path = PROMPT_MAP.get(key, FALLBACK_PROMPT_PATH)
 
-    if os.path.isfile(path):
-        with open(path, "r", encoding="utf-8") as f:
-            return f.read()
+    text = _read_prompt_file(path)
+    if text is not None:
+        return text
 
     # Fallback ultime si fichier introuvable
-    if os.path.isfile(FALLBACK_PROMPT_PATH):
+    text = _read_prompt_file(FALLBACK_PROMPT_PATH)
+    if text is not None:
         logger.warning(f"[PROMPT] Fichier {path} introuvable, fallback global")
-        with open(FALLBACK_PROMPT_PATH, "r", encoding="utf-8") as f:
-            return f.read()
+        return text
 
     logger.error("[PROMPT] Aucun fichier prompt disponible")
     return ""
@@ -61,7 +91,6 @@ def load_prompt(window: str) -> str:
 # EuroMillions — file-based prompt loading with lang fallback
 # =========================
 
-@lru_cache(maxsize=128)
 def load_prompt_em(name: str, lang: str = "fr") -> str:
     """
     Charge un prompt EM dans la langue demandee.
@@ -76,10 +105,9 @@ def load_prompt_em(name: str, lang: str = "fr") -> str:
         Prompt text, or empty string if not found for any language.
     """
     for try_lang in _fallback_chain(lang):
-        path = os.path.join(PROMPTS_DIR, "em", try_lang, f"{name}.txt")
-        if os.path.isfile(path):
-            with open(path, "r", encoding="utf-8") as f:
-                return f.read()
+        text = _read_prompt_file(os.path.join(PROMPTS_DIR, "em", try_lang, f"{name}.txt"))
+        if text is not None:
+            return text
 
     logger.error(f"[PROMPT_EM] Prompt '{name}' not found for any language")
     return ""
@@ -0,0 +1,123 @@
+"""
+Coalescence des requêtes GET identiques concurrentes (in-process).
+
+Au moment d'un tirage, des dizaines de requêtes identiques arrivent en même
+temps (/api/euromillions/stats/pairs?window=2A, /draw/{date}…) alors que le
+cache vient d'être purgé : chacune lançait sa propre requête SQL.
+
+@coalesce (sous @limiter.limit — le rate limit reste par client) : la 1re
+requête d'une clé exécute le handler dans une tâche, les requêtes identiques
+qui arrivent pendant son exécution l'attendent et reçoivent la même réponse.
+Le corps est sérialisé une seule fois ; chaque appelant reçoit sa propre
+Response sur ces octets.
+
+Clé = handler + paramètres liés par FastAPI (normalisés : défauts appliqués,
+Enum → valeur, paramètres inconnus type cache-buster ignorés) + If-None-Match
+(les réponses snapshot répondent 304 selon cet en-tête).
+
+Réservé aux GET idempotents dont la réponse ne dépend que de ces paramètres.
+Pas de StreamingResponse (un flux ne se partage pas).
+
+La tâche est protégée (asyncio.shield) : la déconnexion du 1er client n'annule
+pas le calcul des autres. Une exception est propagée à tous les appelants.
+
+Compteurs par handler (executions, coalesced, errors) : coalescer_stats().
+"""
+
+import asyncio
+import functools
+import inspect
+import logging
+from collections import defaultdict
+from enum import Enum
+from typing import Any, Callable
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+_inflight: dict[tuple, asyncio.Task] = {}
+_stats: dict[str, dict[str, int]] = defaultdict(lambda: {"executions": 0, "coalesced": 0, "errors": 0})
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v) for v in value)
+    return value
+
+
+def _freeze(result: Any) -> tuple[int, bytes, list[tuple[bytes, bytes]]]:
+    """(status, body, raw headers) of a handler result — serialized once."""
+    if isinstance(result, StreamingResponse):
+        raise TypeError("@coalesce cannot share a StreamingResponse")
+    if not isinstance(result, Response):
+        result = JSONResponse(content=jsonable_encoder(result))
+    headers = [(k, v) for k, v in result.raw_headers if k != b"content-length"]
+    return result.status_code, result.body, headers
+
+
+def _materialize(frozen: tuple[int, bytes, list[tuple[bytes, bytes]]]) -> Response:
+    status, body, headers = frozen
+    response = Response(content=body, status_code=status)
+    response.raw_headers = [h for h in response.raw_headers if h[0] == b"content-length"] + headers
+    return response
+
+
+def coalesce(func: Callable) -> Callable:
+    """Share one execution of an idempotent GET handler between identical concurrent calls."""
+    name = func.__name__
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        request = bound.arguments.get("request")
+        key = (
+            name,
+            tuple((k, _normalize(v)) for k, v in bound.arguments.items() if k != "request"),
+            request.headers.get("if-none-match") if request is not None else None,
+        )
+        task = _inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(_run(func, key, args, kwargs))
+            task.add_done_callback(_retrieve)  # every caller may have gone away
+            _inflight[key] = task
+            _stats[name]["executions"] += 1
+        else:
+            _stats[name]["coalesced"] += 1
+        return _materialize(await asyncio.shield(task))
+
+    return wrapper
+
+
+async def _run(func: Callable, key: tuple, args, kwargs):
+    try:
+        return _freeze(await func(*args, **kwargs))
+    except Exception:
+        _stats[key[0]]["errors"] += 1
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+
+def _retrieve(task: asyncio.Task) -> None:
+    if not task.cancelled():
+        task.exception()
+
+
+def coalescer_stats() -> dict:
+    """Per-handler counters: executions, coalesced (= calls saved), errors, in flight."""
+    return {
+        "in_flight": len(_inflight),
+        "saved": sum(c["coalesced"] for c in _stats.values()),
+        "handlers": {name: dict(c) for name, c in sorted(_stats.items())},
+    }
+
+
+def clear_coalescer() -> None:
+    _inflight.clear()
+    _stats.clear()
@@ -0,0 +1,98 @@
+"""
+Réponses JSON pré-rendues par tirage — /api/{game}/stats, numbers-heat, top-flop.
+
+Ces endpoints renvoient la même réponse à tous les visiteurs entre deux imports
+de tirage, mais la recalculaient à chaque appel (COUNT + MIN/MAX, fréquences,
+retards, UNION ALL ×5 + MAX(date) GROUP BY num pour numbers-heat…).
+
+Ici la réponse est rendue UNE fois par (jeu, endpoint, version de tirage)
+depuis le draw store (aucune requête), sérialisée comme JSONResponse et gardée
+en octets avec son ETag. L'ETag est un hash du corps : identique sur toutes les
+instances Cloud Run → If-None-Match → 304 quel que soit l'instance servie.
+
+Le rendu (dict) est fourni par la route (render(snap)), qui garde la même mise
+en forme pour son chemin SQL. Le listener new-draw purge les réponses du jeu ;
+store non chargé → get_response_snapshot() retourne None et la route garde son
+chemin SQL.
+"""
+
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import Callable
+
+from config.engine import EngineConfig
+from services.draw_store import DrawSnapshot, get_draw_store, register_new_draw_listener
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ResponseSnapshot:
+    """Pre-serialized JSON body of one endpoint for one draw version."""
+    version: str
+    body: bytes
+    etag: str
+
+    @classmethod
+    def render(cls, version: str, payload: dict) -> "ResponseSnapshot":
+        # Same bytes as starlette JSONResponse.render
+        body = json.dumps(
+            payload, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"),
+        ).encode("utf-8")
+        return cls(version=version, body=body, etag=f'"{hashlib.sha1(body).hexdigest()[:20]}"')
+
+    def matches(self, if_none_match: str | None) -> bool:
+        """True if an If-None-Match header value designates this body (→ 304)."""
+        if not if_none_match:
+            return False
+        tags = [t.strip() for t in if_none_match.split(",")]
+        return "*" in tags or any(t.removeprefix("W/") == self.etag for t in tags)
+
+
+_snapshots: dict[tuple[str, str], ResponseSnapshot] = {}
+
+
+async def get_response_snapshot(
+    cfg: EngineConfig,
+    kind: str,
+    render: Callable[[DrawSnapshot], dict],
+    get_connection=None,
+) -> ResponseSnapshot | None:
+    """Rendered response `kind` of a game for the current draw version, or None
+    if the draw store is not loaded. render(snap) runs once per draw version.
+
+    Freshness = draw store throttled MAX(date) check, through `get_connection`
+    only when a check is due (as get_table_summary).
+    """
+    store = get_draw_store(cfg.game)
+    if not store.enabled:
+        return None
+    if get_connection is not None and store.check_due():
+        async with get_connection() as conn:
+            snap = await store.ensure_fresh(conn)
+    else:
+        snap = store.snapshot
+    if snap is None or not len(snap):
+        return None
+    key = (cfg.game, kind)
+    current = _snapshots.get(key)
+    if current is None or current.version != snap.version:
+        current = ResponseSnapshot.render(snap.version, render(snap))
+        _snapshots[key] = current
+        logger.info("[RESPONSE_SNAPSHOT] %s/%s rendered (version=%s, %d bytes)",
+                    cfg.game, kind, snap.version, len(current.body))
+    return current
+
+
+def invalidate_response_snapshots(game: str) -> None:
+    for key in [k for k in _snapshots if k[0] == game]:
+        del _snapshots[key]
+
+
+def clear_response_snapshots() -> None:
+    _snapshots.clear()
+
+
+register_new_draw_listener(invalidate_response_snapshots)
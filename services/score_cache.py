@@ -0,0 +1,87 @@
+"""
+Cache des scores HYBRIDE par tirage — calculer_scores_hybrides(_secondary).
+
+Les scores de fenêtres (principale / récente / globale) sont une fonction pure de
+(jeu, mode, contenu de la table de tirages, EngineConfig). Ils ne changent donc
+qu'à l'import d'un nouveau tirage : ils sont mis en cache sous une clé
+    hybride_scores:{game}:{kind}:{mode}:{draw_version}:{config_fingerprint}
+à 2 niveaux :
+    - dict in-process (lecture sans aller-retour réseau ni json.loads)
+    - services.cache (Redis partagé entre instances Cloud Run, fallback mémoire)
+
+draw_version = MAX(date_de_tirage) → une entrée ne peut jamais servir un autre
+tirage. Invalidation explicite via le listener new-draw (draw_store), déclenché
+par la même détection que check_and_update_decay.
+"""
+
+import dataclasses
+import hashlib
+import json
+import logging
+
+from config.engine import EngineConfig
+from services.cache import cache_get, cache_set
+from services.draw_store import register_new_draw_listener
+
+logger = logging.getLogger(__name__)
+
+SCORE_TTL = 7 * 24 * 3600  # clé versionnée par tirage — TTL = simple garde-fou mémoire Redis
+_LOCAL_MAXSIZE = 256
+
+_local: dict[str, dict[int, float]] = {}
+
+
+def config_fingerprint(cfg: EngineConfig) -> str:
+    """Short stable hash of an EngineConfig (variants from dataclasses.replace differ)."""
+    raw = json.dumps(dataclasses.asdict(cfg), sort_keys=True, default=sorted)
+    return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+
+def _key(cfg: EngineConfig, kind: str, mode: str, version: str) -> str:
+    return f"hybride_scores:{cfg.game}:{kind}:{mode}:{version}:{config_fingerprint(cfg)}"
+
+
+def _remember(key: str, scores: dict[int, float]) -> None:
+    if len(_local) >= _LOCAL_MAXSIZE:
+        # FIFO : les plus anciennes clés (tirages précédents) partent en premier
+        for k in list(_local)[:_LOCAL_MAXSIZE // 4 or 1]:
+            del _local[k]
+    _local[key] = scores
+
+
+async def get_cached_scores(
+    cfg: EngineConfig, kind: str, mode: str, version: str,
+) -> dict[int, float] | None:
+    """Return a copy of cached scores, or None. kind = "balls" | "secondary"."""
+    key = _key(cfg, kind, mode, version)
+    scores = _local.get(key)
+    if scores is None:
+        cached = await cache_get(key)
+        if cached is None:
+            return None
+        scores = {int(n): s for n, s in cached.items()}
+        _remember(key, scores)
+    return dict(scores)
+
+
+async def set_cached_scores(
+    cfg: EngineConfig, kind: str, mode: str, version: str, scores: dict[int, float],
+) -> None:
+    key = _key(cfg, kind, mode, version)
+    _remember(key, dict(scores))
+    await cache_set(key, scores, ttl=SCORE_TTL)
+
+
+def invalidate_scores(game: str) -> None:
+    """Drop in-process entries of a game (Redis entries are draw-versioned)."""
+    prefix = f"hybride_scores:{game}:"
+    for k in [k for k in _local if k.startswith(prefix)]:
+        del _local[k]
+    logger.info("[SCORE_CACHE] %s invalidated (new draw)", game)
+
+
+def clear_score_cache() -> None:
+    _local.clear()
+
+
+register_new_draw_listener(invalidate_scores)
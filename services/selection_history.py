@@ -7,6 +7,8 @@ Enables the "Persistent Saturation Brake" mechanism (audit 01.1 rev.2 — F01.1-
 Table: hybride_selection_history
 Pipeline position: READ-ONLY during scoring (step 4b, AFTER decay, BEFORE intra-batch saturation).
 WRITE only on /api/{game}/generate (first canonical grid of the batch for the day).
+/generate writes through the write-behind queue (services.selection_writer),
+record_canonical_selection below is the synchronous equivalent.
 
 Architecture (mirrors decay_state V94 pattern):
     - Scoring pipeline (API /generate) → WRITE canonical selection AFTER generation
@@ -38,11 +40,37 @@ logger = logging.getLogger(__name__)
 # WRITE — called from API /generate (never from chatbot)
 # ─────────────────────────────────────────────────────────────────────
 
+def selection_numbers(selected_numbers: dict | None):
+    """Yield (number_type, int) pairs of a grid selection, skipping invalid values.
+
+    Keys outside {"ball", "star", "chance"} are ignored, single-int values
+    (legacy Loto chance) are wrapped to list, None / non-int values skipped.
+    """
+    for ntype, values in (selected_numbers or {}).items():
+        if ntype not in ("ball", "star", "chance"):
+            continue
+        # Normalize to list
+        if values is None:
+            continue
+        if isinstance(values, int):
+            values = [values]
+        if not isinstance(values, (list, tuple, set)):
+            continue
+        for n in values:
+            if n is None:
+                continue
+            try:
+                yield ntype, int(n)
+            except (TypeError, ValueError):
+                continue
+
+
 async def record_canonical_selection(
     conn,
     game: str,
     draw_date_target,
     selected_numbers: dict,
+    commit: bool = True,
 ) -> dict:
     """Record the canonical grid selection for a target draw date.
 
@@ -58,6 +86,7 @@ async def record_canonical_selection(
         selected_numbers: dict with keys in {"ball", "star", "chance"}
                           each value = list[int] of selected numbers.
                           Single-int values (legacy Loto chance) are wrapped to list.
+        commit: False = the caller commits (several grids in one transaction).
 
     Returns:
         {"game": str, "draw_date_target": str, "grid_id": str (V137),
@@ -75,35 +104,20 @@ async def record_canonical_selection(
         inserted = 0
         ignored = 0
 
-        for ntype, values in (selected_numbers or {}).items():
-            if ntype not in ("ball", "star", "chance"):
-                continue
-            # Normalize to list
-            if values is None:
-                continue
-            if isinstance(values, int):
-                values = [values]
-            if not isinstance(values, (list, tuple, set)):
-                continue
-            for n in values:
-                if n is None:
-                    continue
-                try:
-                    n_int = int(n)
-                except (TypeError, ValueError):
-                    continue
-                await cursor.execute(
-                    "INSERT IGNORE INTO hybride_selection_history "
-                    "(game, number_value, number_type, draw_date_target, source, grid_id) "
-                    "VALUES (%s, %s, %s, %s, 'generator', %s)",
-                    (game, n_int, ntype, draw_date_target, grid_id),
-                )
-                if cursor.rowcount == 1:
-                    inserted += 1
-                else:
-                    ignored += 1
+        for ntype, n_int in selection_numbers(selected_numbers):
+            await cursor.execute(
+                "INSERT IGNORE INTO hybride_selection_history "
+                "(game, number_value, number_type, draw_date_target, source, grid_id) "
+                "VALUES (%s, %s, %s, %s, 'generator', %s)",
+                (game, n_int, ntype, draw_date_target, grid_id),
+            )
+            if cursor.rowcount == 1:
+                inserted += 1
+            else:
+                ignored += 1
 
-        await conn.commit()
+        if commit:
+            await conn.commit()
         logger.info(
             "[CALENDAR] record_canonical_selection OK game=%s target=%s grid_id=%s "
             "— %d inserted, %d ignored",
@@ -167,81 +181,10 @@ async def get_persistent_brake_map(
     if not getattr(config, "saturation_persistent_enabled", False):
         return {}
 
-    t1_mult = getattr(config, "saturation_brake_persistent_t1", 0.20)
-    t2_mult = getattr(config, "saturation_brake_persistent_t2", 0.50)
-    window = getattr(config, "saturation_persistent_window", 2)
-
     try:
-        cursor = await conn.cursor()
-        # Fetch distinct draw_date_target values before current_draw_date (DESC)
-        # limited to window size. These are the "T-1, T-2, ..." canonical dates.
-        # V136: filtre source='generator' — les rows pdf_meta_* du calendrier
-        # admin performance ne contribuent pas au brake.
-        await cursor.execute(
-            "SELECT DISTINCT draw_date_target FROM hybride_selection_history "
-            "WHERE game = %s AND number_type = %s AND source = 'generator' "
-            "AND draw_date_target < %s "
-            "ORDER BY draw_date_target DESC LIMIT %s",
-            (game, number_type, current_draw_date, int(window)),
-        )
-        rows = await cursor.fetchall()
-        if not rows:
-            return {}
-        target_dates = [row["draw_date_target"] for row in rows]
-        # target_dates[0] = T-1 (most recent before current), target_dates[1] = T-2, ...
-
-        # V137 — Fetch numbers for these target dates BUT ONLY from the FIRST
-        # temporal grid of each day (subquery JOIN MIN(selected_at) INTERVAL
-        # 1 SECOND, symmetrical to V136.A admin calendar pattern).
-        # V137.B — Avec V137.B, /api/{game}/generate enregistre N grilles du
-        # batch (n=3 par défaut, max 10) en boucle ~50-200ms total → toutes les
-        # N grilles peuvent avoir le même selected_at à la seconde. Le filter
-        # INTERVAL 1 SECOND seul inclurait toutes les N → ~30 numéros bloqués
-        # au lieu de 5 → V110 dégénère. Solution : ajout MIN(grid_id) pour ne
-        # lire que la 1ère grille déterministe (1er UUID alphabétique) dans
-        # la 1ère seconde.
-        # Clause `f.first_grid_id IS NULL OR h.grid_id = f.first_grid_id` :
-        # si toutes les rows d'un draw_date_target sont legacy V136.A (grid_id
-        # NULL), MIN(grid_id) retourne NULL → fallback sur INTERVAL 1 SECOND
-        # seul (sémantique V137 préservée pour les rows historiques).
-        placeholders = ",".join(["%s"] * len(target_dates))
-        await cursor.execute(
-            f"SELECT h.number_value, h.draw_date_target "
-            f"FROM hybride_selection_history h "
-            f"INNER JOIN ("
-            f"    SELECT draw_date_target, MIN(selected_at) AS first_ts, "
-            f"           MIN(grid_id) AS first_grid_id "
-            f"    FROM hybride_selection_history "
-            f"    WHERE game = %s AND number_type = %s AND source = 'generator' "
-            f"    AND draw_date_target IN ({placeholders}) "
-            f"    GROUP BY draw_date_target"
-            f") f ON h.draw_date_target = f.draw_date_target "
-            f"WHERE h.game = %s AND h.number_type = %s AND h.source = 'generator' "
-            f"AND h.selected_at >= f.first_ts "
-            f"AND h.selected_at < f.first_ts + INTERVAL 1 SECOND "
-            f"AND (f.first_grid_id IS NULL OR h.grid_id = f.first_grid_id)",
-            (game, number_type, *target_dates, game, number_type),
+        return await build_persistent_brake_map(
+            conn, game, current_draw_date, number_type, config,
         )
-        selections = await cursor.fetchall()
-
-        # Build brake map: iterate selections, apply min multiplier if collision
-        brake: dict[int, float] = {}
-        # Map target_date → tier index (0 = T-1, 1 = T-2, ...)
-        date_to_tier = {d: i for i, d in enumerate(target_dates)}
-        tier_multipliers = (t1_mult, t2_mult)
-        for sel in selections:
-            n = sel["number_value"]
-            tier = date_to_tier.get(sel["draw_date_target"])
-            if tier is None or tier >= len(tier_multipliers):
-                continue
-            mult = tier_multipliers[tier]
-            # Collision (number in both T-1 and T-2): keep the MIN (stronger brake)
-            if n in brake:
-                brake[n] = min(brake[n], mult)
-            else:
-                brake[n] = mult
-
-        return brake
     except Exception:
         logger.warning(
             "get_persistent_brake_map failed for %s/%s — returning empty map",
@@ -250,6 +193,94 @@ async def get_persistent_brake_map(
         return {}
 
 
+async def build_persistent_brake_map(
+    conn,
+    game: str,
+    current_draw_date,
+    number_type: str,
+    config,
+) -> dict:
+    """Brake map query of get_persistent_brake_map — raises on DB error.
+
+    Ignores saturation_persistent_enabled. Used directly by services.brake_cache
+    (an error must not be materialized as an empty map).
+    """
+    t1_mult = getattr(config, "saturation_brake_persistent_t1", 0.20)
+    t2_mult = getattr(config, "saturation_brake_persistent_t2", 0.50)
+    window = getattr(config, "saturation_persistent_window", 2)
+
+    cursor = await conn.cursor()
+    # Fetch distinct draw_date_target values before current_draw_date (DESC)
+    # limited to window size. These are the "T-1, T-2, ..." canonical dates.
+    # V136: filtre source='generator' — les rows pdf_meta_* du calendrier
+    # admin performance ne contribuent pas au brake.
+    await cursor.execute(
+        "SELECT DISTINCT draw_date_target FROM hybride_selection_history "
+        "WHERE game = %s AND number_type = %s AND source = 'generator' "
+        "AND draw_date_target < %s "
+        "ORDER BY draw_date_target DESC LIMIT %s",
+        (game, number_type, current_draw_date, int(window)),
+    )
+    rows = await cursor.fetchall()
+    if not rows:
+        return {}
+    target_dates = [row["draw_date_target"] for row in rows]
+    # target_dates[0] = T-1 (most recent before current), target_dates[1] = T-2, ...
+
+    # V137 — Fetch numbers for these target dates BUT ONLY from the FIRST
+    # temporal grid of each day (subquery JOIN MIN(selected_at) INTERVAL
+    # 1 SECOND, symmetrical to V136.A admin calendar pattern).
+    # V137.B — Avec V137.B, /api/{game}/generate enregistre N grilles du
+    # batch (n=3 par défaut, max 10) en boucle ~50-200ms total → toutes les
+    # N grilles peuvent avoir le même selected_at à la seconde. Le filter
+    # INTERVAL 1 SECOND seul inclurait toutes les N → ~30 numéros bloqués
+    # au lieu de 5 → V110 dégénère. Solution : ajout MIN(grid_id) pour ne
+    # lire que la 1ère grille déterministe (1er UUID alphabétique) dans
+    # la 1ère seconde.
+    # Clause `f.first_grid_id IS NULL OR h.grid_id = f.first_grid_id` :
+    # si toutes les rows d'un draw_date_target sont legacy V136.A (grid_id
+    # NULL), MIN(grid_id) retourne NULL → fallback sur INTERVAL 1 SECOND
+    # seul (sémantique V137 préservée pour les rows historiques).
+    placeholders = ",".join(["%s"] * len(target_dates))
+    await cursor.execute(
+        f"SELECT h.number_value, h.draw_date_target "
+        f"FROM hybride_selection_history h "
+        f"INNER JOIN ("
+        f"    SELECT draw_date_target, MIN(selected_at) AS first_ts, "
+        f"           MIN(grid_id) AS first_grid_id "
+        f"    FROM hybride_selection_history "
+        f"    WHERE game = %s AND number_type = %s AND source = 'generator' "
+        f"    AND draw_date_target IN ({placeholders}) "
+        f"    GROUP BY draw_date_target"
+        f") f ON h.draw_date_target = f.draw_date_target "
+        f"WHERE h.game = %s AND h.number_type = %s AND h.source = 'generator' "
+        f"AND h.selected_at >= f.first_ts "
+        f"AND h.selected_at < f.first_ts + INTERVAL 1 SECOND "
+        f"AND (f.first_grid_id IS NULL OR h.grid_id = f.first_grid_id)",
+        (game, number_type, *target_dates, game, number_type),
+    )
+    selections = await cursor.fetchall()
+
+    # Build brake map: iterate selections, apply min multiplier if collision
+    brake: dict[int, float] = {}
+    # Map target_date → tier index (0 = T-1, 1 = T-2, ...)
+    date_to_tier = {d: i for i, d in enumerate(target_dates)}
+    tier_multipliers = (t1_mult, t2_mult)
+    for sel in selections:
+        n = sel["number_value"]
+        tier = date_to_tier.get(sel["draw_date_target"])
+        if tier is None or tier >= len(tier_multipliers):
+            continue
+        mult = tier_multipliers[tier]
+        # Collision (number in both T-1 and T-2): keep the MIN (stronger brake)
+        if n in brake:
+            brake[n] = min(brake[n], mult)
+        else:
+            brake[n] = mult
+
+    return brake
+
+
 # ─────────────────────────────────────────────────────────────────────
 # MAINTENANCE — optional cleanup
 # ─────────────────────────────────────────────────────────────────────
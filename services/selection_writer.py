@@ -0,0 +1,160 @@
+"""
+Write-behind des grilles canoniques /generate (hybride_selection_history).
+
+V137.B enregistre TOUTES les grilles du batch : jusqu'à 10 grilles × (5 boules
++ 1-2 secondaires) INSERT IGNORE unitaires sur le chemin critique de chaque
+requête. Ici les lignes sont mises en file en mémoire (enqueue, sans I/O) et
+écrites par un flush périodique (_FLUSH_INTERVAL_S) ou dès _FLUSH_MAX_ROWS
+lignes en attente, en INSERT IGNORE multi-lignes (1 statement / chunk, 1 COMMIT).
+La latence /generate ne dépend plus de la latence d'écriture MySQL.
+
+Sémantique V137 conservée pour get_persistent_brake_map :
+    - grid_id   : 1 UUID v4 par grille, généré à l'enqueue (retourné à l'appelant)
+    - selected_at : horodatage de la requête, pas du flush — chaque ligne est
+      écrite avec NOW() - INTERVAL <âge en file> SECOND (horloge BDD, comme le
+      DEFAULT CURRENT_TIMESTAMP des écritures synchrones) ; âge en secondes
+      fractionnaires, l'ordre des requêtes est conservé au flush
+    - INSERT IGNORE + UNIQUE KEY : idempotence inchangée, 1er appelant gagne
+
+Après le flush de la 1ère grille d'une date cible, les brake maps V110 des
+tirages suivants sont matérialisées (services.brake_cache).
+
+Lifecycle : run_selection_writer() en tâche supervisée (lifespan main.py),
+flush_selection_writes() au shutdown AVANT close_pool.
+Échec d'écriture → lignes remises en file (retry au flush suivant), file bornée
+à _MAX_PENDING_ROWS (les plus récentes sont abandonnées au-delà : les grilles
+déjà retournées gardent leur 1er appelant gagnant).
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+
+from services.brake_cache import materialize_after_selection
+from services.selection_history import selection_numbers
+
+logger = logging.getLogger(__name__)
+
+_FLUSH_INTERVAL_S = 1.0
+_FLUSH_MAX_ROWS = 500       # seuil de flush anticipé + taille max d'un INSERT multi-lignes
+_MAX_PENDING_ROWS = 20_000  # BDD indisponible longtemps : borne mémoire
+
+_ROW_SQL = "(%s, %s, %s, %s, 'generator', %s, NOW() - INTERVAL %s SECOND)"
+
+
+class SelectionWriter:
+    """In-memory queue of selection rows flushed with multi-row INSERT IGNORE."""
+
+    def __init__(self, max_rows: int = _FLUSH_MAX_ROWS, max_pending: int = _MAX_PENDING_ROWS):
+        self.max_rows = max_rows
+        self.max_pending = max_pending
+        # (game, number_value, number_type, draw_date_target, grid_id, enqueued_at)
+        self._rows: list[tuple] = []
+        self._lock = asyncio.Lock()
+        self._flush_task: asyncio.Task | None = None
+        self._materialized: set[tuple] = set()  # (game, draw_date_target) already seen
+
+    @property
+    def pending(self) -> int:
+        return len(self._rows)
+
+    def enqueue(self, game: str, draw_date_target, selected_numbers: dict) -> str:
+        """Queue one canonical grid (no I/O). Returns its V137 grid_id."""
+        grid_id = str(uuid.uuid4())  # V137 — 1 UUID v4 par grille canonique
+        now = time.monotonic()
+        for ntype, n_int in selection_numbers(selected_numbers):
+            self._rows.append((game, n_int, ntype, draw_date_target, grid_id, now))
+        self._trim()
+        if len(self._rows) >= self.max_rows and (self._flush_task is None or self._flush_task.done()):
+            try:
+                self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+            except RuntimeError:
+                pass  # no running loop (scripts) — periodic / shutdown flush
+        return grid_id
+
+    def _trim(self) -> None:
+        overflow = len(self._rows) - self.max_pending
+        if overflow > 0:
+            del self._rows[self.max_pending:]
+            logger.warning("[CALENDAR] selection writer queue full — %d newest rows dropped", overflow)
+
+    async def flush(self, get_connection=None) -> int:
+        """Write all queued rows. Returns the number of rows written (0 on failure)."""
+        if get_connection is None:
+            from db_cloudsql import get_connection
+        async with self._lock:
+            if not self._rows:
+                return 0
+            rows, self._rows = self._rows, []
+            now = time.monotonic()
+            try:
+                async with get_connection() as conn:
+                    cursor = await conn.cursor()
+                    for i in range(0, len(rows), self.max_rows):
+                        chunk = rows[i:i + self.max_rows]
+                        params = []
+                        for game, n_int, ntype, target, grid_id, enqueued_at in chunk:
+                            params += [game, n_int, ntype, target, grid_id, round(now - enqueued_at, 6)]
+                        await cursor.execute(
+                            "INSERT IGNORE INTO hybride_selection_history "
+                            "(game, number_value, number_type, draw_date_target, source, grid_id, selected_at) "
+                            "VALUES " + ", ".join([_ROW_SQL] * len(chunk)),
+                            tuple(params),
+                        )
+                    await conn.commit()
+                    await self._materialize_brake_maps(conn, rows)
+            except Exception:
+                self._rows[:0] = rows
+                self._trim()
+                logger.warning(
+                    "[CALENDAR] selection writer flush failed — %d rows kept for retry",
+                    len(rows), exc_info=True,
+                )
+                return 0
+        logger.info(
+            "[CALENDAR] selection writer flushed %d rows (%d grids)",
+            len(rows), len({r[4] for r in rows}),
+        )
+        return len(rows)
+
+    async def _materialize_brake_maps(self, conn, rows: list[tuple]) -> None:
+        # 1ère écriture d'une date cible (pour cette instance) → brake maps des
+        # tirages suivants recalculées (services.brake_cache). Best-effort.
+        for game, target in {(r[0], r[3]) for r in rows} - self._materialized:
+            try:
+                await materialize_after_selection(conn, game, target)
+                self._materialized.add((game, target))
+            except Exception:
+                logger.warning("[BRAKE_CACHE] materialization failed for %s target=%s",
+                               game, target, exc_info=True)
+
+    async def run(self, interval: float = _FLUSH_INTERVAL_S) -> None:
+        """Periodic flush loop (supervised background task in main.py lifespan)."""
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    def clear(self) -> None:
+        self._rows.clear()
+        self._materialized.clear()
+
+
+_writer = SelectionWriter()
+
+
+def get_selection_writer() -> SelectionWriter:
+    return _writer
+
+
+def enqueue_canonical_selection(game: str, draw_date_target, selected_numbers: dict) -> str:
+    """Deferred record_canonical_selection: queue the grid, return its grid_id."""
+    return _writer.enqueue(game, draw_date_target, selected_numbers)
+
+
+async def flush_selection_writes(get_connection=None) -> int:
+    return await _writer.flush(get_connection)
+
+
+async def run_selection_writer() -> None:
+    await _writer.run()
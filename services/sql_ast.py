@@ -0,0 +1,933 @@
+"""
+Tokenizer + AST du sous-ensemble SQL lecture seule du chatbot (Phase SQL).
+
+Le SQL généré par Gemini était validé par regex (services.base_chat_sql) :
+mots interdits, tables après FROM/JOIN, premier LIMIT trouvé plafonné. Ce
+module parse le SQL en un petit AST pour les contrôles structurels :
+
+    - parse_sql()    : SELECT [DISTINCT] … FROM / JOIN / sous-requêtes, WHERE,
+                       GROUP BY, HAVING, ORDER BY, LIMIT, UNION ALL. Tout ce qui
+                       sort de la grammaire (commentaires, ';', variables @,
+                       UNION sans ALL, table qualifiée par un schéma…) lève
+                       SqlSyntaxError. AST mémorisé par texte SQL (FIFO).
+    - check_query()  : tables whitelistées, colonnes whitelistées (schéma
+                       DESCRIBE, alias de la requête), fonctions autorisées,
+                       nombre de SELECT borné.
+    - clamp_limit()  : LIMIT de la requête principale injecté ou plafonné en
+                       place (les LIMIT internes d'une sous-requête restent
+                       intacts : « 200 derniers tirages » garde son sens).
+    - normalize_sql(): forme canonique (casse, espaces, backticks, AS, !=)
+                       → requêtes équivalentes = même clé de cache.
+
+Les nœuds sont des dataclasses frozen (comparables, partageables via le memo).
+"""
+
+import re
+from dataclasses import dataclass, field, fields
+
+_MAXSIZE = 256
+_MAX_SELECTS = 10  # cf. base_chat_sql._validate_sql (unpivot EM = 8 SELECT)
+
+_parsed: dict[str, "Query"] = {}
+
+
+class SqlSyntaxError(ValueError):
+    """SQL hors du sous-ensemble lecture seule supporté."""
+
+
+# ────────────────────────────────────────────
+# Tokenizer
+# ────────────────────────────────────────────
+
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<num>\d+(?:\.\d+)?(?![\w.]))
+  | (?P<str>'(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*")
+  | (?P<qident>`[^`\s]+`)
+  | (?P<ident>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<op><=>|<=|>=|<>|!=|[=<>+\-*/%(),.])
+""", re.VERBOSE)
+
+_ESCAPE_RE = re.compile(r"\\(.)")
+
+_RESERVED = frozenset({
+    "ALL", "AND", "AS", "ASC", "BETWEEN", "BY", "CASE", "CROSS", "DESC", "DISTINCT",
+    "DIV", "ELSE", "END", "EXISTS", "FROM", "GROUP", "HAVING", "IN", "INNER", "INTERVAL",
+    "IS", "JOIN", "LEFT", "LIKE", "LIMIT", "NOT", "NULL", "OFFSET", "ON", "OR", "ORDER",
+    "OUTER", "REGEXP", "RIGHT", "RLIKE", "SELECT", "THEN", "UNION", "WHEN", "WHERE", "XOR",
+})
+
+_INTERVAL_UNITS = frozenset({"DAY", "WEEK", "MONTH", "QUARTER", "YEAR"})
+
+
+@dataclass(frozen=True, slots=True)
+class Token:
+    kind: str       # num | str | ident | qident | op | eof
+    value: str      # str: valeur décodée, qident: sans backticks
+    start: int
+    end: int
+
+    def is_kw(self, *words: str) -> bool:
+        return self.kind == "ident" and self.value.upper() in words
+
+    def is_op(self, *ops: str) -> bool:
+        return self.kind == "op" and self.value in ops
+
+
+def tokenize(sql: str) -> list[Token]:
+    tokens: list[Token] = []
+    pos, n = 0, len(sql)
+    while pos < n:
+        m = _TOKEN_RE.match(sql, pos)
+        if m is None:
+            raise SqlSyntaxError(f"unexpected character {sql[pos]!r} at {pos}")
+        kind, text = m.lastgroup, m.group()
+        if kind == "op" and sql.startswith(("--", "/*"), pos):
+            raise SqlSyntaxError(f"comment at {pos}")
+        if kind == "str":
+            quote = text[0]
+            text = _ESCAPE_RE.sub(r"\1", text[1:-1].replace(quote * 2, quote))
+        elif kind == "qident":
+            text = text[1:-1]
+        if kind != "ws":
+            tokens.append(Token(kind, text, m.start(), m.end()))
+        pos = m.end()
+    tokens.append(Token("eof", "", n, n))
+    return tokens
+
+
+# ────────────────────────────────────────────
+# AST
+# ────────────────────────────────────────────
+
+class Node:
+    __slots__ = ()
+
+
+@dataclass(frozen=True)
+class Literal(Node):
+    value: str | None
+    kind: str                   # num | str | null | bool
+
+
+@dataclass(frozen=True)
+class Column(Node):
+    name: str
+    table: str | None = None
+
+
+@dataclass(frozen=True)
+class Star(Node):
+    table: str | None = None
+
+
+@dataclass(frozen=True)
+class OrderItem(Node):
+    expr: Node
+    desc: bool = False
+
+
+@dataclass(frozen=True)
+class Func(Node):
+    name: str                   # majuscules
+    args: tuple = ()
+    distinct: bool = False
+    order_by: tuple = ()        # GROUP_CONCAT(… ORDER BY …)
+    separator: str | None = None
+    over: tuple | None = None   # (partition exprs, order items) — fonction fenêtre
+
+
+@dataclass(frozen=True)
+class Interval(Node):
+    expr: Node
+    unit: str
+
+
+@dataclass(frozen=True)
+class Cast(Node):
+    expr: Node
+    type: str
+
+
+@dataclass(frozen=True)
+class Extract(Node):
+    unit: str
+    expr: Node
+
+
+@dataclass(frozen=True)
+class TimestampDiff(Node):
+    unit: str
+    start: Node
+    end: Node
+
+
+@dataclass(frozen=True)
+class Unary(Node):
+    op: str                     # - | NOT
+    operand: Node
+
+
+@dataclass(frozen=True)
+class Binary(Node):
+    op: str                     # OR XOR AND = <> < > <= >= <=> LIKE REGEXP + - * / % DIV MOD
+    left: Node
+    right: Node
+
+
+@dataclass(frozen=True)
+class InList(Node):
+    expr: Node
+    items: tuple                # expressions, ou (Query,) pour IN (SELECT …)
+    negated: bool = False
+
+
+@dataclass(frozen=True)
+class Between(Node):
+    expr: Node
+    low: Node
+    high: Node
+    negated: bool = False
+
+
+@dataclass(frozen=True)
+class IsNull(Node):
+    expr: Node
+    negated: bool = False
+
+
+@dataclass(frozen=True)
+class Case(Node):
+    operand: Node | None
+    whens: tuple                # ((condition, résultat), …)
+    default: Node | None = None
+
+
+@dataclass(frozen=True)
+class Row(Node):
+    items: tuple                # (a, b) = (1, 2)
+
+
+@dataclass(frozen=True)
+class Subquery(Node):
+    query: "Query"
+
+
+@dataclass(frozen=True)
+class Exists(Node):
+    query: "Query"
+
+
+@dataclass(frozen=True)
+class SelectItem(Node):
+    expr: Node
+    alias: str | None = None
+    text: str = field(default="", compare=False)   # SQL source de l'expression
+
+    @property
+    def name(self) -> str:
+        """Nom de colonne du résultat (clé DictCursor) : alias, colonne, ou texte source."""
+        if self.alias:
+            return self.alias
+        if isinstance(self.expr, Column):
+            return self.expr.name
+        return self.text
+
+
+@dataclass(frozen=True)
+class TableRef(Node):
+    name: str
+    alias: str | None = None
+
+
+@dataclass(frozen=True)
+class Derived(Node):
+    query: "Query"
+    alias: str | None = None
+
+
+@dataclass(frozen=True)
+class Join(Node):
+    left: Node
+    right: Node
+    kind: str                   # JOIN | LEFT JOIN | RIGHT JOIN | CROSS JOIN
+    on: Node | None = None
+
+
+@dataclass(frozen=True)
+class Limit(Node):
+    count: int
+    offset: int | None = None
+    span: tuple = field(default=(0, 0), compare=False)   # position de `count` dans le SQL
+
+
+@dataclass(frozen=True)
+class Select(Node):
+    items: tuple
+    from_: tuple = ()
+    where: Node | None = None
+    group_by: tuple = ()
+    having: Node | None = None
+    distinct: bool = False
+
+
+@dataclass(frozen=True)
+class Query(Node):
+    terms: tuple                # Select | Query, reliés par UNION ALL
+    order_by: tuple = ()
+    limit: Limit | None = None
+    end: int = field(default=0, compare=False)          # fin de la requête dans le SQL
+
+
+def walk(node):
+    """Tous les nœuds de l'arbre (pré-ordre)."""
+    stack = [node]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, Node):
+            yield value
+            stack.extend(getattr(value, f.name) for f in fields(value))
+        elif isinstance(value, tuple):
+            stack.extend(value)
+
+
+# ────────────────────────────────────────────
+# Parser (descente récursive)
+# ────────────────────────────────────────────
+
+_COMPARISONS = ("=", "<>", "!=", "<", ">", "<=", ">=", "<=>")
+
+
+class _Parser:
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.tokens = tokenize(sql)
+        self.pos = 0
+
+    # ── helpers ──
+
+    @property
+    def tok(self) -> Token:
+        return self.tokens[self.pos]
+
+    def peek(self, offset: int = 1) -> Token:
+        return self.tokens[min(self.pos + offset, len(self.tokens) - 1)]
+
+    def advance(self) -> Token:
+        tok = self.tok
+        self.pos += 1
+        return tok
+
+    def error(self, expected: str) -> SqlSyntaxError:
+        tok = self.tok
+        return SqlSyntaxError(f"expected {expected} at {tok.start}, got {tok.value or 'end'!r}")
+
+    def accept_kw(self, *words: str) -> bool:
+        if self.tok.is_kw(*words):
+            self.pos += 1
+            return True
+        return False
+
+    def expect_kw(self, word: str) -> None:
+        if not self.accept_kw(word):
+            raise self.error(word)
+
+    def accept_op(self, op: str) -> bool:
+        if self.tok.is_op(op):
+            self.pos += 1
+            return True
+        return False
+
+    def expect_op(self, op: str) -> None:
+        if not self.accept_op(op):
+            raise self.error(repr(op))
+
+    def identifier(self) -> str:
+        tok = self.tok
+        if tok.kind == "qident" or (tok.kind == "ident" and tok.value.upper() not in _RESERVED):
+            self.pos += 1
+            return tok.value
+        raise self.error("identifier")
+
+    def integer(self) -> tuple[int, Token]:
+        tok = self.tok
+        if tok.kind != "num" or not tok.value.isdigit():
+            raise self.error("integer")
+        self.pos += 1
+        return int(tok.value), tok
+
+    def alias(self) -> str | None:
+        if self.accept_kw("AS"):
+            if self.tok.kind == "str":
+                return self.advance().value
+            return self.identifier()
+        tok = self.tok
+        if tok.kind == "qident" or (tok.kind == "ident" and tok.value.upper() not in _RESERVED):
+            self.pos += 1
+            return tok.value
+        return None
+
+    # ── requêtes ──
+
+    def parse(self) -> "Query":
+        query = self.query()
+        if self.tok.kind != "eof":
+            raise self.error("end of statement")
+        return query
+
+    def query(self) -> Query:
+        terms = [self.query_term()]
+        while self.accept_kw("UNION"):
+            if not self.accept_kw("ALL"):
+                raise self.error("ALL after UNION")
+            terms.append(self.query_term())
+        order_by = self.order_by() if self.tok.is_kw("ORDER") else ()
+        limit = self.limit() if self.tok.is_kw("LIMIT") else None
+        return Query(tuple(terms), order_by, limit, end=self.tokens[self.pos - 1].end)
+
+    def query_term(self) -> Node:
+        if self.accept_op("("):
+            query = self.query()
+            self.expect_op(")")
+            return query
+        return self.select()
+
+    def select(self) -> Select:
+        self.expect_kw("SELECT")
+        distinct = self.accept_kw("DISTINCT")
+        if not distinct:
+            self.accept_kw("ALL")
+        items = [self.select_item()]
+        while self.accept_op(","):
+            items.append(self.select_item())
+        from_ = ()
+        if self.accept_kw("FROM"):
+            sources = [self.table_source()]
+            while self.accept_op(","):
+                sources.append(self.table_source())
+            from_ = tuple(sources)
+        where = self.expr() if self.accept_kw("WHERE") else None
+        group_by = ()
+        if self.accept_kw("GROUP"):
+            self.expect_kw("BY")
+            group_by = self.expr_list()
+        having = self.expr() if self.accept_kw("HAVING") else None
+        return Select(tuple(items), from_, where, group_by, having, distinct)
+
+    def select_item(self) -> SelectItem:
+        start = self.tok.start
+        if self.accept_op("*"):
+            return SelectItem(Star(), text="*")
+        expr = self.expr()
+        text = self.sql[start:self.tokens[self.pos - 1].end]
+        return SelectItem(expr, self.alias(), text)
+
+    def table_source(self) -> Node:
+        source = self.table_primary()
+        while True:
+            if self.tok.is_kw("JOIN", "INNER"):
+                if self.accept_kw("INNER"):
+                    self.expect_kw("JOIN")
+                else:
+                    self.pos += 1
+                kind = "JOIN"
+            elif self.tok.is_kw("LEFT", "RIGHT"):
+                kind = self.advance().value.upper() + " JOIN"
+                self.accept_kw("OUTER")
+                self.expect_kw("JOIN")
+            elif self.accept_kw("CROSS"):
+                self.expect_kw("JOIN")
+                kind = "CROSS JOIN"
+            else:
+                return source
+            right = self.table_primary()
+            on = self.expr() if kind != "CROSS JOIN" and self.accept_kw("ON") else None
+            if kind != "CROSS JOIN" and on is None:
+                raise self.error("ON")
+            source = Join(source, right, kind, on)
+
+    def table_primary(self) -> Node:
+        if self.accept_op("("):
+            if not (self.tok.is_kw("SELECT") or self.tok.is_op("(")):
+                raise self.error("subquery")
+            query = self.query()
+            self.expect_op(")")
+            return Derived(query, self.alias())
+        name = self.identifier()
+        if self.tok.is_op("."):
+            raise SqlSyntaxError(f"schema-qualified table {name}.{self.peek().value}")
+        return TableRef(name, self.alias())
+
+    def order_by(self) -> tuple:
+        self.expect_kw("ORDER")
+        self.expect_kw("BY")
+        items = []
+        while True:
+            expr = self.expr()
+            desc = self.accept_kw("DESC")
+            if not desc:
+                self.accept_kw("ASC")
+            items.append(OrderItem(expr, desc))
+            if not self.accept_op(","):
+                return tuple(items)
+
+    def limit(self) -> Limit:
+        self.expect_kw("LIMIT")
+        first, tok = self.integer()
+        if self.accept_op(","):
+            count, count_tok = self.integer()
+            return Limit(count, first, (count_tok.start, count_tok.end))
+        offset = self.integer()[0] if self.accept_kw("OFFSET") else None
+        return Limit(first, offset, (tok.start, tok.end))
+
+    # ── expressions ──
+
+    def expr_list(self) -> tuple:
+        items = [self.expr()]
+        while self.accept_op(","):
+            items.append(self.expr())
+        return tuple(items)
+
+    def expr(self) -> Node:
+        return self.binary_level(0)
+
+    _LEVELS = (("OR",), ("XOR",), ("AND",))
+
+    def binary_level(self, level: int) -> Node:
+        if level == len(self._LEVELS):
+            return self.negation()
+        left = self.binary_level(level + 1)
+        while self.tok.is_kw(*self._LEVELS[level]):
+            op = self.advance().value.upper()
+            left = Binary(op, left, self.binary_level(level + 1))
+        return left
+
+    def negation(self) -> Node:
+        if self.accept_kw("NOT"):
+            return Unary("NOT", self.negation())
+        return self.predicate()
+
+    def predicate(self) -> Node:
+        left = self.additive()
+        tok = self.tok
+        if tok.is_op(*_COMPARISONS):
+            self.pos += 1
+            op = "<>" if tok.value == "!=" else tok.value
+            return Binary(op, left, self.additive())
+        if tok.is_kw("IS"):
+            self.pos += 1
+            negated = self.accept_kw("NOT")
+            self.expect_kw("NULL")
+            return IsNull(left, negated)
+        negated = self.accept_kw("NOT")
+        if self.accept_kw("IN"):
+            self.expect_op("(")
+            if self.tok.is_kw("SELECT"):
+                items = (self.query(),)
+            else:
+                items = self.expr_list()
+            self.expect_op(")")
+            return InList(left, items, negated)
+        if self.accept_kw("BETWEEN"):
+            low = self.additive()
+            self.expect_kw("AND")
+            return Between(left, low, self.additive(), negated)
+        if self.tok.is_kw("LIKE", "REGEXP", "RLIKE"):
+            op = "LIKE" if self.advance().value.upper() == "LIKE" else "REGEXP"
+            node = Binary(op, left, self.additive())
+            return Unary("NOT", node) if negated else node
+        if negated:
+            raise self.error("IN, BETWEEN, LIKE or REGEXP after NOT")
+        return left
+
+    def additive(self) -> Node:
+        left = self.multiplicative()
+        while self.tok.is_op("+", "-"):
+            op = self.advance().value
+            left = Binary(op, left, self.multiplicative())
+        return left
+
+    def multiplicative(self) -> Node:
+        left = self.unary()
+        while self.tok.is_op("*", "/", "%") or (self.tok.is_kw("DIV", "MOD") and not self.peek().is_op("(")):
+            op = self.advance().value.upper()
+            left = Binary(op, left, self.unary())
+        return left
+
+    def unary(self) -> Node:
+        if self.accept_op("-"):
+            return Unary("-", self.unary())
+        if self.accept_op("+"):
+            return self.unary()
+        return self.primary()
+
+    def primary(self) -> Node:
+        tok = self.tok
+        if tok.kind == "num":
+            self.pos += 1
+            return Literal(tok.value, "num")
+        if tok.kind == "str":
+            self.pos += 1
+            return Literal(tok.value, "str")
+        if tok.is_op("("):
+            self.pos += 1
+            if self.tok.is_kw("SELECT"):
+                node = Subquery(self.query())
+            else:
+                node = self.expr()
+                if self.tok.is_op(","):
+                    self.pos += 1
+                    node = Row((node,) + self.expr_list())
+            self.expect_op(")")
+            return node
+        if tok.kind == "qident":
+            return self.column_ref()
+        if tok.kind != "ident":
+            raise self.error("expression")
+        word = tok.value.upper()
+        if word == "NULL":
+            self.pos += 1
+            return Literal(None, "null")
+        if word in ("TRUE", "FALSE"):
+            self.pos += 1
+            return Literal(word, "bool")
+        if word == "EXISTS":
+            self.pos += 1
+            self.expect_op("(")
+            query = self.query()
+            self.expect_op(")")
+            return Exists(query)
+        if word == "CASE":
+            return self.case()
+        if word == "INTERVAL":
+            self.pos += 1
+            expr = self.additive()
+            return Interval(expr, self.interval_unit())
+        if word in ("CURRENT_DATE", "CURRENT_TIMESTAMP") and not self.peek().is_op("("):
+            self.pos += 1
+            return Func(word)
+        if self.peek().is_op("(") and word not in _RESERVED:
+            return self.function()
+        return self.column_ref()
+
+    def interval_unit(self) -> str:
+        tok = self.tok
+        if tok.kind != "ident" or tok.value.upper() not in _INTERVAL_UNITS:
+            raise self.error("interval unit")
+        self.pos += 1
+        return tok.value.upper()
+
+    def column_ref(self) -> Node:
+        name = self.identifier()
+        if self.accept_op("."):
+            if self.accept_op("*"):
+                return Star(name)
+            return Column(self.identifier(), name)
+        return Column(name)
+
+    def case(self) -> Case:
+        self.expect_kw("CASE")
+        operand = None if self.tok.is_kw("WHEN") else self.expr()
+        whens = []
+        while self.accept_kw("WHEN"):
+            cond = self.expr()
+            self.expect_kw("THEN")
+            whens.append((cond, self.expr()))
+        if not whens:
+            raise self.error("WHEN")
+        default = self.expr() if self.accept_kw("ELSE") else None
+        self.expect_kw("END")
+        return Case(operand, tuple(whens), default)
+
+    def function(self) -> Node:
+        name = self.advance().value.upper()
+        self.expect_op("(")
+        if name == "CAST":
+            expr = self.expr()
+            self.expect_kw("AS")
+            type_ = self.advance().value.upper()
+            if self.accept_op("("):
+                type_ += f"({self.integer()[0]})"
+                self.expect_op(")")
+            self.expect_op(")")
+            return Cast(expr, type_)
+        if name == "EXTRACT":
+            unit = self.interval_unit()
+            self.expect_kw("FROM")
+            expr = self.expr()
+            self.expect_op(")")
+            return Extract(unit, expr)
+        if name == "TIMESTAMPDIFF":
+            unit = self.interval_unit()
+            self.expect_op(",")
+            start = self.expr()
+            self.expect_op(",")
+            end = self.expr()
+            self.expect_op(")")
+            return TimestampDiff(unit, start, end)
+        distinct = self.accept_kw("DISTINCT")
+        args: tuple = ()
+        if self.accept_op("*"):
+            args = (Star(),)
+        elif not self.tok.is_op(")"):
+            args = self.expr_list()
+        order_by = self.order_by() if self.tok.is_kw("ORDER") else ()
+        separator = None
+        if self.tok.is_kw("SEPARATOR") and self.peek().kind == "str":
+            self.pos += 1
+            separator = self.advance().value
+        self.expect_op(")")
+        over = None
+        if self.tok.is_kw("OVER") and self.peek().is_op("("):
+            self.pos += 2
+            partition = ()
+            if self.accept_kw("PARTITION"):
+                self.expect_kw("BY")
+                partition = self.expr_list()
+            window_order = self.order_by() if self.tok.is_kw("ORDER") else ()
+            self.expect_op(")")
+            over = (partition, window_order)
+        return Func(name, args, distinct, order_by, separator, over)
+
+
+def parse_sql(sql: str) -> Query:
+    """AST du SQL (mémorisé par texte). Lève SqlSyntaxError hors sous-ensemble."""
+    query = _parsed.get(sql)
+    if query is None:
+        query = _Parser(sql).parse()
+        if len(_parsed) >= _MAXSIZE:
+            # FIFO : les entrées les plus anciennes partent en premier
+            for k in list(_parsed)[:_MAXSIZE // 4]:
+                del _parsed[k]
+        _parsed[sql] = query
+    return query
+
+
+def clear_parsed() -> None:
+    _parsed.clear()
+
+
+# ────────────────────────────────────────────
+# Validation
+# ────────────────────────────────────────────
+
+_FUNCTIONS = frozenset({
+    # agrégats
+    "COUNT", "SUM", "MIN", "MAX", "AVG", "GROUP_CONCAT",
+    "STD", "STDDEV", "STDDEV_POP", "STDDEV_SAMP", "VARIANCE", "VAR_POP", "VAR_SAMP",
+    # fenêtre
+    "ROW_NUMBER", "RANK", "DENSE_RANK", "LAG", "LEAD",
+    # numériques
+    "ROUND", "ABS", "FLOOR", "CEIL", "CEILING", "MOD", "GREATEST", "LEAST", "TRUNCATE",
+    # conditionnelles
+    "COALESCE", "IFNULL", "NULLIF", "IF",
+    # dates
+    "YEAR", "MONTH", "DAY", "DAYOFMONTH", "DAYOFWEEK", "DAYOFYEAR", "DAYNAME",
+    "MONTHNAME", "WEEK", "WEEKDAY", "WEEKOFYEAR", "QUARTER", "DATE", "CURDATE",
+    "CURRENT_DATE", "CURRENT_TIMESTAMP", "NOW", "DATE_SUB", "DATE_ADD", "DATEDIFF",
+    "DATE_FORMAT", "LAST_DAY", "STR_TO_DATE",
+    # chaînes
+    "CONCAT", "CONCAT_WS", "LOWER", "UPPER", "LENGTH", "SUBSTRING", "SUBSTR",
+})
+
+
+def check_query(query: Query, *, allowed_tables: frozenset[str],
+                allowed_columns: frozenset[str] | set[str] | None = None) -> str | None:
+    """Raison du rejet, None si la requête reste dans le sous-ensemble autorisé.
+
+    allowed_columns vide / None : colonnes non vérifiées (schéma pas encore lu).
+    Les alias définis dans la requête (SELECT, tables dérivées) sont acceptés
+    comme colonnes ; les qualifieurs doivent désigner une table ou un alias.
+    """
+    nodes = list(walk(query))
+    allowed = {t.lower() for t in allowed_tables}
+    qualifiers: set[str] = set()
+    aliases: set[str] = set()
+    selects = 0
+    for node in nodes:
+        if isinstance(node, TableRef):
+            if node.name.lower() not in allowed:
+                return f"table {node.name}"
+            qualifiers.add(node.name.lower())
+            if node.alias:
+                qualifiers.add(node.alias.lower())
+        elif isinstance(node, Derived) and node.alias:
+            qualifiers.add(node.alias.lower())
+        elif isinstance(node, SelectItem) and node.alias:
+            aliases.add(node.alias.lower())
+        elif isinstance(node, Func) and node.name not in _FUNCTIONS:
+            return f"function {node.name}"
+        elif isinstance(node, Select):
+            selects += 1
+    if selects > _MAX_SELECTS:
+        return f"{selects} SELECT"
+    for node in nodes:
+        if isinstance(node, (Column, Star)) and node.table and node.table.lower() not in qualifiers:
+            return f"qualifier {node.table}"
+        if isinstance(node, Column) and allowed_columns:
+            name = node.name.lower()
+            if name not in allowed_columns and name not in aliases:
+                return f"column {node.name}"
+    return None
+
+
+# ────────────────────────────────────────────
+# LIMIT structurel
+# ────────────────────────────────────────────
+
+def clamp_limit(sql: str, max_limit: int) -> str:
+    """LIMIT de la requête principale : ajouté si absent, plafonné à max_limit.
+
+    Édition en place du texte (le reste du SQL est conservé tel quel).
+    Lève SqlSyntaxError si le SQL ne parse pas.
+    """
+    query = parse_sql(sql)
+    if query.limit is None:
+        return sql[:query.end] + f" LIMIT {max_limit}"
+    if query.limit.count > max_limit:
+        start, end = query.limit.span
+        return sql[:start] + str(max_limit) + sql[end:]
+    return sql
+
+
+# ────────────────────────────────────────────
+# Forme canonique
+# ────────────────────────────────────────────
+
+_PRECEDENCE = {
+    "OR": 1, "XOR": 2, "AND": 3, "NOT": 4,
+    "=": 5, "<>": 5, "<": 5, ">": 5, "<=": 5, ">=": 5, "<=>": 5, "LIKE": 5, "REGEXP": 5,
+    "+": 6, "-": 6, "*": 7, "/": 7, "%": 7, "DIV": 7, "MOD": 7,
+}
+
+
+def _prec(node: Node) -> int:
+    if isinstance(node, Binary):
+        return _PRECEDENCE[node.op]
+    if isinstance(node, Unary):
+        return 4 if node.op == "NOT" else 8
+    if isinstance(node, (InList, Between, IsNull)):
+        return 5
+    return 9
+
+
+def _wrap(node: Node, parent: int) -> str:
+    text = to_sql(node)
+    return f"({text})" if _prec(node) < parent else text
+
+
+def _ident(name: str) -> str:
+    return name.lower()
+
+
+def _list(nodes) -> str:
+    return ", ".join(to_sql(n) for n in nodes)
+
+
+def _order(items) -> str:
+    return ", ".join(to_sql(i.expr) + (" DESC" if i.desc else "") for i in items)
+
+
+def to_sql(node: Node) -> str:
+    """Rendu canonique d'un nœud."""
+    if isinstance(node, Query):
+        parts = [f"({to_sql(t)})" if isinstance(t, Query) else to_sql(t) for t in node.terms]
+        text = " UNION ALL ".join(parts)
+        if node.order_by:
+            text += " ORDER BY " + _order(node.order_by)
+        if node.limit is not None:
+            text += f" LIMIT {node.limit.count}"
+            if node.limit.offset:
+                text += f" OFFSET {node.limit.offset}"
+        return text
+    if isinstance(node, Select):
+        text = "SELECT " + ("DISTINCT " if node.distinct else "") + _list(node.items)
+        if node.from_:
+            text += " FROM " + _list(node.from_)
+        if node.where is not None:
+            text += " WHERE " + to_sql(node.where)
+        if node.group_by:
+            text += " GROUP BY " + _list(node.group_by)
+        if node.having is not None:
+            text += " HAVING " + to_sql(node.having)
+        return text
+    if isinstance(node, SelectItem):
+        return to_sql(node.expr) + (f" AS {_ident(node.alias)}" if node.alias else "")
+    if isinstance(node, TableRef):
+        return _ident(node.name) + (f" AS {_ident(node.alias)}" if node.alias else "")
+    if isinstance(node, Derived):
+        return f"({to_sql(node.query)})" + (f" AS {_ident(node.alias)}" if node.alias else "")
+    if isinstance(node, Join):
+        text = f"{to_sql(node.left)} {node.kind} {to_sql(node.right)}"
+        return text + (f" ON {to_sql(node.on)}" if node.on is not None else "")
+    if isinstance(node, Literal):
+        if node.kind == "str":
+            return "'" + node.value.replace("\\", "\\\\").replace("'", "''") + "'"
+        return "NULL" if node.kind == "null" else node.value.upper()
+    if isinstance(node, Column):
+        return (f"{_ident(node.table)}." if node.table else "") + _ident(node.name)
+    if isinstance(node, Star):
+        return f"{_ident(node.table)}.*" if node.table else "*"
+    if isinstance(node, Func):
+        text = node.name + "(" + ("DISTINCT " if node.distinct else "") + _list(node.args)
+        if node.order_by:
+            text += " ORDER BY " + _order(node.order_by)
+        if node.separator is not None:
+            text += " SEPARATOR " + to_sql(Literal(node.separator, "str"))
+        text += ")"
+        if node.over is not None:
+            partition, window_order = node.over
+            window = []
+            if partition:
+                window.append("PARTITION BY " + _list(partition))
+            if window_order:
+                window.append("ORDER BY " + _order(window_order))
+            text += " OVER (" + " ".join(window) + ")"
+        return text
+    if isinstance(node, Interval):
+        return f"INTERVAL {_wrap(node.expr, 6)} {node.unit}"
+    if isinstance(node, Cast):
+        return f"CAST({to_sql(node.expr)} AS {node.type})"
+    if isinstance(node, Extract):
+        return f"EXTRACT({node.unit} FROM {to_sql(node.expr)})"
+    if isinstance(node, TimestampDiff):
+        return f"TIMESTAMPDIFF({node.unit}, {to_sql(node.start)}, {to_sql(node.end)})"
+    if isinstance(node, Unary):
+        if node.op == "NOT":
+            return "NOT " + _wrap(node.operand, 4)
+        return "-" + _wrap(node.operand, 8)
+    if isinstance(node, Binary):
+        prec = _PRECEDENCE[node.op]
+        # gauche associatif : à droite, même précédence → parenthèses
+        return f"{_wrap(node.left, prec)} {node.op} {_wrap(node.right, prec + 1)}"
+    if isinstance(node, InList):
+        items = to_sql(node.items[0]) if isinstance(node.items[0], Query) else _list(node.items)
+        return f"{_wrap(node.expr, 6)} {'NOT ' if node.negated else ''}IN ({items})"
+    if isinstance(node, Between):
+        return (f"{_wrap(node.expr, 6)} {'NOT ' if node.negated else ''}BETWEEN "
+                f"{_wrap(node.low, 6)} AND {_wrap(node.high, 6)}")
+    if isinstance(node, IsNull):
+        return f"{_wrap(node.expr, 6)} IS {'NOT ' if node.negated else ''}NULL"
+    if isinstance(node, Case):
+        text = "CASE" + (f" {to_sql(node.operand)}" if node.operand is not None else "")
+        for cond, result in node.whens:
+            text += f" WHEN {to_sql(cond)} THEN {to_sql(result)}"
+        if node.default is not None:
+            text += f" ELSE {to_sql(node.default)}"
+        return text + " END"
+    if isinstance(node, Row):
+        return f"({_list(node.items)})"
+    if isinstance(node, Subquery):
+        return f"({to_sql(node.query)})"
+    if isinstance(node, Exists):
+        return f"EXISTS ({to_sql(node.query)})"
+    raise TypeError(f"unsupported node {type(node).__name__}")
+
+
+def normalize_sql(sql: str) -> str:
+    """Forme canonique du SQL (clé de cache) ; espaces compactés s'il ne parse pas."""
+    try:
+        return to_sql(parse_sql(sql))
+    except SqlSyntaxError:
+        return " ".join(sql.split())
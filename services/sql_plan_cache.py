@@ -0,0 +1,226 @@
+"""
+Cache de plans Text-to-SQL (Phase SQL du chatbot).
+
+run_text_to_sql payait pour chaque question « data » un aller-retour Gemini
+(prompt générateur SQL ~20 KB, T=0 donc déterministe) puis l'exécution du SQL.
+
+Plans — la question normalisée (services.gemini_cache.normalize_message) est
+réduite à une signature où dates et nombres (numéros, années, top-N…) sont des
+slots typés par leur nombre de chiffres :
+    "top 5 des numeros en 2023"  →  "top {n1} des numeros en {n4}"  + (5, 2023)
+Le SQL validé est stocké sous (jeu, langue, date du jour, signature) comme
+template : chaque valeur de slot est remplacée dans le SQL (token entier) par
+son placeholder.
+    - mêmes valeurs     → SQL d'origine, sans appel LLM ;
+    - autres valeurs    → template instancié, SEULEMENT si le template a été
+      vérifié : une 1re variante structurelle passe par le LLM et son SQL doit
+      être identique au template instancié (sinon le template est remplacé).
+      Une valeur de slot présente par coïncidence dans le SQL (LIMIT 10 et
+      « numéro 10 ») ne peut donc pas produire un SQL faux.
+Seules les questions sans historique sont concernées (le générateur résout les
+questions de suivi avec les 6 derniers messages). La date du jour fait partie
+de la clé ({TODAY} du prompt : « 30 derniers jours » → dates littérales).
+
+Résultats — les lignes du SQL (lecture seule) sont mémorisées par
+(jeu, draw_version, SQL normalisé — services.sql_ast.normalize_sql : casse,
+espaces, backticks, alias AS) : valides jusqu'au tirage suivant, purgées par le
+listener new-draw. Store non chargé (version inconnue) → pas de cache résultat.
+
+Rapport : plan_hits / result_hits / misses et latence économisée (moyenne
+glissante des générations et exécutions réelles), reportés dans chat_log
+(colonnes sql_cache, sql_saved_ms).
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import date
+
+from services.draw_store import register_new_draw_listener
+from services.gemini_cache import normalize_message
+from services.sql_ast import normalize_sql
+
+_PLAN_MAXSIZE = 512
+_RESULT_MAXSIZE = 256
+_EMA_ALPHA = 0.2
+
+# dd/mm/yyyy, dd-mm-yyyy, yyyy-mm-dd (avant normalisation : "/" et "-" y sont retirés)
+_DATE_RE = re.compile(r"\b(?:(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})|(\d{4})-(\d{2})-(\d{2}))\b")
+_NUMBER_RE = re.compile(r"\b\d{1,4}\b")
+_PLACEHOLDER_RE = re.compile(r"\{([dn])(\d+)\}")
+
+
+def templatize(question: str) -> tuple[str, tuple[str, ...]]:
+    """(signature, slot values) of a question.
+
+    Dates → ISO 'yyyy-mm-dd' slots {d}, numbers → slots {nK} (K = digits).
+    """
+    values: list[str] = []
+
+    def _date(m: re.Match) -> str:
+        if m.group(1):
+            d, mo, y = int(m.group(1)), int(m.group(2)), m.group(3)
+        else:
+            y, mo, d = m.group(4), int(m.group(5)), int(m.group(6))
+        values.append(f"{y}-{mo:02d}-{d:02d}")
+        return " {d} "
+
+    def _number(m: re.Match) -> str:
+        values.append(m.group(0))
+        return "{n%d}" % len(m.group(0))
+
+    text = _DATE_RE.sub(_date, question)
+    text = " ".join(normalize_message(part) if not part.startswith("{") else part
+                    for part in re.split(r"(\{d\})", text))
+    text = _NUMBER_RE.sub(_number, text)
+    return " ".join(text.split()), tuple(values)
+
+
+def _slot_re(value: str) -> re.Pattern:
+    return re.compile(r"(?<![\w-])" + re.escape(value) + r"(?![\w-])") if "-" in value \
+        else re.compile(r"\b" + re.escape(value) + r"\b")
+
+
+def make_template(sql: str, values: tuple[str, ...]) -> str | None:
+    """SQL with each slot value replaced by {d<i>}/{n<i>} (i = slot index).
+    None when two slots share a value (ambiguous) or SQL holds braces."""
+    if "{" in sql or "}" in sql or len(set(values)) != len(values):
+        return None
+    # longest values first: '2023' before '23', dates before their year
+    for i in sorted(range(len(values)), key=lambda i: -len(values[i])):
+        kind = "d" if "-" in values[i] else "n"
+        sql = _slot_re(values[i]).sub("{%s%d}" % (kind, i), sql)
+    return sql
+
+
+def instantiate(template: str, values: tuple[str, ...]) -> str:
+    return _PLACEHOLDER_RE.sub(lambda m: values[int(m.group(2))], template)
+
+
+@dataclass
+class _Plan:
+    sql: str                    # SQL of `values`
+    values: tuple[str, ...]
+    template: str | None        # None: exact-match only
+    verified: bool = False
+
+
+class SqlPlanCache:
+    """Plans (question signature → SQL template) + draw-versioned SQL results."""
+
+    def __init__(self, plan_maxsize: int = _PLAN_MAXSIZE, result_maxsize: int = _RESULT_MAXSIZE):
+        self._plans: dict[tuple, _Plan] = {}
+        self._results: dict[tuple, list] = {}
+        self._plan_maxsize = plan_maxsize
+        self._result_maxsize = result_maxsize
+        self._gen_ms: float | None = None      # EMA of real SQL generations
+        self._exec_ms: float | None = None     # EMA of real SQL executions
+        self.plan_hits = 0
+        self.result_hits = 0
+        self.misses = 0
+        self.saved_ms = 0
+
+    @staticmethod
+    def _evict(store: dict, maxsize: int) -> None:
+        if len(store) >= maxsize:
+            # FIFO : les entrées les plus anciennes partent en premier
+            for k in list(store)[:maxsize // 4 or 1]:
+                del store[k]
+
+    @staticmethod
+    def _key(game: str, lang: str, signature: str) -> tuple:
+        return (game, lang, date.today().isoformat(), signature)
+
+    # ── Plans ──
+
+    def lookup_plan(self, game: str, lang: str, question: str) -> str | None:
+        signature, values = templatize(question)
+        plan = self._plans.get(self._key(game, lang, signature))
+        if plan is None:
+            return None
+        if plan.values == values:
+            return plan.sql
+        if plan.verified:
+            return instantiate(plan.template, values)
+        return None
+
+    def remember_plan(self, game: str, lang: str, question: str, sql: str) -> None:
+        """Store the validated SQL generated for `question` (LLM output)."""
+        signature, values = templatize(question)
+        key = self._key(game, lang, signature)
+        plan = self._plans.get(key)
+        if plan is not None and plan.values != values and plan.template is not None:
+            if instantiate(plan.template, values) == sql:
+                plan.verified = True
+                return
+        if plan is None:
+            self._evict(self._plans, self._plan_maxsize)
+        self._plans[key] = _Plan(sql, values, make_template(sql, values))
+
+    # ── Results ──
+
+    def lookup_result(self, game: str, version: str | None, sql: str) -> list | None:
+        if version is None:
+            return None
+        return self._results.get((game, version, normalize_sql(sql)))
+
+    def remember_result(self, game: str, version: str | None, sql: str, rows: list) -> None:
+        if version is None:
+            return
+        self._evict(self._results, self._result_maxsize)
+        self._results[(game, version, normalize_sql(sql))] = rows
+
+    def invalidate_results(self, game: str) -> None:
+        for k in [k for k in self._results if k[0] == game]:
+            del self._results[k]
+
+    # ── Reporting ──
+
+    @staticmethod
+    def _ema(current: float | None, ms: float) -> float:
+        return ms if current is None else current + _EMA_ALPHA * (ms - current)
+
+    def record_generation(self, ms: float) -> None:
+        self._gen_ms = self._ema(self._gen_ms, ms)
+
+    def record_execution(self, ms: float) -> None:
+        self._exec_ms = self._ema(self._exec_ms, ms)
+
+    def record(self, plan_hit: bool, result_hit: bool) -> int:
+        """Count one Phase SQL lookup, return the latency saved (ms)."""
+        saved = 0
+        if plan_hit:
+            self.plan_hits += 1
+            saved += int(self._gen_ms or 0)
+        else:
+            self.misses += 1
+        if result_hit:
+            self.result_hits += 1
+            saved += int(self._exec_ms or 0)
+        self.saved_ms += saved
+        return saved
+
+    def stats(self) -> dict:
+        lookups = self.plan_hits + self.misses
+        return {
+            "plans": len(self._plans),
+            "verified_templates": sum(p.verified for p in self._plans.values()),
+            "results": len(self._results),
+            "plan_hits": self.plan_hits,
+            "result_hits": self.result_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.plan_hits / lookups, 3) if lookups else 0.0,
+            "saved_ms": self.saved_ms,
+            "avg_generation_ms": int(self._gen_ms or 0),
+            "avg_execution_ms": int(self._exec_ms or 0),
+        }
+
+    def clear(self) -> None:
+        self._plans.clear()
+        self._results.clear()
+        self._gen_ms = self._exec_ms = None
+        self.plan_hits = self.result_hits = self.misses = self.saved_ms = 0
+
+
+sql_plan_cache = SqlPlanCache()
+
+register_new_draw_listener(sql_plan_cache.invalidate_results)
@@ -29,6 +29,7 @@ LOTO_CONFIG = GameConfig(
     secondary_key="chance",
     secondary_match_key="chance_match",
     secondary_label="Chance",
+    draw_store_game="loto",
 )
 
 
@@ -100,6 +101,9 @@ class LotoStats(BaseStatsService):
     def _extract_secondary_match(self, best_match, secondary):
         return bool(best_match.get('chance_match', 0))
 
+    def _index_secondary(self, secondary):
+        return [secondary] if secondary is not None else None
+
 
 # ────────────────────────────────────────────
 # Instance singleton + re-exports
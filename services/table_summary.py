@@ -0,0 +1,130 @@
+"""
+TableSummary — métadonnées d'une table de tirages, 1 calcul par tirage importé.
+
+COUNT(*), MIN/MAX(date_de_tirage), comptes par fenêtre HYBRIDE et cadence
+tirages/an ne changent qu'à l'import d'un tirage (2-3 fois par semaine). Ils
+étaient pourtant recalculés à chaque requête :
+    - generate_grids                : COUNT + MIN/MAX + MAX + 1 COUNT par fenêtre
+    - /api/{game}/database-info     : COUNT + MIN/MAX
+    - /api/{game}/meta-windows-info : SELECT de toutes les dates
+    - /api/{game}/tirages/count     : COUNT
+
+Le résumé est dérivé du draw store (services.draw_store, aucune requête) et
+mémorisé par version de tirage ; le listener new-draw le purge. Store non
+chargé (tests, scripts) → get_table_summary() retourne None et les appelants
+gardent leur chemin SQL.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from config.engine import EngineConfig
+from services.draw_store import DrawSnapshot, get_draw_store, register_new_draw_listener
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class TableSummary:
+    """Immutable per-game table metadata (one draw version)."""
+    game: str
+    version: str | None
+    total: int
+    date_min: date | None
+    date_max: date | None
+    draws_per_year: float | None          # None if span <= 0 day
+    window_counts: dict = field(default_factory=dict)   # {"principale": n, "recente": n}
+    _dates: np.ndarray = field(default=None, repr=False, compare=False)  # datetime64[D] ASC
+
+    @classmethod
+    def from_snapshot(cls, snap: DrawSnapshot, cfg: EngineConfig) -> "TableSummary":
+        total = len(snap)
+        date_min = snap.dates[0].astype(date) if total else None
+        date_max = snap.reference_date()
+        draws_per_year = None
+        if total and (date_max - date_min).days > 0:
+            draws_per_year = total / ((date_max - date_min).days / 365.25)
+        window_counts = {}
+        if total:
+            # Même date de référence / même troncature que HybrideEngine.get_reference_date()
+            ref = datetime(date_max.year, date_max.month, date_max.day)
+            for name, years in (("principale", cfg.fenetre_principale_annees),
+                                ("recente", cfg.fenetre_recente_annees)):
+                window_counts[name] = total - snap.window_start(ref - timedelta(days=years * 365.25))
+        return cls(
+            game=cfg.game, version=snap.version, total=total,
+            date_min=date_min, date_max=date_max, draws_per_year=draws_per_year,
+            window_counts=window_counts, _dates=snap.dates,
+        )
+
+    @classmethod
+    def from_dates(cls, game: str, dates) -> "TableSummary":
+        """Summary of a plain list of draw dates (SQL fallback) — no window counts / cadence."""
+        arr = np.sort(np.array([str(d)[:10] for d in dates], dtype="datetime64[D]"))
+        total = len(arr)
+        return cls(
+            game=game, version=None, total=total,
+            date_min=arr[0].astype(date) if total else None,
+            date_max=arr[-1].astype(date) if total else None,
+            draws_per_year=None, _dates=arr,
+        )
+
+    def count_since(self, day: date) -> int:
+        """Number of draws with date >= day."""
+        return self.total - int(np.searchsorted(self._dates, np.datetime64(day, "D"), "left"))
+
+    def first_since(self, day: date) -> date | None:
+        """Oldest draw date >= day (None if no draw)."""
+        idx = int(np.searchsorted(self._dates, np.datetime64(day, "D"), "left"))
+        return self._dates[idx].astype(date) if idx < self.total else None
+
+    def nth_latest(self, n: int) -> date | None:
+        """Date of the n-th most recent draw (1 = last draw)."""
+        return self._dates[self.total - n].astype(date) if 1 <= n <= self.total else None
+
+
+_summaries: dict[str, TableSummary] = {}
+
+
+def summary_for(cfg: EngineConfig, snap: DrawSnapshot) -> TableSummary:
+    """Memoized TableSummary of a snapshot (rebuilt once per draw version)."""
+    summary = _summaries.get(cfg.game)
+    if summary is None or summary.version != snap.version:
+        summary = TableSummary.from_snapshot(snap, cfg)
+        _summaries[cfg.game] = summary
+    return summary
+
+
+async def get_table_summary(cfg: EngineConfig, conn=None, get_connection=None) -> TableSummary | None:
+    """Current TableSummary of a game, or None if the draw store is not loaded.
+
+    Freshness = draw store throttled MAX(date) check: on `conn` if given, else a
+    connection is opened through `get_connection` only when a check is due.
+    """
+    store = get_draw_store(cfg.game)
+    if not store.enabled:
+        return None
+    if conn is not None:
+        snap = await store.ensure_fresh(conn)
+    elif get_connection is not None and store.check_due():
+        async with get_connection() as _conn:
+            snap = await store.ensure_fresh(_conn)
+    else:
+        snap = store.snapshot
+    if snap is None or not len(snap):
+        return None
+    return summary_for(cfg, snap)
+
+
+def invalidate_summary(game: str) -> None:
+    _summaries.pop(game, None)
+
+
+def clear_table_summaries() -> None:
+    _summaries.clear()
+
+
+register_new_draw_listener(invalidate_summary)
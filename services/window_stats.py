@@ -0,0 +1,92 @@
+"""
+WindowStats — fréquences + retards de TOUTES les fenêtres en un seul passage.
+
+Le scoring HYBRIDE (principale / récente / globale) et les services de stats
+calculaient chaque fenêtre séparément : une requête ORDER BY + une boucle Python
+pour les fréquences, une autre pour les retards, × 3 fenêtres × (boules +
+secondaires) ≈ 12 requêtes et 12 passes pour les mêmes tirages.
+
+Les fenêtres sont toutes des suffixes de l'historique (date >= cutoff). En le
+parcourant du plus récent au plus ancien :
+    - fréquences : comptage par segment entre 2 cutoffs consécutifs, puis somme
+      cumulée → chaque tirage n'est lu qu'une fois pour toutes les fenêtres ;
+    - retards    : l'indice de 1ère apparition (DESC) est commun à toutes les
+      fenêtres ; retard(fenêtre) = min(indice, taille de la fenêtre), la taille
+      signifiant « jamais vu dans la fenêtre » comme dans calculer_retards().
+
+Source : DrawSnapshot (draw store in-process) ou lignes SQL (1 seule requête,
+via DrawSnapshot.from_rows) quand le store n'est pas chargé.
+"""
+
+from datetime import date, datetime
+from typing import Sequence
+
+import numpy as np
+
+from config.engine import EngineConfig
+from services.draw_store import DrawSnapshot, select_columns
+
+
+class WindowStats:
+    """Per-window counts and lags for balls and secondary numbers (one scan).
+
+    Window i = draws with date >= cutoffs[i] (None = full history).
+    Arrays are indexed by number (index 0 unused).
+    """
+
+    __slots__ = ("_counts", "_first_seen", "cutoffs", "sizes", "total")
+
+    def __init__(self, snap: DrawSnapshot, cutoffs: Sequence[date | datetime | str | None], cfg: EngineConfig):
+        self.cutoffs = tuple(cutoffs)
+        self.total = len(snap)
+        self.sizes = [self.total - snap.window_start(c) for c in self.cutoffs]
+        self._counts = {}
+        self._first_seen = {}
+        for secondary, size in ((False, cfg.num_max), (True, cfg.secondary_max)):
+            matrix = snap.secondary if secondary else snap.balls
+            self._counts[secondary] = self._scan_counts(matrix[::-1], size)
+            # lags over the full history = DESC index of the most recent appearance
+            self._first_seen[secondary] = snap.lags(0, size, secondary=secondary)
+
+    @classmethod
+    def from_rows(cls, cfg: EngineConfig, rows: list[dict], cutoffs) -> "WindowStats":
+        """Build from DB rows (any order) — SQL fallback when no draw store."""
+        return cls(DrawSnapshot.from_rows(cfg, rows), cutoffs, cfg)
+
+    @staticmethod
+    def select_sql(cfg: EngineConfig, cutoffs) -> tuple[str, tuple]:
+        """Single query covering every window (newest first)."""
+        cols = select_columns(cfg)
+        if any(c is None for c in cutoffs):
+            return f"SELECT {cols} FROM {cfg.table_name} ORDER BY date_de_tirage DESC", ()
+        oldest = min(cutoffs).strftime("%Y-%m-%d")
+        return (
+            f"SELECT {cols} FROM {cfg.table_name} WHERE date_de_tirage >= %s "
+            f"ORDER BY date_de_tirage DESC",
+            (oldest,),
+        )
+
+    def _scan_counts(self, newest_first: np.ndarray, size: int) -> dict[int, np.ndarray]:
+        # Segments between consecutive window sizes, each draw counted once.
+        counts = {}
+        running = np.zeros(size + 1, dtype=np.int64)
+        done = 0
+        for w_size in sorted(set(self.sizes)):
+            segment = newest_first[done:w_size].ravel()
+            segment = segment[segment >= 0].astype(np.intp)
+            running = running + np.bincount(segment, minlength=size + 1)[:size + 1]
+            counts[w_size] = running
+            done = w_size
+        return counts
+
+    def size(self, window: int) -> int:
+        """Number of draws in a window."""
+        return self.sizes[window]
+
+    def counts(self, window: int, secondary: bool = False) -> np.ndarray:
+        """Appearance count per number in a window."""
+        return self._counts[secondary][self.sizes[window]]
+
+    def lags(self, window: int, secondary: bool = False) -> np.ndarray:
+        """Draws since last appearance per number (window size = never seen in window)."""
+        return np.minimum(self._first_seen[secondary], self.sizes[window])
@@ -241,10 +241,58 @@ def smart_mock_db():
 @pytest.fixture(autouse=True)
 def _clear_cache():
     """Vide le cache in-memory avant et apres chaque test."""
-    from services.cache import _mem_cache
+    from services.cache import _inflight, _mem_cache, clear_l1_cache
+    from services.score_cache import clear_score_cache
+    from services.table_summary import clear_table_summaries
+    from services.response_snapshots import clear_response_snapshots
+    from services.draw_windows import clear_draw_windows
+    from services.request_coalescer import clear_coalescer
+    from services.selection_writer import get_selection_writer
+    from services.brake_cache import clear_brake_cache
+    from services.prompt_cache import clear_prompt_cache
+    from services.gemini_cache import answer_cache
+    from services.sql_plan_cache import sql_plan_cache
+    from services.base_chat_sql import set_allowed_columns
     _mem_cache.clear()
+    clear_l1_cache()
+    _inflight.clear()
+    clear_score_cache()
+    clear_table_summaries()
+    clear_response_snapshots()
+    clear_draw_windows()
+    clear_coalescer()
+    clear_brake_cache()
+    clear_prompt_cache()
+    answer_cache.clear()
+    sql_plan_cache.clear()
+    set_allowed_columns(())
+    get_selection_writer().clear()
     yield
     _mem_cache.clear()
+    clear_l1_cache()
+    _inflight.clear()
+    clear_score_cache()
+    clear_table_summaries()
+    clear_response_snapshots()
+    clear_draw_windows()
+    clear_coalescer()
+    clear_brake_cache()
+    clear_prompt_cache()
+    answer_cache.clear()
+    sql_plan_cache.clear()
+    set_allowed_columns(())
+
+
+@pytest.fixture(autouse=True)
+def _reset_draw_stores():
+    """Draw store process-wide desactive par defaut (chemin SQL mocke)."""
+    from services.decay_state import reset_decay_check
+    from services.draw_store import reset_draw_stores
+    reset_draw_stores()
+    reset_decay_check()
+    yield
+    reset_draw_stores()
+    reset_decay_check()
 
 
 # ═══════════════════════════════════════════════════════════════════════
@@ -284,10 +332,11 @@ class _VertexController:
         self.client.aio.models.generate_content = AsyncMock()
         self.client.aio.models.generate_content_stream = AsyncMock()
 
-    def set_response(self, text: str, tin: int = 10, tout: int = 5):
-        """Mock generate_content → response.text = `text` + usage_metadata."""
+    def set_response(self, text: str, tin: int = 10, tout: int = 5, finish_reason: str = "STOP"):
+        """Mock generate_content → response.text = `text` + usage_metadata + finish_reason."""
         resp = MagicMock()
         resp.text = text
+        resp.candidates = [MagicMock(finish_reason=finish_reason)]
         resp.usage_metadata = MagicMock(
             prompt_token_count=tin,
             candidates_token_count=tout,
@@ -335,3 +335,55 @@ class TestRealtimeAPI:
         data = resp.json()
         assert data["events"] == []
         assert data["kpi"]["total"] == 0
+
+
+# ── Cache L1/L2 stats ───────────────────────────────────────────────────────
+
+class TestCacheStats:
+    """GET /admin/api/cache-stats."""
+
+    def test_cache_stats_requires_auth(self):
+        client = _get_client()
+        resp = client.get("/admin/api/cache-stats")
+        assert resp.status_code == 401
+
+    def test_cache_stats_payload(self):
+        client = _authed_client()
+        resp = client.get("/admin/api/cache-stats")
+        assert resp.status_code == 200
+        data = resp.json()
+        assert set(data["l1"]) == {"entries", "bytes", "max_bytes"}
+        assert isinstance(data["namespaces"], dict)
+
+
+class TestCoalescerStats:
+    """GET /admin/api/coalescer-stats."""
+
+    def test_coalescer_stats_requires_auth(self):
+        client = _get_client()
+        resp = client.get("/admin/api/coalescer-stats")
+        assert resp.status_code == 401
+
+    def test_coalescer_stats_payload(self):
+        client = _authed_client()
+        resp = client.get("/admin/api/coalescer-stats")
+        assert resp.status_code == 200
+        data = resp.json()
+        assert set(data) == {"in_flight", "saved", "handlers"}
+
+
+class TestGeminiCacheStats:
+    """GET /admin/api/gemini-cache-stats."""
+
+    def test_gemini_cache_stats_requires_auth(self):
+        client = _get_client()
+        resp = client.get("/admin/api/gemini-cache-stats")
+        assert resp.status_code == 401
+
+    def test_gemini_cache_stats_payload(self):
+        client = _authed_client()
+        resp = client.get("/admin/api/gemini-cache-stats")
+        assert resp.status_code == 200
+        data = resp.json()
+        assert set(data) == {"pitch", "answer", "sql_plan"}
+        assert data["answer"]["hits"] == 0 and "evictions" in data["pitch"]
@@ -0,0 +1,204 @@
+"""
+Tests for the chatbot answer cache (services/gemini_cache.AnswerCache) —
+generic ResponseCache shared with PitchCache, key on normalized message /
+phase / lang / enrichment hash, SSE replay in stream_and_respond and cached
+answers in call_gemini_and_respond.
+"""
+
+import asyncio
+import json
+import os
+import time as _time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+# Ensure DB env vars for import safety
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASS", "test")
+os.environ.setdefault("DB_NAME", "test")
+
+from services.chat_pipeline_gemini import _replay_chunks, call_gemini_and_respond, stream_and_respond
+from services.gemini_cache import AnswerCache, PitchCache, ResponseCache, answer_cache, normalize_message
+
+_Q = "Quels sont les numéros les plus sortis ?"
+
+
+def _ctx(enrichment="[STATS] 7: 120", phase="Gemini", history=(), insult_prefix=""):
+    return {
+        "system_prompt": "sys",
+        "system_prompt_hash": "abc",
+        "contents": [{"role": "user", "parts": [{"text": _Q}]}],
+        "mode": "chat",
+        "insult_prefix": insult_prefix,
+        "history": list(history),
+        "lang": "fr",
+        "_http_client": MagicMock(),
+        "gem_api_key": "",
+        "_answer_cache": True,
+        "_chat_meta": {"phase": phase, "lang": "fr", "t0": _time.monotonic(),
+                       "enrichment_context": enrichment},
+        "_get_tirage_fn": None,
+        "_game": "loto",
+    }
+
+
+def _stream_of(*chunks):
+    async def _stream(*args, **kwargs):
+        for c in chunks:
+            yield c
+    return _stream
+
+
+async def _failing_stream(*args, **kwargs):
+    raise AssertionError("no Gemini call expected")
+    yield  # pragma: no cover
+
+
+def _vertex_chunk(text, finish_reason=None):
+    chunk = MagicMock(text=text, usage_metadata=None)
+    chunk.candidates = [MagicMock(finish_reason=finish_reason)] if finish_reason else []
+    return chunk
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+async def _collect(gen):
+    return [json.loads(e[len("data: "):]) async for e in gen]
+
+
+class TestKey:
+
+    def test_shared_implementation(self):
+        assert isinstance(answer_cache, ResponseCache) and issubclass(PitchCache, ResponseCache)
+
+    def test_normalize(self):
+        assert normalize_message("  Quels sont les NUMÉROS les plus sortis ?? ") == \
+            normalize_message("quels sont les numeros, les plus sortis") == "quels sont les numeros les plus sortis"
+
+    def test_near_identical_messages_share_key(self):
+        cache = AnswerCache()
+        assert cache.key_for(_ctx(), _Q, "fr", "accueil") == cache.key_for(
+            _ctx(), "quels sont les numeros les plus sortis", "fr", "accueil")
+
+    @pytest.mark.parametrize("change", [
+        {"enrichment": "[STATS] 7: 121"}, {"phase": "1"},
+    ])
+    def test_key_changes_with_context(self, change):
+        cache = AnswerCache()
+        assert cache.key_for(_ctx(**change), _Q, "fr", "accueil") != cache.key_for(_ctx(), _Q, "fr", "accueil")
+        assert cache.key_for(_ctx(), _Q, "en", "accueil") != cache.key_for(_ctx(), _Q, "fr", "accueil")
+
+    def test_not_cacheable(self):
+        cache = AnswerCache()
+        assert cache.key_for(_ctx(history=[MagicMock()]), _Q, "fr", "accueil") is None
+        assert cache.key_for(_ctx(insult_prefix="Calme."), _Q, "fr", "accueil") is None
+        assert cache.key_for(_ctx(), " ?! ", "fr", "accueil") is None
+
+    def test_replay_chunks_rebuild_text(self):
+        text = "mot " * 100 + "fin"
+        chunks = _replay_chunks(text, size=30)
+        assert "".join(chunks) == text and len(chunks) > 5
+        assert all(len(c) <= 30 for c in chunks)
+
+
+class TestStream:
+
+    @pytest.mark.asyncio
+    async def test_second_identical_question_replayed(self):
+        first = await _collect(stream_and_respond(
+            _ctx(), "fb", "[T]", "chatbot", "fr", _Q, "accueil", call_type="chat",
+            stream_fn=_stream_of("Le 7 est ", "le plus sorti.")))
+        assert answer_cache.stats()["size"] == 1
+        second = await _collect(stream_and_respond(
+            _ctx(), "fb", "[T]", "chatbot", "fr", "quels sont les numeros les plus sortis",
+            "accueil", call_type="chat", stream_fn=_failing_stream))
+        assert "".join(e["chunk"] for e in second) == "".join(e["chunk"] for e in first)
+        assert second[-1] == {"chunk": "", "source": "gemini", "mode": "chat", "is_done": True}
+        assert {e["source"] for e in second} == {"gemini"}
+        assert answer_cache.hits == 1
+
+    @pytest.mark.asyncio
+    async def test_new_draw_context_misses(self):
+        await _collect(stream_and_respond(
+            _ctx(), "fb", "[T]", "chatbot", "fr", _Q, "accueil", call_type="chat",
+            stream_fn=_stream_of("Le 7.")))
+        out = await _collect(stream_and_respond(
+            _ctx(enrichment="[STATS] 7: 121"), "fb", "[T]", "chatbot", "fr", _Q, "accueil",
+            call_type="chat", stream_fn=_stream_of("Le 8.")))
+        assert "".join(e["chunk"] for e in out) == "Le 8."
+
+    @pytest.mark.asyncio
+    async def test_fallback_and_flagged_answers_not_cached(self):
+        await _collect(stream_and_respond(
+            _ctx(), "fb", "[T]", "chatbot", "fr", _Q, "accueil", call_type="chat",
+            stream_fn=_stream_of()))
+        with patch("services.chat_pipeline_gemini._check_sql_number_hallucination", return_value="safe"):
+            await _collect(stream_and_respond(
+                _ctx(), "fb", "[T]", "chatbot", "fr", _Q, "accueil", call_type="chat",
+                stream_fn=_stream_of("Le 99 est sorti.")))
+        assert answer_cache.stats()["size"] == 0
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("finish, cached", [(None, 1), ("MAX_TOKENS", 0), ("SAFETY", 0)])
+    async def test_truncated_stream_not_cached(self, mock_vertex_client, finish, cached):
+        chunks = [_vertex_chunk("Le 7 est "), _vertex_chunk("le plus", finish)]
+        with mock_vertex_client() as vc, patch("services.gemini.gemini_breaker") as breaker:
+            breaker.state, breaker.OPEN = "closed", "open"
+            vc.client.aio.models.generate_content_stream = AsyncMock(return_value=_aiter(chunks))
+            out = await _collect(stream_and_respond(
+                _ctx(), "fb", "[T]", "chatbot", "fr", _Q, "accueil", call_type="chat"))
+        assert ("Réponse interrompue" in "".join(e["chunk"] for e in out)) is bool(finish)
+        assert answer_cache.stats()["size"] == cached
+
+    @pytest.mark.asyncio
+    async def test_inter_chunk_timeout_not_cached(self, mock_vertex_client):
+        async def _hang():
+            yield _vertex_chunk("Le 7 est ")
+            await asyncio.sleep(60)
+
+        with mock_vertex_client() as vc, patch("services.gemini.gemini_breaker") as breaker, \
+                patch("services.gemini._INTER_CHUNK_TIMEOUT", 0.01):
+            breaker.state, breaker.OPEN = "closed", "open"
+            vc.client.aio.models.generate_content_stream = AsyncMock(return_value=_hang())
+            out = await _collect(stream_and_respond(
+                _ctx(), "fb", "[T]", "chatbot", "fr", _Q, "accueil", call_type="chat"))
+        assert "Le 7 est" in "".join(e["chunk"] for e in out)
+        assert answer_cache.stats()["size"] == 0
+
+    @pytest.mark.asyncio
+    async def test_disabled_without_ctx_flag(self):
+        ctx = _ctx()
+        del ctx["_answer_cache"]
+        await _collect(stream_and_respond(
+            ctx, "fb", "[T]", "chatbot", "fr", _Q, "accueil", call_type="chat",
+            stream_fn=_stream_of("Le 7.")))
+        assert answer_cache.stats()["size"] == 0
+
+
+class TestNonStream:
+
+    @pytest.mark.asyncio
+    async def test_cached_answer_skips_gemini(self, mock_vertex_client):
+        with mock_vertex_client() as vc, \
+             patch("services.chat_pipeline_gemini.gemini_breaker") as breaker:
+            vc.set_response(text="Le 7 est le plus sorti.", tin=12, tout=3)
+            breaker.state, breaker.OPEN = "closed", "open"
+            first = await call_gemini_and_respond(_ctx(), "fb", "[T]", "chatbot", "fr", _Q, "accueil")
+            second = await call_gemini_and_respond(_ctx(), "fb", "[T]", "chatbot", "fr", _Q, "accueil")
+        assert first == second == {"response": "Le 7 est le plus sorti.", "source": "gemini", "mode": "chat"}
+        assert vc.client.aio.models.generate_content.call_count == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("finish", ["MAX_TOKENS", "SAFETY"])
+    async def test_truncated_reply_not_cached(self, mock_vertex_client, finish):
+        with mock_vertex_client() as vc, \
+             patch("services.chat_pipeline_gemini.gemini_breaker") as breaker:
+            vc.set_response(text="Le 7 est le plus", finish_reason=finish)
+            breaker.state, breaker.OPEN = "closed", "open"
+            out = await call_gemini_and_respond(_ctx(), "fb", "[T]", "chatbot", "fr", _Q, "accueil")
+        assert out["response"] == "Le 7 est le plus"
+        assert answer_cache.stats()["size"] == 0
@@ -4,8 +4,10 @@ Couvre les methodes non testees via test_services.py :
 get_numeros_par_categorie, prepare_grilles_pitch_context, chemins EM.
 """
 
+import asyncio
+import time
 from contextlib import asynccontextmanager
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 from datetime import date, timedelta
 
 import pytest
@@ -217,3 +219,34 @@ class TestEdgeCases:
         assert await svc.get_numero_stats(0, "principal") is None
         assert await svc.get_numero_stats(50, "principal") is None
         assert await svc.get_numero_stats(11, "chance") is None
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Loaders cached() — curseur de l'appelant vs refresh de fond
+# ═══════════════════════════════════════════════════════════════════════
+
+class TestCachedLoaders:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("method, key", [
+        ("_get_all_frequencies", "freq:principal:None"),
+        ("_get_all_ecarts", "ecarts:principal"),
+    ])
+    async def test_miss_on_caller_cursor_refresh_on_own_connection(self, method, key):
+        from services import cache as cache_mod
+
+        caller, own = AsyncSmartMockCursor(), AsyncSmartMockCursor()
+        svc = TestableStats(LOTO_CONFIG, make_async_conn(own))
+        no_db = AsyncMock()
+        no_db.execute.side_effect = AssertionError("caller cursor must not be used")
+        with patch.object(own, "execute", wraps=own.execute) as own_execute:
+            # Miss : pas de 2e connexion du pool pendant que l'appelant tient la sienne
+            value = await getattr(svc, method)(caller, "principal")
+            own_execute.assert_not_awaited()
+            entry = await cache_mod.cache_get(key)
+            await cache_mod.cache_set(key, entry | {"soft": time.time() - 5}, 120)
+            # Stale : servi tout de suite, recalcul de fond sur sa propre connexion
+            assert await getattr(svc, method)(no_db, "principal") == value
+            await asyncio.gather(*cache_mod._inflight.values())
+        no_db.execute.assert_not_awaited()
+        assert own_execute.await_count >= 1
@@ -0,0 +1,137 @@
+"""
+Tests for engine/sampler.py — batch sampler of HybrideEngine.generer_grille().
+Vectorized validators == scalar validators, loop selection semantics,
+and same sampling law as the sequential retry loop.
+"""
+
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from config.engine import LOTO_CONFIG, EM_CONFIG
+from engine import sampler
+from engine.hybride_base import HybrideEngine
+from services.esi import calculate_esi
+
+
+def _random_grids(cfg, n, seed=7):
+    rnd = random.Random(seed)
+    return np.array([
+        sorted(rnd.sample(range(cfg.num_min, cfg.num_max + 1), cfg.num_count))
+        for _ in range(n)
+    ])
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Vectorized validators
+# ═══════════════════════════════════════════════════════════════════════
+
+class TestVectorizedValidators:
+
+    @pytest.mark.parametrize("cfg", [LOTO_CONFIG, EM_CONFIG], ids=["loto", "em"])
+    def test_conformity_matches_valider_contraintes(self, cfg):
+        engine = HybrideEngine(cfg)
+        grids = _random_grids(cfg, 2000)
+        conf = sampler.conformity_matrix(grids, cfg)
+        expected = [engine.valider_contraintes([int(n) for n in g]) for g in grids]
+        assert conf.tolist() == expected
+
+    @pytest.mark.parametrize("cfg", [LOTO_CONFIG, EM_CONFIG], ids=["loto", "em"])
+    def test_esi_matches_calculate_esi(self, cfg):
+        grids = _random_grids(cfg, 2000)
+        esi = sampler.esi_matrix(grids, cfg.num_max)
+        assert esi.tolist() == [calculate_esi(list(g), cfg.num_max) for g in grids]
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Retry-loop selection
+# ═══════════════════════════════════════════════════════════════════════
+
+class TestPickAttempt:
+
+    def test_first_accepted_wins(self):
+        conf = np.array([0.5, 0.8, 1.0])
+        ok = np.array([True, True, True])
+        assert sampler.pick_attempt(conf, ok, 0.7) == (1, 0.8)
+
+    def test_esi_failure_not_accepted(self):
+        conf = np.array([1.0, 0.75])
+        ok = np.array([False, True])
+        assert sampler.pick_attempt(conf, ok, 0.7) == (1, 0.75)
+
+    def test_none_accepted_keeps_first_best_effective(self):
+        conf = np.array([0.6, 1.0, 0.6, 0.5])
+        ok = np.array([True, False, True, True])
+        # effective = [0.6, 0.5, 0.6, 0.5] → first occurrence of the max
+        assert sampler.pick_attempt(conf, ok, 0.7) == (0, 0.6)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Sampling primitives
+# ═══════════════════════════════════════════════════════════════════════
+
+class TestSamplingPrimitives:
+
+    def test_reproducible_under_random_seed(self):
+        w = np.ones((5, 10))
+        random.seed(3)
+        a = sampler.sample_without_replacement(sampler.make_rng(), w, 4)
+        random.seed(3)
+        b = sampler.sample_without_replacement(sampler.make_rng(), w, 4)
+        assert a.tolist() == b.tolist()
+
+    def test_without_replacement_distinct_and_positive_first(self):
+        w = np.zeros((200, 8))
+        w[:, :3] = 1.0
+        picks = sampler.sample_without_replacement(np.random.default_rng(0), w, 5)
+        assert all(len(set(row)) == 5 for row in picks.tolist())
+        # the 3 positive columns are always drawn before the zero-weight ones
+        assert (np.sort(picks[:, :3], axis=1) == [0, 1, 2]).all()
+
+    def test_weighted_choice_frequencies(self):
+        w = np.tile([1.0, 3.0, 0.0, 6.0], (20000, 1))
+        counts = np.bincount(sampler.weighted_choice(np.random.default_rng(1), w), minlength=4)
+        assert counts[2] == 0
+        assert counts / counts.sum() == pytest.approx([0.1, 0.3, 0.0, 0.6], abs=0.015)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Batch path == sequential path (distribution)
+# ═══════════════════════════════════════════════════════════════════════
+
+class TestBatchVsSequential:
+
+    N = 3000
+
+    def _marginals(self, fn, engine):
+        scores = {n: 0.2 + (n % 7) / 10 for n in range(1, 50)}
+        counts = Counter()
+        random.seed(11)
+        for _ in range(self.N):
+            grid, _ = fn(engine, scores)
+            counts.update(grid)
+        return np.array([counts[n] for n in range(1, 50)]) / (self.N * 5)
+
+    @pytest.mark.parametrize("stratified", [True, False], ids=["stratified", "global"])
+    def test_same_per_number_marginals(self, stratified):
+        engine = HybrideEngine(LOTO_CONFIG)
+        args = (set(), None, 1.3, 0.1, stratified)
+        seq = self._marginals(
+            lambda e, s: e._sample_attempts_sequential(s, [], *args, False, 5), engine)
+        batch = self._marginals(
+            lambda e, s: e._sample_attempts_batch(s, [], *args, 5), engine)
+        # 15 000 numbers per path → sd(freq) ≈ 0.0025 per number
+        assert np.abs(seq - batch).max() < 0.012
+
+    def test_forced_and_exclusions_respected(self):
+        engine = HybrideEngine(LOTO_CONFIG)
+        scores = {n: 1.0 for n in range(1, 50)}
+        random.seed(5)
+        for _ in range(50):
+            grid, _ = engine._sample_attempts_batch(
+                scores, [7, 21], {3}, {"exclude_nums": [10, 11]}, 1.3, 0.1, False, 3,
+            )
+            assert {7, 21} <= set(grid) and len(set(grid)) == 5
+            assert not {3, 10, 11} & set(grid)
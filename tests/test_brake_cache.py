@@ -0,0 +1,111 @@
+"""
+Tests for services/brake_cache.py — materialized V110 brake maps.
+"""
+
+from dataclasses import replace
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from config.engine import LOTO_CONFIG
+from services import cache as cache_mod
+from services.brake_cache import (
+    _key, _local, _next_targets, get_brake_map, get_brake_maps, materialize_after_selection,
+)
+from services.cache import _INVALIDATION_CHANNEL, _INSTANCE_ID, _apply_invalidation, clear_l1_cache
+from services.selection_history import get_persistent_brake_map
+from tests.test_cache_l1 import _FakeRedis
+
+_CFG = replace(LOTO_CONFIG, saturation_persistent_enabled=True, saturation_persistent_window=2)
+_T1, _T2 = date(2026, 4, 20), date(2026, 4, 18)
+_TARGET = date(2026, 4, 22)
+
+
+def _history_conn():
+    """Conn answering the 2 brake queries (DISTINCT dates, first-grid numbers)."""
+    cursor = MagicMock()
+    cursor.execute = AsyncMock()
+
+    async def fetchall():
+        query = cursor.execute.await_args.args[0]
+        if "SELECT DISTINCT" in query:
+            return [{"draw_date_target": _T1}, {"draw_date_target": _T2}]
+        return [{"number_value": 7, "draw_date_target": _T1},
+                {"number_value": 9, "draw_date_target": _T2},
+                {"number_value": 7, "draw_date_target": _T2}]
+
+    cursor.fetchall = fetchall
+    conn = MagicMock()
+    conn.cursor = AsyncMock(return_value=cursor)
+    return conn, cursor
+
+
+class TestBrakeCache:
+
+    @pytest.mark.asyncio
+    async def test_equals_query_then_no_db(self):
+        conn, cursor = _history_conn()
+        expected = await get_persistent_brake_map(conn, "loto", _TARGET, "ball", _CFG)
+        assert expected == {7: 0.20, 9: 0.50}
+        cursor.execute.reset_mock()
+        assert await get_brake_map(conn, "loto", _TARGET, "ball", _CFG) == expected
+        assert cursor.execute.await_count == 2
+        assert await get_brake_map(conn, "loto", _TARGET, "ball", _CFG) == expected
+        assert cursor.execute.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_shared_cache_layer_after_local_miss(self):
+        conn, cursor = _history_conn()
+        await get_brake_maps(conn, "loto", _TARGET, _CFG)
+        _local.clear()
+        cursor.execute.reset_mock()
+        maps = await get_brake_maps(conn, "loto", _TARGET, _CFG)
+        assert set(maps) == {"ball", "chance"} and maps["ball"] == {7: 0.20, 9: 0.50}
+        cursor.execute.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_disabled_no_db(self):
+        conn = MagicMock()
+        conn.cursor = AsyncMock()
+        cfg = replace(LOTO_CONFIG, saturation_persistent_enabled=False)
+        assert await get_brake_map(conn, "loto", _TARGET, "ball", cfg) == {}
+        conn.cursor.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_db_error_not_materialized(self):
+        conn = MagicMock()
+        conn.cursor = AsyncMock(side_effect=RuntimeError("db down"))
+        assert await get_brake_map(conn, "loto", _TARGET, "ball", _CFG) == {}
+        conn, cursor = _history_conn()
+        assert await get_brake_map(conn, "loto", _TARGET, "ball", _CFG) == {7: 0.20, 9: 0.50}
+
+    @pytest.mark.asyncio
+    async def test_materialized_on_first_selection(self):
+        conn, cursor = _history_conn()
+        nxt = _next_targets("loto", _T1, 2)
+        assert nxt[0] > _T1 and nxt[1] > nxt[0]
+        await materialize_after_selection(conn, "loto", _T1, _CFG)
+        assert cursor.execute.await_count == 2 * 2 * 2   # 2 next draws × (ball, chance) × 2 queries
+        cursor.execute.reset_mock()
+        for target in nxt:
+            await get_brake_maps(conn, "loto", target, _CFG)
+        cursor.execute.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_materialization_invalidates_peer_local_maps(self):
+        conn, _ = _history_conn()
+        nxt = _next_targets("loto", _T1, 2)
+        keys = [_key("loto", ntype, target, _CFG) for target in nxt for ntype in ("ball", "chance")]
+        redis = _FakeRedis()
+        with patch.object(cache_mod, "_redis", redis):
+            await materialize_after_selection(conn, "loto", _T1, _CFG)
+        clear_l1_cache()
+        assert [m for _, m in redis.published] == [f"{_INSTANCE_ID}|{k}" for k in keys]
+        assert {c for c, _ in redis.published} == {_INVALIDATION_CHANNEL}
+        # Peer instance side: stale local copies dropped on the same messages
+        _local.update({k: {1: 0.5} for k in keys})
+        _apply_invalidation(f"peer|{keys[0]}".encode())
+        assert keys[0] not in _local and keys[1] in _local
+        _apply_invalidation(b"peer|*")
+        assert not _local
@@ -0,0 +1,114 @@
+"""
+Tests for services/cache_codec.py — framed binary codec (marshal), zlib above a
+threshold, preservation of int keys / dates / Decimal, legacy JSON entries.
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+import services.cache as cache_mod
+import services.cache_codec as codec_mod
+from services.cache import cache_get, cache_set
+from services.cache_codec import Codec, decode, encode, get_codec, register_codec
+from tests.test_cache_l1 import _FakeRedis
+
+
+def _roundtrip(value, codec=None):
+    data, _ = encode(value, codec)
+    return decode(data)[0]
+
+
+class TestCodec:
+
+    def test_int_keys_and_tuples_preserved(self):
+        value = {1: 0.5, 49: 0.1, "pairs": [(1, 2), [3, 4]], "nested": {7: None}}
+        out = _roundtrip(value)
+        assert out == value
+        assert out["pairs"][0] == (1, 2)
+
+    def test_dates_decimal_numpy_tagged(self):
+        value = {
+            "first_draw_date": date(2019, 11, 4),
+            "at": datetime(2026, 2, 3, 20, 15),
+            "cost": Decimal("1.25"),
+            "count": np.int64(967),
+            "draws": [{"date": date(2026, 1, 31), "boules": [1, 2, 3, 4, 5]}],
+        }
+        data, _ = encode(value)
+        assert data[1] & codec_mod._F_TAGGED
+        out = decode(data)[0]
+        assert out == {**value, "count": 967}
+        assert type(out["count"]) is int and type(out["at"]) is datetime
+
+    def test_untagged_fast_path(self):
+        data, size = encode({"a": [1, 2, 3]})
+        assert data[0] == codec_mod._MAGIC and not data[1] & codec_mod._F_TAGGED
+        assert size == len(data) - 2
+
+    def test_compression_above_threshold(self, monkeypatch):
+        monkeypatch.setattr(codec_mod, "_COMPRESS_MIN_BYTES", 256)
+        small, _ = encode(list(range(10)))
+        assert not small[1] & codec_mod._F_ZLIB
+        value = [{"date": "2026-01-31", "boules": [1, 2, 3, 4, 5], "secondary": [7]}] * 200
+        data, size = encode(value)
+        assert data[1] & codec_mod._F_ZLIB
+        assert len(data) < size / 5
+        assert decode(data) == (value, size)
+
+    def test_legacy_json_value(self):
+        raw = json.dumps({"1": 0.5, "total": 3}).encode()
+        assert decode(raw) == ({"1": 0.5, "total": 3}, len(raw))
+
+    def test_frames_decoded_whatever_the_writer_codec(self):
+        as_json, _ = encode({"a": 1}, get_codec("json"))
+        as_marshal, _ = encode({"a": 1}, get_codec("marshal"))
+        assert as_json[1] & codec_mod._F_ID != as_marshal[1] & codec_mod._F_ID
+        assert decode(as_json)[0] == decode(as_marshal)[0] == {"a": 1}
+
+    def test_json_codec_keeps_historical_semantics(self):
+        assert _roundtrip({1: "x"}, get_codec("json")) == {"1": "x"}
+        with pytest.raises(TypeError):
+            encode({"d": date(2026, 1, 1)}, get_codec("json"))
+
+    def test_unsupported_value_raises(self):
+        with pytest.raises(ValueError):
+            encode({"x": object()})
+
+    def test_register_codec_rejects_duplicates(self):
+        with pytest.raises(ValueError):
+            register_codec(Codec("marshal", 9, repr, eval))
+        with pytest.raises(ValueError):
+            register_codec(Codec("other", 1, repr, eval))
+        with pytest.raises(ValueError):
+            register_codec(Codec("other", 16, repr, eval))
+
+
+class TestCacheWithCodec:
+
+    @pytest.fixture
+    def redis(self):
+        fake = _FakeRedis()
+        with patch.object(cache_mod, "_redis", fake):
+            yield fake
+        cache_mod.clear_l1_cache()
+
+    @pytest.mark.asyncio
+    async def test_l2_hit_restores_int_keys_and_dates(self, redis):
+        value = {"freq": {1: 12, 49: 7}, "last_draw_date": date(2026, 2, 3)}
+        await cache_set("cdc:k", value)
+        assert redis.store["hybride:cdc:k"][0][0] == codec_mod._MAGIC
+        cache_mod.clear_l1_cache()  # force the Redis read
+        assert await cache_get("cdc:k") == value
+
+    @pytest.mark.asyncio
+    async def test_l1_budget_counts_uncompressed_size(self, redis, monkeypatch):
+        monkeypatch.setattr(codec_mod, "_COMPRESS_MIN_BYTES", 256)
+        value = ["2026-01-31"] * 500
+        await cache_set("cdc:big", value)
+        _, size, _ = cache_mod._l1["cdc:big"]
+        assert size > len(redis.store["hybride:cdc:big"][0]) * 5
@@ -0,0 +1,213 @@
+"""
+Tests for services/cache.py — in-process L1 (LRU, TTL, byte budget) in front
+of Redis L2, pub/sub invalidation across instances, per-namespace counters.
+"""
+
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+
+import services.cache as cache_mod
+from services.cache import (
+    _apply_invalidation, _INSTANCE_ID, _INVALIDATION_CHANNEL, _namespace,
+    cache_clear, cache_delete, cache_get, cache_set, cache_stats, clear_l1_cache,
+    run_invalidation_listener,
+)
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self._redis = redis
+        self._ops = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def get(self, key):
+        self._ops.append(("get", key))
+
+    def pttl(self, key):
+        self._ops.append(("pttl", key))
+
+    async def execute(self):
+        self._redis.round_trips += 1
+        out = []
+        for op, key in self._ops:
+            entry = self._redis.store.get(key)
+            if op == "get":
+                out.append(entry[0] if entry else None)
+            else:
+                out.append(entry[1] * 1000 if entry else -2)
+        return out
+
+
+class _FakePubSub:
+    def __init__(self, messages):
+        self._messages = messages
+        self.channels = []
+        self.closed = False
+
+    async def subscribe(self, channel):
+        self.channels.append(channel)
+
+    async def listen(self):
+        for m in self._messages:
+            yield m
+
+    async def aclose(self):
+        self.closed = True
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.store = {}
+        self.published = []
+        self.round_trips = 0
+        self.pubsub_obj = None
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    async def set(self, key, data, ex=None):
+        self.round_trips += 1
+        self.store[key] = (data.encode() if isinstance(data, str) else data, ex)
+
+    async def delete(self, *keys):
+        for k in keys:
+            self.store.pop(k, None)
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+
+    async def scan(self, cursor, match=None, count=None):
+        return 0, [k for k in self.store if k.startswith(match.rstrip("*"))]
+
+    def pubsub(self):
+        return self.pubsub_obj
+
+
+@pytest.fixture
+def redis():
+    fake = _FakeRedis()
+    with patch.object(cache_mod, "_redis", fake):
+        yield fake
+    clear_l1_cache()
+
+
+def _counters(ns):
+    return dict(cache_stats()["namespaces"].get(ns, {}))
+
+
+class TestL1:
+
+    def test_namespace(self):
+        assert _namespace("em:freq:boule:None") == "em:freq"
+        assert _namespace("freq:boule:None") == "freq"
+        assert _namespace("global_stats_loto") == "global_stats_loto"
+
+    @pytest.mark.asyncio
+    async def test_hot_read_served_by_l1(self, redis):
+        await cache_set("l1t:hot", {"a": [1, 2]}, ttl=600)
+        trips = redis.round_trips
+        before = _counters("l1t")
+        with patch("services.cache.decode") as decode:
+            assert await cache_get("l1t:hot") == {"a": [1, 2]}
+        decode.assert_not_called()
+        assert redis.round_trips == trips
+        assert _counters("l1t")["l1_hits"] == before.get("l1_hits", 0) + 1
+
+    @pytest.mark.asyncio
+    async def test_l2_hit_fills_l1_with_remaining_ttl(self, redis):
+        redis.store["hybride:l1t:other"] = (json.dumps([1, 2, 3]).encode(), 2)
+        assert await cache_get("l1t:other") == [1, 2, 3]
+        assert redis.round_trips == 1  # GET + PTTL pipelined
+        expires_at = cache_mod._l1["l1t:other"][0]
+        assert expires_at - time.monotonic() <= 2.0
+        assert await cache_get("l1t:other") == [1, 2, 3]
+        assert redis.round_trips == 1
+        assert await cache_get("l1t:missing") is None
+        c = _counters("l1t")
+        assert c["l2_hits"] >= 1 and c["misses"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_expired_l1_entry_goes_back_to_l2(self, redis):
+        await cache_set("l1t:exp", 1, ttl=600)
+        key = "l1t:exp"
+        _, size, value = cache_mod._l1[key]
+        cache_mod._l1[key] = (time.monotonic() - 1, size, value)
+        assert await cache_get(key) == 1
+        assert redis.round_trips == 2  # SET + pipelined GET/PTTL
+
+    @pytest.mark.asyncio
+    async def test_byte_budget_lru_eviction(self, redis, monkeypatch):
+        monkeypatch.setattr(cache_mod, "_L1_MAX_BYTES", 25)
+        before = _counters("l1b").get("evictions", 0)
+        await cache_set("l1b:a", "x" * 8, ttl=60)   # 10 bytes payload
+        await cache_set("l1b:b", "y" * 8, ttl=60)
+        await cache_get("l1b:a")                      # a = most recently used
+        await cache_set("l1b:c", "z" * 8, ttl=60)
+        assert set(cache_mod._l1) == {"l1b:a", "l1b:c"}
+        assert cache_stats()["l1"]["bytes"] == 20
+        assert _counters("l1b")["evictions"] == before + 1
+
+    @pytest.mark.asyncio
+    async def test_set_broadcasts_invalidation(self, redis):
+        await cache_set("l1t:pub", 1, ttl=60)
+        assert redis.published == [(_INVALIDATION_CHANNEL, f"{_INSTANCE_ID}|l1t:pub")]
+
+    @pytest.mark.asyncio
+    async def test_peer_invalidation_drops_l1_entry(self, redis):
+        await cache_set("l1t:k1", 1, ttl=60)
+        await cache_set("l1t:k2", 2, ttl=60)
+        _apply_invalidation(f"{_INSTANCE_ID}|l1t:k1".encode())  # own message → ignored
+        assert "l1t:k1" in cache_mod._l1
+        _apply_invalidation(b"peer|l1t:k1")
+        assert "l1t:k1" not in cache_mod._l1 and "l1t:k2" in cache_mod._l1
+        _apply_invalidation(b"peer|*")
+        assert not cache_mod._l1
+
+    @pytest.mark.asyncio
+    async def test_listener_applies_messages(self, redis):
+        await cache_set("l1t:lst", 1, ttl=60)
+        redis.pubsub_obj = _FakePubSub([
+            {"type": "subscribe", "data": 1},
+            {"type": "message", "data": b"peer|l1t:lst"},
+        ])
+        await cache_set("l1t:lst", 1, ttl=60)  # refilled after the listener (re)subscribes
+        await run_invalidation_listener()
+        assert redis.pubsub_obj.channels == [_INVALIDATION_CHANNEL]
+        assert redis.pubsub_obj.closed
+        assert "l1t:lst" not in cache_mod._l1
+
+    @pytest.mark.asyncio
+    async def test_listener_noop_without_redis(self):
+        await run_invalidation_listener()
+
+    @pytest.mark.asyncio
+    async def test_delete_and_clear_everywhere(self, redis):
+        await cache_set("l1t:d1", 1, ttl=60)
+        await cache_set("l1t:d2", 2, ttl=60)
+        redis.published.clear()
+        await cache_delete("l1t:d1")
+        assert "hybride:l1t:d1" not in redis.store and "l1t:d1" not in cache_mod._l1
+        assert redis.published == [(_INVALIDATION_CHANNEL, f"{_INSTANCE_ID}|l1t:d1")]
+        await cache_clear()
+        assert not redis.store and not cache_mod._l1
+        assert redis.published[-1] == (_INVALIDATION_CHANNEL, f"{_INSTANCE_ID}|*")
+
+    @pytest.mark.asyncio
+    async def test_fallback_counters(self):
+        before = _counters("l1f")
+        await cache_set("l1f:x", 1)
+        assert await cache_get("l1f:x") == 1
+        assert await cache_get("l1f:y") is None
+        after = _counters("l1f")
+        assert after["l1_hits"] == before.get("l1_hits", 0) + 1
+        assert after["misses"] == before.get("misses", 0) + 1
+        await cache_delete("l1f:x")
+        assert await cache_get("l1f:x") is None
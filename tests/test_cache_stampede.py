@@ -0,0 +1,265 @@
+"""
+Tests for services/cache.py cached() — single-flight loader, Redis lock across
+instances, probabilistic early refresh (XFetch), stale-while-revalidate and
+draw-version tags (entries valid until the next draw).
+"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+import services.cache as cache_mod
+from services.cache import _SWR_TAG, cache_get, cache_set, cached
+from tests.test_cache_l1 import _FakeRedis
+
+
+class _LockingRedis(_FakeRedis):
+    """_FakeRedis + SET NX / GET used by the cross-instance lock."""
+
+    async def set(self, key, data, ex=None, nx=False, px=None):
+        if nx and key in self.store:
+            return None
+        await super().set(key, data, ex=ex or (px and px / 1000))
+        return True
+
+    async def get(self, key):
+        entry = self.store.get(key)
+        return entry[0] if entry else None
+
+
+@pytest.fixture
+def redis():
+    fake = _LockingRedis()
+    with patch.object(cache_mod, "_redis", fake):
+        yield fake
+    cache_mod.clear_l1_cache()
+
+
+class _Loader:
+    def __init__(self, value="v1", delay=0.01, exc=None):
+        self.calls = 0
+        self.value = value
+        self.delay = delay
+        self.exc = exc
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.exc:
+            raise self.exc
+        return self.value
+
+
+def _envelope(value, soft_in, delta=0.01):
+    return {_SWR_TAG: 1, "v": value, "soft": time.time() + soft_in, "delta": delta}
+
+
+async def _drain():
+    while cache_mod._inflight:
+        await asyncio.gather(*cache_mod._inflight.values(), return_exceptions=True)
+
+
+class TestSingleFlight:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_run_loader_once(self):
+        loader = _Loader(value={"pairs": [1, 2]})
+        results = await asyncio.gather(*(cached("sf:k", 60, loader) for _ in range(20)))
+        assert loader.calls == 1
+        assert all(r == {"pairs": [1, 2]} for r in results)
+        entry = await cache_get("sf:k")
+        assert entry["v"] == {"pairs": [1, 2]} and entry["soft"] > time.time()
+        assert await cached("sf:k", 60, loader) == {"pairs": [1, 2]}
+        assert loader.calls == 1
+        assert not cache_mod._inflight
+
+    @pytest.mark.asyncio
+    async def test_error_propagates_to_every_waiter(self):
+        loader = _Loader(exc=RuntimeError("db down"))
+        results = await asyncio.gather(*(cached("sf:err", 60, loader) for _ in range(5)),
+                                       return_exceptions=True)
+        assert loader.calls == 1
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert not cache_mod._inflight
+        assert await cache_get("sf:err") is None
+
+    @pytest.mark.asyncio
+    async def test_none_is_not_cached(self):
+        loader = _Loader(value=None)
+        assert await cached("sf:none", 60, loader) is None
+        assert await cached("sf:none", 60, loader) is None
+        assert loader.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_plain_cache_set_value_is_fresh(self):
+        await cache_set("sf:legacy", [1, 2, 3])
+        loader = _Loader()
+        assert await cached("sf:legacy", 60, loader) == [1, 2, 3]
+        assert loader.calls == 0
+
+    @pytest.mark.asyncio
+    async def test_physical_ttl_includes_stale_window(self):
+        with patch.object(cache_mod, "cache_set", wraps=cache_mod.cache_set) as spy:
+            await cached("sf:ttl", 60, _Loader(), stale_ttl=30)
+        assert spy.call_args[0][2] == 90
+
+
+class TestStaleWhileRevalidate:
+
+    @pytest.mark.asyncio
+    async def test_stale_value_served_while_refreshing(self):
+        await cache_set("swr:k", _envelope("old", soft_in=-5), 120)
+        loader = _Loader(value="new")
+        results = await asyncio.gather(*(cached("swr:k", 60, loader) for _ in range(10)))
+        assert results == ["old"] * 10          # nobody waits for the loader
+        await _drain()
+        assert loader.calls == 1                # one background refresh
+        assert await cached("swr:k", 60, loader) == "new"
+
+    @pytest.mark.asyncio
+    async def test_refresh_loader_only_for_background_refresh(self):
+        loader, refresh = _Loader(value="miss"), _Loader(value="refreshed")
+        assert await cached("swr:rl", 60, loader, refresh_loader=refresh) == "miss"
+        await cache_set("swr:rl", _envelope("old", soft_in=-5), 120)
+        assert await cached("swr:rl", 60, loader, refresh_loader=refresh) == "old"
+        await _drain()
+        assert (loader.calls, refresh.calls) == (1, 1)
+        assert await cached("swr:rl", 60, loader, refresh_loader=refresh) == "refreshed"
+
+    @pytest.mark.asyncio
+    async def test_refresh_failure_keeps_stale_value(self, caplog):
+        await cache_set("swr:fail", _envelope("old", soft_in=-5), 120)
+        loader = _Loader(exc=RuntimeError("timeout"))
+        assert await cached("swr:fail", 60, loader) == "old"
+        await _drain()
+        assert (await cache_get("swr:fail"))["v"] == "old"
+        assert "background refresh of swr:fail failed" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_early_refresh_is_probabilistic(self):
+        # 1 s before expiry, recompute took 1 s : -log(1 - r) >= 1 ⇔ r >= 1 - 1/e
+        await cache_set("swr:early", _envelope("old", soft_in=1.0, delta=1.0), 120)
+        loader = _Loader(value="new")
+        with patch("services.cache.random.random", return_value=0.1):
+            assert await cached("swr:early", 60, loader) == "old"
+        await _drain()
+        assert loader.calls == 0
+        with patch("services.cache.random.random", return_value=0.9):
+            assert await cached("swr:early", 60, loader) == "old"
+        await _drain()
+        assert loader.calls == 1
+        assert (await cache_get("swr:early"))["v"] == "new"
+
+    @pytest.mark.asyncio
+    async def test_far_from_expiry_never_refreshes(self):
+        await cache_set("swr:far", _envelope("v", soft_in=3600, delta=0.05), 7200)
+        loader = _Loader()
+        with patch("services.cache.random.random", return_value=0.999999):
+            assert await cached("swr:far", 60, loader) == "v"
+        await _drain()
+        assert loader.calls == 0
+
+
+class TestRedisLock:
+
+    @pytest.mark.asyncio
+    async def test_lock_taken_and_released(self, redis):
+        loader = _Loader(value=7)
+        assert await cached("lk:k", 60, loader) == 7
+        assert "hybride:lock:lk:k" not in redis.store
+        assert redis.store["hybride:lk:k"][1] == 120
+
+    @pytest.mark.asyncio
+    async def test_waits_for_peer_instance(self, redis, monkeypatch):
+        monkeypatch.setattr(cache_mod, "_LOCK_POLL", 0.005)
+        redis.store["hybride:lock:lk:peer"] = (b"peer-token", 30)
+
+        async def peer_finishes():
+            await asyncio.sleep(0.02)
+            await cache_set("lk:peer", _envelope({"n": 1}, soft_in=60), 120)
+
+        loader = _Loader()
+        result, _ = await asyncio.gather(cached("lk:peer", 60, loader), peer_finishes())
+        assert result == {"n": 1}
+        assert loader.calls == 0
+        assert redis.store["hybride:lock:lk:peer"][0] == b"peer-token"  # not ours to release
+
+    @pytest.mark.asyncio
+    async def test_peer_timeout_computes_locally(self, redis, monkeypatch):
+        monkeypatch.setattr(cache_mod, "_LOCK_POLL", 0.005)
+        monkeypatch.setattr(cache_mod, "_LOCK_WAIT", 0.02)
+        redis.store["hybride:lock:lk:slow"] = (b"peer-token", 30)
+        loader = _Loader(value="mine")
+        assert await cached("lk:slow", 60, loader) == "mine"
+        assert loader.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_refresh_skipped_when_peer_refreshing(self, redis):
+        await cache_set("lk:swr", _envelope("old", soft_in=-1), 120)
+        redis.store["hybride:lock:lk:swr"] = (b"peer-token", 30)
+        loader = _Loader()
+        assert await cached("lk:swr", 60, loader) == "old"
+        await _drain()
+        assert loader.calls == 0
+
+
+class TestDrawVersion:
+
+    @pytest.mark.asyncio
+    async def test_entry_lives_until_next_draw(self):
+        loader = _Loader(value="v-jan-01")
+        with patch.object(cache_mod, "cache_set", wraps=cache_mod.cache_set) as spy:
+            assert await cached("dv:k", 60, loader, version="2026-01-01") == "v-jan-01"
+        assert spy.call_args[0][2] >= cache_mod.VERSIONED_TTL
+        entry = await cache_get("dv:k")
+        assert entry["ver"] == "2026-01-01"
+        assert entry["soft"] - time.time() > 3600  # no hourly recompute between draws
+        assert await cached("dv:k", 60, loader, version="2026-01-01") == "v-jan-01"
+        assert loader.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_previous_draw_entry_is_never_served(self):
+        await cache_set("dv:old", _envelope("old", soft_in=3600) | {"ver": "2026-01-01"}, 7200)
+        loader = _Loader(value="new")
+        assert await cached("dv:old", 60, loader, version="2026-01-03") == "new"
+        assert loader.calls == 1
+        assert (await cache_get("dv:old"))["ver"] == "2026-01-03"
+
+    @pytest.mark.asyncio
+    async def test_newer_draw_entry_from_peer_is_served(self):
+        await cache_set("dv:peer", _envelope("peer", soft_in=3600) | {"ver": "2026-01-03"}, 7200)
+        loader = _Loader()
+        assert await cached("dv:peer", 60, loader, version="2026-01-01") == "peer"
+        assert loader.calls == 0
+
+    @pytest.mark.asyncio
+    async def test_partial_import_entry_not_served_once_complete(self):
+        await cache_set("dv:part", _envelope("partial", soft_in=3600) | {"ver": "2026-01-03~partial"}, 7200)
+        loader = _Loader(value="complete")
+        assert await cached("dv:part", 60, loader, version="2026-01-03~partial") == "partial"
+        assert await cached("dv:part", 60, loader, version="2026-01-03") == "complete"
+        assert loader.calls == 1
+        # complete entry still serves the partial version (peer reloaded first)
+        assert await cached("dv:part", 60, loader, version="2026-01-03~partial") == "complete"
+        assert loader.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_untagged_entries_are_recomputed(self):
+        await cache_set("dv:raw", "raw")
+        await cache_set("dv:env", _envelope("env", soft_in=3600), 7200)
+        loader = _Loader(value="tagged")
+        assert await cached("dv:raw", 60, loader, version="2026-01-01") == "tagged"
+        assert await cached("dv:env", 60, loader, version="2026-01-01") == "tagged"
+        assert loader.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_peer_wait_ignores_previous_draw(self, redis, monkeypatch):
+        monkeypatch.setattr(cache_mod, "_LOCK_POLL", 0.005)
+        monkeypatch.setattr(cache_mod, "_LOCK_WAIT", 0.03)
+        await cache_set("dv:lk", _envelope("old", soft_in=3600) | {"ver": "2026-01-01"}, 7200)
+        redis.store["hybride:lock:dv:lk"] = (b"peer-token", 30)
+        loader = _Loader(value="mine")
+        assert await cached("dv:lk", 60, loader, version="2026-01-03") == "mine"
+        assert loader.calls == 1
@@ -206,3 +206,32 @@ class TestChatLoggerPhaseDetection:
                     assert params[11] == 1   # has_exclusions (int)
                 finally:
                     loop.close()
+
+
+@pytest.mark.no_chat_logger_stub
+class TestChatLoggerSqlCache:
+    """Text-to-SQL plan cache columns (sql_cache, sql_saved_ms)."""
+
+    def test_sql_cache_fields(self):
+        with _db_env:
+            import importlib
+            import services.chat_logger as mod
+            importlib.reload(mod)
+            with patch.object(mod, "db_cloudsql") as mock_db:
+                mock_db.async_query = AsyncMock(return_value=None)
+                loop = asyncio.new_event_loop()
+                try:
+                    async def _run():
+                        mod.log_chat_exchange(
+                            module="loto", lang="fr", question="top 5 en 2023",
+                            phase_detected="SQL", sql_generated="SELECT 1", sql_status="OK",
+                            sql_cache="PLAN", sql_saved_ms=850,
+                        )
+                        await asyncio.sleep(0.05)
+                    loop.run_until_complete(_run())
+                    sql, params = mock_db.async_query.call_args[0]
+                    assert sql.count("%s") == len(params) == 18
+                    assert params[16] == "PLAN"   # sql_cache
+                    assert params[17] == 850      # sql_saved_ms
+                finally:
+                    loop.close()
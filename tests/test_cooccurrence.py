@@ -0,0 +1,186 @@
+"""
+Tests for services/cooccurrence.py — pair / triplet / star-pair co-occurrence
+index on the draw store (equivalence with the UNION ALL + GROUP BY SQL).
+"""
+
+from collections import Counter
+from datetime import date, timedelta
+from itertools import combinations
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from config.engine import LOTO_CONFIG, EM_CONFIG
+from services.draw_store import DrawSnapshot, get_draw_store
+from services.cooccurrence import CooccurrenceIndex, get_cooccurrence
+from tests.conftest import AsyncSmartMockCursor, FAKE_TIRAGES, make_async_conn
+from tests.test_grid_index import _em_rows
+
+
+def _enable(cfg, rows):
+    store = get_draw_store(cfg.game)
+    store.enabled = True
+    store.snapshot = DrawSnapshot.from_rows(cfg, rows)
+    store._checked_at = float("inf")  # no freshness check in tests
+    return store.snapshot
+
+
+def _balls(r):
+    return sorted(r[f"boule_{i}"] for i in range(1, 6))
+
+
+def _window_rows(rows, years):
+    if not years:
+        return rows
+    d_max = max(date.fromisoformat(str(r["date_de_tirage"])[:10]) for r in rows)
+    d_from = d_max - timedelta(days=365 * years)
+    return [r for r in rows if date.fromisoformat(str(r["date_de_tirage"])[:10]) >= d_from]
+
+
+def _ref_top(counter, top_n, order="hot"):
+    sign = 1 if order == "cold" else -1
+    return sorted(counter.items(), key=lambda kv: (sign * kv[1], kv[0]))[:top_n]
+
+
+def _no_sql_conn():
+    cursor = AsyncSmartMockCursor()
+    cursor.execute = AsyncMock()
+    return make_async_conn(cursor), cursor
+
+
+class TestCooccurrenceIndex:
+
+    @pytest.mark.parametrize("years", [None, 1, 2])
+    @pytest.mark.parametrize("order", ["hot", "cold"])
+    def test_top_pairs_equivalent(self, years, order):
+        snap = DrawSnapshot.from_rows(LOTO_CONFIG, FAKE_TIRAGES)
+        index = CooccurrenceIndex(snap)
+        start = 0
+        if years:
+            start = snap.window_start(snap.reference_date() - timedelta(days=365 * years))
+        rows = _window_rows(FAKE_TIRAGES, years)
+        assert len(index) - start == len(rows)
+        ref = Counter(p for r in rows for p in combinations(_balls(r), 2))
+        got = index.top_pairs(start, 15, order)
+        assert [((a, b), c) for a, b, c in got] == _ref_top(ref, 15, order)
+
+    def test_top_triplets_equivalent(self):
+        index = CooccurrenceIndex(DrawSnapshot.from_rows(LOTO_CONFIG, FAKE_TIRAGES))
+        ref = Counter(t for r in FAKE_TIRAGES for t in combinations(_balls(r), 3))
+        got = index.top_triplets(0, 10)
+        assert [((a, b, c), n) for a, b, c, n in got] == _ref_top(ref, 10)
+
+    def test_star_pairs_and_rank(self):
+        rows = _em_rows()
+        index = CooccurrenceIndex(DrawSnapshot.from_rows(EM_CONFIG, rows))
+        ref = Counter(tuple(sorted((r["etoile_1"], r["etoile_2"]))) for r in rows)
+        got = index.top_star_pairs(0, 66, "hot")
+        assert [((a, b), c) for a, b, c in got] == _ref_top(ref, 66)
+        (a, b), count = _ref_top(ref, 5)[4]
+        assert index.star_pair_stats(a, b) == (
+            count, sum(1 for c in ref.values() if c > count) + 1, len(ref))
+
+    def test_pair_stats_and_posting_list(self):
+        index = CooccurrenceIndex(DrawSnapshot.from_rows(LOTO_CONFIG, FAKE_TIRAGES))
+        ref = Counter(p for r in FAKE_TIRAGES for p in combinations(_balls(r), 2))
+        (a, b), count = _ref_top(ref, 1)[0]
+        assert index.pair_stats(a, b) == (count, 1, len(ref))
+        draws = index.pair_draws(a, b, 50)
+        expected = [i for i, r in enumerate(FAKE_TIRAGES) if a in _balls(r) and b in _balls(r)]
+        assert draws.tolist() == expected[::-1][:50]
+        assert index.pair_stats(1, 1) == (0, len(ref) + 1, len(ref))
+        assert index.pair_draws(1, 1, 10).tolist() == []
+
+    def test_incremental_extend_equals_rebuild(self):
+        assert get_cooccurrence("loto") is None
+        _enable(LOTO_CONFIG, FAKE_TIRAGES[:150])
+        index = get_cooccurrence("loto")
+        index.top_pairs(0, 5)  # window counts memorized
+        _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        assert get_cooccurrence("loto") is index  # extended in place
+        full = CooccurrenceIndex(DrawSnapshot.from_rows(LOTO_CONFIG, FAKE_TIRAGES))
+        assert index.top_pairs(0, 30) == full.top_pairs(0, 30)
+        assert index.top_triplets(10, 30) == full.top_triplets(10, 30)
+        a, b, _ = full.top_pairs(0, 1)[0]
+        assert index.pair_draws(a, b, 100).tolist() == full.pair_draws(a, b, 100).tolist()
+        # not an append (history rewritten) → rebuild
+        _enable(LOTO_CONFIG, FAKE_TIRAGES[1:])
+        assert get_cooccurrence("loto") is not index
+
+
+class TestStatsServiceCooccurrence:
+
+    @pytest.mark.asyncio
+    async def test_loto_correlations_without_sql(self):
+        from services import stats_service
+
+        _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        conn, cursor = _no_sql_conn()
+        with patch("services.stats_service.db_cloudsql.get_connection", return_value=conn):
+            pairs = await stats_service.get_pair_correlations(top_n=5, window="1A", order="cold")
+            triplets = await stats_service.get_triplet_correlations(top_n=3)
+            top = (await stats_service.get_pair_correlations(top_n=1))["pairs"][0]
+            single = await stats_service.get_single_pair(n1=top["num_b"], n2=top["num_a"])
+            draws = await stats_service.get_pair_draws(n1=top["num_a"], n2=top["num_b"], limit=3)
+        cursor.execute.assert_not_awaited()
+
+        rows = _window_rows(FAKE_TIRAGES, 1)
+        assert pairs["total_draws"] == len(rows) and pairs["window"] == "1A"
+        assert [p["rank"] for p in pairs["pairs"]] == [1, 2, 3, 4, 5]
+        assert pairs["pairs"][0]["percentage"] == round(pairs["pairs"][0]["count"] / len(rows) * 100, 1)
+        assert len(triplets["triplets"]) == 3 and triplets["total_draws"] == len(FAKE_TIRAGES)
+        assert single["n1"] == top["num_a"] and single["count"] == top["count"] and single["rank"] == 1
+        assert draws["count"] == 3
+        latest = max((r for r in FAKE_TIRAGES if {top["num_a"], top["num_b"]} <= set(_balls(r))),
+                     key=lambda r: r["date_de_tirage"])
+        assert draws["draws"][0] == {
+            "date": str(latest["date_de_tirage"])[:10],
+            "boules": _balls(latest),
+            "secondary": [latest["numero_chance"]],
+        }
+
+    @pytest.mark.asyncio
+    async def test_em_star_pairs_without_sql(self):
+        from services import em_stats_service
+
+        rows = _em_rows()
+        _enable(EM_CONFIG, rows)
+        conn, cursor = _no_sql_conn()
+        with patch("services.em_stats_service.db_cloudsql.get_connection", return_value=conn):
+            star_pairs = await em_stats_service.get_star_pair_correlations(top_n=3)
+            s = star_pairs["pairs"][0]
+            single = await em_stats_service._svc.get_single_star_pair(s1=s["num_a"], s2=s["num_b"])
+            draws = await em_stats_service._svc.get_star_pair_draws(s1=s["num_a"], s2=s["num_b"], limit=2)
+        cursor.execute.assert_not_awaited()
+        assert star_pairs["total_draws"] == len(rows)
+        assert single["rank"] == 1 and single["count"] == s["count"]
+        assert all(d["secondary"] == [s["num_a"], s["num_b"]] for d in draws["draws"])
+
+    @pytest.mark.asyncio
+    async def test_partial_em_import_draw_summary(self):
+        """Dernier tirage EM sans 2e étoile (import 2 étapes) : pas de TypeError."""
+        from services import em_stats_service
+
+        rows = _em_rows()
+        rows[-1] = {**rows[-1], "etoile_2": None}
+        _enable(EM_CONFIG, rows)
+        latest = rows[-1]
+        n1, n2 = _balls(latest)[:2]
+        conn, cursor = _no_sql_conn()
+        with patch("services.em_stats_service.db_cloudsql.get_connection", return_value=conn):
+            draws = await em_stats_service._svc.get_pair_draws(n1=n1, n2=n2, limit=1)
+        cursor.execute.assert_not_awaited()
+        assert draws["draws"][0]["secondary"] == [latest["etoile_1"]]
+
+    @pytest.mark.asyncio
+    async def test_index_error_falls_back_to_sql(self):
+        from services import stats_service
+
+        _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        cursor = AsyncSmartMockCursor()
+        with patch("services.stats_service.db_cloudsql.get_connection",
+                   side_effect=lambda: make_async_conn(cursor)), \
+             patch.object(CooccurrenceIndex, "pair_draws", side_effect=RuntimeError("boom")):
+            draws = await stats_service.get_pair_draws(n1=1, n2=2, limit=3)
+        assert draws is not None and draws["n1"] == 1
+        assert "in (boule_1" in cursor._q
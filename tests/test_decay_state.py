@@ -13,9 +13,11 @@ from services.decay_state import (
     get_decay_state,
     update_decay_after_draw,
     check_and_update_decay,
+    decay_transition,
 )
 from config.engine import LOTO_CONFIG, EM_CONFIG
 from engine.hybride_base import HybrideEngine
+from services.draw_store import DrawSnapshot, get_draw_store
 
 
 # ═══════════════════════════════════════════════════════════════════════
@@ -303,18 +305,48 @@ class TestDecayDBFunctions:
         mock_conn.commit = AsyncMock()
 
         await update_decay_after_draw(mock_conn, "euromillions", [5, 10], drawn_stars=[3, 7])
-        # 2 ball resets + 1 bulk UPDATE other balls
-        # + 2 star resets + 1 bulk UPDATE other stars = 6 calls
-        assert mock_cursor.execute.call_count == 6
+        # 1 SELECT ... FOR UPDATE + 1 multi-row upsert (balls + stars)
+        assert mock_cursor.execute.call_count == 2
+        mock_conn.begin.assert_called_once()
         mock_conn.commit.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_update_after_draw_single_upsert(self):
+        """Transition computed in memory, written as ONE multi-row upsert."""
+        mock_cursor = AsyncMock()
+        mock_cursor.fetchall = AsyncMock(return_value=[
+            {"number_type": "ball", "number_value": 5, "consecutive_misses": 4},
+            {"number_type": "ball", "number_value": 9, "consecutive_misses": 2},
+            {"number_type": "chance", "number_value": 3, "consecutive_misses": 0},
+        ])
+        mock_conn = AsyncMock()
+        mock_conn.cursor = AsyncMock(return_value=mock_cursor)
+
+        result = await update_decay_after_draw(mock_conn, "loto", [5, 10], drawn_stars=[7])
+        assert result == {"game": "loto", "reset": 3, "incremented": 2}
+        select_sql = mock_cursor.execute.call_args_list[0][0][0]
+        assert "FOR UPDATE" in select_sql
+        sql, params = mock_cursor.execute.call_args_list[1][0]
+        assert sql.count("(%s, %s, %s, %s, %s, %s)") == 5
+        assert "ON DUPLICATE KEY UPDATE" in sql
+        rows = {(params[i + 1], params[i + 2]): params[i + 3] for i in range(0, len(params), 6)}
+        assert rows == {("ball", 5): 0, ("ball", 9): 3, ("ball", 10): 0,
+                        ("chance", 3): 1, ("chance", 7): 0}
+
+    def test_decay_transition_pure(self):
+        current = {1: 0, 2: 5, 3: 1}
+        assert decay_transition(current, [2, 4]) == {1: 1, 2: 0, 3: 2, 4: 0}
+        assert current == {1: 0, 2: 5, 3: 1}
+
     @pytest.mark.asyncio
     async def test_update_after_draw_error_graceful(self):
         """DB error on draw update → no crash."""
         mock_conn = AsyncMock()
         mock_conn.cursor = AsyncMock(side_effect=Exception("DB down"))
 
-        await update_decay_after_draw(mock_conn, "loto", [1, 2, 3])
+        result = await update_decay_after_draw(mock_conn, "loto", [1, 2, 3])
+        assert result["error"] is True
+        mock_conn.rollback.assert_called_once()
 
 
 # ═══════════════════════════════════════════════════════════════════════
@@ -539,10 +571,7 @@ class TestDecayV94HotfixTriggerBug:
             drawn_stars=[7],
         )
 
-        # 5 balls reset (INSERT...ON DUPLICATE KEY UPDATE consecutive_misses=0)
-        # 1 star reset
-        # 1 UPDATE for all OTHER tracked balls (consecutive_misses += 1)
-        # 1 UPDATE for all OTHER tracked stars (consecutive_misses += 1)
+        # 5 balls + 1 chance reset, all tracked others +1 — one upsert, one commit
         assert result["reset"] == 6  # 5 balls + 1 chance
         assert result["game"] == "loto"
         mock_conn.commit.assert_called_once()
@@ -558,17 +587,13 @@ class TestDecayV94HotfixTriggerBug:
 
         await update_decay_after_draw(mock_conn, "euromillions", [8, 27], drawn_stars=[2, 10])
 
-        # Check that INSERT...ON DUPLICATE KEY UPDATE with consecutive_misses=0 was called
-        calls = mock_cursor.execute.call_args_list
-        # First 2 calls: ball resets (nums 8, 27)
-        for i in range(2):
-            sql = calls[i][0][0]
-            assert "consecutive_misses = 0" in sql
-            assert "last_drawn" in sql
-        # Call index 3, 4: star resets (stars 2, 10)
-        for i in range(3, 5):
-            sql = calls[i][0][0]
-            assert "consecutive_misses = 0" in sql
+        # Drawn balls + stars upserted with consecutive_misses=0 and last_drawn set
+        sql, params = mock_cursor.execute.call_args_list[-1][0]
+        assert "INSERT INTO hybride_decay_state" in sql
+        assert "last_drawn = COALESCE(VALUES(last_drawn), last_drawn)" in sql
+        rows = [params[i:i + 6] for i in range(0, len(params), 6)]
+        assert {(r[1], r[2]) for r in rows} == {("ball", 8), ("ball", 27), ("star", 2), ("star", 10)}
+        assert all(r[3] == 0 and r[4] is not None for r in rows)
 
     @pytest.mark.asyncio
     async def test_decay_guard_duplicate_draw(self):
@@ -607,6 +632,38 @@ class TestDecayV94HotfixTriggerBug:
         assert result["game"] == "loto"
         assert result["reset"] > 0  # at least balls were reset
 
+    @pytest.mark.asyncio
+    async def test_decay_check_in_memory_with_draw_store(self):
+        """Draw store loaded: drawn numbers from the snapshot, then no query
+        at all until the store version moves."""
+        store = get_draw_store("loto")
+        store.enabled = True
+        store.snapshot = DrawSnapshot.from_rows(LOTO_CONFIG, [
+            {"date_de_tirage": "2026-04-08", "boule_1": 1, "boule_2": 2, "boule_3": 3,
+             "boule_4": 4, "boule_5": 5, "numero_chance": 1},
+            {"date_de_tirage": "2026-04-10", "boule_1": 3, "boule_2": 17, "boule_3": 29,
+             "boule_4": 38, "boule_5": 44, "numero_chance": 5},
+        ])
+        store._checked_at = float("inf")  # no freshness check in tests
+        mock_cursor = AsyncMock()
+        mock_cursor.fetchone = AsyncMock(return_value={"last_update": None, "last_drawn_date": "2026-04-08"})
+        mock_conn = AsyncMock()
+        mock_conn.cursor = AsyncMock(return_value=mock_cursor)
+
+        with patch("services.decay_state.update_decay_after_draw",
+                   new=AsyncMock(return_value={"game": "loto", "reset": 6, "incremented": 0})) as upd:
+            result = await check_and_update_decay(mock_conn, "loto", "tirages")
+            assert result["reset"] == 6
+            upd.assert_awaited_once_with(mock_conn, "loto", [3, 17, 29, 38, 44], [5])
+            # Only the MAX(last_drawn) guard hit the DB — no draws table query
+            assert mock_cursor.execute.await_count == 1
+
+            store._checked_at = float("inf")  # notify_new_draw invalidated the store
+            mock_conn.cursor.reset_mock()
+            assert await check_and_update_decay(mock_conn, "loto", "tirages") is None
+            mock_conn.cursor.assert_not_called()
+            upd.assert_awaited_once()
+
     @pytest.mark.asyncio
     async def test_decay_increment_only_on_draw_not_generation(self):
         """V94 core fix: generating 10 grids does NOT change consecutive_misses.
@@ -0,0 +1,285 @@
+"""
+Tests for services/draw_store.py — in-process NumPy draw history.
+Equivalence snapshot path vs SQL path of HybrideEngine (bit-identical scores).
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from config.engine import LOTO_CONFIG, EM_CONFIG
+from engine.hybride_base import HybrideEngine
+from services.draw_store import (
+    DrawSnapshot, draw_version, get_draw_snapshot, get_draw_store,
+    register_new_draw_listener, run_draw_watcher,
+)
+from services.window_stats import WindowStats
+from tests.conftest import AsyncSmartMockCursor, FAKE_TIRAGES, make_async_conn
+from tests.test_hybride_em import EMAsyncSmartMockCursor, FAKE_EM_TIRAGES, make_em_conn
+
+
+class _PartialAwareCursor(AsyncSmartMockCursor):
+    """Freshness check also reports the latest draw's NULL secondary (import 2 étapes)."""
+
+    async def fetchone(self):
+        row = await super().fetchone()
+        if row is not None and "as partial" in self._q:
+            latest = max(self._tirages, key=lambda t: t["date_de_tirage"])
+            row["partial"] = int(latest["numero_chance"] is None)
+        return row
+
+
+def _enable(cfg, rows):
+    store = get_draw_store(cfg.game)
+    store.enabled = True
+    store.snapshot = DrawSnapshot.from_rows(cfg, rows)
+    store._checked_at = float("inf")  # no freshness check in tests
+    return store.snapshot
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# DrawSnapshot — columnar primitives
+# ═══════════════════════════════════════════════════════════════════════
+
+class TestDrawSnapshot:
+
+    def test_from_rows_sorted_and_typed(self):
+        snap = DrawSnapshot.from_rows(LOTO_CONFIG, list(reversed(FAKE_TIRAGES)))
+        assert len(snap) == len(FAKE_TIRAGES)
+        assert snap.balls.dtype.name == "int8"
+        assert snap.balls.shape == (len(FAKE_TIRAGES), 5)
+        assert snap.reference_date() == FAKE_TIRAGES[-1]["date_de_tirage"]
+        assert snap.version == FAKE_TIRAGES[-1]["date_de_tirage"].isoformat()
+
+    def test_arrays_read_only(self):
+        snap = DrawSnapshot.from_rows(LOTO_CONFIG, FAKE_TIRAGES)
+        with pytest.raises(ValueError):
+            snap.balls[0, 0] = 1
+
+    def test_null_secondary_ignored(self):
+        rows = [
+            {"date_de_tirage": date(2026, 1, 1), "boule_1": 1, "boule_2": 2, "boule_3": 3,
+             "boule_4": 4, "boule_5": 5, "numero_chance": None},
+            {"date_de_tirage": date(2026, 1, 3), "boule_1": 1, "boule_2": 7, "boule_3": 8,
+             "boule_4": 9, "boule_5": 10, "numero_chance": 4},
+        ]
+        snap = DrawSnapshot.from_rows(LOTO_CONFIG, rows)
+        counts = snap.counts(0, 10, secondary=True)
+        assert counts[4] == 1 and counts.sum() == 1
+        assert snap.recent_draws(2, LOTO_CONFIG)[1]["numero_chance"] is None
+
+    def test_window_start_matches_sql_gte(self):
+        snap = DrawSnapshot.from_rows(LOTO_CONFIG, FAKE_TIRAGES)
+        limit = datetime(2021, 3, 2, 17, 30, tzinfo=timezone.utc)
+        expected = sum(1 for t in FAKE_TIRAGES if t["date_de_tirage"] < limit.date())
+        assert snap.window_start(limit) == expected
+        assert snap.window_start(None) == 0
+
+    def test_lags(self):
+        rows = [
+            {"date_de_tirage": date(2026, 1, d), "boule_1": b[0], "boule_2": b[1], "boule_3": b[2],
+             "boule_4": b[3], "boule_5": b[4], "numero_chance": 1}
+            for d, b in ((1, (1, 2, 3, 4, 5)), (2, (1, 6, 7, 8, 9)), (3, (2, 6, 10, 11, 12)))
+        ]
+        lags = DrawSnapshot.from_rows(LOTO_CONFIG, rows).lags(0, 49)
+        assert lags[2] == 0 and lags[6] == 0
+        assert lags[1] == 1
+        assert lags[3] == 2
+        assert lags[49] == 3  # never seen → len(window)
+
+    def test_recent_draws_desc_shape(self):
+        snap = DrawSnapshot.from_rows(EM_CONFIG, FAKE_EM_TIRAGES)
+        recent = snap.recent_draws(4, EM_CONFIG)
+        assert [r["date_de_tirage"] for r in recent] == [
+            t["date_de_tirage"] for t in reversed(FAKE_EM_TIRAGES[-4:])
+        ]
+        assert set(recent[0]) == {"date_de_tirage", "boule_1", "boule_2", "boule_3",
+                                  "boule_4", "boule_5", "etoile_1", "etoile_2"}
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Engine equivalence — snapshot path == SQL path
+# ═══════════════════════════════════════════════════════════════════════
+
+class TestEngineEquivalence:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("mode", ["conservative", "balanced", "recent"])
+    async def test_loto_scores_identical(self, mode):
+        engine = HybrideEngine(LOTO_CONFIG)
+        async with make_async_conn(AsyncSmartMockCursor()) as conn:
+            sql_scores = await engine.calculer_scores_hybrides(conn, mode=mode)
+        _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        snap_scores = await engine.calculer_scores_hybrides(None, mode=mode)
+        assert snap_scores == sql_scores
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("mode", ["conservative", "balanced", "recent"])
+    async def test_em_scores_identical(self, mode):
+        engine = HybrideEngine(EM_CONFIG)
+        async with make_em_conn(EMAsyncSmartMockCursor()) as conn:
+            sql_scores = await engine.calculer_scores_hybrides(conn, mode=mode)
+        _enable(EM_CONFIG, FAKE_EM_TIRAGES)
+        snap_scores = await engine.calculer_scores_hybrides(None, mode=mode)
+        assert snap_scores == sql_scores
+
+    @pytest.mark.asyncio
+    async def test_secondary_scores_reference(self):
+        """Secondary window scores == hand-computed freq/lag formula (full window)."""
+        engine = HybrideEngine(EM_CONFIG)
+        snap = _enable(EM_CONFIG, FAKE_EM_TIRAGES)
+        nb = len(FAKE_EM_TIRAGES)
+        freq = {s: 0 for s in range(1, 13)}
+        last = {}
+        for idx, t in enumerate(reversed(FAKE_EM_TIRAGES)):
+            for col in ("etoile_1", "etoile_2"):
+                freq[t[col]] += 1
+                last.setdefault(t[col], idx)
+        freq = engine._minmax_normalize({s: c / nb for s, c in freq.items()})
+        lag = {s: last.get(s, nb) for s in range(1, 13)}
+        max_r = max(lag.values()) or 1
+        lag = engine._minmax_normalize({s: v / max_r for s, v in lag.items()})
+        expected = {
+            s: EM_CONFIG.poids_frequence_secondary * freq[s] + EM_CONFIG.poids_retard_secondary * lag[s]
+            for s in range(1, 13)
+        }
+        stats = WindowStats(snap, [None], EM_CONFIG)
+        assert engine._scores_fenetre_from_stats(stats, 0, secondary=True) == expected
+
+    @pytest.mark.asyncio
+    async def test_reference_date_and_recent_draws_from_snapshot(self):
+        engine = HybrideEngine(LOTO_CONFIG)
+        _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        ref = await engine.get_reference_date(None)
+        d = FAKE_TIRAGES[-1]["date_de_tirage"]
+        assert ref == datetime(d.year, d.month, d.day, tzinfo=timezone.utc)
+        recent = await engine.get_recent_draws(None)
+        assert len(recent) == LOTO_CONFIG.penalty_window
+        assert recent[0]["date_de_tirage"] == d
+
+    @pytest.mark.asyncio
+    async def test_empty_window_uniform_fallback(self):
+        engine = HybrideEngine(LOTO_CONFIG)
+        snap = _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        future = datetime(2100, 1, 1, tzinfo=timezone.utc)
+        scores = engine._scores_fenetre_from_stats(WindowStats(snap, [future], LOTO_CONFIG), 0, secondary=False)
+        assert set(scores.values()) == {0.0}
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# DrawStore lifecycle
+# ═══════════════════════════════════════════════════════════════════════
+
+class TestDrawStoreLifecycle:
+
+    def test_disabled_by_default(self):
+        assert get_draw_snapshot("loto") is None
+        assert get_draw_snapshot("em") is None
+
+    @pytest.mark.asyncio
+    async def test_ensure_fresh_noop_when_disabled(self):
+        cursor = AsyncSmartMockCursor()
+        async with make_async_conn(cursor) as conn:
+            assert await get_draw_store("loto").ensure_fresh(conn) is None
+        assert conn.cursor.await_count == 0
+
+    @pytest.mark.asyncio
+    async def test_ensure_fresh_loads_then_throttles(self):
+        store = get_draw_store("loto")
+        store.enabled = True
+        async with make_async_conn(AsyncSmartMockCursor()) as conn:
+            snap = await store.ensure_fresh(conn)
+            assert snap is not None and len(snap) == len(FAKE_TIRAGES)
+            calls = conn.cursor.await_count
+            assert await store.ensure_fresh(conn) is snap
+            assert conn.cursor.await_count == calls  # throttled: no DB access
+
+    @pytest.mark.asyncio
+    async def test_reload_on_new_max_date(self):
+        store = get_draw_store("loto")
+        store.enabled = True
+        async with make_async_conn(AsyncSmartMockCursor(FAKE_TIRAGES[:-1])) as conn:
+            old = await store.ensure_fresh(conn)
+        extra = dict(FAKE_TIRAGES[-1])
+        store.invalidate()
+        async with make_async_conn(AsyncSmartMockCursor(FAKE_TIRAGES[:-1] + [extra])) as conn:
+            new = await store.ensure_fresh(conn)
+        assert new is not old
+        assert new.version == extra["date_de_tirage"].isoformat()
+
+    @pytest.mark.asyncio
+    async def test_same_max_date_keeps_snapshot(self):
+        store = get_draw_store("loto")
+        store.enabled = True
+        async with make_async_conn(AsyncSmartMockCursor()) as conn:
+            old = await store.ensure_fresh(conn)
+            store.invalidate()
+            assert await store.ensure_fresh(conn) is old
+
+    @pytest.mark.asyncio
+    async def test_secondary_fill_in_reloads(self):
+        """Import 2 étapes : même date, numero_chance NULL puis renseigné → reload + listeners."""
+        store = get_draw_store("loto")
+        store.enabled = True
+        partial = dict(FAKE_TIRAGES[-1], numero_chance=None)
+        async with make_async_conn(_PartialAwareCursor(FAKE_TIRAGES[:-1] + [partial])) as conn:
+            old = await store.ensure_fresh(conn)
+            store.invalidate()
+            assert await store.ensure_fresh(conn) is old  # still partial: no reload
+        assert old.version.endswith("~partial")
+        fired = []
+        register_new_draw_listener(fired.append)
+        store.invalidate()
+        async with make_async_conn(_PartialAwareCursor(FAKE_TIRAGES)) as conn:
+            new = await store.ensure_fresh(conn)
+        assert new is not old
+        assert new.version == FAKE_TIRAGES[-1]["date_de_tirage"].isoformat()
+        assert new.row(len(new) - 1, LOTO_CONFIG.secondary_columns)["numero_chance"] is not None
+        assert fired == ["loto"]
+
+    def test_draw_version(self):
+        assert draw_version("loto") is None
+        snap = _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        assert draw_version("loto") == snap.version
+        assert draw_version("em") is None
+
+    @pytest.mark.asyncio
+    async def test_watcher_detects_draw_import(self):
+        import asyncio
+        from services import draw_store
+
+        store = get_draw_store("loto")
+        store.enabled = True
+        async with make_async_conn(AsyncSmartMockCursor(FAKE_TIRAGES[:-1])) as conn:
+            await store.ensure_fresh(conn)
+        old = draw_version("loto")
+        fired = []
+        register_new_draw_listener(fired.append)
+        store.invalidate()  # throttle expired
+        rows = FAKE_TIRAGES[:-1] + [dict(FAKE_TIRAGES[-1])]
+        task = asyncio.ensure_future(run_draw_watcher(
+            lambda: make_async_conn(AsyncSmartMockCursor(rows)), interval=0))
+        try:
+            for _ in range(100):
+                await asyncio.sleep(0)
+                if draw_version("loto") != old:
+                    break
+        finally:
+            task.cancel()
+            draw_store._new_draw_listeners.remove(fired.append)
+        assert draw_version("loto") == FAKE_TIRAGES[-1]["date_de_tirage"].isoformat() != old
+        assert fired == ["loto"]
+
+    @pytest.mark.asyncio
+    @patch("engine.hybride.get_connection")
+    async def test_generate_grids_with_store(self, mock_get_conn):
+        """generate_grids end-to-end on the snapshot path."""
+        from engine.hybride import generate_grids
+        _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        mock_get_conn.side_effect = lambda: make_async_conn(AsyncSmartMockCursor())
+        result = await generate_grids(n=3, mode="balanced")
+        assert len(result["grids"]) == 3
+        for g in result["grids"]:
+            assert len(g["nums"]) == 5
+            assert all(1 <= n <= 49 for n in g["nums"])
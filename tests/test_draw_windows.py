@@ -0,0 +1,192 @@
+"""
+Tests for services/draw_windows.py — last-N-draws / since-date windows of the
+history (frequencies, recent draws, penalized ranking) and /meta-analyse-local
+built on them (no id list sent to MySQL).
+"""
+
+import os
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from config.engine import EM_CONFIG, LOTO_CONFIG
+from services.draw_store import DrawSnapshot, get_draw_store, notify_new_draw
+from services.draw_windows import DrawWindow, get_draw_window, window_for
+from tests.conftest import FAKE_TIRAGES
+from tests.test_grid_index import _em_rows
+
+
+def _enable(cfg, rows):
+    store = get_draw_store(cfg.game)
+    store.enabled = True
+    store.snapshot = DrawSnapshot.from_rows(cfg, rows)
+    store._checked_at = float("inf")  # no freshness check in tests
+    return store.snapshot
+
+
+def _newest_first(rows):
+    return sorted(rows, key=lambda r: str(r["date_de_tirage"]), reverse=True)
+
+
+def _reference(rows, sec_cols, sec_max):
+    balls = Counter(r[f"boule_{i}"] for r in rows for i in range(1, 6))
+    secondary = Counter(r[c] for r in rows for c in sec_cols
+                        if r[c] is not None and 1 <= r[c] <= sec_max)
+    recent = _newest_first(rows)[:4]
+    return (dict(sorted(balls.items())), dict(sorted(secondary.items())),
+            tuple(str(r["date_de_tirage"]) for r in recent))
+
+
+class _Cursor:
+    """Records queries; answers COUNT(*) and the window rows query."""
+
+    def __init__(self, rows):
+        self.rows = _newest_first(rows)
+        self.queries = []
+        self._result = None
+
+    async def execute(self, sql, params=()):
+        self.queries.append((sql, params))
+        if "COUNT(*)" in sql:
+            self._result = {"total": len(self.rows)}
+        elif "WHERE date_de_tirage >= %s" in sql:
+            self._result = [r for r in self.rows if str(r["date_de_tirage"]) >= params[0]]
+        elif "LIMIT %s" in sql:
+            self._result = self.rows[:params[0]]
+        else:
+            self._result = list(self.rows)
+
+    async def fetchone(self):
+        return self._result
+
+    async def fetchall(self):
+        return self._result
+
+
+def _get_connection(cursor):
+    @asynccontextmanager
+    async def _cm():
+        conn = AsyncMock()
+        conn.cursor = AsyncMock(return_value=cursor)
+        yield conn
+    return _cm
+
+
+class TestDrawWindow:
+
+    @pytest.mark.parametrize("last_n", [None, 1, 3, 50, 500])
+    def test_last_n_matches_reference(self, last_n):
+        snap = DrawSnapshot.from_rows(LOTO_CONFIG, FAKE_TIRAGES)
+        start = 0 if last_n is None else max(len(snap) - last_n, 0)
+        window = DrawWindow.from_snapshot(snap, LOTO_CONFIG, start)
+        rows = _newest_first(FAKE_TIRAGES)[:last_n]
+        ball_freq, sec_freq, recent = _reference(rows, ["numero_chance"], 10)
+        assert window.size == len(rows) and window.total == len(FAKE_TIRAGES)
+        assert (window.ball_freq, window.secondary_freq, window.recent_dates) == (ball_freq, sec_freq, recent)
+        assert window.date_min == min(r["date_de_tirage"] for r in rows)
+        assert window.date_max == max(r["date_de_tirage"] for r in rows)
+        assert list(window.recent_secondary[0]) == [rows[0]["numero_chance"]]
+
+    def test_null_secondary_excluded(self):
+        rows = [dict(r) for r in _em_rows()]
+        rows[-1]["etoile_2"] = None
+        window = DrawWindow.from_snapshot(DrawSnapshot.from_rows(EM_CONFIG, rows), EM_CONFIG, 0)
+        assert sum(window.secondary_freq.values()) == 2 * len(rows) - 1
+        assert _reference(rows, ["etoile_1", "etoile_2"], 12)[1] == window.secondary_freq
+
+    def test_penalized_ranking_excludes_last_draw(self):
+        snap = DrawSnapshot.from_rows(LOTO_CONFIG, FAKE_TIRAGES)
+        window = DrawWindow.from_snapshot(snap, LOTO_CONFIG, 0)
+        top, info = window.penalized_ranking(range(1, 50), 5)
+        assert len(top) == 5
+        assert not {n["number"] for n in top} & window.recent_balls[0]
+
+    def test_memoized_per_start_and_version(self):
+        snap = _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        first = window_for(LOTO_CONFIG, snap, 100)
+        assert window_for(LOTO_CONFIG, snap, 100) is first
+        assert window_for(LOTO_CONFIG, snap, 0) is not first
+        last = FAKE_TIRAGES[-1]
+        newer = _enable(LOTO_CONFIG, FAKE_TIRAGES + [
+            {**last, "date_de_tirage": last["date_de_tirage"] + timedelta(days=3)}])
+        notify_new_draw("loto")
+        assert window_for(LOTO_CONFIG, newer, 100).version > first.version
+
+
+class TestGetDrawWindow:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("kwargs", [{}, {"last_n": 20}, {"since": "2021-01-01"}])
+    async def test_store_and_sql_fallback_agree(self, kwargs):
+        cursor = _Cursor(FAKE_TIRAGES)
+        sql = await get_draw_window(LOTO_CONFIG, get_connection=_get_connection(cursor), **kwargs)
+        assert len(cursor.queries) == 2
+        assert not any("id IN" in q for q, _ in cursor.queries)
+        _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        cursor = _Cursor(FAKE_TIRAGES)
+        mem = await get_draw_window(LOTO_CONFIG, get_connection=_get_connection(cursor), **kwargs)
+        assert cursor.queries == []
+        assert sql == mem
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Route /api/{game}/meta-analyse-local
+# ═══════════════════════════════════════════════════════════════════════
+
+_env = patch.dict(os.environ, {
+    "DB_PASSWORD": "fake", "DB_USER": "test", "DB_NAME": "testdb", "EM_PUBLIC_ACCESS": "true",
+})
+_static = patch("fastapi.staticfiles.StaticFiles.__init__", return_value=None)
+_static_call = patch("fastapi.staticfiles.StaticFiles.__call__", return_value=None)
+
+
+def _meta(path, cursor):
+    with _env, _static, _static_call, \
+            patch("routes.api_analyse_unified.db_cloudsql") as mock_db, \
+            patch("routes.api_analyse_unified.get_decay_state", new=AsyncMock(return_value={})), \
+            patch("routes.api_analyse_unified.check_and_update_decay", new=AsyncMock()), \
+            patch("services.selection_history.record_pdf_meta_top", new=AsyncMock()):
+        mock_db.get_connection = _get_connection(cursor)
+        import main as main_mod
+        client = TestClient(main_mod.app, raise_server_exceptions=False)
+        return client.get(path)
+
+
+class TestMetaAnalyseLocal:
+
+    @pytest.mark.parametrize("query", ["window=GLOBAL", "window=25", "window=9999", "years=GLOBAL"])
+    def test_store_path_equals_sql_path(self, query):
+        path = f"/api/loto/meta-analyse-local?{query}"
+        cursor = _Cursor(FAKE_TIRAGES)
+        sql = _meta(path, cursor).json()
+        assert not any("id IN" in q for q, _ in cursor.queries)
+        _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        cursor = _Cursor(FAKE_TIRAGES)
+        mem = _meta(path, cursor).json()
+        assert not any(q.lstrip().startswith("SELECT date_de_tirage") for q, _ in cursor.queries)
+        assert mem == sql
+        assert mem["success"] is True
+
+    def test_last_n_window(self):
+        _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        data = _meta("/api/loto/meta-analyse-local?window=25", _Cursor(FAKE_TIRAGES)).json()
+        rows = _newest_first(FAKE_TIRAGES)[:25]
+        assert data["rows_used"] == 25 and data["meta"]["window_used"] == "25"
+        assert data["meta"]["total_draws"] == len(FAKE_TIRAGES)
+        assert data["all_frequencies"]["boules"] == {
+            str(k): v for k, v in _reference(rows, ["numero_chance"], 10)[0].items()}
+        assert data["meta"]["date_max"] == str(rows[0]["date_de_tirage"])
+        assert data["meta"]["penalization"]["last_draw_date"] == str(rows[0]["date_de_tirage"])
+
+    def test_em_window(self):
+        rows = _em_rows()
+        _enable(EM_CONFIG, rows)
+        data = _meta("/api/euromillions/meta-analyse-local?window=100", _Cursor(rows)).json()
+        ref = _reference(_newest_first(rows)[:100], ["etoile_1", "etoile_2"], 12)
+        assert data["rows_used"] == 100
+        assert data["all_frequencies"]["secondary"] == {str(k): v for k, v in ref[1].items()}
+        assert len(data["graph_etoiles"]["labels"]) == 3
@@ -223,7 +223,7 @@ class TestGetGcpMetrics:
     @pytest.mark.asyncio
     async def test_returns_cached_value(self):
         cached = {"status": "healthy", "cached": True}
-        with patch("services.gcp_monitoring.cache_get", AsyncMock(return_value=cached)):
+        with patch("services.cache.cache_get", AsyncMock(return_value=cached)):
             result = await get_gcp_metrics()
             assert result == cached
 
@@ -231,8 +231,8 @@ class TestGetGcpMetrics:
     async def test_cloud_monitoring_unavailable_returns_unknown(self):
         _LOCAL_CACHE.clear()
         with (
-            patch("services.gcp_monitoring.cache_get", AsyncMock(return_value=None)),
-            patch("services.gcp_monitoring.cache_set", AsyncMock()),
+            patch("services.cache.cache_get", AsyncMock(return_value=None)),
+            patch("services.cache.cache_set", AsyncMock()),
             patch("services.gcp_monitoring._fetch_cloud_run_metrics", AsyncMock(return_value={})),
             patch("services.gcp_monitoring._get_gemini_counters", AsyncMock(return_value={
                 "calls": 0, "errors": 0, "tokens_in": 0, "tokens_out": 0, "total_ms": 0,
@@ -266,8 +266,8 @@ class TestGetGcpMetrics:
             "total_ms": 187200,
         }
         with (
-            patch("services.gcp_monitoring.cache_get", AsyncMock(return_value=None)),
-            patch("services.gcp_monitoring.cache_set", AsyncMock()),
+            patch("services.cache.cache_get", AsyncMock(return_value=None)),
+            patch("services.cache.cache_set", AsyncMock()),
             patch("services.gcp_monitoring._fetch_cloud_run_metrics", AsyncMock(return_value=cloud_metrics)),
             patch("services.gcp_monitoring._get_gemini_counters", AsyncMock(return_value=gem_counters)),
         ):
@@ -291,8 +291,8 @@ class TestGetGcpMetrics:
             "_total_errors_5min": 15,
         }
         with (
-            patch("services.gcp_monitoring.cache_get", AsyncMock(return_value=None)),
-            patch("services.gcp_monitoring.cache_set", AsyncMock()),
+            patch("services.cache.cache_get", AsyncMock(return_value=None)),
+            patch("services.cache.cache_set", AsyncMock()),
             patch("services.gcp_monitoring._fetch_cloud_run_metrics", AsyncMock(return_value=cloud_metrics)),
             patch("services.gcp_monitoring._get_gemini_counters", AsyncMock(return_value={
                 "calls": 0, "errors": 0, "tokens_in": 0, "tokens_out": 0, "total_ms": 0,
@@ -305,8 +305,8 @@ class TestGetGcpMetrics:
     async def test_payload_structure(self):
         _LOCAL_CACHE.clear()
         with (
-            patch("services.gcp_monitoring.cache_get", AsyncMock(return_value=None)),
-            patch("services.gcp_monitoring.cache_set", AsyncMock()),
+            patch("services.cache.cache_get", AsyncMock(return_value=None)),
+            patch("services.cache.cache_set", AsyncMock()),
             patch("services.gcp_monitoring._fetch_cloud_run_metrics", AsyncMock(return_value={
                 "requests_per_second": 1, "error_rate_5xx": 0, "latency_p50_ms": 10,
                 "latency_p95_ms": 100, "latency_p99_ms": 200, "active_instances": 1,
@@ -348,8 +348,8 @@ class TestGetGcpMetrics:
         _LOCAL_CACHE.clear()
         mock_set = AsyncMock()
         with (
-            patch("services.gcp_monitoring.cache_get", AsyncMock(return_value=None)),
-            patch("services.gcp_monitoring.cache_set", mock_set),
+            patch("services.cache.cache_get", AsyncMock(return_value=None)),
+            patch("services.cache.cache_set", mock_set),
             patch("services.gcp_monitoring._fetch_cloud_run_metrics", AsyncMock(return_value={})),
             patch("services.gcp_monitoring._get_gemini_counters", AsyncMock(return_value={
                 "calls": 0, "errors": 0, "tokens_in": 0, "tokens_out": 0, "total_ms": 0,
@@ -359,16 +359,16 @@ class TestGetGcpMetrics:
             mock_set.assert_called_once()
             args = mock_set.call_args
             assert args[0][0] == "gcp_metrics"
-            assert args[0][1] == result
-            assert args[0][2] == 60
+            assert args[0][1]["v"] == result       # cached() envelope
+            assert args[0][2] == 60 + 60          # fresh 60s + stale 60s
 
     @pytest.mark.asyncio
     async def test_gemini_breakers_dict_exposed(self):
         """V128bis: payload must expose per-phase breakers dict (chat/sql/pitch)."""
         _LOCAL_CACHE.clear()
         with (
-            patch("services.gcp_monitoring.cache_get", AsyncMock(return_value=None)),
-            patch("services.gcp_monitoring.cache_set", AsyncMock()),
+            patch("services.cache.cache_get", AsyncMock(return_value=None)),
+            patch("services.cache.cache_set", AsyncMock()),
             patch("services.gcp_monitoring._fetch_cloud_run_metrics", AsyncMock(return_value={
                 "requests_per_second": 1, "error_rate_5xx": 0, "latency_p50_ms": 10,
                 "latency_p95_ms": 100, "latency_p99_ms": 200, "active_instances": 1,
@@ -0,0 +1,124 @@
+"""
+Tests for services/generate_session.py — /generate on a single DB connection.
+"""
+
+import logging
+from contextlib import asynccontextmanager
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from config.games import ValidGame, get_config
+from engine.hybride_base import HybrideEngine
+from config.engine import LOTO_CONFIG
+from services.decay_state import get_decay_states
+from services.generate_session import GenerateSession
+from services.selection_writer import get_selection_writer
+from tests.conftest import AsyncSmartMockCursor, make_async_conn
+
+
+class _RecordCursor:
+    def __init__(self, rows=None):
+        self.execute = AsyncMock()
+        self.rowcount = 1
+        self._rows = rows or []
+
+    async def fetchall(self):
+        return self._rows
+
+
+def _record_conn():
+    cursor = _RecordCursor()
+    conn = MagicMock()
+    conn.cursor = AsyncMock(return_value=cursor)
+    conn.commit = AsyncMock()
+    return conn, cursor
+
+
+def _counting_get_connection(cursor_factory=AsyncSmartMockCursor):
+    opened = []
+
+    @asynccontextmanager
+    async def _get_connection():
+        opened.append(1)
+        async with make_async_conn(cursor_factory()) as conn:
+            yield conn
+
+    return _get_connection, opened
+
+
+def _session(get_connection, engine=None):
+    cfg = get_config(ValidGame.loto)
+    return GenerateSession(ValidGame.loto, cfg, engine or HybrideEngine(LOTO_CONFIG), get_connection)
+
+
+class TestGetDecayStates:
+
+    @pytest.mark.asyncio
+    async def test_one_query_grouped_by_type(self):
+        conn, cursor = _record_conn()
+        cursor._rows = [
+            {"number_type": "ball", "number_value": 7, "consecutive_misses": 3},
+            {"number_type": "chance", "number_value": 2, "consecutive_misses": 1},
+            {"number_type": "ball", "number_value": 9, "consecutive_misses": 0},
+        ]
+        states = await get_decay_states(conn, "loto", ("ball", "chance"))
+        assert states == {"ball": {7: 3, 9: 0}, "chance": {2: 1}}
+        assert cursor.execute.await_count == 1
+        assert cursor.execute.await_args.args[1] == ("loto", "ball", "chance")
+
+    @pytest.mark.asyncio
+    async def test_graceful_on_error(self):
+        conn = MagicMock()
+        conn.cursor = AsyncMock(side_effect=RuntimeError("db down"))
+        assert await get_decay_states(conn, "loto", ("ball", "chance")) == {"ball": {}, "chance": {}}
+
+
+class TestGenerateSession:
+
+    @pytest.mark.asyncio
+    async def test_single_connection_for_whole_request(self):
+        get_connection, opened = _counting_get_connection()
+        async with _session(get_connection) as session:
+            await session.load_state()
+            result = await session.generate(n=2, mode="balanced")
+        assert opened == [1]
+        assert len(result["grids"]) == 2
+        assert isinstance(session.next_draw_date, date)
+        assert {"connect", "next_draw", "decay_sync", "state", "engine", "total"} <= set(session.timings)
+
+    @pytest.mark.asyncio
+    async def test_engine_uses_loaded_secondary_decay(self):
+        engine = HybrideEngine(LOTO_CONFIG)
+        get_connection, _ = _counting_get_connection()
+        with patch("engine.hybride_base.get_decay_state", new=AsyncMock()) as engine_read, \
+                patch.object(engine, "generer_grille", wraps=engine.generer_grille) as gen:
+            async with _session(get_connection, engine) as session:
+                session.decay, session.decay_secondary = {1: 3}, {2: 5}
+                await session.generate(n=1)
+        engine_read.assert_not_awaited()
+        assert gen.await_args.kwargs["decay_state_secondary"] == {2: 5}
+
+    @pytest.mark.asyncio
+    async def test_record_selections_queued_without_db(self):
+        conn, cursor = _record_conn()
+        grids = [{"nums": [1, 2, 3, 4, 5], "chance": 1},
+                 {"nums": [6, 7, 8, 9, 10], "chance": 2},
+                 {"nums": [11, 12, 13, 14, 15], "chance": 3}]
+        async with _session(lambda: make_async_conn()) as session:
+            session.conn = conn
+            session.next_draw_date = date(2026, 4, 22)
+            assert session.record_selections(grids) == (3, 0)
+        cursor.execute.assert_not_awaited()
+        assert get_selection_writer().pending == 18
+
+    @pytest.mark.asyncio
+    async def test_phase_timings_logged(self, caplog):
+        get_connection, _ = _counting_get_connection()
+        with caplog.at_level(logging.INFO, logger="services.generate_session"):
+            async with _session(get_connection) as session:
+                with session.phase("custom"):
+                    pass
+        line = next(r.getMessage() for r in caplog.records if "[GENERATE]" in r.getMessage())
+        assert "connect=" in line and "custom=" in line and "total=" in line
@@ -0,0 +1,151 @@
+"""
+Tests for services/grid_index.py — bitmask historical grid matching.
+Equivalence with the SQL semantics of _query_exact_matches / _query_best_match.
+"""
+
+import random
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from config.engine import LOTO_CONFIG, EM_CONFIG
+from services.draw_store import DrawSnapshot, get_draw_store
+from services.grid_index import GridIndex, _popcount, get_grid_index
+from tests.conftest import AsyncSmartMockCursor, FAKE_TIRAGES, make_async_conn
+
+
+def _enable(cfg, rows):
+    store = get_draw_store(cfg.game)
+    store.enabled = True
+    store.snapshot = DrawSnapshot.from_rows(cfg, rows)
+    store._checked_at = float("inf")  # no freshness check in tests
+    return store.snapshot
+
+
+def _em_rows(n=300, seed=11):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        balls = rng.sample(range(1, 51), 5)
+        stars = rng.sample(range(1, 13), 2)
+        rows.append({
+            "date_de_tirage": f"{2010 + i // 200}-{1 + (i // 20) % 10:02d}-{1 + i % 20:02d}",
+            **{f"boule_{j + 1}": b for j, b in enumerate(balls)},
+            "etoile_1": stars[0], "etoile_2": stars[1],
+        })
+    return rows
+
+
+def _sql_exact(rows, nums, sec_cols, secondary):
+    """Reference: boule_i IN nums AND every secondary col IN secondary, date DESC."""
+    out = [r for r in rows if all(r[f"boule_{i}"] in nums for i in range(1, 6))]
+    if secondary is not None:
+        out = [r for r in out if all(r[c] is not None and r[c] in secondary for c in sec_cols)]
+    return sorted((str(r["date_de_tirage"]) for r in out), reverse=True)
+
+
+def _sql_best(rows, nums, sec_cols, secondary):
+    """Reference: ORDER BY match_count DESC, secondary match DESC, date DESC LIMIT 1."""
+    def key(r):
+        mc = sum(r[f"boule_{i}"] in nums for i in range(1, 6))
+        sc = sum(r[c] is not None and r[c] in secondary for c in sec_cols) if secondary is not None else 0
+        return mc, sc, str(r["date_de_tirage"])
+    return max(rows, key=key)
+
+
+class TestGridIndex:
+
+    def test_popcount(self):
+        import numpy as np
+        masks = np.array([0, 1, (1 << 50) | (1 << 3), 2 ** 64 - 1], dtype=np.uint64)
+        assert _popcount(masks).tolist() == [0, 1, 2, 64]
+
+    @pytest.mark.parametrize("cfg,rows_fn", [
+        (LOTO_CONFIG, lambda: FAKE_TIRAGES),
+        (EM_CONFIG, _em_rows),
+    ])
+    def test_equivalent_to_sql(self, cfg, rows_fn):
+        rows = rows_fn()
+        index = GridIndex(DrawSnapshot.from_rows(cfg, rows), cfg.secondary_columns)
+        rng = random.Random(3)
+        grids = [[rows[k][f"boule_{i}"] for i in range(1, 6)] for k in (0, 17, len(rows) - 1)]
+        grids += [rng.sample(range(1, cfg.num_max + 1), 5) for _ in range(40)]
+        for nums in grids:
+            sec = [rng.randint(1, cfg.secondary_max) for _ in cfg.secondary_columns]
+            for secondary in (None, sec):
+                exact = [str(d) for d in index.exact_dates(nums, secondary)]
+                assert exact == _sql_exact(rows, nums, cfg.secondary_columns, secondary)
+                best = index.best_match(nums, secondary, match_key="sec_match")
+                ref = _sql_best(rows, nums, cfg.secondary_columns, secondary)
+                assert str(best["date_de_tirage"]) == str(ref["date_de_tirage"])[:10]
+                assert best["match_count"] == sum(ref[f"boule_{i}"] in nums for i in range(1, 6))
+                assert all(best[c] == ref[c] for c in cfg.secondary_columns)
+
+    def test_exact_match_with_secondary(self):
+        rows = FAKE_TIRAGES
+        target = rows[42]
+        nums = [target[f"boule_{i}"] for i in range(1, 6)]
+        index = GridIndex(DrawSnapshot.from_rows(LOTO_CONFIG, rows), LOTO_CONFIG.secondary_columns)
+        assert str(target["date_de_tirage"])[:10] in [str(d) for d in index.exact_dates(nums)]
+        other = target["numero_chance"] % 10 + 1
+        assert str(target["date_de_tirage"])[:10] not in [str(d) for d in index.exact_dates(nums, [other])]
+
+    def test_null_secondary_never_matches(self):
+        rows = [dict(FAKE_TIRAGES[0], numero_chance=None)]
+        index = GridIndex(DrawSnapshot.from_rows(LOTO_CONFIG, rows), LOTO_CONFIG.secondary_columns)
+        nums = [rows[0][f"boule_{i}"] for i in range(1, 6)]
+        assert index.exact_dates(nums, [1]) == []
+        best = index.best_match(nums, [1], match_key="chance_match")
+        assert best["numero_chance"] is None and best["chance_match"] == 0
+
+    def test_index_follows_snapshot(self):
+        assert get_grid_index("loto") is None
+        _enable(LOTO_CONFIG, FAKE_TIRAGES[:50])
+        first = get_grid_index("loto")
+        assert len(first) == 50 and get_grid_index("loto") is first
+        _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        assert len(get_grid_index("loto")) == len(FAKE_TIRAGES)
+
+
+class TestAnalyzeGrilleIndexed:
+
+    @pytest.mark.asyncio
+    async def test_loto_chat_analysis_without_sql(self):
+        from services.stats_service import analyze_grille_for_chat
+
+        _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        target = FAKE_TIRAGES[-1]
+        nums = [target[f"boule_{i}"] for i in range(1, 6)]
+        cursor = AsyncSmartMockCursor()
+        cursor.execute = AsyncMock()
+        with patch("services.stats_service.db_cloudsql.get_connection",
+                   return_value=make_async_conn(cursor)):
+            result = await analyze_grille_for_chat(nums, chance=target["numero_chance"])
+
+        cursor.execute.assert_not_awaited()
+        historique = result["historique"]
+        assert historique["deja_sortie"] is True
+        assert historique["exact_dates"] == _sql_exact(
+            FAKE_TIRAGES, nums, ["numero_chance"], [target["numero_chance"]])
+        best = historique["meilleure_correspondance"]
+        assert best["nb_numeros_communs"] == 5 and best["numeros_communs"] == sorted(nums)
+        assert best["chance_match"] is True
+
+    @pytest.mark.asyncio
+    async def test_em_secondary_match_through_hook(self):
+        from services.em_stats_service import analyze_grille_for_chat
+
+        rows = _em_rows()
+        _enable(EM_CONFIG, rows)
+        nums = [rows[5][f"boule_{i}"] for i in range(1, 6)]
+        cursor = AsyncSmartMockCursor()
+        cursor.execute = AsyncMock()
+        with patch("services.em_stats_service.db_cloudsql.get_connection",
+                   return_value=make_async_conn(cursor)):
+            result = await analyze_grille_for_chat(nums, [rows[5]["etoile_1"], 12])
+
+        cursor.execute.assert_not_awaited()
+        best = result["historique"]["meilleure_correspondance"]
+        ref = _sql_best(rows, nums, EM_CONFIG.secondary_columns, None)
+        assert best["date"] == str(ref["date_de_tirage"])
+        assert best["etoiles_match"] == bool({ref["etoile_1"], ref["etoile_2"]} & {rows[5]["etoile_1"], 12})
@@ -0,0 +1,185 @@
+"""
+Tests for services/intent_router.py — detector lists compiled into one
+alternation each (same decisions as the former one-regex-per-entry loops on
+the chatbot test corpus) and route_intents() phase signal vector.
+"""
+
+import ast
+import re
+from pathlib import Path
+
+import pytest
+
+import services.base_chat_detect_guardrails as guard
+import services.base_chat_detect_temporal as temporal
+import services.chat_detectors as loto
+import services.chat_detectors_em_guardrails as em
+from services.intent_router import IntentSignals, merge_patterns, merge_phrases, merge_words, route_intents
+
+_LANGS = ("fr", "en", "es", "pt", "de", "nl")
+_CORPUS_FILES = (
+    "test_argent.py", "test_chat_detectors_em.py", "test_chat_detectors_extra.py",
+    "test_chat_pipeline.py", "test_chat_pipeline_em.py", "test_insult_multilang.py",
+    "test_insult_oor.py", "test_pt_detection.py", "test_chat_site_rating.py",
+    "test_chat_temporal_bypass.py", "test_v51_chatbot_fixes.py", "test_generation_chat.py",
+)
+
+
+def _corpus() -> list[str]:
+    """String literals of the chatbot test files + every detector list entry."""
+    messages = set()
+    for name in _CORPUS_FILES:
+        tree = ast.parse((Path(__file__).parent / name).read_text(encoding="utf-8"))
+        messages.update(node.value for node in ast.walk(tree)
+                        if isinstance(node, ast.Constant) and isinstance(node.value, str)
+                        and 0 < len(node.value) < 300)
+    words = [*guard._INSULTE_MOTS, *guard._COMPLIMENT_PHRASES, *guard._COMPLIMENT_SOLO_WORDS,
+             *(m for mots in loto._ARGENT_MOTS.values() for m in mots),
+             *(m for mots in em._ARGENT_MOTS_EM.values() for m in mots)]
+    for w in words:
+        messages.update((w, f"tu es {w}", f"le loto {w} ?", f"{w}s euromillions", f"x{w}x"))
+    return sorted(messages)
+
+
+CORPUS = _corpus()
+
+
+# Former implementations (one re.search per list entry) — reference decisions
+
+def _legacy_insulte(message):
+    normalized = message.lower().replace('0', 'o').replace('1', 'i').replace('3', 'e').replace('@', 'a')
+    normalized = re.sub(r'(?<=\w)\.(?=\w)', '', normalized)
+    normalized = re.sub(r'\btes\b', "t'es", normalized)
+    if any(re.search(p, normalized) for p in guard._MENACE_PATTERNS):
+        return "menace"
+    if (any(re.search(p, normalized) for p in guard._INSULTE_PHRASES)
+            or any(re.search(r'\b' + re.escape(m) + r'\b', normalized) for m in guard._INSULTE_MOTS)):
+        if guard._insult_targets_bot(normalized):
+            return "directe"
+    return None
+
+
+_MERCI_PHRASES = (
+    "je vous remercie", "je te remercie", "je remercie",
+    "i appreciate", "thank you very much", "thanks so much",
+    "muchas gracias", "muito obrigado", "muito obrigada",
+    "vielen dank", "heel erg bedankt", "hartelijk dank",
+)
+
+
+def _legacy_compliment(message):
+    lower = re.sub(r'\btes\b', "t'es", message.lower().strip())
+    if any(p in lower for p in guard._COMPLIMENT_LOVE_PHRASES):
+        return "love"
+    if len(lower) < 80 and (any(lower.startswith(m) for m in guard._MERCI_STARTS)
+                            or any(p in lower for p in _MERCI_PHRASES)):
+        return "merci"
+    hit = (any(p in lower for p in guard._COMPLIMENT_PHRASES)
+           or set(re.findall(r'\w+', lower)) & guard._COMPLIMENT_SOLO_WORDS)
+    return "compliment" if hit and guard._compliment_targets_bot(lower) else None
+
+
+def _legacy_words(lower, phrases, mots, skip):
+    if any(re.search(p, lower) for p in phrases):
+        return True
+    return any(re.search(r'\b' + re.escape(m) + r'\b', lower) for m in mots if m not in skip)
+
+
+def _legacy_argent_loto_tail(message, lang):
+    lower = message.lower()
+    skip = loto._EURO_GAME_SKIP.get(lang, loto._EURO_GAME_SKIP["fr"]) if loto._EURO_GAME_RE.search(lower) else set()
+    return _legacy_words(lower, loto._ARGENT_PHRASES.get(lang, loto._ARGENT_PHRASES["fr"]),
+                         loto._ARGENT_MOTS.get(lang, loto._ARGENT_MOTS["fr"]), skip)
+
+
+def _legacy_argent_em_tail(message, lang):
+    lower = message.lower()
+    skip = em._EURO_GAME_SKIP_EM.get(lang, em._EURO_GAME_SKIP_EM["fr"]) if em._EURO_GAME_RE_EM.search(lower) else set()
+    return _legacy_words(lower, em._ARGENT_PHRASES_EM.get(lang, em._ARGENT_PHRASES_EM["fr"]),
+                         em._ARGENT_MOTS_EM.get(lang, em._ARGENT_MOTS_EM["fr"]), skip)
+
+
+class TestMerge:
+
+    def test_merge_words_whole_words_only(self):
+        rx = merge_words(["con", "connard", "c'est"])
+        assert rx.search("quel connard") and rx.search("t'es con!") and rx.search("bon, c'est ça")
+        assert not rx.search("conseil") and not rx.search("déconner")
+
+    def test_merge_patterns_and_phrases(self):
+        assert merge_patterns([r"\bab\b", r"c\d"]).search("x c4")
+        assert merge_phrases(["a.b"]).search("xa.bx") and not merge_phrases(["a.b"]).search("axb")
+
+    def test_empty_lists_never_match(self):
+        for rx in (merge_patterns([]), merge_words([]), merge_phrases([])):
+            assert rx.search("anything") is None and rx.search("") is None
+
+
+class TestSameDecisions:
+
+    def test_corpus_is_substantial(self):
+        assert len(CORPUS) > 2000
+
+    def test_insulte(self):
+        assert [guard._detect_insulte(m) for m in CORPUS] == [_legacy_insulte(m) for m in CORPUS]
+
+    def test_compliment(self):
+        assert [guard._detect_compliment(m) for m in CORPUS] == [_legacy_compliment(m) for m in CORPUS]
+
+    @pytest.mark.parametrize("lang", _LANGS)
+    def test_argent_word_lists(self, lang):
+        got_loto = [bool(loto._ARGENT_PHRASES_RE.get(lang, loto._ARGENT_PHRASES_RE["fr"]).search(m.lower()))
+                    or bool((loto._ARGENT_MOTS_RE[lang][1] if loto._EURO_GAME_RE.search(m.lower())
+                             else loto._ARGENT_MOTS_RE[lang][0]).search(m.lower())) for m in CORPUS]
+        assert got_loto == [_legacy_argent_loto_tail(m, lang) for m in CORPUS]
+        got_em = [bool(em._ARGENT_PHRASES_EM_RE[lang].search(m.lower()))
+                  or bool((em._ARGENT_MOTS_EM_RE[lang][1] if em._EURO_GAME_RE_EM.search(m.lower())
+                           else em._ARGENT_MOTS_EM_RE[lang][0]).search(m.lower())) for m in CORPUS]
+        assert got_em == [_legacy_argent_em_tail(m, lang) for m in CORPUS]
+
+    @pytest.mark.parametrize("lang", _LANGS)
+    def test_pedagogie_and_score(self, lang):
+        for m in CORPUS:
+            lower = m.lower()
+            assert em._detect_pedagogie_limites_em(m, lang) == any(
+                re.search(p, lower) for p in em._PEDAGOGIE_LIMITES_EM.get(lang, em._PEDAGOGIE_LIMITES_EM["fr"]))
+            assert em._detect_score_question_em(m, lang) == any(
+                re.search(p, lower) for p in em._SCORE_QUESTION_EM.get(lang, em._SCORE_QUESTION_EM["fr"]))
+        assert [loto._detect_pedagogie_limites(m) for m in CORPUS] == [
+            any(re.search(p, m.lower()) for p in loto._PEDAGOGIE_LIMITES_FR) for m in CORPUS]
+        assert [loto._detect_score_question(m) for m in CORPUS] == [
+            any(re.search(p, m.lower()) for p in loto._SCORE_QUESTION_FR) for m in CORPUS]
+
+    def test_temporal_filter(self):
+        assert [temporal._has_temporal_filter(m) for m in CORPUS] == [
+            any(re.search(p, m.lower()) for p in temporal._TEMPORAL_PATTERNS) for m in CORPUS]
+
+
+class TestRouteIntents:
+
+    @pytest.fixture(scope="class")
+    def cfgs(self):
+        from services.chat_pipeline import _build_loto_config
+        from services.chat_pipeline_em import _build_em_config
+        return {"loto": _build_loto_config(), "em": _build_em_config()}
+
+    @pytest.mark.parametrize("game", ["loto", "em"])
+    def test_vector_matches_detectors(self, cfgs, game):
+        cfg = cfgs[game]
+        for message in CORPUS[::7]:
+            s = route_intents(message, "fr", cfg)
+            assert s.insulte == cfg["detect_insulte"](message)
+            assert s.compliment == cfg["detect_compliment"](message)
+            assert s.argent == bool(cfg["detect_argent"](message, "fr"))
+            assert s.generation == bool(cfg["detect_generation"](message))
+            assert s.salutation == bool(cfg["detect_salutation"](message))
+
+    def test_signals(self, cfgs):
+        s = route_intents("Noter le site", "fr", cfgs["loto"])
+        assert isinstance(s, IntentSignals) and s.site_rating and not s.country
+        assert route_intents("Bonjour", "fr", cfgs["loto"]).salutation
+        assert route_intents("t'es nul", "fr", cfgs["loto"]).insulte == "directe"
+        assert route_intents("génère une grille", "fr", cfgs["em"]).generation
+        s = route_intents("t'es nul, le 7 sort souvent ?", "fr", cfgs["loto"])
+        assert s.has_question("t'es nul, le 7 sort souvent ?", ())
+        assert not route_intents("t'es nul", "fr", cfgs["loto"]).has_question("t'es nul", ("combien",))
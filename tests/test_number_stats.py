@@ -0,0 +1,123 @@
+"""
+Tests for services/number_stats.py — per-number rows (appearances, gaps,
+current / mean / max gap, per-year counts) of every number in one pass, and
+get_numero_stats / analyze_number / /stats/number on top of them.
+"""
+
+from collections import Counter
+from datetime import timedelta
+from itertools import pairwise
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from config.engine import EM_CONFIG, LOTO_CONFIG
+from engine.stats import analyze_number
+from services.draw_store import DrawSnapshot, get_draw_store, notify_new_draw
+from services.number_stats import NumberStats, get_number_stats
+from services.stats_service import LOTO_CONFIG as LOTO_STATS_CONFIG
+from tests.conftest import AsyncSmartMockCursor, FAKE_TIRAGES, make_async_conn
+from tests.test_base_stats import TestableStats
+from tests.test_grid_index import _em_rows
+from tests.test_response_snapshots import _get
+
+
+def _enable(cfg, rows):
+    store = get_draw_store(cfg.game)
+    store.enabled = True
+    store.snapshot = DrawSnapshot.from_rows(cfg, rows)
+    store._checked_at = float("inf")  # no freshness check in tests
+    return store.snapshot
+
+
+def _reference(rows, number, cols):
+    rows = sorted(rows, key=lambda r: str(r["date_de_tirage"]))
+    idx = [i for i, r in enumerate(rows) if number in (r[c] for c in cols)]
+    gaps = [b - a for a, b in pairwise(idx)]
+    return {
+        "appearances": len(idx),
+        "dates": tuple(rows[i]["date_de_tirage"] for i in idx),
+        "gaps": tuple(gaps),
+        "current_gap": len(rows) - 1 - idx[-1] if idx else 0,
+        "max_gap": max(gaps, default=0),
+        "per_year": dict(Counter(int(str(rows[i]["date_de_tirage"])[:4]) for i in idx)),
+    }
+
+
+class TestNumberStats:
+
+    @pytest.mark.parametrize("number", [1, 7, 25, 49])
+    def test_balls_match_reference(self, number):
+        stats = NumberStats(DrawSnapshot.from_rows(LOTO_CONFIG, FAKE_TIRAGES), 49, 10)
+        row = stats.number(number)
+        ref = _reference(FAKE_TIRAGES, number, [f"boule_{i}" for i in range(1, 6)])
+        assert {k: getattr(row, k) for k in ref} == ref
+        if len(ref["gaps"]) >= 1:
+            assert row.mean_gap == pytest.approx(sum(ref["gaps"]) / len(ref["gaps"]))
+        assert row.first == (ref["dates"][0] if ref["dates"] else None)
+
+    def test_secondary_null_excluded(self):
+        rows = [dict(r) for r in _em_rows()]
+        rows[-1]["etoile_2"] = None
+        stats = NumberStats(DrawSnapshot.from_rows(EM_CONFIG, rows), 50, 12)
+        for number in range(1, 13):
+            row = stats.number(number, secondary=True)
+            ref = _reference(rows, number, ["etoile_1", "etoile_2"])
+            assert (row.appearances, tuple(map(str, row.dates)), row.current_gap) == (
+                ref["appearances"], ref["dates"], ref["current_gap"])
+        assert stats.appearances(secondary=True).sum() == 2 * len(rows) - 1
+
+    def test_never_drawn(self):
+        stats = NumberStats(DrawSnapshot.from_rows(LOTO_CONFIG, FAKE_TIRAGES[:3]), 49, 10)
+        drawn = {FAKE_TIRAGES[i][f"boule_{j}"] for i in range(3) for j in range(1, 6)}
+        number = min(set(range(1, 50)) - drawn)
+        row = stats.number(number)
+        assert (row.appearances, row.dates, row.current_gap, row.max_gap, row.mean_gap) == (0, (), 0, 0, 0.0)
+        assert row.last is None and row.per_year == {}
+        assert stats.number(99).appearances == 0
+
+    def test_rebuilt_on_new_snapshot(self):
+        assert get_number_stats("loto") is None
+        _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        first = get_number_stats("loto")
+        assert get_number_stats("loto") is first
+        last = FAKE_TIRAGES[-1]
+        _enable(LOTO_CONFIG, FAKE_TIRAGES + [
+            {**last, "date_de_tirage": last["date_de_tirage"] + timedelta(days=3)}])
+        notify_new_draw("loto")
+        second = get_number_stats("loto")
+        assert second is not first and len(second) == len(first) + 1
+
+
+class TestCallers:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("number", [3, 17, 42])
+    async def test_get_numero_stats_store_equals_sql(self, number):
+        svc = TestableStats(LOTO_STATS_CONFIG, make_async_conn(AsyncSmartMockCursor()))
+        sql = await svc.get_numero_stats(number)
+        _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        cursor = MagicMock()
+        cursor.execute.side_effect = AssertionError("no DB access expected")
+        svc = TestableStats(LOTO_STATS_CONFIG, make_async_conn(cursor))
+        assert await svc.get_numero_stats(number) == sql
+
+    @pytest.mark.asyncio
+    async def test_analyze_number_store_path(self):
+        _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        with patch("engine.stats.get_connection", side_effect=AssertionError("no DB access expected")):
+            result = await analyze_number(7)
+        ref = _reference(FAKE_TIRAGES, 7, [f"boule_{i}" for i in range(1, 6)])
+        assert result["total_appearances"] == ref["appearances"]
+        assert result["appearance_dates"] == list(ref["dates"])
+        assert result["current_gap"] == ref["current_gap"]
+        assert result["total_draws"] == len(FAKE_TIRAGES)
+
+    def test_stats_number_route_store_equals_sql(self):
+        sql = _get("/api/loto/stats/number/12", AsyncSmartMockCursor()).json()
+        _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        mem = _get("/api/loto/stats/number/12", AsyncSmartMockCursor()).json()
+        for key in ("total_appearances", "first_appearance", "last_appearance",
+                    "current_gap", "appearance_dates"):
+            assert mem[key] == sql[key]
+        assert mem["success"] is True
@@ -64,8 +64,8 @@ def _make_stats(rows):
 async def test_hot_pairs_returns_10():
     """Hot pairs returns 10 results with correct structure."""
     svc = _make_stats(_HOT_ROWS)
-    with patch("services.base_stats.cache_get", new_callable=AsyncMock, return_value=None), \
-         patch("services.base_stats.cache_set", new_callable=AsyncMock):
+    with patch("services.cache.cache_get", new_callable=AsyncMock, return_value=None), \
+         patch("services.cache.cache_set", new_callable=AsyncMock):
         result = await svc.get_pair_correlations(top_n=10, order="hot")
     assert result is not None
     assert len(result["pairs"]) == 10
@@ -76,8 +76,8 @@ async def test_hot_pairs_returns_10():
 async def test_cold_pairs_returns_10():
     """Cold pairs returns 10 results."""
     svc = _make_stats(_COLD_ROWS)
-    with patch("services.base_stats.cache_get", new_callable=AsyncMock, return_value=None), \
-         patch("services.base_stats.cache_set", new_callable=AsyncMock):
+    with patch("services.cache.cache_get", new_callable=AsyncMock, return_value=None), \
+         patch("services.cache.cache_set", new_callable=AsyncMock):
         result = await svc.get_pair_correlations(top_n=10, order="cold")
     assert result is not None
     assert len(result["pairs"]) == 10
@@ -87,8 +87,8 @@ async def test_cold_pairs_returns_10():
 async def test_pairs_n1_less_than_n2():
     """All pairs have num_a < num_b (LEAST/GREATEST normalization)."""
     svc = _make_stats(_HOT_ROWS)
-    with patch("services.base_stats.cache_get", new_callable=AsyncMock, return_value=None), \
-         patch("services.base_stats.cache_set", new_callable=AsyncMock):
+    with patch("services.cache.cache_get", new_callable=AsyncMock, return_value=None), \
+         patch("services.cache.cache_set", new_callable=AsyncMock):
         result = await svc.get_pair_correlations(top_n=10, order="hot")
     for p in result["pairs"]:
         assert p["num_a"] < p["num_b"], f"{p['num_a']} should be < {p['num_b']}"
@@ -98,8 +98,8 @@ async def test_pairs_n1_less_than_n2():
 async def test_hot_sorted_desc():
     """Hot pairs are sorted by count descending."""
     svc = _make_stats(_HOT_ROWS)
-    with patch("services.base_stats.cache_get", new_callable=AsyncMock, return_value=None), \
-         patch("services.base_stats.cache_set", new_callable=AsyncMock):
+    with patch("services.cache.cache_get", new_callable=AsyncMock, return_value=None), \
+         patch("services.cache.cache_set", new_callable=AsyncMock):
         result = await svc.get_pair_correlations(top_n=10, order="hot")
     counts = [p["count"] for p in result["pairs"]]
     assert counts == sorted(counts, reverse=True)
@@ -109,8 +109,8 @@ async def test_hot_sorted_desc():
 async def test_cold_sorted_asc():
     """Cold pairs are sorted by count ascending."""
     svc = _make_stats(_COLD_ROWS)
-    with patch("services.base_stats.cache_get", new_callable=AsyncMock, return_value=None), \
-         patch("services.base_stats.cache_set", new_callable=AsyncMock):
+    with patch("services.cache.cache_get", new_callable=AsyncMock, return_value=None), \
+         patch("services.cache.cache_set", new_callable=AsyncMock):
         result = await svc.get_pair_correlations(top_n=10, order="cold")
     counts = [p["count"] for p in result["pairs"]]
     assert counts == sorted(counts)
@@ -120,8 +120,8 @@ async def test_cold_sorted_asc():
 async def test_pairs_have_percentage_and_rank():
     """Each pair has percentage and rank fields."""
     svc = _make_stats(_HOT_ROWS[:3])
-    with patch("services.base_stats.cache_get", new_callable=AsyncMock, return_value=None), \
-         patch("services.base_stats.cache_set", new_callable=AsyncMock):
+    with patch("services.cache.cache_get", new_callable=AsyncMock, return_value=None), \
+         patch("services.cache.cache_set", new_callable=AsyncMock):
         result = await svc.get_pair_correlations(top_n=3, order="hot")
     for p in result["pairs"]:
         assert "percentage" in p
@@ -140,8 +140,8 @@ async def test_cache_key_includes_order():
         cache_keys.append(key)
         return None
 
-    with patch("services.base_stats.cache_get", side_effect=mock_cache_get), \
-         patch("services.base_stats.cache_set", new_callable=AsyncMock):
+    with patch("services.cache.cache_get", side_effect=mock_cache_get), \
+         patch("services.cache.cache_set", new_callable=AsyncMock):
         await svc.get_pair_correlations(top_n=10, order="hot")
         await svc.get_pair_correlations(top_n=10, order="cold")
 
@@ -180,8 +180,8 @@ def _make_single_pair_stats(pair_count, rank_better, total_pairs):
 async def test_single_pair_returns_correct_data():
     """get_single_pair returns count, percentage, rank for a specific pair."""
     svc = _make_single_pair_stats(pair_count=19, rank_better=0, total_pairs=1176)
-    with patch("services.base_stats.cache_get", new_callable=AsyncMock, return_value=None), \
-         patch("services.base_stats.cache_set", new_callable=AsyncMock):
+    with patch("services.cache.cache_get", new_callable=AsyncMock, return_value=None), \
+         patch("services.cache.cache_set", new_callable=AsyncMock):
         result = await svc.get_single_pair(n1=7, n2=11)
     assert result is not None
     assert result["n1"] == 7
@@ -197,8 +197,8 @@ async def test_single_pair_returns_correct_data():
 async def test_single_pair_normalizes_order():
     """get_single_pair normalizes n1 < n2 even if called with n1 > n2."""
     svc = _make_single_pair_stats(pair_count=5, rank_better=50, total_pairs=1176)
-    with patch("services.base_stats.cache_get", new_callable=AsyncMock, return_value=None), \
-         patch("services.base_stats.cache_set", new_callable=AsyncMock):
+    with patch("services.cache.cache_get", new_callable=AsyncMock, return_value=None), \
+         patch("services.cache.cache_set", new_callable=AsyncMock):
         result = await svc.get_single_pair(n1=30, n2=3)
     assert result["n1"] == 3
     assert result["n2"] == 30
@@ -208,14 +208,14 @@ async def test_single_pair_normalizes_order():
 async def test_single_pair_rank_coherent():
     """Rank 1 means no pair has higher count (0 better)."""
     svc = _make_single_pair_stats(pair_count=19, rank_better=0, total_pairs=1176)
-    with patch("services.base_stats.cache_get", new_callable=AsyncMock, return_value=None), \
-         patch("services.base_stats.cache_set", new_callable=AsyncMock):
+    with patch("services.cache.cache_get", new_callable=AsyncMock, return_value=None), \
+         patch("services.cache.cache_set", new_callable=AsyncMock):
         result = await svc.get_single_pair(n1=7, n2=11)
     assert result["rank"] == 1
 
     svc2 = _make_single_pair_stats(pair_count=10, rank_better=25, total_pairs=1176)
-    with patch("services.base_stats.cache_get", new_callable=AsyncMock, return_value=None), \
-         patch("services.base_stats.cache_set", new_callable=AsyncMock):
+    with patch("services.cache.cache_get", new_callable=AsyncMock, return_value=None), \
+         patch("services.cache.cache_set", new_callable=AsyncMock):
         result2 = await svc2.get_single_pair(n1=1, n2=2)
     assert result2["rank"] == 26  # 25 better → rank 26
 
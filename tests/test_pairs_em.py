@@ -56,8 +56,8 @@ _STAR_ROWS = [
 async def test_em_hot_pairs_returns_10():
     """EM hot ball pairs returns 10 results."""
     svc = _make_em_stats(_BALL_ROWS)
-    with patch("services.base_stats.cache_get", new_callable=AsyncMock, return_value=None), \
-         patch("services.base_stats.cache_set", new_callable=AsyncMock):
+    with patch("services.cache.cache_get", new_callable=AsyncMock, return_value=None), \
+         patch("services.cache.cache_set", new_callable=AsyncMock):
         result = await svc.get_pair_correlations(top_n=10, order="hot")
     assert result is not None
     assert len(result["pairs"]) == 10
@@ -67,8 +67,8 @@ async def test_em_hot_pairs_returns_10():
 async def test_em_cold_pairs_returns_10():
     """EM cold ball pairs returns 10 results."""
     svc = _make_em_stats(_BALL_ROWS)
-    with patch("services.base_stats.cache_get", new_callable=AsyncMock, return_value=None), \
-         patch("services.base_stats.cache_set", new_callable=AsyncMock):
+    with patch("services.cache.cache_get", new_callable=AsyncMock, return_value=None), \
+         patch("services.cache.cache_set", new_callable=AsyncMock):
         result = await svc.get_pair_correlations(top_n=10, order="cold")
     assert result is not None
     assert len(result["pairs"]) == 10
@@ -80,8 +80,8 @@ async def test_em_cold_pairs_returns_10():
 async def test_em_star_pairs_hot():
     """EM hot star pairs returns results."""
     svc = _make_em_stats(_STAR_ROWS)
-    with patch("services.base_stats.cache_get", new_callable=AsyncMock, return_value=None), \
-         patch("services.base_stats.cache_set", new_callable=AsyncMock):
+    with patch("services.cache.cache_get", new_callable=AsyncMock, return_value=None), \
+         patch("services.cache.cache_set", new_callable=AsyncMock):
         result = await svc.get_star_pair_correlations(top_n=10, order="hot")
     assert result is not None
     assert len(result["pairs"]) == 10
@@ -106,8 +106,8 @@ async def test_em_single_star_pair():
     ctx.__aexit__ = AsyncMock(return_value=False)
     svc._get_connection = MagicMock(return_value=ctx)
 
-    with patch("services.base_stats.cache_get", new_callable=AsyncMock, return_value=None), \
-         patch("services.base_stats.cache_set", new_callable=AsyncMock):
+    with patch("services.cache.cache_get", new_callable=AsyncMock, return_value=None), \
+         patch("services.cache.cache_set", new_callable=AsyncMock):
         result = await svc.get_single_star_pair(s1=3, s2=7)
 
     assert result is not None
@@ -151,7 +151,7 @@ async def test_em_ball_range_50():
     """EM ball pairs should work with numbers up to 50 (not 49 like Loto)."""
     rows = [{"num_a": 42, "num_b": 50, "pair_count": 7}]
     svc = _make_em_stats(rows)
-    with patch("services.base_stats.cache_get", new_callable=AsyncMock, return_value=None), \
-         patch("services.base_stats.cache_set", new_callable=AsyncMock):
+    with patch("services.cache.cache_get", new_callable=AsyncMock, return_value=None), \
+         patch("services.cache.cache_set", new_callable=AsyncMock):
         result = await svc.get_pair_correlations(top_n=1, order="hot")
     assert result["pairs"][0]["num_b"] == 50
@@ -0,0 +1,126 @@
+"""
+Tests for services/prompt_cache.py and the prompt_loader file cache — system
+prompt layers assembled once per (game, lang, base, draw count, date,
+pedagogical flag), prompt files re-read only when their mtime/size change.
+"""
+
+import hashlib
+import os
+import sys
+from contextlib import ExitStack
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Ensure DB env vars for import safety
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASS", "test")
+os.environ.setdefault("DB_NAME", "test")
+
+import services.prompt_cache as prompt_cache
+import services.prompt_loader as prompt_loader
+from services.chat_pipeline import _prepare_chat_context
+from services.chat_pipeline_shared import ANTI_REINTRO_BLOCK, _assemble_system_prompt, _build_temporal_anchor
+from services.prompt_cache import get_assembled_prompt, prompt_cache_stats
+from services.stats_analysis import PEDAGOGICAL_CONTEXT
+
+
+@pytest.fixture(autouse=True)
+def _clear_files():
+    prompt_loader.clear_prompt_files()
+    yield
+    prompt_loader.clear_prompt_files()
+
+
+def _touch(path, text, mtime):
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(mtime, mtime))
+
+
+class TestPromptFiles:
+
+    def test_same_object_until_file_changes(self, tmp_path):
+        path = tmp_path / "p.txt"
+        _touch(path, "v1", 1_000_000_000)
+        first = prompt_loader._read_prompt_file(str(path))
+        assert first == "v1" and prompt_loader._read_prompt_file(str(path)) is first
+        _touch(path, "v2", 2_000_000_000)
+        assert prompt_loader._read_prompt_file(str(path)) == "v2"
+
+    def test_missing_file(self, tmp_path):
+        assert prompt_loader._read_prompt_file(str(tmp_path / "absent.txt")) is None
+
+    def test_load_prompt_em_sees_edits_and_fallback(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(prompt_loader, "PROMPTS_DIR", str(tmp_path))
+        (tmp_path / "em" / "en").mkdir(parents=True)
+        path = tmp_path / "em" / "en" / "x.txt"
+        _touch(path, "hello", 1_000_000_000)
+        assert prompt_loader.load_prompt_em("x", "de") == "hello"
+        _touch(path, "hello v2", 2_000_000_000)
+        assert prompt_loader.load_prompt_em("x", "de") == "hello v2"
+
+    def test_load_prompt_unchanged(self):
+        text = prompt_loader.load_prompt("CHATBOT")
+        with open(prompt_loader.PROMPT_MAP["CHATBOT"], encoding="utf-8") as f:
+            assert text == f.read()
+        assert prompt_loader.load_prompt("CHATBOT") is text
+
+
+class TestAssembledPrompt:
+
+    def test_built_once_interned_and_hashed(self):
+        build = MagicMock(return_value="".join(["sys", "tem"]))
+        first = get_assembled_prompt(("loto", "fr", "base", 900, date(2026, 5, 1), False), build)
+        second = get_assembled_prompt(("loto", "fr", "base", 900, date(2026, 5, 1), False), build)
+        assert second is first and build.call_count == 1
+        assert first.text is sys.intern("system")
+        assert first.hash == hashlib.sha256(b"system").hexdigest()
+        assert prompt_cache_stats() == {"size": 1, "hits": 1, "misses": 1}
+
+    def test_fifo_eviction(self, monkeypatch):
+        monkeypatch.setattr(prompt_cache, "_MAXSIZE", 4)
+        for i in range(5):
+            get_assembled_prompt(("k", i), lambda i=i: f"p{i}")
+        assert prompt_cache_stats()["size"] == 4
+        assert ("k", 0) not in prompt_cache._assembled
+
+    @pytest.mark.parametrize("lang,pedagogical", [("fr", False), ("en", True)])
+    def test_layers_match_former_concatenation(self, lang, pedagogical):
+        today = date(2026, 5, 26)
+        text = _assemble_system_prompt("Base {DRAW_COUNT} tirages", lang, 980, today, pedagogical)
+        assert text.startswith("Base 980 tirages")
+        assert ("[LANGUE — RÈGLE OBLIGATOIRE]" in text) == (lang != "fr")
+        assert _build_temporal_anchor(today) + ANTI_REINTRO_BLOCK in text
+        assert text.endswith(PEDAGOGICAL_CONTEXT if pedagogical else ANTI_REINTRO_BLOCK)
+
+
+_NO_PHASE = {
+    "_detect_insulte": None, "_detect_compliment": None, "_detect_generation": False,
+    "_detect_argent": False, "_is_short_continuation": False, "_detect_prochain_tirage": False,
+    "_detect_tirage": None, "_has_temporal_filter": False, "_detect_grille": (None, None),
+    "_detect_requete_complexe": None, "_detect_cooccurrence_high_n": False,
+    "_detect_triplets": False, "_detect_paires": False, "_detect_out_of_range": (None, None),
+    "_detect_numero": (None, None), "_generate_sql": None, "_build_session_context": "",
+}
+
+
+class TestPipeline:
+
+    @pytest.mark.asyncio
+    async def test_second_message_reuses_assembled_prompt(self):
+        ctxs = []
+        with ExitStack() as stack:
+            stack.enter_context(patch("services.chat_pipeline.load_prompt", return_value="Tu es HYBRIDE."))
+            for name, value in _NO_PHASE.items():
+                stack.enter_context(patch(f"services.chat_pipeline.{name}", return_value=value))
+            for message in ("quel est le numéro le plus fréquent ?", "et le moins fréquent ?"):
+                early, ctx = await _prepare_chat_context(
+                    message, [SimpleNamespace(role="user", content="bonjour")], "accueil", MagicMock())
+                assert early is None
+                ctxs.append(ctx)
+        assert ctxs[0]["system_prompt"] is ctxs[1]["system_prompt"]
+        assert ctxs[0]["system_prompt_hash"] == hashlib.sha256(
+            ctxs[0]["system_prompt"].encode("utf-8")).hexdigest()
+        assert prompt_cache_stats()["hits"] == 1
@@ -0,0 +1,119 @@
+"""
+Tests for services/request_coalescer.py — identical concurrent GET requests
+share one handler execution and one serialized body (@coalesce).
+"""
+
+import asyncio
+import json
+from enum import Enum
+
+import pytest
+from fastapi.responses import JSONResponse
+from starlette.requests import Request
+
+from services.request_coalescer import coalesce, coalescer_stats
+from tests.conftest import AsyncSmartMockCursor
+from tests.test_response_snapshots import _get
+
+
+class _Game(str, Enum):
+    loto = "loto"
+
+
+def _request(headers=()):
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": b"",
+                    "headers": [(k.encode(), v.encode()) for k, v in headers]})
+
+
+def _handler(calls, gate, result=None, exc=None):
+    @coalesce
+    async def handler(request: Request, game: _Game, window: str = "GLOBAL"):
+        calls.append((game, window))
+        await gate.wait()
+        if exc is not None:
+            raise exc
+        return result if result is not None else {"game": game, "window": window}
+    return handler
+
+
+async def _gather_open(gate, *coros):
+    tasks = [asyncio.ensure_future(c) for c in coros]
+    await asyncio.sleep(0)
+    gate.set()
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class TestCoalesce:
+
+    @pytest.mark.asyncio
+    async def test_identical_calls_share_one_execution(self):
+        calls, gate = [], asyncio.Event()
+        handler = _handler(calls, gate)
+        responses = await _gather_open(
+            gate, *(handler(request=_request(), game=_Game.loto) for _ in range(5)),
+            handler(_request(), "loto", "GLOBAL"))
+        assert len(calls) == 1
+        assert {r.body for r in responses} == {b'{"game":"loto","window":"GLOBAL"}'}
+        assert len({id(r) for r in responses}) == 6  # one Response per caller
+        assert responses[0].headers["content-type"] == "application/json"
+        stats = coalescer_stats()
+        assert stats["saved"] == 5 and stats["in_flight"] == 0
+        assert stats["handlers"]["handler"] == {"executions": 1, "coalesced": 5, "errors": 0}
+
+    @pytest.mark.asyncio
+    async def test_distinct_params_and_etag_not_shared(self):
+        calls, gate = [], asyncio.Event()
+        handler = _handler(calls, gate)
+        responses = await _gather_open(
+            gate,
+            handler(request=_request(), game=_Game.loto),
+            handler(request=_request(), game=_Game.loto, window="2A"),
+            handler(request=_request([("if-none-match", '"abc"')]), game=_Game.loto))
+        assert len(calls) == 3
+        assert json.loads(responses[1].body)["window"] == "2A"
+
+    @pytest.mark.asyncio
+    async def test_error_propagates_to_every_caller(self):
+        calls, gate = [], asyncio.Event()
+        handler = _handler(calls, gate, exc=ValueError("boom"))
+        results = await _gather_open(
+            gate, *(handler(request=_request(), game=_Game.loto) for _ in range(3)))
+        assert len(calls) == 1
+        assert all(isinstance(r, ValueError) for r in results)
+        assert coalescer_stats()["handlers"]["handler"]["errors"] == 1
+        assert coalescer_stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_sequential_calls_execute_again(self):
+        calls, gate = [], asyncio.Event()
+        gate.set()
+        handler = _handler(calls, gate, result=JSONResponse({"x": 1}, status_code=503,
+                                                            headers={"Retry-After": "5"}))
+        first = await handler(request=_request(), game=_Game.loto)
+        second = await handler(request=_request(), game=_Game.loto)
+        assert len(calls) == 2
+        assert first.status_code == second.status_code == 503
+        assert second.headers["retry-after"] == "5"
+        assert second.headers["content-length"] == str(len(second.body))
+
+    @pytest.mark.asyncio
+    async def test_first_caller_cancelled_others_still_served(self):
+        calls, gate = [], asyncio.Event()
+        handler = _handler(calls, gate)
+        first = asyncio.ensure_future(handler(request=_request(), game=_Game.loto))
+        second = asyncio.ensure_future(handler(request=_request(), game=_Game.loto))
+        await asyncio.sleep(0)
+        first.cancel()
+        gate.set()
+        response = await second
+        assert first.cancelled() and response.status_code == 200
+        assert len(calls) == 1
+
+
+class TestRoutes:
+
+    def test_route_response_unchanged(self):
+        resp = _get("/api/loto/stats", AsyncSmartMockCursor())
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "application/json"
+        assert coalescer_stats()["handlers"]["unified_stats"]["executions"] == 1
@@ -0,0 +1,122 @@
+"""
+Tests for services/response_snapshots.py — /stats, /numbers-heat, /stats/top-flop
+rendered once per draw from the draw store, ETag / If-None-Match → 304.
+"""
+
+import json
+from collections import Counter
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from config.engine import EM_CONFIG, LOTO_CONFIG
+from services.draw_store import DrawSnapshot, get_draw_store, notify_new_draw
+from services.response_snapshots import ResponseSnapshot, get_response_snapshot
+from tests.conftest import AsyncSmartMockCursor, FAKE_TIRAGES, make_async_conn
+from tests.test_grid_index import _em_rows
+from tests.test_table_summary import _env, _static, _static_call
+
+_PATHS = ("/api/loto/stats", "/api/loto/numbers-heat", "/api/loto/stats/top-flop")
+
+
+def _enable(cfg, rows):
+    store = get_draw_store(cfg.game)
+    store.enabled = True
+    store.snapshot = DrawSnapshot.from_rows(cfg, rows)
+    store._checked_at = float("inf")  # no freshness check in tests
+    return store.snapshot
+
+
+def _get(path, cursor, headers=None):
+    with _env, _static, _static_call, patch("routes.api_data_unified.db_cloudsql") as mock_db:
+        mock_db.get_connection = lambda: make_async_conn(cursor)
+        import main as main_mod
+        client = TestClient(main_mod.app, raise_server_exceptions=False)
+        return client.get(path, headers=headers)
+
+
+def _no_db_cursor():
+    cursor = MagicMock()
+    cursor.execute.side_effect = AssertionError("no DB access expected")
+    return cursor
+
+
+class TestResponseSnapshot:
+
+    def test_etag_matching(self):
+        snap = ResponseSnapshot.render("2026-01-01", {"a": 1})
+        assert snap.body == b'{"a":1}'
+        assert snap.matches(snap.etag)
+        assert snap.matches(f'"other", W/{snap.etag}')
+        assert snap.matches("*")
+        assert not snap.matches('"other"')
+        assert not snap.matches(None)
+        assert ResponseSnapshot.render("2026-01-02", {"a": 1}).etag == snap.etag
+
+    @pytest.mark.asyncio
+    async def test_rendered_once_per_draw_version(self):
+        assert await get_response_snapshot(LOTO_CONFIG, "k", lambda s: {}) is None  # store disabled
+        _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        calls = []
+
+        def render(snap):
+            calls.append(snap.version)
+            return {"version": snap.version}
+
+        first = await get_response_snapshot(LOTO_CONFIG, "k", render)
+        assert await get_response_snapshot(LOTO_CONFIG, "k", render) is first
+        last = FAKE_TIRAGES[-1]
+        _enable(LOTO_CONFIG, FAKE_TIRAGES + [
+            {**last, "date_de_tirage": last["date_de_tirage"] + timedelta(days=3)}])
+        notify_new_draw("loto")
+        second = await get_response_snapshot(LOTO_CONFIG, "k", render)
+        assert second.version > first.version and second.etag != first.etag
+        assert len(calls) == 2
+
+
+class TestRoutes:
+
+    @pytest.mark.parametrize("path", _PATHS)
+    def test_snapshot_equals_sql_path(self, path):
+        sql = _get(path, AsyncSmartMockCursor())
+        assert "etag" not in sql.headers
+        _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        mem = _get(path, _no_db_cursor())
+        assert mem.status_code == 200
+        assert mem.json() == sql.json()
+        assert mem.headers["content-type"] == "application/json"
+
+    @pytest.mark.parametrize("path", _PATHS)
+    def test_if_none_match_304(self, path):
+        _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        etag = _get(path, _no_db_cursor()).headers["etag"]
+        resp = _get(path, _no_db_cursor(), headers={"If-None-Match": etag})
+        assert resp.status_code == 304 and resp.content == b""
+        assert resp.headers["etag"] == etag
+        assert _get(path, _no_db_cursor(), headers={"If-None-Match": '"stale"'}).status_code == 200
+
+    def test_em_etoiles(self):
+        rows = _em_rows()
+        _enable(EM_CONFIG, rows)
+        stars = Counter(r[c] for r in rows for c in ("etoile_1", "etoile_2"))
+        last = {}
+        for r in sorted(rows, key=lambda r: r["date_de_tirage"]):
+            for c in ("etoile_1", "etoile_2"):
+                last[r[c]] = str(r["date_de_tirage"])
+
+        stats = _get("/api/euromillions/stats", _no_db_cursor()).json()["data"]
+        assert stats["frequences_etoiles"] == {str(n): stars.get(n, 0) for n in range(1, 13)}
+        heat = _get("/api/euromillions/numbers-heat", _no_db_cursor()).json()
+        assert {int(n): e["last_draw"] for n, e in heat["etoiles"].items()} == {
+            n: last.get(n) for n in range(1, 13)}
+        top_flop = _get("/api/euromillions/stats/top-flop", _no_db_cursor()).json()
+        assert [e["number"] for e in top_flop["top_etoiles"]] == sorted(
+            range(1, 13), key=lambda n: (-stars.get(n, 0), n))
+
+    def test_body_is_json_response_bytes(self):
+        _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        resp = _get("/api/loto/stats/top-flop", _no_db_cursor())
+        assert resp.content == json.dumps(
+            resp.json(), ensure_ascii=False, separators=(",", ":")).encode()
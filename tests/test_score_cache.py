@@ -0,0 +1,129 @@
+"""
+Tests for services/score_cache.py — draw-versioned HYBRIDE score cache.
+"""
+
+import dataclasses
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from config.engine import LOTO_CONFIG, EM_CONFIG
+from engine.hybride_base import HybrideEngine
+from services import score_cache
+from services.draw_store import notify_new_draw
+from services.score_cache import (
+    config_fingerprint,
+    get_cached_scores,
+    set_cached_scores,
+)
+from tests.conftest import FAKE_TIRAGES, AsyncSmartMockCursor, make_async_conn
+
+
+class TestFingerprint:
+
+    def test_stable(self):
+        assert config_fingerprint(LOTO_CONFIG) == config_fingerprint(LOTO_CONFIG)
+
+    def test_differs_per_game_and_variant(self):
+        variant = dataclasses.replace(LOTO_CONFIG, poids_retard=0.25)
+        fps = {config_fingerprint(LOTO_CONFIG), config_fingerprint(EM_CONFIG), config_fingerprint(variant)}
+        assert len(fps) == 3
+
+
+class TestGetSet:
+
+    @pytest.mark.asyncio
+    async def test_roundtrip_returns_copy(self):
+        await set_cached_scores(LOTO_CONFIG, "balls", "balanced", "2026-01-01", {1: 0.5, 2: 0.25})
+        got = await get_cached_scores(LOTO_CONFIG, "balls", "balanced", "2026-01-01")
+        assert got == {1: 0.5, 2: 0.25}
+        got[1] = 99.0
+        assert (await get_cached_scores(LOTO_CONFIG, "balls", "balanced", "2026-01-01"))[1] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_key_isolation(self):
+        await set_cached_scores(LOTO_CONFIG, "balls", "balanced", "2026-01-01", {1: 0.5})
+        assert await get_cached_scores(LOTO_CONFIG, "balls", "recent", "2026-01-01") is None
+        assert await get_cached_scores(LOTO_CONFIG, "secondary", "balanced", "2026-01-01") is None
+        assert await get_cached_scores(LOTO_CONFIG, "balls", "balanced", "2026-01-04") is None
+
+    @pytest.mark.asyncio
+    async def test_redis_payload_int_keys_restored(self):
+        """L2 hit (JSON → str keys) is converted back to int keys."""
+        key = score_cache._key(LOTO_CONFIG, "balls", "balanced", "2026-01-01")
+        payload = json.loads(json.dumps({1: 0.5, 49: 0.1}))
+        with patch("services.score_cache.cache_get", new=AsyncMock(return_value=payload)) as m:
+            got = await get_cached_scores(LOTO_CONFIG, "balls", "balanced", "2026-01-01")
+        m.assert_awaited_once_with(key)
+        assert got == {1: 0.5, 49: 0.1}
+
+    @pytest.mark.asyncio
+    async def test_new_draw_invalidates_local_tier(self):
+        await set_cached_scores(LOTO_CONFIG, "balls", "balanced", "2026-01-01", {1: 0.5})
+        await set_cached_scores(EM_CONFIG, "balls", "balanced", "2026-01-01", {1: 0.5})
+        notify_new_draw("loto")
+        assert not any(k.startswith("hybride_scores:loto:") for k in score_cache._local)
+        assert any(k.startswith("hybride_scores:em:") for k in score_cache._local)
+
+
+class TestEngineIntegration:
+
+    @pytest.mark.asyncio
+    async def test_second_call_skips_scoring(self):
+        engine = HybrideEngine(LOTO_CONFIG)
+        async with make_async_conn(AsyncSmartMockCursor()) as conn:
+            first = await engine.scores_hybrides_cached(conn, mode="balanced")
+            with patch.object(engine, "calculer_scores_hybrides", new=AsyncMock()) as calc:
+                second = await engine.scores_hybrides_cached(conn, mode="balanced")
+        calc.assert_not_awaited()
+        assert first == second
+
+    @pytest.mark.asyncio
+    async def test_matches_uncached(self):
+        engine = HybrideEngine(LOTO_CONFIG)
+        async with make_async_conn(AsyncSmartMockCursor()) as conn:
+            raw = await engine.calculer_scores_hybrides_secondary(conn, mode="recent")
+            cached = await engine.scores_hybrides_cached(conn, mode="recent", secondary=True)
+        assert raw == cached
+
+    @pytest.mark.asyncio
+    async def test_unknown_version_not_cached(self):
+        engine = HybrideEngine(LOTO_CONFIG)
+        cursor = AsyncSmartMockCursor()
+        cursor._tirages = []  # empty table → MAX(date) NULL
+        async with make_async_conn(cursor) as conn:
+            await engine.scores_hybrides_cached(conn, mode="balanced")
+        assert score_cache._local == {}
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("partial, suffix", [(1, "~partial"), (0, "")])
+    async def test_sql_version_marks_partial_import(self, partial, suffix):
+        """Sans draw store : la version SQL porte ~partial tant que le N° chance manque."""
+        engine = HybrideEngine(LOTO_CONFIG)
+        latest = FAKE_TIRAGES[-1]["date_de_tirage"]
+        cursor = AsyncSmartMockCursor()
+        cursor.fetchone = AsyncMock(return_value={"max_date": latest, "partial": partial})
+        async with make_async_conn(cursor) as conn:
+            version = await engine._draw_version(conn)
+        assert version == latest.isoformat() + suffix
+
+
+class TestDecayHook:
+
+    @pytest.mark.asyncio
+    async def test_check_and_update_decay_notifies(self):
+        from services.decay_state import check_and_update_decay
+        cursor = AsyncMock()
+        cursor.fetchone = AsyncMock(side_effect=[
+            {"date_de_tirage": "2026-01-03"},
+            {"last_update": None, "last_drawn_date": "2026-01-01"},
+            {"boule_1": 1, "boule_2": 2, "boule_3": 3, "boule_4": 4, "boule_5": 5,
+             "etoile_1": 1, "etoile_2": 2},
+        ])
+        conn = AsyncMock()
+        conn.cursor = AsyncMock(return_value=cursor)
+        with patch("services.decay_state.notify_new_draw") as notify, \
+             patch("services.decay_state.update_decay_after_draw", new=AsyncMock(return_value={})):
+            await check_and_update_decay(conn, "euromillions", "tirages_euromillions")
+        notify.assert_called_once_with("em")
@@ -0,0 +1,133 @@
+"""
+Tests for services/selection_writer.py — write-behind of /generate canonical grids.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from services.selection_writer import SelectionWriter
+
+_TARGET = date(2026, 4, 22)
+_GRID = {"ball": [3, 12, 30, 36, 42], "chance": [2]}
+
+
+def _conn_factory(fail=False):
+    cursor = MagicMock()
+    cursor.execute = AsyncMock(side_effect=RuntimeError("db down") if fail else None)
+    conn = MagicMock()
+    conn.cursor = AsyncMock(return_value=cursor)
+    conn.commit = AsyncMock()
+
+    @asynccontextmanager
+    async def _get_connection():
+        yield conn
+
+    return _get_connection, conn, cursor
+
+
+@pytest.fixture(autouse=True)
+def _materialize(monkeypatch):
+    mock = AsyncMock()
+    monkeypatch.setattr("services.selection_writer.materialize_after_selection", mock)
+    return mock
+
+
+class TestSelectionWriter:
+
+    def test_enqueue_no_io_one_grid_id_per_grid(self):
+        writer = SelectionWriter()
+        g1 = writer.enqueue("loto", _TARGET, _GRID)
+        g2 = writer.enqueue("loto", _TARGET, {"ball": [1, None, "x", 4], "chance": 7, "bogus": [1]})
+        assert g1 != g2
+        assert writer.pending == 6 + 3
+        assert {r[4] for r in writer._rows} == {g1, g2}
+
+    @pytest.mark.asyncio
+    async def test_flush_multi_row_insert_single_commit(self):
+        writer = SelectionWriter()
+        for _ in range(3):
+            writer.enqueue("loto", _TARGET, _GRID)
+        get_connection, conn, cursor = _conn_factory()
+        assert await writer.flush(get_connection) == 18
+        assert cursor.execute.await_count == 1
+        query, params = cursor.execute.await_args.args
+        assert query.startswith("INSERT IGNORE INTO hybride_selection_history")
+        assert query.count("'generator'") == 18
+        # V137: grid_id + selected_at = request time (age in queue, DB clock)
+        assert "NOW() - INTERVAL %s SECOND" in query
+        assert params[:4] == ("loto", 3, "ball", _TARGET) and 0 <= params[5] < 1
+        conn.commit.assert_awaited_once()
+        assert writer.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_flush_chunks_large_batches(self):
+        writer = SelectionWriter(max_rows=10)
+        for _ in range(3):
+            writer.enqueue("loto", _TARGET, _GRID)
+        get_connection, conn, cursor = _conn_factory()
+        assert await writer.flush(get_connection) == 18
+        assert cursor.execute.await_count == 2
+        conn.commit.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_requeues_rows(self):
+        writer = SelectionWriter()
+        writer.enqueue("euromillions", _TARGET, {"ball": [1, 2, 3, 4, 5], "star": [6, 7]})
+        get_connection, _, _ = _conn_factory(fail=True)
+        assert await writer.flush(get_connection) == 0
+        assert writer.pending == 7
+        get_connection, _, cursor = _conn_factory()
+        assert await writer.flush(get_connection) == 7
+        assert writer.pending == 0
+
+    def test_queue_bounded(self):
+        writer = SelectionWriter(max_pending=10)
+        first = writer.enqueue("loto", _TARGET, _GRID)
+        second = writer.enqueue("loto", _TARGET, _GRID)
+        assert writer.pending == 10
+        # newest rows dropped: the queued grids keep their place
+        assert sum(1 for r in writer._rows if r[4] == first) == 6
+        assert sum(1 for r in writer._rows if r[4] == second) == 4
+
+    @pytest.mark.asyncio
+    async def test_selected_at_offset_keeps_sub_second_order(self, monkeypatch):
+        clock = iter([10.2, 10.7, 11.5])
+        monkeypatch.setattr("services.selection_writer.time", SimpleNamespace(monotonic=lambda: next(clock)))
+        writer = SelectionWriter()
+        writer.enqueue("loto", _TARGET, _GRID)
+        writer.enqueue("loto", _TARGET, _GRID)
+        get_connection, _, cursor = _conn_factory()
+        assert await writer.flush(get_connection) == 12
+        _, params = cursor.execute.await_args.args
+        assert params[5::6] == (1.3,) * 6 + (0.8,) * 6
+
+    @pytest.mark.asyncio
+    async def test_size_threshold_triggers_flush(self, monkeypatch):
+        get_connection, _, cursor = _conn_factory()
+        writer = SelectionWriter(max_rows=12)
+        monkeypatch.setattr("db_cloudsql.get_connection", get_connection)
+        writer.enqueue("loto", _TARGET, _GRID)
+        assert writer._flush_task is None
+        writer.enqueue("loto", _TARGET, _GRID)
+        await asyncio.wait_for(writer._flush_task, 1)
+        assert cursor.execute.await_count == 1
+        assert writer.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_brake_maps_materialized_once_per_target(self, _materialize):
+        writer = SelectionWriter()
+        get_connection, conn, _ = _conn_factory()
+        writer.enqueue("loto", _TARGET, _GRID)
+        writer.enqueue("loto", _TARGET, _GRID)
+        await writer.flush(get_connection)
+        writer.enqueue("loto", _TARGET, _GRID)
+        writer.enqueue("euromillions", _TARGET, {"ball": [1, 2, 3, 4, 5], "star": [6, 7]})
+        await writer.flush(get_connection)
+        assert sorted(c.args[1:] for c in _materialize.await_args_list) == [
+            ("euromillions", _TARGET), ("loto", _TARGET),
+        ]
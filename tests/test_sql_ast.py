@@ -0,0 +1,278 @@
+"""
+Tests for services/sql_ast.py (tokenizer, AST, whitelist check, structural
+LIMIT, canonical form) and services/draw_sql.py (Text-to-SQL answered from the
+draw store, checked against SQLite on the same draws), wired into
+base_chat_sql._validate_sql / _ensure_limit / _execute_safe_sql.
+"""
+
+import os
+import sqlite3
+from datetime import date
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+# Ensure DB env vars for import safety
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASS", "test")
+os.environ.setdefault("DB_NAME", "test")
+
+from config.engine import EM_CONFIG, LOTO_CONFIG
+from services.base_chat_sql import (
+    ALLOWED_TABLES_EM, ALLOWED_TABLES_LOTO, _ensure_limit, _execute_safe_sql,
+    _validate_sql, set_allowed_columns,
+)
+from services.draw_sql import answer_from_draw_store
+from services.sql_ast import (
+    Column, Func, SqlSyntaxError, Star, check_query, clamp_limit, normalize_sql, parse_sql,
+)
+from tests.conftest import FAKE_TIRAGES
+from tests.test_number_stats import _enable
+
+_PROMPTS = Path(__file__).resolve().parent.parent / "prompts"
+_BALLS = " OR ".join(f"boule_{i} = 7" for i in range(1, 6))
+_COLUMNS = ("id", "date_de_tirage", "boule_1", "boule_2", "boule_3", "boule_4", "boule_5",
+            "numero_chance", "etoile_1", "etoile_2", "nombre_de_gagnant_au_rang1")
+
+
+def _unpivot(where=""):
+    return " UNION ALL ".join(f"SELECT boule_{i} AS num FROM tirages {where}" for i in range(1, 6))
+
+
+def _prompt_examples() -> list[str]:
+    sqls = set()
+    for path in _PROMPTS.rglob("prompt_sql_generator*.txt"):
+        sqls.update(line.strip() for line in path.read_text(encoding="utf-8").splitlines()
+                    if line.startswith("SELECT"))
+    return sorted(sqls)
+
+
+class TestParser:
+
+    def test_prompt_examples_parse_and_round_trip(self):
+        examples = _prompt_examples()
+        assert len(examples) > 50
+        for sql in examples:
+            canonical = normalize_sql(sql)
+            assert parse_sql(canonical) == parse_sql(sql)
+            assert normalize_sql(canonical) == canonical
+
+    @pytest.mark.parametrize("sql", [
+        "SELECT 1; DROP TABLE tirages",
+        "SELECT 1 -- x",
+        "SELECT /* x */ 1",
+        "SELECT @a FROM tirages",
+        "SELECT boule_1 FROM tirages UNION SELECT boule_2 FROM tirages",
+        "SELECT * FROM mysql.user",
+        "SELECT boule_1 FROM tirages WHERE",
+        "SELECT 0x10 FROM tirages",
+    ])
+    def test_rejected_syntax(self, sql):
+        with pytest.raises(SqlSyntaxError):
+            parse_sql(sql)
+
+    def test_ast_shape(self):
+        query = parse_sql(f"SELECT COUNT(*) AS n, t.boule_1 FROM tirages t WHERE {_BALLS} LIMIT 3, 5")
+        select = query.terms[0]
+        assert select.items[0].expr == Func("COUNT", (Star(),)) and select.items[0].name == "n"
+        assert select.items[1].expr == Column("boule_1", "t") and select.items[1].name == "boule_1"
+        assert (query.limit.count, query.limit.offset) == (5, 3)
+
+    def test_normalize_equivalent_queries(self):
+        assert normalize_sql("select `boule_1`  num from TIRAGES where boule_1 != 3 limit 2, 5") == \
+            normalize_sql("SELECT boule_1 AS num FROM tirages WHERE boule_1 <> 3 LIMIT 5 OFFSET 2") == \
+            "SELECT boule_1 AS num FROM tirages WHERE boule_1 <> 3 LIMIT 5 OFFSET 2"
+        assert normalize_sql("SELECT a FROM t WHERE (a = 1 OR b = 2) AND c = 3") == \
+            "SELECT a FROM t WHERE (a = 1 OR b = 2) AND c = 3"
+
+
+class TestCheck:
+
+    def _check(self, sql, columns=_COLUMNS):
+        return check_query(parse_sql(sql), allowed_tables=ALLOWED_TABLES_LOTO, allowed_columns=set(columns))
+
+    def test_aliases_and_derived_tables_allowed(self):
+        assert self._check(f"SELECT num, COUNT(*) AS freq FROM ({_unpivot()}) t "
+                           "GROUP BY t.num ORDER BY freq DESC") is None
+
+    @pytest.mark.parametrize("sql,reason", [
+        ("SELECT draw_date FROM tirages", "column draw_date"),
+        ("SELECT x.boule_1 FROM tirages t", "qualifier x"),
+        ("SELECT SLEEP(1) FROM tirages", "function SLEEP"),
+        ("SELECT * FROM tirages WHERE boule_1 IN (SELECT id FROM chat_log)", "table chat_log"),
+    ])
+    def test_rejections(self, sql, reason):
+        assert self._check(sql) == reason
+
+    def test_columns_unchecked_without_schema(self):
+        assert self._check("SELECT draw_date FROM tirages", columns=()) is None
+
+    def test_validate_sql_uses_schema_columns(self):
+        assert _validate_sql("SELECT draw_date FROM tirages", allowed_tables=ALLOWED_TABLES_LOTO) is True
+        set_allowed_columns(c.upper() for c in _COLUMNS)
+        assert _validate_sql("SELECT draw_date FROM tirages", allowed_tables=ALLOWED_TABLES_LOTO) is False
+        assert _validate_sql("SELECT boule_1 FROM tirages LIMIT 10", allowed_tables=ALLOWED_TABLES_LOTO) is True
+
+    def test_timestampdiff_unit_is_keyword(self):
+        sql = "SELECT TIMESTAMPDIFF(DAY, MIN(date_de_tirage), MAX(date_de_tirage)) FROM tirages"
+        assert self._check(sql) is None
+        assert normalize_sql(sql) == sql
+        set_allowed_columns(c.upper() for c in _COLUMNS)
+        assert _validate_sql(sql, allowed_tables=ALLOWED_TABLES_LOTO) is True
+        with pytest.raises(SqlSyntaxError):
+            parse_sql("SELECT TIMESTAMPDIFF(boule_1, MIN(date_de_tirage), MAX(date_de_tirage)) FROM tirages")
+
+    @pytest.mark.parametrize("sql", [
+        "SELECT SUBSTRING(date_de_tirage, 1, 4) AS annee, COUNT(*) FROM tirages GROUP BY annee",
+        "SELECT STDDEV(boule_1), VARIANCE(boule_2) FROM tirages",
+        "SELECT date_de_tirage FROM tirages WHERE date_de_tirage REGEXP '^2024-0[1-3]'",
+        "SELECT date_de_tirage FROM tirages WHERE date_de_tirage NOT RLIKE '^2024'",
+        "SELECT date_de_tirage FROM tirages WHERE (boule_1, boule_2) = (1, 2)",
+        "SELECT date_de_tirage FROM tirages WHERE (boule_1, boule_2) IN ((1, 2), (3, 4))",
+    ])
+    def test_validate_sql_mysql_constructs(self, sql):
+        set_allowed_columns(c.upper() for c in _COLUMNS)
+        assert _validate_sql(sql, allowed_tables=ALLOWED_TABLES_LOTO) is True
+        canonical = normalize_sql(sql)
+        assert parse_sql(canonical) == parse_sql(sql)
+
+    @pytest.mark.parametrize("sql", [
+        # sous-ensemble couvert, mais hors whitelist
+        "SELECT SUBSTRING(draw_date, 1, 4) FROM tirages",
+        "SELECT date_de_tirage FROM tirages WHERE SLEEP(1) REGEXP '1'",
+        "SELECT date_de_tirage FROM tirages WHERE (boule_1, id) IN (SELECT id, id FROM chat_log)",
+        # constructions hors sous-ensemble
+        "SELECT SUBSTRING(date_de_tirage FROM 6 FOR 2) FROM tirages",
+        "SELECT CONVERT(date_de_tirage USING latin1) FROM tirages",
+        "SELECT date_de_tirage FROM tirages WHERE MATCH(date_de_tirage) AGAINST('2024')",
+        "SELECT date_de_tirage FROM tirages WHERE date_de_tirage SOUNDS LIKE '2024'",
+        "SELECT date_de_tirage FROM tirages WHERE boule_1 REGEXP BINARY '7'",
+    ])
+    def test_validate_sql_constructs_still_rejected(self, sql):
+        set_allowed_columns(c.upper() for c in _COLUMNS)
+        assert _validate_sql(sql, allowed_tables=ALLOWED_TABLES_LOTO) is False
+
+    def test_validate_sql_rejects_unparsable(self):
+        assert _validate_sql("SELECT boule_1 FROM tirages WHERE boule_1 = = 3",
+                             allowed_tables=ALLOWED_TABLES_LOTO) is False
+
+
+class TestLimit:
+
+    def test_inner_limits_untouched(self):
+        sql = ("SELECT SUM(CASE WHEN num%2=0 THEN 1 ELSE 0 END) AS pairs FROM ("
+               "(SELECT boule_1 AS num FROM tirages ORDER BY date_de_tirage DESC LIMIT 200) UNION ALL "
+               "(SELECT boule_2 FROM tirages ORDER BY date_de_tirage DESC LIMIT 200)) t")
+        assert _ensure_limit(sql) == sql + " LIMIT 20"
+
+    def test_outer_limit_clamped_in_place(self):
+        sql = "SELECT num FROM (SELECT boule_1 AS num FROM tirages LIMIT 5) t  LIMIT 100 OFFSET 2"
+        assert clamp_limit(sql, 20) == "SELECT num FROM (SELECT boule_1 AS num FROM tirages LIMIT 5) t  LIMIT 20 OFFSET 2"
+
+    def test_regex_fallback_when_unparsable(self):
+        assert _ensure_limit("SELECT boule_1 FROM tirages WHERE x = = 1 LIMIT 99").endswith("LIMIT 20")
+
+
+# ────────────────────────────────────────────
+# Draw store answers vs SQLite reference
+# ────────────────────────────────────────────
+
+@pytest.fixture
+def reference():
+    """SQLite copy of FAKE_TIRAGES with MySQL YEAR / MONTH."""
+    db = sqlite3.connect(":memory:")
+    db.create_function("YEAR", 1, lambda d: int(d[:4]))
+    db.create_function("MONTH", 1, lambda d: int(d[5:7]))
+    db.execute("CREATE TABLE tirages (date_de_tirage TEXT, boule_1 INT, boule_2 INT, boule_3 INT, "
+               "boule_4 INT, boule_5 INT, numero_chance INT)")
+    db.executemany("INSERT INTO tirages VALUES (?, ?, ?, ?, ?, ?, ?)", [
+        (r["date_de_tirage"].isoformat(), r["boule_1"], r["boule_2"], r["boule_3"],
+         r["boule_4"], r["boule_5"], r["numero_chance"]) for r in FAKE_TIRAGES])
+    db.row_factory = sqlite3.Row
+    _enable(LOTO_CONFIG, FAKE_TIRAGES)
+
+    def run(sql):
+        rows = [dict(r) for r in db.execute(sql)]
+        return [{k: date.fromisoformat(v) if isinstance(v, str) else v for k, v in r.items()} for r in rows]
+    yield run
+    db.close()
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT COUNT(*) AS total FROM tirages",
+    f"SELECT COUNT(*) AS total_sorties FROM tirages WHERE ({_BALLS}) AND YEAR(date_de_tirage) = 2021",
+    f"SELECT MIN(date_de_tirage) AS premiere, MAX(date_de_tirage) AS derniere FROM tirages WHERE {_BALLS}",
+    "SELECT MAX(date_de_tirage) AS d FROM tirages WHERE boule_1 = 49 AND numero_chance = 99",
+    "SELECT COUNT(*) AS n FROM tirages WHERE MONTH(date_de_tirage) IN (3, 4, 5) "
+    "AND date_de_tirage BETWEEN '2020-02-01' AND '2021-01-31'",
+    f"SELECT date_de_tirage, boule_1, boule_2, boule_3, boule_4, boule_5, numero_chance FROM tirages "
+    f"WHERE {_BALLS} ORDER BY date_de_tirage DESC LIMIT 3",
+    "SELECT date_de_tirage, numero_chance FROM tirages WHERE numero_chance <> 4 "
+    "ORDER BY date_de_tirage LIMIT 2, 5",
+    "SELECT COUNT(*) AS n FROM tirages WHERE date_de_tirage NOT IN ('2020-01-06', '2020-01-09')",
+    "SELECT COUNT(*) AS n FROM tirages WHERE YEAR(date_de_tirage) NOT IN (2020) AND numero_chance NOT IN (1, 2)",
+    "SELECT numero_chance, COUNT(*) AS freq FROM tirages GROUP BY numero_chance "
+    "ORDER BY freq DESC, numero_chance LIMIT 4",
+    f"SELECT num, COUNT(*) AS freq FROM ({_unpivot()}) t GROUP BY num ORDER BY freq DESC, num LIMIT 5",
+    "SELECT num, COUNT(*) AS freq FROM (" + _unpivot("WHERE date_de_tirage >= '2021-01-01'") + ") t "
+    "GROUP BY num ORDER BY COUNT(*), num DESC LIMIT 3",
+])
+def test_store_answers_match_sql(reference, sql):
+    assert answer_from_draw_store(sql) == reference(sql)
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM tirages ORDER BY date_de_tirage DESC LIMIT 1",          # colonnes hors snapshot
+    "SELECT boule_1 FROM tirages LIMIT 5",                                 # ordre non défini
+    "SELECT COUNT(*) FROM tirages WHERE NOT boule_1 = 7",
+    "SELECT COUNT(*) FROM tirages WHERE nombre_de_gagnant_au_rang1 > 0",
+    "SELECT SUM(boule_1) FROM tirages",
+    "SELECT COUNT(*) FROM tirages_euromillions",                           # store EM non chargé
+])
+def test_unsupported_forms_fall_back(reference, sql):
+    assert answer_from_draw_store(sql) is None
+
+
+def test_evaluation_error_falls_back(reference):
+    with patch("services.draw_sql._answer", side_effect=TypeError("ufunc")):
+        assert answer_from_draw_store("SELECT COUNT(*) AS n FROM tirages") is None
+
+
+def test_curdate_intervals(reference):
+    with patch("services.draw_sql._today", return_value=date(2021, 3, 31)):
+        rows = answer_from_draw_store(
+            "SELECT COUNT(*) AS n FROM tirages WHERE date_de_tirage >= DATE_SUB(CURDATE(), INTERVAL 1 MONTH) "
+            "AND YEAR(date_de_tirage) = YEAR(CURDATE())")
+    assert rows == reference("SELECT COUNT(*) AS n FROM tirages WHERE date_de_tirage >= '2021-02-28'")
+
+
+class TestExecuteSafeSql:
+
+    @pytest.mark.asyncio
+    async def test_simple_aggregate_skips_database(self, reference):
+        with patch("services.base_chat_sql.db_cloudsql.get_connection_readonly") as conn:
+            rows = await _execute_safe_sql(f"SELECT COUNT(*) AS n FROM tirages WHERE {_BALLS}",
+                                           allowed_tables=ALLOWED_TABLES_LOTO)
+        assert rows == reference(f"SELECT COUNT(*) AS n FROM tirages WHERE {_BALLS}")
+        conn.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_disabled_flag_or_unloaded_store_uses_database(self):
+        _enable(EM_CONFIG, [])
+        cursor = AsyncMock()
+        cursor.fetchall = AsyncMock(return_value=[{"n": 1}])
+        with patch("services.base_chat_sql.db_cloudsql.get_connection_readonly") as conn:
+            conn.return_value.__aenter__.return_value.cursor = AsyncMock(return_value=cursor)
+            rows = await _execute_safe_sql("SELECT COUNT(*) AS n FROM tirages", allowed_tables=ALLOWED_TABLES_LOTO)
+            _enable(LOTO_CONFIG, FAKE_TIRAGES)
+            with patch("services.base_chat_sql.CHAT_SQL_LOCAL_ENABLED", False):
+                rows_off = await _execute_safe_sql("SELECT COUNT(*) AS n FROM tirages",
+                                                   allowed_tables=ALLOWED_TABLES_LOTO)
+        assert rows == rows_off == [{"n": 1}]
+        assert cursor.execute.await_count == 2
+        cursor.execute.assert_awaited_with("SELECT COUNT(*) AS n FROM tirages LIMIT 20")
+
+    def test_em_allowed_tables(self):
+        assert _validate_sql("SELECT etoile_1, COUNT(*) FROM tirages_euromillions GROUP BY etoile_1",
+                             allowed_tables=ALLOWED_TABLES_EM) is True
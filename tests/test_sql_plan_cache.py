@@ -0,0 +1,158 @@
+"""
+Tests for services/sql_plan_cache.py — question signatures with number / date
+slots, SQL templates (exact reuse, structural reuse once verified), results per
+draw version, and run_text_to_sql skipping generation / execution on hits.
+"""
+
+import os
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+# Ensure DB env vars for import safety
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASS", "test")
+os.environ.setdefault("DB_NAME", "test")
+
+from config.engine import LOTO_CONFIG
+from services.chat_pipeline_shared import run_text_to_sql
+from services.draw_store import notify_new_draw
+from services.sql_plan_cache import SqlPlanCache, instantiate, make_template, sql_plan_cache, templatize
+from tests.conftest import FAKE_TIRAGES
+from tests.test_number_stats import _enable
+
+_TOP_SQL = "SELECT n FROM x WHERE YEAR(date_de_tirage) = {y} ORDER BY c DESC LIMIT {k}"
+
+
+def _top(k, y):
+    return _TOP_SQL.format(k=k, y=y)
+
+
+class TestTemplates:
+
+    @pytest.mark.parametrize("question,signature,values", [
+        ("Top 5 des numéros en 2023 ?", "top {n1} des numeros en {n4}", ("5", "2023")),
+        ("tirage du 12/03/2024", "tirage du {d}", ("2024-03-12",)),
+        ("Tirages depuis le 2024-01-05", "tirages depuis le {d}", ("2024-01-05",)),
+        ("Combien de TIRAGES au total", "combien de tirages au total", ()),
+    ])
+    def test_templatize(self, question, signature, values):
+        assert templatize(question) == (signature, values)
+
+    def test_number_width_in_signature(self):
+        assert templatize("top 5 en 2023")[0] != templatize("top 10 en 2023")[0]
+
+    def test_make_template_round_trip(self):
+        template = make_template(_top(5, 2023), ("5", "2023"))
+        assert template == _TOP_SQL.format(k="{n0}", y="{n1}")
+        assert instantiate(template, ("8", "2021")) == _top(8, 2021)
+        date_sql = "SELECT * FROM tirages WHERE date_de_tirage = '2024-03-12'"
+        assert instantiate(make_template(date_sql, ("2024-03-12",)), ("2023-01-02",)) == \
+            "SELECT * FROM tirages WHERE date_de_tirage = '2023-01-02'"
+
+    def test_ambiguous_values_not_templated(self):
+        assert make_template("SELECT 7 + 7", ("7", "7")) is None
+        assert make_template("SELECT '{x}'", ("1",)) is None
+
+
+class TestPlans:
+
+    def test_exact_question_reused(self):
+        cache = SqlPlanCache()
+        cache.remember_plan("loto", "fr", "Top 5 des numéros en 2023", _top(5, 2023))
+        assert cache.lookup_plan("loto", "fr", "top 5 des numeros en 2023 ?") == _top(5, 2023)
+        assert cache.lookup_plan("em", "fr", "top 5 des numeros en 2023") is None
+        assert cache.lookup_plan("loto", "en", "top 5 des numeros en 2023") is None
+
+    def test_structural_variant_needs_verification(self):
+        cache = SqlPlanCache()
+        cache.remember_plan("loto", "fr", "top 5 des numeros en 2023", _top(5, 2023))
+        assert cache.lookup_plan("loto", "fr", "top 6 des numeros en 2021") is None
+        cache.remember_plan("loto", "fr", "top 6 des numeros en 2021", _top(6, 2021))  # LLM agrees
+        assert cache.lookup_plan("loto", "fr", "top 8 des numeros en 2019") == _top(8, 2019)
+        assert cache.stats()["verified_templates"] == 1
+
+    def test_coincidental_constant_never_verified(self):
+        cache = SqlPlanCache()
+        # "numéro 10" + a LIMIT 10 that does not come from the question
+        cache.remember_plan("loto", "fr", "ecart du numero 10", "SELECT e FROM s WHERE n = 10 LIMIT 10")
+        cache.remember_plan("loto", "fr", "ecart du numero 12", "SELECT e FROM s WHERE n = 12 LIMIT 10")
+        assert cache.lookup_plan("loto", "fr", "ecart du numero 15") is None
+        assert cache.lookup_plan("loto", "fr", "ecart du numero 12") == "SELECT e FROM s WHERE n = 12 LIMIT 10"
+
+    def test_results_per_draw_version(self):
+        cache = SqlPlanCache()
+        cache.remember_result("loto", "2024-01-01", "SELECT 1", [{"a": 1}])
+        cache.remember_result("loto", None, "SELECT 2", [{"a": 2}])
+        assert cache.lookup_result("loto", "2024-01-01", "SELECT 1") == [{"a": 1}]
+        assert cache.lookup_result("loto", "2024-01-04", "SELECT 1") is None
+        assert cache.lookup_result("loto", None, "SELECT 2") is None
+        cache.invalidate_results("loto")
+        assert cache.stats()["results"] == 0
+
+
+def _history(n=1):
+    msg = MagicMock()
+    msg.role, msg.content = "user", "bonjour"
+    return [msg] * n
+
+
+async def _run(message, gen, execute, history=None, report=None):
+    return await run_text_to_sql(
+        message=message, http_client=MagicMock(), gem_api_key="",
+        history=history or [],
+        generate_sql_fn=gen, validate_sql_fn=lambda sql: True,
+        ensure_limit_fn=lambda sql: sql, execute_sql_fn=execute,
+        format_result_fn=lambda rows: f"[RÉSULTAT SQL] {rows}", max_per_session=10,
+        log_prefix="[TEST]", force_sql=True, has_data_signal_fn=lambda m: True,
+        continuation_mode=False, enrichment_context=None,
+        lang="fr", game="loto", cache_report=report,
+    )
+
+
+class TestRunTextToSql:
+
+    @pytest.mark.asyncio
+    async def test_repeated_question_skips_generation(self):
+        gen = AsyncMock(return_value=_top(5, 2023))
+        execute = AsyncMock(return_value=[{"n": 7}])
+        first = await _run("Top 5 des numéros en 2023 ?", gen, execute)
+        report = {}
+        second = await _run("top 5 des numeros en 2023", gen, execute, report=report)
+        assert first == second == ("[RÉSULTAT SQL] [{'n': 7}]", _top(5, 2023), "OK")
+        assert gen.await_count == 1 and execute.await_count == 2  # store not loaded: no result cache
+        assert report["sql_cache"] == "PLAN"
+        assert sql_plan_cache.stats()["plan_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_result_cached_until_next_draw(self):
+        _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        gen = AsyncMock(return_value=_top(5, 2023))
+        execute = AsyncMock(return_value=[{"n": 7}])
+        await _run("top 5 des numeros en 2023", gen, execute)
+        report = {}
+        await _run("top 5 des numeros en 2023", gen, execute, report=report)
+        assert execute.await_count == 1 and report["sql_cache"] == "RESULT"
+        last = FAKE_TIRAGES[-1]
+        _enable(LOTO_CONFIG, FAKE_TIRAGES + [
+            {**last, "date_de_tirage": last["date_de_tirage"] + timedelta(days=3)}])
+        notify_new_draw("loto")
+        await _run("top 5 des numeros en 2023", gen, execute)
+        assert execute.await_count == 2 and gen.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_history_bypasses_cache(self):
+        gen = AsyncMock(return_value=_top(5, 2023))
+        execute = AsyncMock(return_value=[{"n": 7}])
+        for _ in range(2):
+            report = {}
+            await _run("top 5 des numeros en 2023", gen, execute, history=_history(), report=report)
+        assert gen.await_count == 2 and report == {}
+
+    @pytest.mark.asyncio
+    async def test_rejected_sql_not_cached(self):
+        gen = AsyncMock(return_value="NO_SQL")
+        await _run("top 5 des numeros en 2023", gen, AsyncMock())
+        await _run("top 5 des numeros en 2023", gen, AsyncMock())
+        assert gen.await_count == 2 and sql_plan_cache.stats()["plans"] == 0
@@ -179,6 +179,33 @@ async def test_get_global_stats_cached(mock_get_conn):
     assert mock_get_conn.call_count == 1
 
 
+@pytest.mark.asyncio
+@patch("engine.stats.get_connection")
+async def test_get_global_stats_recomputed_on_new_draw(mock_get_conn):
+    """Cache versionne par tirage : nouveau tirage importe → recalcul."""
+    from config.engine import LOTO_CONFIG
+    from services.draw_store import DrawSnapshot, get_draw_store
+    from tests.conftest import FAKE_TIRAGES
+
+    store = get_draw_store("loto")
+    store.enabled = True
+    store._checked_at = float("inf")
+    store.snapshot = DrawSnapshot.from_rows(LOTO_CONFIG, FAKE_TIRAGES[:-1])
+    cursor = AsyncMock()
+    mock_get_conn.side_effect = lambda: _async_conn(cursor)
+    cursor.fetchone = AsyncMock(side_effect=[
+        {"count": 967}, {"min_date": date(2019, 3, 4), "max_date": date(2026, 2, 3)},
+        {"count": 968}, {"min_date": date(2019, 3, 4), "max_date": date(2026, 2, 5)},
+    ])
+
+    assert (await get_global_stats())["total_draws"] == 967
+    assert (await get_global_stats())["total_draws"] == 967
+    assert mock_get_conn.call_count == 1
+    store.snapshot = DrawSnapshot.from_rows(LOTO_CONFIG, FAKE_TIRAGES)  # watcher reload
+    assert (await get_global_stats())["total_draws"] == 968
+    assert mock_get_conn.call_count == 2
+
+
 # ═══════════════════════════════════════════════════════════════════════
 # get_top_flop_numbers
 # ═══════════════════════════════════════════════════════════════════════
@@ -0,0 +1,143 @@
+"""
+Tests for services/table_summary.py — per-game table metadata, 1 calcul / tirage.
+"""
+
+import os
+import random
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from config.engine import LOTO_CONFIG
+from engine.hybride_base import HybrideEngine
+from services.draw_store import DrawSnapshot, get_draw_store, notify_new_draw
+from services.table_summary import TableSummary, get_table_summary, summary_for
+from tests.conftest import AsyncSmartMockCursor, FAKE_TIRAGES, make_async_conn
+
+
+def _enable(rows=FAKE_TIRAGES):
+    store = get_draw_store(LOTO_CONFIG.game)
+    store.enabled = True
+    store.snapshot = DrawSnapshot.from_rows(LOTO_CONFIG, rows)
+    store._checked_at = float("inf")
+    return store.snapshot
+
+
+class TestTableSummary:
+
+    def test_fields(self):
+        summary = TableSummary.from_snapshot(DrawSnapshot.from_rows(LOTO_CONFIG, FAKE_TIRAGES), LOTO_CONFIG)
+        dates = sorted(t["date_de_tirage"] for t in FAKE_TIRAGES)
+        assert summary.total == len(dates)
+        assert (summary.date_min, summary.date_max) == (dates[0], dates[-1])
+        assert summary.draws_per_year == len(dates) / ((dates[-1] - dates[0]).days / 365.25)
+        limit = dates[-1] - timedelta(days=365)
+        assert summary.count_since(limit) == sum(1 for d in dates if d >= limit)
+        assert summary.first_since(limit) == min(d for d in dates if d >= limit)
+        assert summary.first_since(date(2100, 1, 1)) is None
+        assert summary.nth_latest(1) == dates[-1]
+        assert summary.nth_latest(3) == dates[-3]
+        assert summary.nth_latest(len(dates) + 1) is None
+
+    def test_memoized_per_version_and_invalidated(self):
+        snap = _enable()
+        first = summary_for(LOTO_CONFIG, snap)
+        assert summary_for(LOTO_CONFIG, snap) is first
+        notify_new_draw("loto")
+        assert summary_for(LOTO_CONFIG, snap) is not first
+
+    @pytest.mark.asyncio
+    async def test_none_when_store_disabled(self):
+        assert await get_table_summary(LOTO_CONFIG) is None
+
+    @pytest.mark.asyncio
+    async def test_connection_opened_only_when_check_due(self):
+        _enable()
+        get_connection = AsyncMock(side_effect=AssertionError("no DB access expected"))
+        summary = await get_table_summary(LOTO_CONFIG, get_connection=get_connection)
+        assert summary.total == len(FAKE_TIRAGES)
+        get_draw_store("loto").invalidate()
+        opened = []
+
+        @asynccontextmanager
+        async def _get_connection():
+            opened.append(1)
+            async with make_async_conn(AsyncSmartMockCursor()) as conn:
+                yield conn
+
+        await get_table_summary(LOTO_CONFIG, get_connection=_get_connection)
+        assert opened == [1]
+
+
+class TestGenerateGridsMetadata:
+
+    @pytest.mark.asyncio
+    async def test_summary_metadata_equals_sql(self):
+        engine = HybrideEngine(LOTO_CONFIG)
+        random.seed(1)
+        sql = await engine.generate_grids(
+            n=1, _get_connection=lambda: make_async_conn(AsyncSmartMockCursor()))
+        _enable()
+        cursor = AsyncSmartMockCursor()
+        with patch.object(cursor, "execute", wraps=cursor.execute) as execute:
+            random.seed(1)
+            mem = await engine.generate_grids(n=1, _get_connection=lambda: make_async_conn(cursor))
+        for key in ("nb_tirages_total", "periode_base", "degraded_windows"):
+            assert mem["metadata"][key] == sql["metadata"][key]
+        assert not [c for c in execute.await_args_list if "COUNT(*)" in c.args[0]]
+
+    @pytest.mark.asyncio
+    async def test_degraded_windows_from_summary(self):
+        engine = HybrideEngine(LOTO_CONFIG)
+        summary = summary_for(LOTO_CONFIG, _enable())
+        degraded = await engine._check_degraded_windows(
+            None, summary.total, summary.date_min, summary.date_max, summary=summary,
+        )
+        # 200 fake draws over ~1.6 year: the principal window (multi-year) is degraded
+        assert "principale" in {d["window"] for d in degraded}
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Routes — /meta-windows-info, /database-info, /tirages/count
+# ═══════════════════════════════════════════════════════════════════════
+
+_env = patch.dict(os.environ, {"DB_PASSWORD": "fake", "DB_USER": "test", "DB_NAME": "testdb"})
+_static = patch("fastapi.staticfiles.StaticFiles.__init__", return_value=None)
+_static_call = patch("fastapi.staticfiles.StaticFiles.__call__", return_value=None)
+
+
+def _get(path, cursor):
+    with _env, _static, _static_call, patch("routes.api_data_unified.db_cloudsql") as mock_db:
+        mock_db.get_connection = lambda: make_async_conn(cursor)
+        import main as main_mod
+        client = TestClient(main_mod.app, raise_server_exceptions=False)
+        return client.get(path)
+
+
+class TestRoutes:
+
+    def test_meta_windows_info_summary_equals_sql(self):
+        dates_desc = [{"date_de_tirage": t["date_de_tirage"]}
+                      for t in sorted(FAKE_TIRAGES, key=lambda t: t["date_de_tirage"], reverse=True)]
+        cursor = AsyncMock()
+        cursor.fetchall = AsyncMock(return_value=dates_desc)
+        sql = _get("/api/loto/meta-windows-info", cursor)
+        _enable()
+        mem = _get("/api/loto/meta-windows-info", AsyncMock(side_effect=AssertionError))
+        assert sql.status_code == mem.status_code == 200
+        assert mem.json() == sql.json()
+
+    def test_database_info_and_count_from_memory(self):
+        _enable()
+        cursor = AsyncMock(side_effect=AssertionError("no DB access expected"))
+        info = _get("/api/loto/database-info", cursor).json()
+        assert info == {
+            "total_draws": len(FAKE_TIRAGES),
+            "first_draw": str(FAKE_TIRAGES[0]["date_de_tirage"]),
+            "last_draw": str(FAKE_TIRAGES[-1]["date_de_tirage"]),
+        }
+        count = _get("/api/loto/tirages/count", cursor).json()
+        assert count["data"]["total"] == len(FAKE_TIRAGES)
@@ -0,0 +1,184 @@
+"""
+Tests /api/{game}/tirages/list keyset pagination (before / next_cursor) and
+/api/{game}/tirages/export streaming (NDJSON / CSV) over db_cloudsql.stream_rows
+(server-side cursor).
+"""
+
+import json
+import os
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import aiomysql
+import pytest
+from fastapi.testclient import TestClient
+
+import db_cloudsql
+
+_env = patch.dict(os.environ, {
+    "DB_PASSWORD": "fake", "DB_USER": "test", "DB_NAME": "testdb", "EM_PUBLIC_ACCESS": "true",
+})
+_static = patch("fastapi.staticfiles.StaticFiles.__init__", return_value=None)
+_static_call = patch("fastapi.staticfiles.StaticFiles.__call__", return_value=None)
+
+
+def _rows(n, start=date(2026, 1, 1)):
+    return [{"id": i + 1, "date_de_tirage": start + timedelta(days=3 * i),
+             "boule_1": 1 + i % 45, "boule_2": 46, "boule_3": 47, "boule_4": 48, "boule_5": 49,
+             "numero_chance": 1 + i % 10} for i in range(n)]
+
+
+def _get(path, mock_db):
+    with _env, _static, _static_call, patch("routes.api_data_unified.db_cloudsql", mock_db):
+        import main as main_mod
+        return TestClient(main_mod.app, raise_server_exceptions=False).get(path)
+
+
+def _list_db(rows):
+    cursor = AsyncMock()
+    cursor.fetchall.return_value = rows
+    mock_db = MagicMock()
+
+    @asynccontextmanager
+    async def _cm():
+        conn = AsyncMock()
+        conn.cursor = AsyncMock(return_value=cursor)
+        yield conn
+
+    mock_db.get_connection = _cm
+    return mock_db, cursor
+
+
+def _stream_db(rows, fail_after=None):
+    calls = []
+
+    async def stream_rows(sql, params=None, batch_size=500):
+        calls.append((sql, params))
+        for i, row in enumerate(rows):
+            if fail_after is not None and i == fail_after:
+                raise ConnectionError("lost")
+            yield row
+
+    mock_db = MagicMock()
+    mock_db.stream_rows = stream_rows
+    return mock_db, calls
+
+
+class TestKeysetList:
+
+    def test_before_uses_keyset_and_returns_next_cursor(self):
+        mock_db, cursor = _list_db(_rows(5))
+        data = _get("/api/loto/tirages/list?limit=5&before=2026-03-01", mock_db).json()["data"]
+        sql, params = cursor.execute.await_args.args
+        assert "date_de_tirage < %s" in sql and "OFFSET" not in sql
+        assert params == ("2026-03-01", 5)
+        assert data["count"] == 5 and data["next_cursor"] == "2026-01-13"
+
+    def test_last_page_has_no_cursor(self):
+        mock_db, _ = _list_db(_rows(2))
+        data = _get("/api/euromillions/tirages/list?limit=5&before=2026-01-10", mock_db).json()["data"]
+        assert data["count"] == 2 and data["next_cursor"] is None
+
+    def test_offset_still_supported(self):
+        mock_db, cursor = _list_db(_rows(3))
+        data = _get("/api/loto/tirages/list?limit=3&offset=6", mock_db).json()["data"]
+        assert cursor.execute.await_args.args[1] == (3, 6)
+        assert data["next_cursor"] == "2026-01-07"
+
+    def test_invalid_cursor_rejected(self):
+        mock_db, _ = _list_db([])
+        assert _get("/api/loto/tirages/list?before=yesterday", mock_db).status_code == 422
+
+
+class TestExport:
+
+    def test_ndjson_full_history_ascending(self):
+        mock_db, calls = _stream_db(_rows(3))
+        resp = _get("/api/loto/tirages/export", mock_db)
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "application/x-ndjson"
+        assert 'filename="loto-tirages.ndjson"' in resp.headers["content-disposition"]
+        lines = [json.loads(line) for line in resp.text.splitlines()]
+        assert [r["date_de_tirage"] for r in lines] == ["2026-01-01", "2026-01-04", "2026-01-07"]
+        assert lines[0]["numero_chance"] == 1
+        (sql, params), = calls
+        assert "FROM tirages " in sql and sql.rstrip().endswith("ASC") and params is None
+
+    def test_csv_since(self):
+        mock_db, calls = _stream_db(_rows(2))
+        resp = _get("/api/euromillions/tirages/export?format=csv&since=2026-01-01", mock_db)
+        assert resp.headers["content-type"].startswith("text/csv")
+        header, first, second = resp.text.splitlines()
+        assert header.startswith("id,date_de_tirage,boule_1")
+        assert first.startswith("1,2026-01-01,1,")
+        assert "WHERE date_de_tirage >= %s" in calls[0][0] and calls[0][1] == ("2026-01-01",)
+        assert "tirages_euromillions" in calls[0][0]
+
+    def test_stream_error_truncates_body(self):
+        mock_db, _ = _stream_db(_rows(4), fail_after=2)
+        with patch("routes.api_data_unified.logger") as mock_logger:
+            resp = _get("/api/loto/tirages/export", mock_db)
+        assert resp.status_code == 200
+        assert len(resp.text.splitlines()) == 2
+        assert "stream interrompu" in mock_logger.error.call_args.args[0]
+
+    def test_no_stream_slot_returns_503(self):
+        mock_db, calls = _stream_db(_rows(3))
+        mock_db.stream_slot_available.return_value = False
+        resp = _get("/api/loto/tirages/export", mock_db)
+        assert resp.status_code == 503 and resp.headers["retry-after"] == "30"
+        assert calls == []
+
+
+class TestStreamRows:
+
+    @pytest.mark.asyncio
+    async def test_server_side_cursor_batches(self):
+        rows = _rows(5)
+        cursor = AsyncMock()
+        cursor.fetchmany.side_effect = [rows[:2], rows[2:4], rows[4:], []]
+        conn = AsyncMock()
+        conn.cursor = AsyncMock(return_value=cursor)
+        pool = MagicMock()
+
+        @asynccontextmanager
+        async def _acquire():
+            yield conn
+
+        pool.acquire = _acquire
+        with patch.object(db_cloudsql, "_pool", pool):
+            got = [r async for r in db_cloudsql.stream_rows("SELECT * FROM tirages", batch_size=2)]
+        assert got == rows
+        conn.cursor.assert_awaited_once_with(aiomysql.SSDictCursor)
+        assert cursor.fetchmany.await_args.args == (2,)
+        cursor.close.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_streams_capped(self):
+        import asyncio
+
+        acquired = []
+
+        @asynccontextmanager
+        async def _get_connection():
+            cursor = AsyncMock()
+            cursor.fetchmany.side_effect = [_rows(1), []]
+            conn = AsyncMock()
+            conn.cursor = AsyncMock(return_value=cursor)
+            acquired.append(conn)
+            yield conn
+
+        with patch.object(db_cloudsql, "get_connection", _get_connection), \
+                patch.object(db_cloudsql, "_stream_slots", asyncio.Semaphore(1)):
+            first = db_cloudsql.stream_rows("SELECT * FROM tirages")
+            await first.__anext__()                 # 1st export mid-download
+            assert not db_cloudsql.stream_slot_available()
+            second = db_cloudsql.stream_rows("SELECT * FROM tirages")
+            pending = asyncio.ensure_future(second.__anext__())
+            await asyncio.sleep(0.01)
+            assert not pending.done() and len(acquired) == 1   # no 2nd pool connection
+            await first.aclose()
+            assert (await pending)["id"] == 1 and len(acquired) == 2
+            await second.aclose()
+            assert db_cloudsql.stream_slot_available()
@@ -5,7 +5,7 @@ pipeline d'import externe en 2 etapes peut laisser numero_chance / etoile_1 /
 etoile_2 NULL temporairement entre INSERT et UPDATE.
 
 3 surfaces de defense :
-  1. routes/api_analyse_unified.py : SQL filtre NULL/range + log error si asymetrie
+  1. routes/api_analyse_unified.py : NULL/range exclus (services.draw_windows) + log error si asymetrie
   2. engine/hybride_base.py        : guard NULL/range + log warning, skip ligne
   3. observabilite                 : preffix [META-CHANCE] / [META-STARS] / [HYBRIDE-SECONDARY]
 """
@@ -13,7 +13,7 @@ etoile_2 NULL temporairement entre INSERT et UPDATE.
 import logging
 import os
 from contextlib import asynccontextmanager
-from datetime import date
+from datetime import date, timedelta
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -39,34 +39,34 @@ _db_module_patch = patch.dict(os.environ, {
 })
 
 
-def _build_chance_freq_rows(per_value: int = 101, total_target: int = 1014):
-    """Build 10 rows summing to total_target (Loto chance).
+def _build_window_rows(n: int = 1014, em: bool = False, null_secondary: int = 0):
+    """Build *n* draw rows (newest first, as the window query) for Loto / EM.
 
-    Default 9 rows × 101 + 1 row × 105 = 909 + 105 = 1014.
-    Ajuste la dernière entrée pour atteindre la cible exacte.
+    Les *null_secondary* tirages les plus anciens ont numero_chance / etoile_2
+    NULL (import en 2 étapes non terminé, V2 hyp F).
     """
-    rows = [{"num": i, "freq": per_value} for i in range(1, 10)]
-    remaining = total_target - per_value * 9
-    rows.append({"num": 10, "freq": remaining})
-    return rows
-
-
-def _build_em_stars_rows(per_value: int = 169, total_target: int = 2028):
-    """Build 12 rows summing to total_target (EM stars).
-
-    Default 11 × 169 + 1 × 169 = 2028 (cible = 2 × 1014 tirages).
-    """
-    rows = [{"num": i, "freq": per_value} for i in range(1, 12)]
-    remaining = total_target - per_value * 11
-    rows.append({"num": 12, "freq": remaining})
+    rows = []
+    for i in range(n):
+        row = {
+            "date_de_tirage": date(2026, 4, 27) - timedelta(days=2 * i),
+            **{f"boule_{k}": (i + 7 * k) % 49 + 1 for k in range(1, 6)},
+        }
+        if em:
+            row["etoile_1"] = i % 12 + 1
+            row["etoile_2"] = (i + 5) % 12 + 1
+        else:
+            row["numero_chance"] = i % 10 + 1
+        if i >= n - null_secondary:
+            row["etoile_2" if em else "numero_chance"] = None
+        rows.append(row)
     return rows
 
 
 # ═══════════════════════════════════════════════════════════════════════
-# Test 1 — Loto Global : sum chance == len(window_ids) → AUCUN log error
+# Test 1 — Loto Global : sum chance == taille fenêtre → AUCUN log error
 # ═══════════════════════════════════════════════════════════════════════
 
-@patch("routes.api_analyse_unified.get_persistent_brake_map", new=AsyncMock(return_value={}))
+@patch("services.generate_session.get_brake_maps", new=AsyncMock(return_value={}))
 @patch("routes.api_analyse_unified.get_decay_state", new=AsyncMock(return_value={}))
 @patch("routes.api_analyse_unified.check_and_update_decay", new=AsyncMock(return_value=None))
 @patch("routes.api_analyse_unified.db_cloudsql")
@@ -76,13 +76,9 @@ def test_meta_analyse_local_loto_chance_consistency_no_log(mock_db):
     mock_db.get_connection = _async_cm_conn(cursor)
     cursor.fetchone.side_effect = [
         {"total": 1014},                                                     # COUNT(*)
-        {"min_date": date(2019, 11, 6), "max_date": date(2026, 4, 27)},      # MIN/MAX dates
     ]
     cursor.fetchall.side_effect = [
-        [{"id": i} for i in range(1, 1015)],                                 # window_ids (1014)
-        [{"num": i, "freq": 100} for i in range(1, 50)],                     # boules
-        [],                                                                   # recent_draws (LIMIT 4)
-        _build_chance_freq_rows(per_value=101, total_target=1014),           # chance freq cohérent
+        _build_window_rows(1014, em=False, null_secondary=0),
     ]
 
     with _db_module_patch, _static_patch, _static_call:
@@ -105,26 +101,22 @@ def test_meta_analyse_local_loto_chance_consistency_no_log(mock_db):
 
 
 # ═══════════════════════════════════════════════════════════════════════
-# Test 2 — Loto Global : SQL renvoie sum=1013 (NULL filtré) → log error
+# Test 2 — Loto Global : 1 chance NULL → sum=1013 → log error
 # ═══════════════════════════════════════════════════════════════════════
 
-@patch("routes.api_analyse_unified.get_persistent_brake_map", new=AsyncMock(return_value={}))
+@patch("services.generate_session.get_brake_maps", new=AsyncMock(return_value={}))
 @patch("routes.api_analyse_unified.get_decay_state", new=AsyncMock(return_value={}))
 @patch("routes.api_analyse_unified.check_and_update_decay", new=AsyncMock(return_value=None))
 @patch("routes.api_analyse_unified.db_cloudsql")
 def test_meta_analyse_local_loto_chance_asymetrie_logs_error(mock_db):
-    """Loto Global : 1014 IDs mais SQL filtre 1 NULL -> sum=1013 -> [META-CHANCE] log."""
+    """Loto Global : 1014 tirages dont 1 chance NULL -> sum=1013 -> [META-CHANCE] log."""
     cursor = AsyncMock()
     mock_db.get_connection = _async_cm_conn(cursor)
     cursor.fetchone.side_effect = [
-        {"total": 1014},
-        {"min_date": date(2019, 11, 6), "max_date": date(2026, 4, 27)},
+        {"total": 1014},                                                     # COUNT(*)
     ]
     cursor.fetchall.side_effect = [
-        [{"id": i} for i in range(1, 1015)],                  # 1014 window_ids
-        [{"num": i, "freq": 100} for i in range(1, 50)],
-        [],
-        _build_chance_freq_rows(per_value=101, total_target=1013),  # NULL filtré → -1
+        _build_window_rows(1014, em=False, null_secondary=1),  # 1 NULL → -1
     ]
 
     with _db_module_patch, _static_patch, _static_call:
@@ -143,7 +135,7 @@ def test_meta_analyse_local_loto_chance_asymetrie_logs_error(mock_db):
         if c.args and "[META-CHANCE]" in c.args[0]
     ]
     assert len(error_calls) == 1, f"Expected 1 [META-CHANCE] log, got {len(error_calls)}: {mock_logger.error.call_args_list}"
-    # Verifie les valeurs interpolées : args[1]=window_used, args[2]=total_chance, args[3]=len(window_ids)
+    # Verifie les valeurs interpolées : args[1]=window_used, args[2]=total_chance, args[3]=taille fenêtre
     call_args = error_calls[0].args
     assert call_args[1] == "GLOBAL"
     assert call_args[2] == 1013
@@ -151,10 +143,10 @@ def test_meta_analyse_local_loto_chance_asymetrie_logs_error(mock_db):
 
 
 # ═══════════════════════════════════════════════════════════════════════
-# Test 3 — EM Global : sum stars == 2 × len(window_ids) → AUCUN log error
+# Test 3 — EM Global : sum stars == 2 × taille fenêtre → AUCUN log error
 # ═══════════════════════════════════════════════════════════════════════
 
-@patch("routes.api_analyse_unified.get_persistent_brake_map", new=AsyncMock(return_value={}))
+@patch("services.generate_session.get_brake_maps", new=AsyncMock(return_value={}))
 @patch("routes.api_analyse_unified.get_decay_state", new=AsyncMock(return_value={}))
 @patch("routes.api_analyse_unified.check_and_update_decay", new=AsyncMock(return_value=None))
 @patch("routes.api_analyse_unified.db_cloudsql")
@@ -163,14 +155,10 @@ def test_meta_analyse_local_em_stars_consistency_no_log(mock_db):
     cursor = AsyncMock()
     mock_db.get_connection = _async_cm_conn(cursor)
     cursor.fetchone.side_effect = [
-        {"total": 1014},
-        {"min_date": date(2019, 11, 6), "max_date": date(2026, 4, 27)},
+        {"total": 1014},                                                     # COUNT(*)
     ]
     cursor.fetchall.side_effect = [
-        [{"id": i} for i in range(1, 1015)],
-        [{"num": i, "freq": 100} for i in range(1, 51)],     # 50 boules EM
-        [],
-        _build_em_stars_rows(per_value=169, total_target=2028),
+        _build_window_rows(1014, em=True, null_secondary=0),
     ]
 
     with _db_module_patch, _static_patch, _static_call:
@@ -192,10 +180,10 @@ def test_meta_analyse_local_em_stars_consistency_no_log(mock_db):
 
 
 # ═══════════════════════════════════════════════════════════════════════
-# Test 4 — EM Global : sum stars=2027 (1 NULL filtré) → log error EM
+# Test 4 — EM Global : 1 étoile NULL → sum stars=2027 → log error EM
 # ═══════════════════════════════════════════════════════════════════════
 
-@patch("routes.api_analyse_unified.get_persistent_brake_map", new=AsyncMock(return_value={}))
+@patch("services.generate_session.get_brake_maps", new=AsyncMock(return_value={}))
 @patch("routes.api_analyse_unified.get_decay_state", new=AsyncMock(return_value={}))
 @patch("routes.api_analyse_unified.check_and_update_decay", new=AsyncMock(return_value=None))
 @patch("routes.api_analyse_unified.db_cloudsql")
@@ -204,14 +192,10 @@ def test_meta_analyse_local_em_stars_asymetrie_logs_error(mock_db):
     cursor = AsyncMock()
     mock_db.get_connection = _async_cm_conn(cursor)
     cursor.fetchone.side_effect = [
-        {"total": 1014},
-        {"min_date": date(2019, 11, 6), "max_date": date(2026, 4, 27)},
+        {"total": 1014},                                                     # COUNT(*)
     ]
     cursor.fetchall.side_effect = [
-        [{"id": i} for i in range(1, 1015)],
-        [{"num": i, "freq": 100} for i in range(1, 51)],
-        [],
-        _build_em_stars_rows(per_value=169, total_target=2027),  # NULL filtré → -1
+        _build_window_rows(1014, em=True, null_secondary=1),  # 1 NULL → -1
     ]
 
     with _db_module_patch, _static_patch, _static_call:
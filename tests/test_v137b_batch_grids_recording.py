@@ -79,7 +79,7 @@ class TestBatchGridsRecording:
             {"nums": [1, 19, 22, 40, 45], "chance": 4},
             {"nums": [4, 13, 24, 35, 49], "chance": 1},
         ]
-        record_spy = AsyncMock(return_value={"grid_id": "uuid-mock", "inserted": 6, "ignored": 0})
+        record_spy = MagicMock(return_value="uuid-mock")
         with patch(
             "routes.api_analyse_unified.get_engine",
             return_value=_make_mock_engine(grids, secondary_name="chance"),
@@ -87,24 +87,24 @@ class TestBatchGridsRecording:
             "routes.api_analyse_unified.db_cloudsql.get_connection",
             return_value=_make_async_cm(),
         ), patch(
-            "routes.api_analyse_unified.record_canonical_selection",
+            "services.generate_session.enqueue_canonical_selection",
             new=record_spy,
         ), patch(
-            "routes.api_analyse_unified.check_and_update_decay",
+            "services.generate_session.check_and_update_decay",
             new=AsyncMock(),
         ), patch(
-            "routes.api_analyse_unified.get_decay_state",
-            new=AsyncMock(return_value={}),
+            "services.generate_session.get_decay_states",
+            new=AsyncMock(return_value={"ball": {}, "chance": {}, "star": {}}),
         ), patch(
-            "routes.api_analyse_unified.get_persistent_brake_map",
-            new=AsyncMock(return_value={}),
+            "services.generate_session.get_brake_maps",
+            new=AsyncMock(return_value={"ball": {}, "chance": {}, "star": {}}),
         ):
             resp = client.get("/api/loto/generate?n=3&mode=balanced")
         assert resp.status_code == 200
         # V137.B : 3 appels record_canonical_selection (1 par grille du batch)
-        assert record_spy.await_count == 3, (
+        assert record_spy.call_count == 3, (
             f"V137.B : 3 grilles dans le batch → 3 appels attendus, "
-            f"got {record_spy.await_count}"
+            f"got {record_spy.call_count}"
         )
 
     def test_batch_records_all_grids_em(self):
@@ -115,7 +115,7 @@ class TestBatchGridsRecording:
             {"nums": [1, 19, 22, 40, 45], "etoile": [4, 9]},
             {"nums": [4, 13, 24, 35, 49], "etoile": [1, 11]},
         ]
-        record_spy = AsyncMock(return_value={"grid_id": "uuid-mock", "inserted": 6, "ignored": 0})
+        record_spy = MagicMock(return_value="uuid-mock")
         with patch(
             "routes.api_analyse_unified.get_engine",
             return_value=_make_mock_engine(grids, secondary_name="etoile"),
@@ -123,22 +123,22 @@ class TestBatchGridsRecording:
             "routes.api_analyse_unified.db_cloudsql.get_connection",
             return_value=_make_async_cm(),
         ), patch(
-            "routes.api_analyse_unified.record_canonical_selection",
+            "services.generate_session.enqueue_canonical_selection",
             new=record_spy,
         ), patch(
-            "routes.api_analyse_unified.check_and_update_decay",
+            "services.generate_session.check_and_update_decay",
             new=AsyncMock(),
         ), patch(
-            "routes.api_analyse_unified.get_decay_state",
-            new=AsyncMock(return_value={}),
+            "services.generate_session.get_decay_states",
+            new=AsyncMock(return_value={"ball": {}, "chance": {}, "star": {}}),
         ), patch(
-            "routes.api_analyse_unified.get_persistent_brake_map",
-            new=AsyncMock(return_value={}),
+            "services.generate_session.get_brake_maps",
+            new=AsyncMock(return_value={"ball": {}, "chance": {}, "star": {}}),
         ):
             resp = client.get("/api/euromillions/generate?n=3&mode=balanced")
         assert resp.status_code == 200
-        assert record_spy.await_count == 3, (
-            f"V137.B EM : 3 grilles → 3 appels attendus, got {record_spy.await_count}"
+        assert record_spy.call_count == 3, (
+            f"V137.B EM : 3 grilles → 3 appels attendus, got {record_spy.call_count}"
         )
 
     def test_batch_continues_on_partial_failure(self):
@@ -154,13 +154,13 @@ class TestBatchGridsRecording:
         # AsyncMock side_effect : 1ère grille OK, 2ème exception, 3+4+5 OK
         call_count = {"n": 0}
 
-        async def record_with_partial_fail(*args, **kwargs):
+        def record_with_partial_fail(*args, **kwargs):
             call_count["n"] += 1
             if call_count["n"] == 2:
-                raise Exception("simulated DB transient error grid #2")
-            return {"grid_id": f"uuid-{call_count['n']}", "inserted": 6, "ignored": 0}
+                raise Exception("simulated enqueue error grid #2")
+            return f"uuid-{call_count['n']}"
 
-        record_spy = AsyncMock(side_effect=record_with_partial_fail)
+        record_spy = MagicMock(side_effect=record_with_partial_fail)
         with patch(
             "routes.api_analyse_unified.get_engine",
             return_value=_make_mock_engine(grids, secondary_name="chance"),
@@ -168,24 +168,24 @@ class TestBatchGridsRecording:
             "routes.api_analyse_unified.db_cloudsql.get_connection",
             return_value=_make_async_cm(),
         ), patch(
-            "routes.api_analyse_unified.record_canonical_selection",
+            "services.generate_session.enqueue_canonical_selection",
             new=record_spy,
         ), patch(
-            "routes.api_analyse_unified.check_and_update_decay",
+            "services.generate_session.check_and_update_decay",
             new=AsyncMock(),
         ), patch(
-            "routes.api_analyse_unified.get_decay_state",
-            new=AsyncMock(return_value={}),
+            "services.generate_session.get_decay_states",
+            new=AsyncMock(return_value={"ball": {}, "chance": {}, "star": {}}),
         ), patch(
-            "routes.api_analyse_unified.get_persistent_brake_map",
-            new=AsyncMock(return_value={}),
+            "services.generate_session.get_brake_maps",
+            new=AsyncMock(return_value={"ball": {}, "chance": {}, "star": {}}),
         ):
             resp = client.get("/api/loto/generate?n=5&mode=balanced")
         assert resp.status_code == 200
         # V137.B : 5 appels tentés (1 fail, 4 OK), boucle ne s'arrête pas
-        assert record_spy.await_count == 5, (
+        assert record_spy.call_count == 5, (
             f"V137.B graceful : 5 appels attendus malgré 1 fail, "
-            f"got {record_spy.await_count}"
+            f"got {record_spy.call_count}"
         )
 
 
@@ -0,0 +1,134 @@
+"""
+Tests for services/window_stats.py — single-pass frequency + lag for all windows.
+Reference = brute-force per window, and the per-window engine methods.
+"""
+
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from config.engine import LOTO_CONFIG, EM_CONFIG
+from engine.hybride_base import HybrideEngine
+from services.draw_store import DrawSnapshot, get_draw_store
+from services.stats_service import LOTO_CONFIG as LOTO_STATS_CONFIG, LotoStats
+from services.window_stats import WindowStats
+from tests.conftest import AsyncSmartMockCursor, FAKE_TIRAGES, make_async_conn
+from tests.test_hybride_em import FAKE_EM_TIRAGES
+
+_BALLS = ("boule_1", "boule_2", "boule_3", "boule_4", "boule_5")
+
+
+def _brute_force(rows, cutoff, cols, size):
+    window = sorted(
+        (r for r in rows if cutoff is None or r["date_de_tirage"] >= cutoff),
+        key=lambda r: r["date_de_tirage"], reverse=True,
+    )
+    counts = [0] * (size + 1)
+    lags = [len(window)] * (size + 1)
+    for idx, r in enumerate(window):
+        for col in cols:
+            n = r.get(col)
+            if n is None:
+                continue
+            counts[n] += 1
+            lags[n] = min(lags[n], idx)
+    return len(window), counts, lags
+
+
+def _enable(cfg, rows):
+    store = get_draw_store(cfg.game)
+    store.enabled = True
+    store.snapshot = DrawSnapshot.from_rows(cfg, rows)
+    store._checked_at = float("inf")
+    return store.snapshot
+
+
+class TestWindowStats:
+
+    CUTOFFS = [date(2021, 6, 1), date(2023, 1, 1), None, date(2100, 1, 1)]
+
+    @pytest.mark.parametrize("cfg,rows", [(LOTO_CONFIG, FAKE_TIRAGES), (EM_CONFIG, FAKE_EM_TIRAGES)],
+                             ids=["loto", "em"])
+    def test_matches_brute_force(self, cfg, rows):
+        stats = WindowStats.from_rows(cfg, rows, self.CUTOFFS)
+        for i, cutoff in enumerate(self.CUTOFFS):
+            for secondary, cols, size in ((False, _BALLS, cfg.num_max),
+                                          (True, cfg.secondary_columns, cfg.secondary_max)):
+                nb, counts, lags = _brute_force(rows, cutoff, cols, size)
+                assert stats.size(i) == nb
+                assert stats.counts(i, secondary).tolist()[1:] == counts[1:]
+                assert stats.lags(i, secondary).tolist()[1:] == lags[1:]
+
+    def test_select_sql_single_query(self):
+        query, params = WindowStats.select_sql(LOTO_CONFIG, [date(2022, 1, 1), date(2020, 1, 1)])
+        assert "WHERE date_de_tirage >= %s" in query and params == ("2020-01-01",)
+        query, params = WindowStats.select_sql(LOTO_CONFIG, [date(2022, 1, 1), None])
+        assert "WHERE" not in query and params == ()
+
+
+class TestEngineScoring:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("mode", ["conservative", "balanced", "recent"])
+    async def test_equals_per_window_methods(self, mode):
+        """calculer_scores_hybrides == combination of calculer_scores_fenetre per window."""
+        engine = HybrideEngine(LOTO_CONFIG)
+        async with make_async_conn(AsyncSmartMockCursor()) as conn:
+            now = await engine.get_reference_date(conn)
+            cutoffs = engine._window_cutoffs(now, mode)
+            windows = [await engine.calculer_scores_fenetre(conn, c) for c in cutoffs]
+            got = await engine.calculer_scores_hybrides(conn, mode=mode)
+        poids = LOTO_CONFIG.modes[mode]
+        if len(windows) == 3:
+            expected = {n: poids[0] * windows[0][n] + poids[1] * windows[1][n] + poids[2] * windows[2][n]
+                        for n in windows[0]}
+        else:
+            expected = {n: poids[0] * windows[0][n] + poids[1] * windows[1][n] for n in windows[0]}
+        assert got == expected
+
+    @pytest.mark.asyncio
+    async def test_sql_path_one_scan(self):
+        engine = HybrideEngine(LOTO_CONFIG)
+        cursor = AsyncSmartMockCursor()
+        with patch.object(cursor, "execute", wraps=cursor.execute) as execute:
+            async with make_async_conn(cursor) as conn:
+                await engine.calculer_scores_hybrides(conn, mode="balanced")
+        # MAX(date) reference + 1 history scan
+        assert execute.await_count == 2
+
+
+class TestStatsConsumers:
+
+    @pytest.mark.asyncio
+    async def test_base_stats_snapshot_equals_sql(self):
+        svc = LotoStats(LOTO_STATS_CONFIG)
+        cursor = AsyncSmartMockCursor()
+        sql_freq = await svc._get_all_frequencies(cursor, "principal")
+        sql_freq_2022 = await svc._get_all_frequencies(cursor, "principal", date_from=date(2022, 3, 1))
+        sql_ecarts = await svc._get_all_ecarts(cursor, "principal")
+        _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        assert await svc._get_all_frequencies(None, "principal") == sql_freq
+        assert await svc._get_all_frequencies(None, "principal", date_from="2022-03-01") == sql_freq_2022
+        assert await svc._get_all_ecarts(None, "principal") == sql_ecarts
+
+    @pytest.mark.asyncio
+    async def test_base_stats_secondary_snapshot(self):
+        svc = LotoStats(LOTO_STATS_CONFIG)
+        _enable(LOTO_CONFIG, FAKE_TIRAGES)
+        _, counts, lags = _brute_force(FAKE_TIRAGES, None, ("numero_chance",), 10)
+        assert await svc._get_all_frequencies(None, "chance") == {
+            n: c for n, c in enumerate(counts) if c > 0
+        }
+        assert await svc._get_all_ecarts(None, "chance") == {n: lags[n] for n in range(1, 11)}
+
+    @pytest.mark.asyncio
+    async def test_top_flop_snapshot_equals_sql(self):
+        from engine.stats import get_top_flop_numbers
+        with patch("engine.stats.get_connection") as mock_get_conn:
+            mock_get_conn.side_effect = lambda: make_async_conn(AsyncSmartMockCursor())
+            sql = await get_top_flop_numbers(LOTO_CONFIG)
+            _enable(LOTO_CONFIG, FAKE_TIRAGES)
+            snap = await get_top_flop_numbers(LOTO_CONFIG)
+            assert mock_get_conn.call_count == 1
+        assert snap == sql
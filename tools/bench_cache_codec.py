@@ -0,0 +1,115 @@
+"""
+Micro-benchmark des codecs de cache (services.cache_codec) sur des payloads
+réels de BaseStatsService : taille Redis, temps d'encodage (cache_set) et de
+décodage (hit L2) — JSON historique vs marshal, avec / sans zlib.
+
+Les payloads sont produits par les méthodes de BaseStatsService sur le draw
+store (mêmes dicts que ceux mis en cache par le chemin SQL) :
+    - historique réel : --db (Cloud SQL Proxy + .env, comme backtest_hybride)
+    - sinon historique synthétique (--draws tirages aléatoires, seed fixe)
+
+USAGE
+    python tools/bench_cache_codec.py
+    python tools/bench_cache_codec.py --db --game em --repeat 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import sys
+import timeit
+from datetime import date, timedelta
+from pathlib import Path
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(_PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(_PROJECT_ROOT))
+
+from config.engine import LOTO_CONFIG, EM_CONFIG  # noqa: E402
+import services.cache_codec as codec_mod  # noqa: E402
+from services.cache_codec import decode, encode, get_codec  # noqa: E402
+from services.draw_store import DrawSnapshot, get_draw_store, init_draw_stores  # noqa: E402
+
+
+def _synthetic_rows(cfg, n: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    day = date(2008, 1, 1)
+    rows = []
+    for _ in range(n):
+        row = {"date_de_tirage": day}
+        for i, b in enumerate(rng.sample(range(1, cfg.num_max + 1), 5), 1):
+            row[f"boule_{i}"] = b
+        for col, s in zip(cfg.secondary_columns,
+                          rng.sample(range(1, cfg.secondary_max + 1), len(cfg.secondary_columns))):
+            row[col] = s
+        rows.append(row)
+        day += timedelta(days=3)
+    return rows
+
+
+async def _payloads(game: str) -> dict[str, object]:
+    if game == "em":
+        from services.em_stats_service import _svc
+    else:
+        from services.stats_service import _svc
+    top = (await _svc.get_pair_correlations(top_n=1))["pairs"][0]
+    a, b = top["num_a"], top["num_b"]
+    return {
+        "freq (int keys)": await _svc._get_all_frequencies(None),
+        "ecarts (int keys)": await _svc._get_all_ecarts(None),
+        "pairs top 100": await _svc.get_pair_correlations(top_n=100),
+        "triplets top 50": await _svc.get_triplet_correlations(top_n=50),
+        "pair_draws 50": await _svc.get_pair_draws(n1=a, n2=b, limit=50),
+        "pair_draws all": await _svc.get_pair_draws(n1=a, n2=b, limit=10_000),
+    }
+
+
+def _bench(value, codec, compress: bool, repeat: int) -> tuple[int, float, float]:
+    saved = codec_mod._COMPRESS_MIN_BYTES
+    codec_mod._COMPRESS_MIN_BYTES = 0 if compress else sys.maxsize
+    try:
+        data, _ = encode(value, codec)
+        t_enc = min(timeit.repeat(lambda: encode(value, codec), number=repeat, repeat=3)) / repeat
+        t_dec = min(timeit.repeat(lambda: decode(data), number=repeat, repeat=3)) / repeat
+    finally:
+        codec_mod._COMPRESS_MIN_BYTES = saved
+    return len(data), t_enc * 1e6, t_dec * 1e6
+
+
+async def _main(args) -> int:
+    cfg = EM_CONFIG if args.game == "em" else LOTO_CONFIG
+    if args.db:
+        from db_cloudsql import init_pool, close_pool
+        await init_pool()
+        await init_draw_stores()
+        await close_pool()
+    store = get_draw_store(cfg.game)
+    if store.snapshot is None:
+        store.snapshot = DrawSnapshot.from_rows(cfg, _synthetic_rows(cfg, args.draws))
+    store.enabled = True
+    store._checked_at = float("inf")
+    print(f"{cfg.game}: {len(store.snapshot)} draws ({'db' if args.db else 'synthetic'})\n")
+
+    variants = [("json", False), ("marshal", False), ("marshal+zlib", True)]
+    print(f"{'payload':<20}{'codec':<14}{'bytes':>9}{'enc µs':>10}{'dec µs':>10}")
+    for name, value in (await _payloads(cfg.game)).items():
+        for label, compress in variants:
+            size, enc, dec = _bench(value, get_codec(label.split("+")[0]), compress, args.repeat)
+            print(f"{name:<20}{label:<14}{size:>9}{enc:>10.1f}{dec:>10.1f}")
+        print()
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--game", choices=("loto", "em"), default="loto")
+    parser.add_argument("--db", action="store_true", help="load the real history (Cloud SQL)")
+    parser.add_argument("--draws", type=int, default=1000, help="synthetic history size")
+    parser.add_argument("--repeat", type=int, default=200)
+    return asyncio.run(_main(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Micro-benchmark de la détection d'intentions du chatbot (services.intent_router).
+
+Coût par message de route_intents() (vecteur des phases court-circuit I → GEO)
+pour Loto et EuroMillions, détail par détecteur, et listes de mots / regex :
+une re.search par entrée (détecteurs historiques) vs l'alternance compilée.
+
+Corpus : chaînes des tests chatbot (tests/test_chat_*.py, test_insult_*.py…).
+
+USAGE (.env présent avec DB_USER / DB_PASSWORD / DB_NAME — import des pipelines)
+    python tools/bench_intent_router.py
+    python tools/bench_intent_router.py --repeat 20 --lang en
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import re
+import sys
+import time
+from pathlib import Path
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(_PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(_PROJECT_ROOT))
+
+from services.intent_router import route_intents  # noqa: E402
+
+_SIGNALS = ("detect_insulte", "detect_compliment", "detect_site_rating", "detect_salutation",
+            "detect_generation", "detect_foreign_lottery", "detect_grid_evaluation",
+            "detect_argent", "detect_country")
+
+
+def _corpus() -> list[str]:
+    messages = set()
+    for path in sorted((_PROJECT_ROOT / "tests").glob("test_*.py")):
+        if not any(k in path.name for k in ("chat", "insult", "argent", "detect", "generation")):
+            continue
+        for node in ast.walk(ast.parse(path.read_text(encoding="utf-8"))):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str) and 3 < len(node.value) < 300:
+                messages.add(node.value)
+    return sorted(messages)
+
+
+def _per_message_us(fn, corpus: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(3):
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            for message in corpus:
+                fn(message)
+        best = min(best, time.perf_counter() - t0)
+    return best / (repeat * len(corpus)) * 1e6
+
+
+def _call(cfg: dict, name: str, lang: str):
+    fn = cfg.get(name)
+    if fn is None:
+        return None
+    if name == "detect_argent":
+        return lambda m: fn(m, lang)
+    if name == "detect_grid_evaluation":
+        return lambda m: fn(m, game=cfg["eval_game"])
+    return fn
+
+
+def _lists():
+    import services.base_chat_detect_guardrails as guard
+    import services.base_chat_detect_temporal as temporal
+    import services.chat_detectors as loto
+    words = [r"\b" + re.escape(m) + r"\b" for m in loto._ARGENT_MOTS["fr"]]
+    return {
+        "insultes (phrases+mots)": (
+            [*guard._INSULTE_PHRASES, *(r"\b" + re.escape(m) + r"\b" for m in guard._INSULTE_MOTS)],
+            guard._INSULTE_RE),
+        "argent mots (fr)": (words, loto._ARGENT_MOTS_RE["fr"][0]),
+        "filtres temporels": (temporal._TEMPORAL_PATTERNS, temporal._TEMPORAL_RE),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lang", default="fr")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    from services.chat_pipeline import _build_loto_config
+    from services.chat_pipeline_em import _build_em_config
+
+    corpus = _corpus()
+    print(f"corpus: {len(corpus)} messages, lang={args.lang}\n")
+    for game, cfg in (("loto", _build_loto_config()), ("em", _build_em_config())):
+        total = _per_message_us(lambda m, cfg=cfg: route_intents(m, args.lang, cfg), corpus, args.repeat)
+        print(f"{game}: route_intents {total:8.1f} µs / message")
+        for name in _SIGNALS:
+            fn = _call(cfg, name, args.lang)
+            if fn is not None:
+                print(f"    {name:<24}{_per_message_us(fn, corpus, args.repeat):8.1f} µs")
+        print()
+
+    print(f"{'liste':<26}{'1 re.search / entrée':>22}{'alternance':>12}")
+    for name, (patterns, compiled) in _lists().items():
+        lowered = [m.lower() for m in corpus]
+        loop = _per_message_us(lambda m, patterns=patterns: any(re.search(p, m) for p in patterns), lowered, args.repeat)
+        merged = _per_message_us(compiled.search, lowered, args.repeat)
+        print(f"{name:<26}{loop:>19.1f} µs{merged:>9.1f} µs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
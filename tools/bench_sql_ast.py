@@ -0,0 +1,100 @@
+"""
+Micro-benchmark du validateur SQL du chatbot (services.sql_ast, services.draw_sql).
+
+Corpus : exemples SQL des prompts générateurs (prompts/**/prompt_sql_generator*.txt).
+Coût par requête de _validate_sql (regex + AST), de _ensure_limit, du parse seul
+(memo vidé) et de normalize_sql ; puis, sur un draw store synthétique (2 500
+tirages Loto), part des exemples servis sans Cloud SQL et coût de la réponse.
+
+USAGE (.env présent avec DB_USER / DB_PASSWORD / DB_NAME — import base_chat_sql)
+    python tools/bench_sql_ast.py
+    python tools/bench_sql_ast.py --repeat 50 --draws 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(_PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(_PROJECT_ROOT))
+
+from config.engine import LOTO_CONFIG  # noqa: E402
+from services.base_chat_sql import ALLOWED_TABLES_LOTO, _ensure_limit, _validate_sql  # noqa: E402
+from services.draw_sql import answer_from_draw_store  # noqa: E402
+from services.draw_store import DrawSnapshot, get_draw_store  # noqa: E402
+from services.sql_ast import clear_parsed, normalize_sql, parse_sql  # noqa: E402
+
+
+def _corpus() -> list[str]:
+    sqls = set()
+    for path in (_PROJECT_ROOT / "prompts").rglob("prompt_sql_generator*.txt"):
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if line.startswith("SELECT") and " FROM tirages " in line + " ":
+                sqls.add(line.strip())
+    return sorted(sqls)
+
+
+def _per_query_us(fn, corpus: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(3):
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            for sql in corpus:
+                fn(sql)
+        best = min(best, time.perf_counter() - t0)
+    return best / (repeat * len(corpus)) * 1e6
+
+
+def _load_store(n: int) -> None:
+    rng = random.Random(42)
+    start = date.today() - timedelta(days=3 * n)
+    rows = []
+    for i in range(n):
+        balls = sorted(rng.sample(range(1, 50), 5))
+        rows.append({"date_de_tirage": start + timedelta(days=3 * i),
+                     **{f"boule_{j + 1}": b for j, b in enumerate(balls)},
+                     "numero_chance": rng.randint(1, 10)})
+    store = get_draw_store("loto")
+    store.enabled = True
+    store.snapshot = DrawSnapshot.from_rows(LOTO_CONFIG, rows)
+    store._checked_at = float("inf")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--draws", type=int, default=2500)
+    args = parser.parse_args(argv)
+
+    corpus = _corpus()
+    print(f"corpus: {len(corpus)} requêtes Loto\n")
+
+    def _parse_cold(sql):
+        clear_parsed()
+        parse_sql(sql)
+
+    for name, fn in (
+        ("_validate_sql", lambda s: _validate_sql(s, allowed_tables=ALLOWED_TABLES_LOTO)),
+        ("_ensure_limit", _ensure_limit),
+        ("parse_sql (sans memo)", _parse_cold),
+        ("normalize_sql", normalize_sql),
+    ):
+        print(f"{name:<24}{_per_query_us(fn, corpus, args.repeat):10.1f} µs / requête")
+
+    _load_store(args.draws)
+    limited = [_ensure_limit(sql) for sql in corpus]
+    local = [sql for sql in limited if answer_from_draw_store(sql) is not None]
+    print(f"\ndraw store ({args.draws} tirages) : {len(local)}/{len(limited)} requêtes sans Cloud SQL")
+    if local:
+        print(f"{'answer_from_draw_store':<24}{_per_query_us(answer_from_draw_store, local, args.repeat):10.1f} µs / requête")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())